@@ -0,0 +1,69 @@
+"""Load test for the FastAPI /api/analyze endpoint against a stubbed LLM.
+
+Fires a fixed number of requests at the app through an in-process ASGI client
+for several values of MAX_CONCURRENT_ANALYSES and prints the throughput of
+each run. With a non-blocking analysis path the throughput should scale
+roughly linearly with the concurrency limit until the client saturates.
+
+    python benchmarks/async_load.py --requests 64 --latency 0.2
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import sys
+import time
+
+import httpx
+
+from stub_llm import StubChatModel
+
+BACKEND_MAIN = os.path.join(os.path.dirname(__file__), '..', 'resume-analyzer-web', 'backend', 'main.py')
+
+
+def load_backend():
+    """Import the backend app with a dummy key so no real client is ever used"""
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+    spec = importlib.util.spec_from_file_location("backend_main", BACKEND_MAIN)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def run_load(backend, total: int, concurrency: int) -> float:
+    """Send ``total`` requests with ``concurrency`` LLM slots and return requests/sec"""
+    backend.llm_semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int):
+            response = await client.post("/api/analyze", json={"resume_text": f"Resume {i}\nPython developer"})
+            response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+    return total / elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--requests", type=int, default=64)
+    arg_parser.add_argument("--latency", type=float, default=0.2, help="stub LLM latency in seconds")
+    arg_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = arg_parser.parse_args()
+
+    backend = load_backend()
+    backend.engine.use_llm(StubChatModel(latency=args.latency))
+    # Later runs resend the same resumes; they must reach the stub, not the cache
+    backend.engine.cache = None
+
+    print(f"{'concurrency':>12} {'req/s':>10} {'speedup':>8}")
+    baseline = None
+    for concurrency in args.concurrency:
+        throughput = asyncio.run(run_load(backend, args.requests, concurrency))
+        baseline = baseline or throughput
+        print(f"{concurrency:>12} {throughput:>10.1f} {throughput / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""LLM calls saved by coalescing concurrent identical analyses.
+
+Sends a burst of concurrent /api/analyze requests in which every resume is
+submitted several times (a double-clicked submit button, a batch with
+duplicates) to the backend with a stubbed LLM and the analysis cache off,
+then compares the number of requests with the number of LLM calls made.
+
+    python benchmarks/coalescing.py --distinct 20 --copies 4 --latency 0.2
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from async_load import load_backend
+from stub_llm import StubChatModel
+
+
+async def burst(backend, resumes):
+    transport = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(text):
+            response = await client.post("/api/analyze", json={"resume_text": text})
+            response.raise_for_status()
+            return response.json()
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(text) for text in resumes))
+        return results, time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--distinct", type=int, default=20)
+    arg_parser.add_argument("--copies", type=int, default=4, help="submissions of each resume")
+    arg_parser.add_argument("--latency", type=float, default=0.2, help="stub LLM latency in seconds")
+    args = arg_parser.parse_args()
+
+    backend = load_backend()
+    stub = StubChatModel(latency=args.latency)
+    backend.engine.use_llm(stub)
+    # Measure coalescing alone; with the cache on, late duplicates would be cache hits
+    backend.engine.cache = None
+    backend.llm_semaphore = asyncio.Semaphore(args.distinct * args.copies)
+
+    # Copies differ only in whitespace, which compaction normalizes away
+    resumes = [f"Resume {i}\nPython developer{' ' * copy}\n\n" for i in range(args.distinct) for copy in range(args.copies)]
+    random.Random(16).shuffle(resumes)
+    results, elapsed = asyncio.run(burst(backend, resumes))
+
+    print(f"requests            {len(resumes)}")
+    print(f"distinct resumes    {args.distinct}")
+    print(f"LLM calls           {stub.calls}")
+    print(f"calls saved         {backend.engine.inflight.saved}")
+    print(f"elapsed             {elapsed * 1000:.0f} ms")
+    print(f"all answered        {all(results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Cold-start profile of the Lambda handlers, one fresh interpreter per route.
+
+Each route is invoked in a new ``python -X importtime`` process, the way a
+cold Lambda container would serve it. The report shows the wall time of
+import + first invocation, total import time, the number of modules loaded
+and whether any heavy LLM stack was pulled in. Analysis routes use a stub
+LLM so no network access is needed.
+
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --handler serverless --top 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+
+HANDLERS = {
+    "serverless": (os.path.join(ROOT, "serverless-deploy"), "lambda_function"),
+    "root": (ROOT, "lambda_main"),
+}
+
+ROUTES = {
+    "OPTIONS": {"httpMethod": "OPTIONS", "path": "/api/analyze"},
+    "/health": {"httpMethod": "GET", "path": "/health"},
+    "/api/analyze/sample": {"httpMethod": "GET", "path": "/api/analyze/sample"},
+    "/api/analyze": {
+        "httpMethod": "POST",
+        "path": "/api/analyze",
+        "body": json.dumps({"resume_text": "Jane Doe\nPython developer"}),
+    },
+}
+
+HEAVY_PREFIXES = ("langchain", "google", "openai", "anthropic", "pydantic", "boto3", "botocore")
+
+# Runs inside the child interpreter; reports its own timings as JSON on stdout
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+sys.path[:0] = [{handler_dir!r}, {benchmarks!r}]
+import {module} as handler
+imported = time.perf_counter()
+if {stub_llm!r}:
+    from stub_llm import StubChatModel
+    # The schema handlers build through the shared engine, lambda_main through its own factory
+    owner = handler.engine if hasattr(handler, "engine") else handler
+    original_factory = owner.build_analyzer
+    def build_with_stub():
+        resume_analyzer = original_factory()
+        resume_analyzer.llm = StubChatModel()
+        return resume_analyzer
+    if owner is handler:
+        handler.analyzer = handler.LazyAnalyzer(build_with_stub)
+    else:
+        owner.build_analyzer = build_with_stub
+response = handler.lambda_handler({event!r}, None)
+done = time.perf_counter()
+print(json.dumps({{"status": response["statusCode"], "import_ms": (imported - start) * 1000, "total_ms": (done - start) * 1000}}))
+"""
+
+
+def parse_importtime(stderr: str):
+    """Return (self time per module in microseconds) from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if self_us.isdigit():
+            modules[name.strip()] = int(self_us)
+    return modules
+
+
+def profile_route(handler_name: str, route: str):
+    handler_dir, module = HANDLERS[handler_name]
+    event = ROUTES[route]
+    code = CHILD.format(
+        handler_dir=handler_dir,
+        benchmarks=BENCHMARKS,
+        module=module,
+        stub_llm=route == "/api/analyze",
+        event=event,
+    )
+    env = dict(os.environ, ANALYSIS_CACHE_BACKEND="none",
+               GOOGLE_API_KEY="benchmark-placeholder", OPENAI_API_KEY="benchmark-placeholder")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, env=env, cwd=handler_dir)
+    modules = parse_importtime(result.stderr)
+    report = {"modules": modules}
+    try:
+        report.update(json.loads(result.stdout.strip().splitlines()[-1]))
+    except (IndexError, ValueError):
+        report["error"] = (result.stderr.strip().splitlines() or ["no output"])[-1]
+    return report
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--handler", choices=sorted(HANDLERS), nargs="+", default=sorted(HANDLERS))
+    arg_parser.add_argument("--top", type=int, default=0, help="also list the N slowest imports per route")
+    args = arg_parser.parse_args()
+
+    print(f"{'handler':<11} {'route':<22} {'status':>6} {'total ms':>9} {'import ms':>10} {'modules':>8}  heavy stacks")
+    for handler_name in args.handler:
+        for route in ROUTES:
+            report = profile_route(handler_name, route)
+            modules = report["modules"]
+            heavy = sorted({name.split(".")[0] for name in modules if name.startswith(HEAVY_PREFIXES)})
+            if "error" in report:
+                print(f"{handler_name:<11} {route:<22} {'error':>6}  {report['error']}")
+                continue
+            print(f"{handler_name:<11} {route:<22} {report['status']:>6} {report['total_ms']:>9.1f} "
+                  f"{report['import_ms']:>10.1f} {len(modules):>8}  {', '.join(heavy) or '-'}")
+            for name, self_us in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+                print(f"{'':<35}{self_us / 1000:>9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
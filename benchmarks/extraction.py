@@ -0,0 +1,152 @@
+"""Extraction throughput for generated PDF and DOCX resumes.
+
+Builds a corpus of multi-page documents in memory (plain uncompressed PDFs
+and minimal DOCX archives, so no writer libraries are needed), then reports
+documents/s, pages/s and peak traced memory for extract_text with the default
+budgets and with the budgets lifted. A final run feeds a DOCX zip bomb to
+show the decompression cap holds memory down.
+
+    python benchmarks/extraction.py --documents 200 --pages 4
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+import zipfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from resume_analyzer.extraction import ExtractionError, extract_text
+
+LINES = [
+    "Senior Software Engineer, Example Corp, Jan 2019 - Present",
+    "Built Python microservices on AWS handling 2M requests per day",
+    "Led migration to Kubernetes and CI/CD with GitHub Actions",
+    "Mentored five engineers and ran weekly design reviews",
+    "Reduced cloud spend by 30% through right-sizing and caching",
+    "Skills: Python, SQL, Docker, Terraform, React, TypeScript",
+]
+
+_DOCX_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _page_lines(rng: random.Random, count: int):
+    return [rng.choice(LINES) for _ in range(count)]
+
+
+def make_pdf(pages, rng: random.Random) -> bytes:
+    """A minimal PDF with one Helvetica text stream per page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        text = "".join(f"({line}) Tj T* " for line in _page_lines(rng, 40))
+        stream = f"BT /F1 10 Tf 12 TL 50 780 Td {text}ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def make_docx(pages, rng: random.Random) -> bytes:
+    """A minimal DOCX whose pages are separated by explicit page breaks"""
+    paragraphs = []
+    for page in range(pages):
+        lines = _page_lines(rng, 40)
+        if page:
+            lines[0] = None
+        for line in lines:
+            if line is None:
+                paragraphs.append('<w:p><w:r><w:br w:type="page"/><w:t>Experience (continued)</w:t></w:r></w:p>')
+            else:
+                paragraphs.append(f"<w:p><w:r><w:t>{line}</w:t></w:r></w:p>")
+    document = f'<w:document xmlns:w="{_DOCX_NS}"><w:body>{"".join(paragraphs)}</w:body></w:document>'
+    return _docx_archive(document.encode("utf-8"))
+
+
+def make_docx_bomb(megabytes: int) -> bytes:
+    """A tiny archive whose document.xml inflates to ``megabytes`` of one paragraph"""
+    filler = b"<w:t>" + b"A" * (megabytes * 1024 * 1024) + b"</w:t>"
+    document = b'<w:document xmlns:w="%s"><w:body><w:p><w:r>%s</w:r></w:p></w:body></w:document>' % (
+        _DOCX_NS.encode(), filler)
+    return _docx_archive(document)
+
+
+def _docx_archive(document: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", '<?xml version="1.0"?><Types/>')
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def run(label, documents, filename, **budget):
+    start = time.perf_counter()
+    pages = characters = 0
+    for data in documents:
+        extracted = extract_text(io.BytesIO(data), filename, **budget)
+        pages += extracted["pages"]
+        characters += extracted["characters"]
+    elapsed = time.perf_counter() - start
+
+    # tracemalloc slows allocation-heavy code a lot, so memory is measured on a separate pass
+    tracemalloc.start()
+    for data in documents[:5]:
+        extract_text(io.BytesIO(data), filename, **budget)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {len(documents) / elapsed:>8.1f} docs/s {pages / elapsed:>9.1f} pages/s "
+          f"{characters / len(documents):>8.0f} chars/doc  peak {peak / 1024 / 1024:.1f} MiB")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--documents", type=int, default=200)
+    arg_parser.add_argument("--pages", type=int, default=4)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(7)
+    corpora = {
+        "pdf": [make_pdf(args.pages, rng) for _ in range(args.documents)],
+        "docx": [make_docx(args.pages, rng) for _ in range(args.documents)],
+    }
+    for file_format, documents in corpora.items():
+        size = sum(len(data) for data in documents) / len(documents) / 1024
+        print(f"\n{file_format}: {args.documents} documents x {args.pages} pages, {size:.1f} KiB each")
+        try:
+            run(f"{file_format} default budget", documents, f"resume.{file_format}")
+            run(f"{file_format} unbounded", documents, f"resume.{file_format}", max_pages=10 ** 6, max_chars=10 ** 9)
+            run(f"{file_format} first page only", documents, f"resume.{file_format}", max_pages=1)
+        except ExtractionError as e:
+            print(f"skipped: {e}")
+
+    bomb = make_docx_bomb(512)
+    print(f"\nzip bomb: {len(bomb) / 1024:.0f} KiB archive inflating to 512 MiB")
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        extract_text(io.BytesIO(bomb), "bomb.docx")
+        outcome = "extracted (unexpected)"
+    except ExtractionError as e:
+        outcome = f"rejected: {e}"
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{outcome} in {(time.perf_counter() - start) * 1000:.0f} ms, peak {peak / 1024 / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Incremental re-analysis: tokens and latency of re-analyzing an edited resume, against a full analysis.
+
+Analyzes generated resumes (see segmenter.py) in full, edits each one, then
+re-analyzes the edited copy with analyze_incremental() and with a full
+analysis:
+
+- bullet: one experience bullet reworded
+- skills: a skill added to the skills line
+- summary: the summary rewritten
+- rewrite: every bullet reworded, which is over INCREMENTAL_MAX_CHANGED and
+  falls back to a full analysis
+
+The stub model's latency grows with the tokens it reads and writes (a time
+to first token, then --prompt-ms and --completion-ms per token), which is
+roughly how provider latency behaves; the update prompt's saving is mostly
+the full analysis it no longer writes back.
+
+    python benchmarks/incremental.py --resumes 10
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from segmenter import BULLETS, HEADERS, SKILLS, make_resume
+from stub_llm import SAMPLE_RESPONSE, StubChatModel
+from suite import percentile
+
+EDITS = ["bullet", "skills", "summary", "rewrite"]
+UPDATE_RESPONSE = json.dumps({
+    "score_breakdown": {**json.loads(SAMPLE_RESPONSE)["score_breakdown"], "skills_optimization": 5},
+    "resolved_recommendations": [0],
+    "new_recommendations": [{
+        "category": "Skills",
+        "recommendation": "Group the new skills by area",
+        "priority": "Low",
+        "implementation": "Split the skills line into Languages, Cloud and Tools",
+    }],
+    "missing_keywords": ["AWS", "Docker", "CI/CD"],
+    "summary": "Clearer skills; still needs measurable results.",
+})
+
+
+def edit(rng: random.Random, text: str, kind: str) -> str:
+    lines = text.split("\n")
+    bullets = [i for i, line in enumerate(lines) if line.startswith("- ")]
+    if kind == "bullet":
+        i = rng.choice(bullets)
+        lines[i] = "- " + rng.choice(BULLETS).format(n=rng.randint(41, 99))
+    elif kind == "skills":
+        i = next(i for i, line in enumerate(lines) if line in HEADERS["skills"]) + 1
+        lines[i] += ", " + rng.choice([skill for skill in SKILLS if skill not in lines[i]] or ["Go"])
+    elif kind == "summary":
+        lines[5] = f"Results-driven engineer with {rng.randint(16, 30)} years building data platforms at scale."
+    else:
+        for i in bullets:
+            lines[i] = "- " + rng.choice(BULLETS).format(n=rng.randint(41, 99)) + " across regions"
+    return "\n".join(lines)
+
+
+class TokenTimedStub(StubChatModel):
+    """Answers analysis prompts with the sample analysis and update prompts with UPDATE_RESPONSE,
+    taking longer the more tokens it reads and writes"""
+
+    prompt_ms: float = 0.05
+    completion_ms: float = 2.0
+
+    def _answer(self, messages) -> str:
+        return UPDATE_RESPONSE if "Previous analysis:" in messages[-1].content else SAMPLE_RESPONSE
+
+    def _delay(self, messages, response: str) -> float:
+        from resume_analyzer.compaction import estimate_tokens
+        prompt = sum(estimate_tokens(message.content) for message in messages)
+        return self.latency + (prompt * self.prompt_ms + estimate_tokens(response) * self.completion_ms) / 1000
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any):
+        from langchain_core.messages import AIMessage
+        from langchain_core.outputs import ChatGeneration, ChatResult
+        self.calls += 1
+        response = self._answer(messages)
+        time.sleep(self._delay(messages, response))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=response))])
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--resumes", type=int, default=10)
+    arg_parser.add_argument("--latency", type=float, default=0.2, help="seconds to the first token")
+    arg_parser.add_argument("--prompt-ms", type=float, default=0.05, help="ms per prompt token")
+    arg_parser.add_argument("--completion-ms", type=float, default=2.0, help="ms per completion token")
+    args = arg_parser.parse_args()
+
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+    os.environ["ANALYSIS_CACHE_BACKEND"] = "none"
+    from resume_analyzer.engine import AnalysisEngine
+    from resume_analyzer.timing import PhaseTimer
+
+    engine = AnalysisEngine("google:gemini-1.5-flash")
+    engine.use_llm(TokenTimedStub(latency=args.latency, prompt_ms=args.prompt_ms, completion_ms=args.completion_ms))
+    rng = random.Random(25)
+    resumes = []
+    for i in range(args.resumes):
+        text = make_resume(rng, i)
+        resumes.append((text, engine.analyze(text)[0].dict()))
+
+    print(f"{'edit':<8} {'mode':<12} {'sections':<22} {'tokens full':>11} {'sent':>6} {'saved':>6} "
+          f"{'full p50 ms':>11} {'incr p50 ms':>11}")
+    for kind in EDITS:
+        full_seconds, incremental_seconds, reports = [], [], []
+        for text, previous in resumes:
+            edited = edit(rng, text, kind)
+            start = time.perf_counter()
+            engine.analyze(edited, PhaseTimer())
+            full_seconds.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            _, info = engine.analyze_incremental(edited, text, previous, PhaseTimer())
+            incremental_seconds.append(time.perf_counter() - start)
+            reports.append(info["incremental"])
+        full_seconds.sort()
+        incremental_seconds.sort()
+        first = reports[0]
+        if first["mode"] == "incremental":
+            tokens = [sum(report[name] for report in reports) // len(reports)
+                      for name in ("tokens_full", "tokens_sent", "tokens_saved")]
+            sections = ", ".join(first["sections_changed"])
+        else:
+            tokens = ["-"] * 3
+            sections = first["reason"]
+        print(f"{kind:<8} {first['mode']:<12} {sections:<22} {tokens[0]:>11} {tokens[1]:>6} {tokens[2]:>6} "
+              f"{percentile(full_seconds, 0.5):>11.0f} {percentile(incremental_seconds, 0.5):>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""A burst of analyses against the FastAPI backend, synchronous and in job mode.
+
+Both modes allow the same number of LLM calls at once (MAX_CONCURRENT_ANALYSES
+and JOB_WORKERS) against a stub LLM with fixed latency. Synchronously, every
+request holds its connection until its analysis is done, so the last ones in
+the burst wait for all the others. In job mode each request returns 202 as
+soon as the job is stored; the report shows how long connections were held,
+how long the queue took to drain, and the callbacks a local server received.
+
+    python benchmarks/job_queue.py --requests 64 --latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from stub_llm import StubChatModel
+from suite import make_resumes, percentile
+
+
+def callback_server():
+    """A local HTTP server that counts the job results POSTed to it"""
+    received = []
+
+    class Receiver(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            received.append(self.headers["X-Job-Id"])
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Receiver)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received
+
+
+async def burst(backend, resumes, **request):
+    """Send every resume at once; returns each response's latency in seconds and the response"""
+    transport = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(text: str):
+            start = time.perf_counter()
+            response = await client.post("/api/analyze", json={"resume_text": text, **request.get("body", {})},
+                                         headers=request.get("headers", {}))
+            response.raise_for_status()
+            return time.perf_counter() - start, response
+
+        return await asyncio.gather(*(one(text) for text in resumes))
+
+
+def report(name: str, latencies, extra: str = ""):
+    ordered = sorted(latencies)
+    print(f"{name:<6} {percentile(ordered, 0.5):>12.1f} {percentile(ordered, 0.99):>12.1f} {ordered[-1] * 1000:>12.1f}  {extra}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--requests", type=int, default=64)
+    arg_parser.add_argument("--latency", type=float, default=0.2, help="stub LLM latency in seconds")
+    arg_parser.add_argument("--workers", type=int, default=8, help="LLM calls at once, in both modes")
+    args = arg_parser.parse_args()
+
+    os.environ["ANALYSIS_CACHE_BACKEND"] = "none"
+    os.environ["MAX_CONCURRENT_ANALYSES"] = os.environ["JOB_WORKERS"] = str(args.workers)
+    os.environ["JOB_STORE_PATH"] = os.path.join(tempfile.mkdtemp(), "jobs.sqlite3")
+    # The callback receiver is on loopback, which is refused unless allowlisted
+    os.environ["JOB_CALLBACK_HOSTS"] = "127.0.0.1"
+    from async_load import load_backend
+
+    backend = load_backend()
+    stub = StubChatModel(latency=args.latency)
+    backend.engine.use_llm(stub)
+    # As the app's lifespan would on startup
+    backend.job_pool.start()
+    resumes = make_resumes(args.requests)
+    server, received = callback_server()
+    callback_url = f"http://127.0.0.1:{server.server_address[1]}/done"
+
+    print(f"{args.requests} requests, {args.workers} LLM calls at once, {args.latency * 1000:.0f} ms per call\n")
+    print(f"{'mode':<6} {'p50 held ms':>12} {'p99 held ms':>12} {'max held ms':>12}")
+    start = time.perf_counter()
+    sync = asyncio.run(burst(backend, resumes))
+    report("sync", [latency for latency, _ in sync], f"all results after {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Different text, so the jobs cannot share the synchronous calls' results in flight
+    start = time.perf_counter()
+    jobs = asyncio.run(burst(backend, [text + "\nJob mode" for text in resumes],
+                             headers={"Prefer": "respond-async"}, body={"callback_url": callback_url}))
+    assert all(response.status_code == 202 for _, response in jobs)
+    while backend.job_store.counts().get("done", 0) < args.requests or len(received) < args.requests:
+        time.sleep(0.005)
+    drained = (time.perf_counter() - start) * 1000
+    report("jobs", [latency for latency, _ in jobs], f"all results after {drained:.0f} ms")
+
+    counts = backend.job_store.counts()
+    print(f"\njobs: {counts}, callbacks received: {len(received)}, LLM calls: {stub.calls}")
+    backend.job_pool.stop()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
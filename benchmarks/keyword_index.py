@@ -0,0 +1,83 @@
+"""Keyword matching throughput: compiled index vs. per-industry regexes.
+
+Generates synthetic resumes from the keyword vocabulary plus filler text,
+then times opening the memory-mapped index, one scan per resume, and the
+equivalent regex approach (one alternation pattern per industry, run once
+per industry) that the index replaced.
+
+    python benchmarks/keyword_index.py --resumes 10000
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from resume_analyzer import keywords
+
+FILLER = ("led cross-functional team delivered project improved process reduced costs by 20% "
+          "managed stakeholders built designed implemented owned roadmap mentored junior staff").split()
+
+
+def synthetic_resumes(vocabulary: dict, count: int, words: int, seed: int = 7):
+    rng = random.Random(seed)
+    phrases = [phrase for terms in vocabulary["industries"].values()
+               for name, synonyms in terms.items() for phrase in [name, *synonyms]]
+    for _ in range(count):
+        parts = [rng.choice(phrases) if rng.random() < 0.08 else rng.choice(FILLER) for _ in range(words)]
+        yield " ".join(parts)
+
+
+def regex_baseline(vocabulary: dict):
+    patterns = {}
+    for industry, terms in vocabulary["industries"].items():
+        phrases = [phrase.lower() for name, synonyms in terms.items() for phrase in [name, *synonyms]]
+        alternatives = "|".join(re.escape(phrase) for phrase in sorted(phrases, key=len, reverse=True))
+        patterns[industry] = re.compile(rf"(?<![a-z0-9])(?:{alternatives})(?![a-z0-9])")
+    return patterns
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--resumes", type=int, default=10000)
+    arg_parser.add_argument("--words", type=int, default=500)
+    args = arg_parser.parse_args()
+
+    with open(keywords.VOCABULARY_PATH, "r", encoding="utf-8") as file:
+        vocabulary = json.load(file)
+    resumes = list(synthetic_resumes(vocabulary, args.resumes, args.words))
+
+    index_path = os.path.join(tempfile.gettempdir(), "keywords-benchmark.idx")
+    start = time.perf_counter()
+    keywords.build_index(keywords.VOCABULARY_PATH, index_path)
+    build_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    index = keywords._open_index(index_path)
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"index: {os.path.getsize(index_path) / 1024:.1f} KiB, build {build_ms:.2f} ms, open {load_ms:.2f} ms")
+
+    start = time.perf_counter()
+    for text in resumes:
+        counts = index.scan(text)
+        for industry in index.industries:
+            index.match(text, industry, counts)
+    elapsed = time.perf_counter() - start
+    print(f"index scan + match (all industries): {len(resumes) / elapsed:,.0f} resumes/s")
+
+    patterns = regex_baseline(vocabulary)
+    start = time.perf_counter()
+    for text in resumes:
+        lowered = text.lower()
+        for pattern in patterns.values():
+            pattern.findall(lowered)
+    elapsed = time.perf_counter() - start
+    print(f"regex per industry:                  {len(resumes) / elapsed:,.0f} resumes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Job matching: ranking thousands of resumes against a job description, and the LLM calls it saves.
+
+Generates resumes (see segmenter.py) and plants a few strong matches among
+them: resumes whose skills and bullets cover the job description. Times
+rank_resumes end to end and split into its two halves:
+
+- terms: reducing every resume to its counts of the job description's terms
+- scoring: bm25_scores over the sparse matrix and the top-k selection,
+  against the same scores and top-k computed resume by resume in plain Python
+
+then checks every planted resume made the top-k. /api/match sends only the
+analyze_top best resumes to the LLM, instead of every resume.
+
+    python benchmarks/match.py --resumes 5000 --top-k 10
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from resume_analyzer import matching
+
+from segmenter import make_resume
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+
+We are looking for a backend engineer to build data pipelines and APIs.
+Requirements: Python, Django, PostgreSQL, Amazon Web Services, Docker and Kubernetes.
+Experience with Kafka, Airflow and Terraform. CI/CD and automated testing.
+Machine learning experience is a plus."""
+
+PLANTED = """
+Backend Engineer, Data Co, Jan 2019 - Present
+- Built Django APIs and Airflow pipelines on PostgreSQL and Kafka
+- Ran Docker services on Kubernetes in AWS, provisioned with Terraform
+- Owned CI/CD and automated testing for {n} services
+- Shipped machine learning features in Python
+"""
+
+
+def python_bm25(wanted: dict, documents: list) -> list:
+    """The BM25 scores rank_resumes computes, one resume at a time"""
+    n = len(documents)
+    df = {term: 0 for term in wanted}
+    for counts, _ in documents:
+        for term in counts:
+            df[term] += 1
+    idf = {term: math.log1p((n - df[term] + 0.5) / (df[term] + 0.5)) for term in wanted}
+    average = sum(max(length, 1) for _, length in documents) / n
+    k1, b = matching.BM25_K1, matching.BM25_B
+    scores = []
+    for counts, length in documents:
+        norm = k1 * (1 - b + b * max(length, 1) / average)
+        score = 0.0
+        for term, tf in counts.items():
+            query = wanted[term] * (k1 + 1) / (wanted[term] + k1)
+            score += idf[term] * query * tf * (k1 + 1) / (tf + norm)
+        scores.append(score)
+    return scores
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--resumes", type=int, default=5000)
+    arg_parser.add_argument("--top-k", type=int, default=10)
+    arg_parser.add_argument("--planted", type=int, default=5, help="strong matches hidden among the resumes")
+    arg_parser.add_argument("--analyze-top", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(23)
+    resumes = [(str(i), make_resume(rng, i)) for i in range(args.resumes)]
+    planted = set()
+    for i in rng.sample(range(args.resumes), args.planted):
+        text = resumes[i][1]
+        resumes[i] = (str(i), text.replace("\n\n", "\n" + PLANTED.format(n=rng.randint(5, 40)), 1))
+        planted.add(str(i))
+
+    wanted = matching.job_terms(JOB_DESCRIPTION)
+    columns = {term: i for i, term in enumerate(wanted)}
+    terms = list(wanted)
+    print(f"{args.resumes} resumes, {len(wanted)} job terms: {', '.join(terms)}\n")
+
+    np, sparse = matching._require_numpy()
+    start = time.perf_counter()
+    rows = [matching.term_counts(text, columns) for _, text in resumes]
+    terms_ms = (time.perf_counter() - start) * 1000
+
+    indptr, indices, data = [0], [], []
+    for counts, _ in rows:
+        indices.extend(counts)
+        data.extend(counts.values())
+        indptr.append(len(indices))
+    tf = sparse.csr_matrix((np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32),
+                            np.asarray(indptr, dtype=np.int64)), shape=(len(rows), len(terms)))
+    lengths = [length for _, length in rows]
+    query = [wanted[term] for term in terms]
+    start = time.perf_counter()
+    scores = matching.bm25_scores(tf, lengths, query)[0]
+    top = np.argpartition(-scores, args.top_k - 1)[:args.top_k]
+    top = top[np.lexsort((top, -scores[top]))]
+    numpy_ms = (time.perf_counter() - start) * 1000
+
+    documents = [({terms[column]: count for column, count in counts.items()}, length) for counts, length in rows]
+    start = time.perf_counter()
+    loop_scores = python_bm25(wanted, documents)
+    loop_top = sorted(range(len(loop_scores)), key=lambda row: (-loop_scores[row], row))[:args.top_k]
+    loop_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    ranking = matching.rank_resumes(JOB_DESCRIPTION, resumes, args.top_k)
+    total_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{'':<30} {'ms':>8} {'µs/resume':>10}")
+    for name, ms in [("rank_resumes", total_ms), ("terms", terms_ms), ("scoring + top-k (NumPy)", numpy_ms),
+                     ("scoring + top-k (Python loop)", loop_ms)]:
+        print(f"{name:<30} {ms:>8.2f} {ms * 1000 / args.resumes:>10.2f}")
+
+    top_ids = [result["id"] for result in ranking["results"]]
+    same = top_ids == [resumes[row][0] for row in top.tolist()] == [resumes[row][0] for row in loop_top]
+    print(f"\nsame top {args.top_k} from rank_resumes, NumPy and the Python loop: {same}")
+    found = planted & set(top_ids)
+    print(f"planted matches in the top {args.top_k}: {len(found)}/{len(planted)}")
+    for result in ranking["results"][:3]:
+        print(f"  #{result['rank']} resume {result['id']} score {result['score']} coverage {result['coverage']} "
+              f"missing {result['missing_terms'][:5]}")
+
+    print(f"\nLLM calls: {args.analyze_top} for the shortlist instead of {args.resumes} to analyze every resume")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Near-duplicate reuse: precision/recall of the MinHash index and its lookup latency.
+
+Indexes the compacted text of generated resumes (see segmenter.py), then
+queries with edited copies:
+
+- typo: one character changed in one word
+- reorder: the bullets of one role shuffled
+- reword: one bullet replaced by a different one
+- new role: a whole extra role added
+- other resume: a resume that was never indexed
+
+The ground truth is the Jaccard similarity of all of the query's and the
+original's shingles: a query should reuse the original's analysis when it is
+at or above the threshold, and nothing otherwise. Precision counts a reuse as
+correct only when it picked the original; recall shows what the MinHash
+bands let through to the exact comparison. Latency is the fingerprint of the
+query and the index lookup, which together run once per cache miss.
+
+    python benchmarks/near_duplicate.py --resumes 2000 --threshold 0.9
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from resume_analyzer import neardup
+from resume_analyzer.compaction import compact_resume
+from resume_analyzer.prompts import SEO_SECTIONS
+
+from segmenter import BULLETS, MONTHS, ROLES, make_resume
+from suite import percentile
+
+
+def typo(rng: random.Random, text: str) -> str:
+    words = list(re.finditer(r"[A-Za-z]{5,}", text))
+    word = rng.choice(words)
+    i = rng.randrange(word.start() + 1, word.end() - 1)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def reorder(rng: random.Random, text: str) -> str:
+    lines = text.split("\n")
+    runs, start = [], None
+    for i, line in enumerate(lines + [""]):
+        if line.startswith("- ") and start is None:
+            start = i
+        elif not line.startswith("- ") and start is not None:
+            runs.append((start, i))
+            start = None
+    start, end = rng.choice(runs)
+    block = lines[start:end]
+    while len(block) > 1 and block == lines[start:end]:
+        rng.shuffle(block)
+    return "\n".join(lines[:start] + block + lines[end:])
+
+
+def reword(rng: random.Random, text: str) -> str:
+    lines = text.split("\n")
+    i = rng.choice([i for i, line in enumerate(lines) if line.startswith("- ")])
+    lines[i] = "- " + rng.choice(BULLETS).format(n=rng.randint(41, 99)) + " across three regions"
+    return "\n".join(lines)
+
+
+def new_role(rng: random.Random, text: str) -> str:
+    lines = text.split("\n")
+    i = next(i for i, line in enumerate(lines) if line.startswith("- "))
+    role = [f"{rng.choice(ROLES)}, Another Company {rng.randint(100, 999)}, {rng.choice(MONTHS)} 2023 - Present"]
+    role += [f"- {bullet.format(n=rng.randint(100, 500))}" for bullet in rng.sample(BULLETS, 5)]
+    return "\n".join(lines[:i - 1] + role + [""] + lines[i - 1:])
+
+
+def jaccard(a: str, b: str) -> float:
+    first, second = neardup.shingle_hashes(a), neardup.shingle_hashes(b)
+    return len(first & second) / len(first | second)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--resumes", type=int, default=2000, help="resumes in the index")
+    arg_parser.add_argument("--queries", type=int, default=500, help="queries per edit kind")
+    arg_parser.add_argument("--threshold", type=float, default=0.9)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(22)
+    compact = lambda text: compact_resume(text, sections=SEO_SECTIONS)[0]
+    originals = [make_resume(rng, i) for i in range(args.resumes)]
+    index = neardup.NearDuplicateIndex(args.threshold, max_entries=args.resumes)
+    start = time.perf_counter()
+    for i, text in enumerate(originals):
+        index.add(str(i), neardup.fingerprint(compact(text)))
+    add_ms = (time.perf_counter() - start) * 1000
+
+    edits = {"typo": typo, "reorder": reorder, "reword": reword, "new role": new_role,
+             "other resume": lambda rng, text: make_resume(rng, args.resumes + rng.randrange(10 ** 6))}
+    print(f"{args.resumes} resumes indexed in {add_ms:.0f} ms, threshold {args.threshold}\n")
+    print(f"{'edit':<14} {'exact J':>8} {'should':>7} {'reused':>7} {'correct':>8}")
+    totals = {"should": 0, "reused": 0, "correct": 0}
+    fingerprint_seconds, query_seconds = [], []
+    for name, edit in edits.items():
+        should = reused = correct = 0
+        similarities = []
+        for _ in range(args.queries):
+            original = rng.randrange(args.resumes)
+            query = compact(edit(rng, originals[original]))
+            truth = jaccard(query, compact(originals[original]))
+            similarities.append(truth)
+            begin = time.perf_counter()
+            found = neardup.fingerprint(query)
+            middle = time.perf_counter()
+            match = index.query(found)
+            query_seconds.append(time.perf_counter() - middle)
+            fingerprint_seconds.append(middle - begin)
+            expected = truth >= args.threshold
+            should += expected
+            reused += bool(match)
+            correct += bool(match) and expected and match[0] == str(original)
+        totals["should"] += should
+        totals["reused"] += reused
+        totals["correct"] += correct
+        print(f"{name:<14} {sum(similarities) / len(similarities):>8.3f} {should:>7} {reused:>7} {correct:>8}")
+
+    precision = totals["correct"] / totals["reused"] if totals["reused"] else 1.0
+    recall = totals["correct"] / totals["should"] if totals["should"] else 1.0
+    print(f"\nprecision {precision:.3f}  recall {recall:.3f}")
+    fingerprint_seconds.sort()
+    query_seconds.sort()
+    print(f"\n{'':<12} {'p50 µs':>8} {'p99 µs':>8}")
+    for name, seconds in [("fingerprint", fingerprint_seconds), ("query", query_seconds)]:
+        print(f"{name:<12} {percentile(seconds, 0.5) * 1000:>8.1f} {percentile(seconds, 0.99) * 1000:>8.1f}")
+    print(f"\nindex: {index.stats()}")
+
+
+if __name__ == "__main__":
+    main()
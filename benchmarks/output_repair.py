@@ -0,0 +1,122 @@
+"""How many malformed model answers the repairing parser recovers, and at what cost.
+
+Takes the canned full-schema analysis, applies the kinds of damage seen in
+real model output (code fences, surrounding prose, trailing commas, scores as
+strings, Python literals, raw newlines, truncation) at random, and parses
+every sample with LangChain's PydanticOutputParser and with the backend's
+RepairingOutputParser. Per kind it reports the share each parser accepts, the
+share of repaired answers identical to what the model meant, and the parse
+time.
+
+    python benchmarks/output_repair.py --samples 2000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain_core.output_parsers import PydanticOutputParser
+
+from async_load import load_backend
+from resume_analyzer.repair import repair_stats, reset_repair_stats
+from resume_analyzer.schema import ResumeAnalysis
+from stub_llm import SAMPLE_RESPONSE
+
+
+def fence(text, rng):
+    return "```json\n" + json.dumps(json.loads(text), indent=2) + "\n```"
+
+
+def prose(text, rng):
+    return "Here is the analysis you asked for:\n\n" + text + "\n\nLet me know if you need anything else."
+
+
+def trailing_comma(text, rng):
+    return text.replace('"]', '", ]').replace("}]", "},]").replace('"}', '",}', 1)
+
+
+def string_scores(text, rng):
+    data = json.loads(text)
+    data["overall_score"] = f"{data['overall_score']}/10"
+    data["score_breakdown"]["keyword_score"] = str(data["score_breakdown"]["keyword_score"])
+    return json.dumps(data)
+
+
+def python_literals(text, rng):
+    data = json.loads(text)
+    data["missing_keywords"].append(None)
+    return json.dumps(data).replace("null", "None")
+
+
+def raw_newlines(text, rng):
+    data = json.loads(text)
+    data["summary"] = data["summary"].replace(" that ", "\nthat ")
+    intended = json.dumps(data)
+    return intended.replace("\\n", "\n"), intended
+
+
+def truncated(text, rng):
+    # Token limits cut the end of the answer, where the summary is
+    return text[:rng.randint(len(text) - len(json.loads(text)["summary"]) - 10, len(text) - 1)]
+
+
+def not_json(text, rng):
+    return "I'm sorry, I can't analyze this resume."
+
+
+DAMAGE = [fence, prose, trailing_comma, string_scores, python_literals, raw_newlines, truncated, not_json]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--samples", type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    backend = load_backend()
+    strict = PydanticOutputParser(pydantic_object=ResumeAnalysis)
+    repairing = backend.engine.analyzer().parser
+    rng = random.Random(7)
+
+    reset_repair_stats()
+    print(f"{'damage':<16} {'strict':>8} {'repaired':>9} {'identical':>10} {'strict us':>10} {'repair us':>10}")
+    for damage in [None] + DAMAGE:
+        samples = [damage(SAMPLE_RESPONSE, rng) if damage else SAMPLE_RESPONSE
+                   for _ in range(max(1, args.samples // (len(DAMAGE) + 1)))]
+        # Damage may return (damaged text, the JSON the model meant to write)
+        samples = [sample if isinstance(sample, tuple) else (sample, SAMPLE_RESPONSE) for sample in samples]
+        strict_ok = repaired_ok = identical = 0
+        strict_time = repair_time = 0.0
+        for sample, intended in samples:
+            expected = strict.parse(intended)
+            start = time.perf_counter()
+            try:
+                strict.parse(sample)
+                strict_ok += 1
+            except Exception:
+                pass
+            strict_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            try:
+                parsed = repairing.parse(sample)
+                repaired_ok += 1
+                identical += parsed == expected
+            except Exception:
+                pass
+            repair_time += time.perf_counter() - start
+        count = len(samples)
+        print(f"{damage.__name__ if damage else 'none':<16} {strict_ok / count:>8.0%} {repaired_ok / count:>9.0%} "
+              f"{identical / count:>10.0%} {strict_time / count * 1e6:>10.0f} {repair_time / count * 1e6:>10.0f}")
+
+    stats = repair_stats()
+    print(f"\nrepair rate {stats['repair_rate']:.1%} ({stats['repaired']} repaired, {stats['clean']} clean, "
+          f"{stats['failed']} failed of {stats['parsed']})")
+    print("fixes applied:", ", ".join(f"{fix} {count}" for fix, count in sorted(stats["fixes"].items())))
+
+
+if __name__ == "__main__":
+    main()
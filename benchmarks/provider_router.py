@@ -0,0 +1,129 @@
+"""Provider routing and hedging against fake providers with injected latency.
+
+Three stub providers answer with the canned analysis after a delay drawn from
+a log-normal distribution; one also fails a share of its calls and one has a
+heavy tail. The same request stream is sent to each provider alone, to the
+router, and to the router with hedging, and the latency percentiles, error
+rates and calls per provider are compared. A final phase makes the fastest
+provider slow down mid-run to show the router moving traffic away from it.
+
+    python benchmarks/provider_router.py --requests 400 --concurrency 8
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+from typing import Any, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from resume_analyzer.router import ProviderRouter
+from stub_llm import StubChatModel
+
+
+class FakeProvider(StubChatModel):
+    """Stub provider with log-normal latency, an optional slow tail and random failures"""
+
+    median: float = 0.05
+    sigma: float = 0.3
+    tail_rate: float = 0.0
+    tail_factor: float = 8.0
+    failure_rate: float = 0.0
+    seed: int = 0
+    rng: Any = None
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self.rng = random.Random(self.seed)
+
+    def sample(self) -> float:
+        latency = self.median * math.exp(self.rng.gauss(0, self.sigma))
+        if self.rng.random() < self.tail_rate:
+            latency *= self.tail_factor
+        return latency
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        await asyncio.sleep(self.sample())
+        if self.rng.random() < self.failure_rate:
+            raise RuntimeError("503 Service Unavailable")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.response))])
+
+
+def make_providers(scale: float):
+    return {
+        "google:fast-tail": FakeProvider(median=0.04 * scale, tail_rate=0.08, seed=1),
+        "openai:steady": FakeProvider(median=0.07 * scale, sigma=0.15, seed=2),
+        "anthropic:flaky": FakeProvider(median=0.03 * scale, failure_rate=0.4, seed=3),
+    }
+
+
+async def drive(model, requests: int, concurrency: int):
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+    messages = [HumanMessage(content="Analyze this resume")]
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await model.ainvoke(messages)
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return sorted(latencies), errors
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000 if ordered else float("nan")
+
+
+def report(label, latencies, errors, requests):
+    print(f"{label:<24} p50 {percentile(latencies, 0.5):7.1f} ms  p95 {percentile(latencies, 0.95):7.1f} ms  "
+          f"p99 {percentile(latencies, 0.99):7.1f} ms  errors {errors / requests:6.1%}")
+
+
+async def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--requests", type=int, default=400)
+    arg_parser.add_argument("--concurrency", type=int, default=8)
+    arg_parser.add_argument("--scale", type=float, default=1.0, help="multiply every injected latency")
+    args = arg_parser.parse_args()
+
+    for name, provider in make_providers(args.scale).items():
+        latencies, errors = await drive(provider, args.requests, args.concurrency)
+        report(name, latencies, errors, args.requests)
+
+    for hedge in (False, True):
+        router = ProviderRouter(providers=make_providers(args.scale), hedge=hedge)
+        latencies, errors = await drive(router, args.requests, args.concurrency)
+        report("router + hedging" if hedge else "router", latencies, errors, args.requests)
+        for name, stats in router.stats().items():
+            print(f"    {name:<20} calls {stats['calls']:4}  wins {stats['wins']:4}  hedges {stats['hedges']:4}  "
+                  f"p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  errors {stats['error_rate']:.0%}  "
+                  f"{'healthy' if stats['healthy'] else 'UNHEALTHY'}")
+
+    print("\nfastest provider degrades halfway through:")
+    providers = make_providers(args.scale)
+    router = ProviderRouter(providers=providers, hedge=True)
+    await drive(router, args.requests // 2, args.concurrency)
+    before = {name: stats["wins"] for name, stats in router.stats().items()}
+    providers["google:fast-tail"].median *= 6
+    latencies, errors = await drive(router, args.requests // 2, args.concurrency)
+    report("router after slowdown", latencies, errors, args.requests // 2)
+    for name, stats in router.stats().items():
+        print(f"    {name:<20} wins before {before[name]:4}  after {stats['wins'] - before[name]:4}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,150 @@
+"""Overload against a provider with a rate limit, with and without the client-side limiter.
+
+The stub provider allows ``--provider-rpm`` calls per minute (enforced over
+a sliding 10-second window, as real providers smooth their limits) and
+answers the rest with 429 and a Retry-After. Requests arrive at
+``--load`` times that rate through engine.aanalyze, as they would from the
+backend. Each run reports:
+
+- how many analyses succeeded
+- how many were turned away early with 503 (Overloaded)
+- how many failed outright (the provider's 429 surfacing as a 500)
+- how many 429s the provider sent
+- the latency of the successful analyses
+
+Runs:
+
+- "passthrough" calls the provider directly, as before the limiter.
+- "adaptive" has no limit configured and learns one from the 429s.
+- "configured" is told the provider's limit (LLM_RPM).
+
+    python benchmarks/rate_limit.py --provider-rpm 600 --load 2 --seconds 20
+"""
+import argparse
+import asyncio
+import collections
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any, List, Optional
+
+from langchain_core.messages import BaseMessage
+
+from stub_llm import StubChatModel
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+WINDOW = 10.0
+
+
+class ProviderRateLimitError(Exception):
+    """Shaped like the provider SDKs' errors: a status code and an HTTP response with headers"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = SimpleNamespace(status_code=429, headers={"retry-after": f"{retry_after:.2f}"})
+
+
+class QuotaChatModel(StubChatModel):
+    """Stub provider that allows ``rpm`` calls per minute, counted over a sliding window"""
+
+    rpm: float = 600
+    rejected: int = 0
+
+    def _admit(self) -> None:
+        now = time.monotonic()
+        history = self.__dict__.setdefault("_history", collections.deque())
+        while history and history[0] <= now - WINDOW:
+            history.popleft()
+        if len(history) >= self.rpm * WINDOW / 60:
+            self.rejected += 1
+            raise ProviderRateLimitError(history[0] + WINDOW - now)
+        history.append(now)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any):
+        self._admit()
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+
+class Passthrough:
+    """No limiting, no retries: the provider's 429 fails the analysis"""
+
+    async def acall(self, fn, tokens, timer=None, wait=False):
+        return await fn()
+
+
+async def drive(engine, args) -> dict:
+    from resume_analyzer.ratelimit import Overloaded
+
+    outcomes = collections.Counter()
+    latencies = []
+
+    async def one(i: int):
+        start = time.perf_counter()
+        try:
+            await engine.aanalyze(f"Resume {i}\nPython developer with {i} projects")
+        except Overloaded:
+            outcomes["503"] += 1
+            return
+        except Exception:
+            outcomes["500"] += 1
+            return
+        outcomes["ok"] += 1
+        latencies.append(time.perf_counter() - start)
+
+    rate = args.provider_rpm / 60 * args.load
+    total = int(rate * args.seconds)
+    start = time.perf_counter()
+    tasks = []
+    for i in range(total):
+        await asyncio.sleep(max(0.0, start + i / rate - time.perf_counter()))
+        tasks.append(asyncio.ensure_future(one(i)))
+    await asyncio.gather(*tasks)
+    latencies.sort()
+    return {
+        "requests": total,
+        "elapsed": time.perf_counter() - start,
+        "outcomes": outcomes,
+        "p50": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p99": latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--provider-rpm", type=float, default=600)
+    arg_parser.add_argument("--load", type=float, default=2.0, help="offered load as a multiple of the provider limit")
+    arg_parser.add_argument("--seconds", type=float, default=20.0)
+    arg_parser.add_argument("--latency", type=float, default=0.2, help="stub LLM latency in seconds")
+    args = arg_parser.parse_args()
+
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+    os.environ["ANALYSIS_CACHE_BACKEND"] = "none"
+    from resume_analyzer.engine import AnalysisEngine
+    from resume_analyzer.ratelimit import RateLimiter
+
+    runs = {
+        "passthrough": lambda: Passthrough(),
+        "adaptive": lambda: RateLimiter(max_wait=5.0, backoff=0.2, max_backoff=2.0),
+        "configured": lambda: RateLimiter(rpm=args.provider_rpm, max_wait=5.0, backoff=0.2, max_backoff=2.0),
+    }
+    print(f"provider limit {args.provider_rpm:.0f} rpm, offered {args.load:g}x for {args.seconds:g} s, "
+          f"{args.latency * 1000:.0f} ms per call\n")
+    print(f"{'run':<12} {'ok':>5} {'503':>5} {'500':>5} {'429s':>6} {'ok/s':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, limiter in runs.items():
+        provider = QuotaChatModel(rpm=args.provider_rpm, latency=args.latency)
+        engine = AnalysisEngine("google:gemini-1.5-flash")
+        engine.use_llm(provider)
+        engine.rate_limiter = limiter()
+        engine.preload()
+        result = asyncio.run(drive(engine, args))
+        outcomes = result["outcomes"]
+        print(f"{name:<12} {outcomes['ok']:>5} {outcomes['503']:>5} {outcomes['500']:>5} {provider.rejected:>6} "
+              f"{outcomes['ok'] / result['elapsed']:>6.1f} {result['p50']:>8.0f} {result['p99']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Resume store: bulk and incremental indexing, and boolean/ranked query latency at 100k+ resumes.
+
+Fills a fresh SQLite store with generated resumes (see segmenter.py) and
+made-up analyses (industry, score, missing keywords). Every generated resume
+lists 5-10 of the same 14 skills, so queries on them match half the store;
+each resume also gets a few TOOLS drawn with Zipf weights, the long tail
+real resumes have. Then times:
+
+- bulk load: add_many in transactions of --chunk records
+- incremental: add() of one new analysis at a time into the full store,
+  which is what every analysis the backend returns costs
+- queries: each QUERIES entry, sorted by relevance, score and recency. Recency
+  streams matches newest first and stops at the limit; relevance and score
+  sorts visit every match, so they cost more the more resumes match
+
+    python benchmarks/resume_search.py --resumes 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from resume_analyzer.search import SQLiteResumeStore
+
+from segmenter import ROLES, SKILLS, make_resume
+from suite import percentile
+
+INDUSTRIES = ["Technology", "Healthcare", "Finance", "Retail", "Education"]
+TOOLS = ["Jira", "Confluence", "Jenkins", "Terraform", "Snowflake", "dbt", "Airflow", "Kafka", "Spark", "Hadoop",
+         "Redis", "MongoDB", "Elasticsearch", "GraphQL", "TypeScript", "Go", "Rust", "Scala", "Kotlin", "Swift",
+         "Flutter", "Angular", "Vue", "Svelte", "Django", "Flask", "FastAPI", "Rails", "Laravel", "Spring",
+         "PowerBI", "Looker", "SAS", "Stata", "SPSS", "MATLAB", "Simulink", "AutoCAD", "SolidWorks", "Revit",
+         "Epic", "Cerner", "QuickBooks", "NetSuite", "Workday", "SAP", "Oracle", "Zendesk", "HubSpot", "Marketo"]
+TOOL_WEIGHTS = [1 / rank for rank in range(1, len(TOOLS) + 1)]
+
+# (query, filters)
+QUERIES = [
+    ("snowflake AND dbt", {}),
+    ("rust OR scala", {"min_score": 7}),
+    ('solidworks NOT autocad', {}),
+    ("python AND aws", {"min_score": 7}),
+    ("kubernetes OR docker", {}),
+    ('"machine learning" NOT tableau', {"industry": "Technology"}),
+    ("(react OR figma) AND agile", {"min_score": 5, "max_score": 8}),
+    ('"amazon web services"', {}),
+    ("missing:docker", {"min_score": 8}),
+    ("salesforce", {"industry": "Finance", "min_score": 9}),
+    (None, {"industry": "Healthcare", "min_score": 9}),
+]
+
+
+def with_tools(rng: random.Random, text: str) -> str:
+    return text + "\n\nTOOLS\n" + ", ".join(sorted(set(rng.choices(TOOLS, TOOL_WEIGHTS, k=3))))
+
+
+def make_analysis(rng: random.Random, text: str) -> dict:
+    missing = [skill for skill in SKILLS if skill not in text]
+    return {
+        "current_role": rng.choice(ROLES),
+        "target_industry": rng.choice(INDUSTRIES),
+        "missing_keywords": rng.sample(missing, min(len(missing), rng.randint(2, 6))),
+        "seo_recommendations": [],
+        "overall_score": rng.choice([3, 4, 5, 5, 6, 6, 6, 7, 7, 7, 8, 8, 9, 10]),
+        "score_breakdown": {},
+        "summary": "",
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--resumes", type=int, default=100000)
+    arg_parser.add_argument("--chunk", type=int, default=1000, help="records per bulk transaction")
+    arg_parser.add_argument("--incremental", type=int, default=500, help="single adds timed after the load")
+    arg_parser.add_argument("--repeat", type=int, default=20, help="runs of each query")
+    args = arg_parser.parse_args()
+
+    rng = random.Random(24)
+    directory = tempfile.mkdtemp()
+    store = SQLiteResumeStore(os.path.join(directory, "resumes.sqlite3"))
+
+    start = time.perf_counter()
+    for first in range(0, args.resumes, args.chunk):
+        texts = [with_tools(rng, make_resume(rng, i)) for i in range(first, min(first + args.chunk, args.resumes))]
+        store.add_many((text, make_analysis(rng, text), None) for text in texts)
+    load = time.perf_counter() - start
+    size = os.path.getsize(store.path) / 2 ** 20
+    print(f"bulk load: {args.resumes} resumes in {load:.1f} s ({args.resumes / load:.0f}/s, "
+          f"resume generation included), {size:.0f} MB")
+
+    adds = []
+    for i in range(args.incremental):
+        text = with_tools(rng, make_resume(rng, args.resumes + i))
+        analysis = make_analysis(rng, text)
+        begin = time.perf_counter()
+        store.add(text, analysis, f"user{i}@example.com")
+        adds.append(time.perf_counter() - begin)
+    adds.sort()
+    print(f"incremental add into {store.count()} resumes: p50 {percentile(adds, 0.5):.2f} ms, "
+          f"p99 {percentile(adds, 0.99):.2f} ms\n")
+
+    print(f"{'query':<34} {'filters':<34} {'matches':>8} {'sort':<10} {'hits':>5} {'p50 ms':>7} {'p99 ms':>7}")
+    for query, filters in QUERIES:
+        matches = store.count(query, **filters)
+        described = ", ".join(f"{name}={value}" for name, value in filters.items())
+        for sort in ("relevance", "score", "recent") if query else ("score", "recent"):
+            seconds = []
+            for _ in range(args.repeat):
+                begin = time.perf_counter()
+                results = store.search(query, sort=sort, limit=20, **filters)
+                seconds.append(time.perf_counter() - begin)
+            seconds.sort()
+            print(f"{str(query):<34} {described:<34} {matches:>8} {sort:<10} {len(results):>5} "
+                  f"{percentile(seconds, 0.5):>7.2f} {percentile(seconds, 0.99):>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
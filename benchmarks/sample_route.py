@@ -0,0 +1,59 @@
+"""Latency of the sample-analysis route in every handler, and the LLM calls it makes.
+
+The sample is a prebuilt artifact (resume_analyzer/data/sample_analysis.json)
+encoded once per process, so each handler should answer in microseconds
+without touching the model; a revalidation with If-None-Match gets a 304.
+
+    python benchmarks/sample_route.py --requests 20000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from async_load import load_backend
+from stub_llm import StubChatModel
+from suite import LAMBDA_FUNCTION, VERCEL_APP, asgi_status, load_module, use_model
+
+
+def per_request_us(call, requests: int) -> float:
+    call()
+    start = time.perf_counter()
+    for _ in range(requests):
+        call()
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--requests", type=int, default=20000)
+    args = arg_parser.parse_args()
+
+    stub = StubChatModel()
+    loop = asyncio.new_event_loop()
+    with contextlib.redirect_stdout(io.StringIO()):
+        backend = use_model(load_backend(), stub)
+        lambda_function = use_model(load_module("lambda_function", LAMBDA_FUNCTION), stub)
+        vercel = use_model(load_module("vercel_index", VERCEL_APP), stub)
+
+    event = {"httpMethod": "GET", "path": "/api/analyze/sample"}
+    revalidate = {**event, "headers": {"If-None-Match": lambda_function.SAMPLE.etag}}
+    # The FastAPI app is called directly, without a client, to time the app alone
+    handlers = {
+        "fastapi": lambda: loop.run_until_complete(asgi_status(backend.app, "GET", "/api/analyze/sample")),
+        "lambda": lambda: lambda_function.lambda_handler(event, None),
+        "lambda 304": lambda: lambda_function.lambda_handler(revalidate, None),
+        "vercel": lambda: loop.run_until_complete(asgi_status(vercel.app, "GET", "/api/analyze/sample")),
+    }
+    print(f"{'handler':<12} {'us/request':>11}")
+    for name, call in handlers.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            us = per_request_us(call, args.requests)
+        print(f"{name:<12} {us:>11.1f}")
+    print(f"\nLLM calls: {stub.calls}")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
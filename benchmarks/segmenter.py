@@ -0,0 +1,115 @@
+"""Section segmenter throughput, and the tokens section selection keeps out of prompts.
+
+Generates realistic plain-text resumes (summary, dated roles with bullets,
+education, skills, projects, interests, references) and times:
+
+- parse: segmenting each resume from scratch, on one core
+- segment, first sight: hashing, parsing and storing in the cache
+- segment, cached: the repeat lookups compaction and local scoring make
+
+then compacts every resume with and without the SEO prompts' section list.
+
+    python benchmarks/segmenter.py --resumes 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from resume_analyzer import sections
+from resume_analyzer.compaction import compact_resume
+from resume_analyzer.prompts import SEO_SECTIONS
+
+TARGET_PER_SECOND = 5000
+
+ROLES = ["Software Engineer", "Data Analyst", "Product Manager", "Registered Nurse", "Accountant", "UX Designer"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+BULLETS = [
+    "Led a team of {n} engineers delivering a customer-facing analytics platform",
+    "Reduced monthly infrastructure costs by {n}% by consolidating services",
+    "Built data pipelines in Python and SQL processing {n} million rows a day",
+    "Introduced automated testing, cutting release defects by {n}%",
+    "Mentored {n} junior staff and ran weekly design reviews",
+    "Partnered with sales to launch {n} new product integrations",
+]
+SKILLS = ["Python", "SQL", "AWS", "Docker", "Kubernetes", "React", "Tableau", "Excel", "Agile", "Scrum",
+          "Machine Learning", "Figma", "Salesforce", "Git"]
+HEADERS = {
+    "summary": ["SUMMARY", "Professional Summary", "Profile:"],
+    "experience": ["EXPERIENCE", "Work Experience", "## Professional Experience"],
+    "education": ["EDUCATION", "Education:"],
+    "skills": ["SKILLS", "Technical Skills:", "Core Competencies"],
+    "projects": ["PROJECTS", "Key Projects"],
+    "interests": ["INTERESTS", "Hobbies"],
+    "references": ["REFERENCES", "Referees"],
+}
+
+
+def make_resume(rng: random.Random, i: int) -> str:
+    lines = [f"Candidate {i}", rng.choice(ROLES), f"candidate{i}@example.com | (555) 010-{i % 10000:04d}", ""]
+    lines += [rng.choice(HEADERS["summary"]),
+              f"{rng.choice(ROLES)} with {rng.randint(2, 15)} years of experience shipping reliable products.", ""]
+    lines.append(rng.choice(HEADERS["experience"]))
+    for _ in range(rng.randint(2, 4)):
+        start = rng.randint(2008, 2020)
+        lines.append(f"{rng.choice(ROLES)}, Example Corp {rng.randint(1, 99)}, "
+                     f"{rng.choice(MONTHS)} {start} - {rng.choice(MONTHS)} {start + rng.randint(1, 4)}")
+        lines += [f"- {bullet.format(n=rng.randint(2, 40))}" for bullet in rng.sample(BULLETS, rng.randint(3, 6))]
+        lines.append("")
+    lines += [rng.choice(HEADERS["education"]), f"BSc Computer Science, State University, {rng.randint(2000, 2016)}", ""]
+    lines += [rng.choice(HEADERS["skills"]), ", ".join(rng.sample(SKILLS, rng.randint(5, 10))), ""]
+    if rng.random() < 0.6:
+        lines += [rng.choice(HEADERS["projects"])]
+        lines += [f"• Open-source tool number {n} used by {rng.randint(10, 900)} teams" for n in range(rng.randint(1, 3))]
+        lines.append("")
+    if rng.random() < 0.5:
+        lines += [rng.choice(HEADERS["interests"]), "Chess, trail running, volunteering at the local food bank", ""]
+    if rng.random() < 0.5:
+        lines += [rng.choice(HEADERS["references"]), "Jane Roe, Engineering Director, jane.roe@example.com",
+                  "John Poe, CTO, (555) 010-9999"]
+    return "\n".join(lines)
+
+
+def rate(call, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        call(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--resumes", type=int, default=20000)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(21)
+    resumes = [make_resume(rng, i) for i in range(args.resumes)]
+    words = sum(len(text.split()) for text in resumes) / len(resumes)
+    print(f"{args.resumes} resumes, {words:.0f} words on average\n")
+
+    parse_rate = rate(sections.parse, resumes)
+    # The cache holds SECTION_CACHE_SIZE entries; the last ones are still in it for the repeat pass
+    first_rate = rate(sections.segment, resumes)
+    recent = resumes[-sections.CACHE_SIZE:]
+    cached_rate = rate(sections.segment, recent * max(1, len(resumes) // len(recent)))
+    print(f"{'':<24} {'resumes/s':>10} {'µs each':>8}")
+    for name, value in [("parse", parse_rate), ("segment, first sight", first_rate), ("segment, cached", cached_rate)]:
+        print(f"{name:<24} {value:>10.0f} {1e6 / value:>8.1f}")
+    print(f"\ntarget {TARGET_PER_SECOND}/s on one core: {'met' if parse_rate > TARGET_PER_SECOND else 'MISSED'}")
+
+    sample = resumes[:2000]
+    everything = sum(compact_resume(text)[1]["tokens"] for text in sample)
+    selected = sum(compact_resume(text, sections=SEO_SECTIONS)[1]["tokens"] for text in sample)
+    print(f"\nprompt tokens over {len(sample)} resumes: all sections {everything}, SEO sections {selected} "
+          f"({(everything - selected) / everything * 100:.1f}% fewer)")
+    found = sections.segment(resumes[0])
+    print("\nfirst resume: " + ", ".join(f"{section.kind or 'top'} [{section.start}:{section.end}] "
+                                       f"{len(section.bullets)} bullets {len(section.dates)} dates"
+                                       for section in found.sections))
+
+
+if __name__ == "__main__":
+    main()
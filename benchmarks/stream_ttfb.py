@@ -0,0 +1,81 @@
+"""Time to first byte and first score: /api/analyze versus /api/analyze/stream.
+
+The stub LLM takes ``--first-token`` seconds to start and then emits
+``--chunk-size`` characters every ``--token-delay`` seconds, which is roughly
+how Gemini behaves. The blocking endpoint can only answer once the whole JSON
+has been generated; the streaming endpoint should send its first byte at the
+stub's first-token latency and the overall score shortly after.
+
+    python benchmarks/stream_ttfb.py
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from async_load import load_backend
+from stub_llm import StubChatModel
+
+
+async def measure(backend, path: str):
+    """Drive the ASGI app directly; httpx's ASGITransport buffers whole responses"""
+    body = json.dumps({"resume_text": f"Resume {time.time()}"}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"content-type", b"application/json"), (b"host", b"bench")],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    received = []
+    first_byte = first_score = None
+    start = time.perf_counter()
+
+    async def receive():
+        if not received:
+            received.append(True)
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal first_byte, first_score
+        if message["type"] != "http.response.body" or not message.get("body"):
+            return
+        now = time.perf_counter() - start
+        first_byte = first_byte or now
+        if first_score is None and b'"overall_score"' in message["body"]:
+            first_score = now
+
+    await backend.app(scope, receive, send)
+    return first_byte, first_score, time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--first-token", type=float, default=0.5)
+    arg_parser.add_argument("--token-delay", type=float, default=0.02)
+    arg_parser.add_argument("--chunk-size", type=int, default=8)
+    args = arg_parser.parse_args()
+
+    backend = backend_with_stub(args)
+    print(f"{'endpoint':<22} {'first byte':>11} {'first score':>12} {'total':>8}")
+    for path in ("/api/analyze", "/api/analyze/stream"):
+        first_byte, first_score, total = asyncio.run(measure(backend, path))
+        print(f"{path:<22} {first_byte * 1000:>9.0f}ms {first_score * 1000:>10.0f}ms {total * 1000:>6.0f}ms")
+
+
+def backend_with_stub(args):
+    backend = load_backend()
+    from resume_analyzer.schema import STREAM_FIELD_ORDER  # importable once the backend set up sys.path
+    # The blocking path waits for the whole generation, the streaming path only for the first token
+    stub = StubChatModel(latency=args.first_token, token_delay=args.token_delay, chunk_size=args.chunk_size)
+    # Order the stub's keys the way the streaming prompt asks the model to
+    ordered = json.loads(stub.response)
+    stub.response = json.dumps({field: ordered[field] for field in STREAM_FIELD_ORDER})
+    backend.engine.use_llm(stub)
+    # Every request must reach the model for the comparison to be fair
+    backend.engine.cache = None
+    return backend
+
+
+if __name__ == "__main__":
+    main()
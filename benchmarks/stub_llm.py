@@ -0,0 +1,135 @@
+"""Deterministic stand-in for the chat models used by the analyzers.
+
+Benchmarks swap this in for ChatGoogleGenerativeAI/ChatOpenAI so they can
+measure our own overhead without network access or API credits.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field
+
+# Provider answers with their latency and token usage, one JSON object per line;
+# replace them with `python benchmarks/suite.py --record N` (needs an API key)
+RECORDINGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings.jsonl")
+
+# A valid payload for resume_analyzer.schema.ResumeAnalysis
+SAMPLE_RESPONSE = json.dumps({
+    "current_role": "Software Developer",
+    "target_industry": "Technology",
+    "missing_keywords": ["Python", "AWS", "Docker", "CI/CD"],
+    "seo_recommendations": [
+        {
+            "category": "Keywords",
+            "recommendation": "Name the languages and frameworks you used",
+            "priority": "High",
+            "implementation": "Replace 'Programming' with 'JavaScript, React, Node.js'",
+        },
+        {
+            "category": "Format",
+            "recommendation": "Quantify achievements in the experience section",
+            "priority": "Medium",
+            "implementation": "Add metrics such as users served or bugs resolved",
+        },
+    ],
+    "overall_score": 5,
+    "score_breakdown": {
+        "keyword_score": 4,
+        "ats_compatibility": 7,
+        "industry_terms": 4,
+        "skills_optimization": 3,
+        "format_structure": 7,
+        "explanation": "Standard headers but very few searchable terms",
+    },
+    "summary": "Clean layout that needs specific technologies and measurable results.",
+})
+
+class StubChatModel(BaseChatModel):
+    """Chat model that answers every prompt with a canned response after a fixed delay.
+
+    When streamed, ``latency`` is the time to the first token and the rest of
+    the response arrives in ``chunk_size``-character pieces every ``token_delay``.
+    A blocking call waits for the whole generation, first token and all chunks.
+    """
+
+    response: str = SAMPLE_RESPONSE
+    latency: float = 0.0
+    chunk_size: int = 16
+    token_delay: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat-model"
+
+    def generation_time(self) -> float:
+        return self.latency + self.token_delay * ((len(self.response) - 1) // self.chunk_size)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        if self.latency or self.token_delay:
+            time.sleep(self.generation_time())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.response))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        if self.latency or self.token_delay:
+            await asyncio.sleep(self.generation_time())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.response))])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for start in range(0, len(self.response), self.chunk_size):
+            if start and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=self.response[start:start + self.chunk_size]))
+
+
+def load_recordings(path: str = RECORDINGS) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class RecordedChatModel(StubChatModel):
+    """Replays recorded provider answers in turn, with their token usage.
+
+    Each answer waits ``latency`` plus its recorded latency times
+    ``latency_scale``; the default of 0 measures only our own overhead.
+    """
+
+    recordings: List[dict] = Field(default_factory=load_recordings)
+    latency_scale: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "recorded-chat-model"
+
+    def _replay(self):
+        recording = self.recordings[self.calls % len(self.recordings)]
+        self.calls += 1
+        message = AIMessage(content=recording["response"], usage_metadata=recording.get("usage"))
+        return self.latency + self.latency_scale * recording.get("latency", 0.0), message
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        delay, message = self._replay()
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        delay, message = self._replay()
+        if delay:
+            await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
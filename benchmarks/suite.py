@@ -0,0 +1,394 @@
+"""Offline throughput, latency and memory for every entry point, checked against baselines.
+
+RecordedChatModel replays the provider answers in benchmarks/recordings.jsonl
+in place of the LLM, so runs are deterministic and need no network access or
+API key. Each target runs in a fresh interpreter so its peak RSS is its own:
+
+- cli: main.analyze_resume
+- fastapi: POST /api/analyze on the backend through an in-process ASGI client
+- lambda: lambda_handler with synthetic API Gateway proxy events
+- vercel: the Vercel ASGI app (resume-analyzer-web/api/index.py), called in-process
+
+Every request is a different generated resume and the analysis cache is off,
+so each one goes through compaction, the prompt, the stub and output parsing.
+Warm-up requests (client setup) are not timed; cold_start.py covers those.
+
+Each target runs --repeat times and keeps its best req/s, p50 and p99 (the
+least disturbed by other load on the machine) and its largest peak RSS.
+Results are compared with benchmarks/baselines.json when it was recorded with
+the same settings: lower req/s, or higher p99 or peak RSS, by more than
+--tolerance fails the run with exit status 1. Baselines depend on the machine;
+refresh them with --save-baseline after an intended change.
+
+    python benchmarks/suite.py
+    python benchmarks/suite.py --targets fastapi lambda --latency-scale 1 --concurrency 8
+    python benchmarks/suite.py --save-baseline
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from stub_llm import RECORDINGS, RecordedChatModel
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+CLI_MAIN = os.path.join(ROOT, "main.py")
+LAMBDA_FUNCTION = os.path.join(ROOT, "serverless-deploy", "lambda_function.py")
+VERCEL_APP = os.path.join(ROOT, "resume-analyzer-web", "api", "index.py")
+
+ROLES = ["Software Engineer", "Data Scientist", "Product Manager", "DevOps Engineer", "Marketing Analyst"]
+BULLETS = [
+    "Built Python microservices on AWS handling 2M requests per day",
+    "Led migration to Kubernetes and CI/CD with GitHub Actions",
+    "Mentored five engineers and ran weekly design reviews",
+    "Reduced cloud spend by 30% through right-sizing and caching",
+    "Shipped a self-serve onboarding flow that lifted activation 18%",
+    "Designed A/B tests and dashboards used by the growth team",
+    "Trained gradient boosted models predicting churn from usage data",
+    "Automated infrastructure with Terraform across three regions",
+    "Responsible for various tasks related to reporting",
+    "Worked with stakeholders to define quarterly roadmaps",
+]
+SKILLS = ["Python", "SQL", "Docker", "Terraform", "React", "TypeScript", "Kubernetes", "Tableau",
+          "PyTorch", "Jira", "Go", "Airflow", "Snowflake", "Figma"]
+
+# Lower is worse for req/s, higher is worse for the others; small absolute
+# differences are noise even when they are a large share
+CHECKS = (("rps", -1, 0.0), ("p99_ms", 1, 2.0), ("peak_rss_mb", 1, 5.0))
+
+
+def make_resumes(count: int, seed: int = 15):
+    """Distinct plain-text resumes of varying length"""
+    rng = random.Random(seed)
+    resumes = []
+    for i in range(count):
+        lines = [f"Candidate {i}", rng.choice(ROLES), "", "EXPERIENCE"]
+        for _ in range(rng.randint(1, 3)):
+            lines.append(f"{rng.choice(ROLES)}, Example Corp {rng.randint(1, 99)}, {rng.randint(2012, 2024)} - Present")
+            lines.extend(f"- {bullet}" for bullet in rng.sample(BULLETS, rng.randint(3, 6)))
+        lines += ["", "SKILLS", ", ".join(rng.sample(SKILLS, rng.randint(4, 10)))]
+        resumes.append("\n".join(lines))
+    return resumes
+
+
+def load_module(name: str, path: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def use_model(module, model):
+    module.engine.use_llm(model)
+    module.engine.cache = None
+    return module
+
+
+def timed(call, requests, warmup: int):
+    """Call ``call`` on each request in turn; returns (latencies, elapsed, errors)"""
+    for request in requests[:warmup]:
+        call(request)
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for request in requests[warmup:]:
+        request_start = time.perf_counter()
+        ok = call(request)
+        latencies.append(time.perf_counter() - request_start)
+        errors += not ok
+    return latencies, time.perf_counter() - start, errors
+
+
+def bench_cli(model, resumes, args):
+    module = use_model(load_module("cli_main", CLI_MAIN), model)
+    return timed(lambda text: module.analyze_resume(text) is not None, resumes, args.warmup)
+
+
+def bench_fastapi(model, resumes, args):
+    import httpx
+    from async_load import load_backend
+
+    backend = use_model(load_backend(), model)
+    backend.llm_semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def run():
+        transport = httpx.ASGITransport(app=backend.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def one(text):
+                start = time.perf_counter()
+                response = await client.post("/api/analyze", json={"resume_text": text})
+                return time.perf_counter() - start, response.status_code == 200
+
+            for text in resumes[:args.warmup]:
+                await one(text)
+            slots = asyncio.Semaphore(args.concurrency)
+
+            async def limited(text):
+                async with slots:
+                    return await one(text)
+
+            start = time.perf_counter()
+            results = await asyncio.gather(*(limited(text) for text in resumes[args.warmup:]))
+            elapsed = time.perf_counter() - start
+        return [latency for latency, _ in results], elapsed, sum(not ok for _, ok in results)
+
+    return asyncio.run(run())
+
+
+def api_gateway_event(text: str, request_id: str) -> dict:
+    """A REST API (v1) proxy integration event for POST /api/analyze"""
+    return {
+        "resource": "/api/analyze",
+        "path": "/api/analyze",
+        "httpMethod": "POST",
+        "headers": {"Content-Type": "application/json", "Host": "bench.execute-api.us-east-1.amazonaws.com"},
+        "queryStringParameters": None,
+        "pathParameters": None,
+        "requestContext": {"stage": "Prod", "requestId": request_id, "httpMethod": "POST"},
+        "body": json.dumps({"resume_text": text}),
+        "isBase64Encoded": False,
+    }
+
+
+def bench_lambda(model, resumes, args):
+    module = use_model(load_module("lambda_function", LAMBDA_FUNCTION), model)
+    calls = [(api_gateway_event(text, f"bench-{i}"), SimpleNamespace(aws_request_id=f"bench-{i}"))
+             for i, text in enumerate(resumes)]
+    return timed(lambda call: module.lambda_handler(*call)["statusCode"] == 200, calls, args.warmup)
+
+
+class InMemoryConnection:
+    """Just enough of a socket for BaseHTTPRequestHandler: the request in, the response out"""
+
+    def __init__(self, request: bytes):
+        self.request = request
+        self.response = io.BytesIO()
+
+    def makefile(self, mode, *args, **kwargs):
+        return io.BytesIO(self.request)
+
+    def sendall(self, data):
+        self.response.write(data)
+
+
+def http_request(method: str, path: str, body: bytes = b"") -> bytes:
+    head = (f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n")
+    return head.encode() + body
+
+
+def handler_status(handler_class, request: bytes) -> int:
+    """Serve one raw HTTP request with a BaseHTTPRequestHandler class; returns the status"""
+    connection = InMemoryConnection(request)
+    handler_class(connection, ("127.0.0.1", 0), None)
+    return int(connection.response.getvalue().split(b" ", 2)[1])
+
+
+async def asgi_status(app, method: str, path: str, body: bytes = b"") -> int:
+    """Serve one request with an ASGI app, without a server; returns the status"""
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+             "scheme": "https", "path": path, "raw_path": path.encode(), "query_string": b"",
+             "headers": [(b"host", b"bench"), (b"content-type", b"application/json"),
+                         (b"content-length", str(len(body)).encode())]}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+def bench_vercel(model, resumes, args):
+    module = use_model(load_module("vercel_index", VERCEL_APP), model)
+    bodies = [json.dumps({"resume_text": text}).encode() for text in resumes]
+    loop = asyncio.new_event_loop()
+    try:
+        return timed(lambda body: loop.run_until_complete(asgi_status(module.app, "POST", "/api/analyze", body)) == 200,
+                     bodies, args.warmup)
+    finally:
+        loop.close()
+
+
+TARGETS = {"cli": bench_cli, "fastapi": bench_fastapi, "lambda": bench_lambda, "vercel": bench_vercel}
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000 if ordered else None
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_target(target: str, args) -> dict:
+    """Benchmark one target in this process"""
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+    os.environ["ANALYSIS_CACHE_BACKEND"] = "none"
+    model = RecordedChatModel(latency_scale=args.latency_scale)
+    resumes = make_resumes(args.warmup + args.requests)
+    # The handlers print a log line per request
+    with contextlib.redirect_stdout(io.StringIO()):
+        latencies, elapsed, errors = TARGETS[target](model, resumes, args)
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_child(target: str, args) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), "--child", target, "--requests", str(args.requests),
+               "--warmup", str(args.warmup), "--concurrency", str(args.concurrency),
+               "--latency-scale", str(args.latency_scale)]
+    result = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+    try:
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return {"error": (result.stderr.strip().splitlines() or ["no output"])[-1]}
+
+
+def best_of(runs):
+    """Fastest numbers across runs of one target; errors from any run are kept"""
+    ok = [run for run in runs if "error" not in run]
+    if not ok:
+        return runs[0]
+    return {
+        "requests": ok[0]["requests"],
+        "errors": max(run["errors"] for run in ok),
+        "rps": max(run["rps"] for run in ok),
+        "p50_ms": min(run["p50_ms"] for run in ok),
+        "p99_ms": min(run["p99_ms"] for run in ok),
+        "peak_rss_mb": max((run["peak_rss_mb"] for run in ok), default=None),
+    }
+
+
+def settings(args) -> dict:
+    return {"requests": args.requests, "concurrency": args.concurrency, "latency_scale": args.latency_scale}
+
+
+def load_baselines() -> dict:
+    if not os.path.exists(BASELINES):
+        return {}
+    with open(BASELINES, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def regressions(result: dict, baseline: dict, tolerance: float):
+    found = []
+    for key, direction, noise in CHECKS:
+        old, new = baseline.get(key), result.get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if change * direction > tolerance and abs(new - old) > noise:
+            found.append(f"{key} {old} -> {new} ({change:+.0%})")
+    return found
+
+
+def record(count: int):
+    """Replace the recordings with real provider answers (needs an API key)"""
+    from resume_analyzer.compaction import compact_resume
+
+    analyzer = load_module("cli_main", CLI_MAIN).engine.analyzer()
+    with open(RECORDINGS, "w", encoding="utf-8", newline="\n") as f:
+        for text in make_resumes(count):
+            prompt_value = analyzer.prompt.invoke({"resume_text": compact_resume(text)[0]})
+            start = time.perf_counter()
+            message = analyzer.llm.invoke(prompt_value)
+            usage = getattr(message, "usage_metadata", None)
+            f.write(json.dumps({"response": message.content, "latency": round(time.perf_counter() - start, 3),
+                                "usage": dict(usage) if usage else None}) + "\n")
+    print(f"Recorded {count} answers to {RECORDINGS}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--targets", choices=sorted(TARGETS), nargs="+", default=list(TARGETS))
+    arg_parser.add_argument("--requests", type=int, default=200)
+    arg_parser.add_argument("--warmup", type=int, default=5)
+    arg_parser.add_argument("--repeat", type=int, default=3, help="runs per target; the best is reported")
+    arg_parser.add_argument("--concurrency", type=int, default=8, help="in-flight requests for the fastapi target")
+    arg_parser.add_argument("--latency-scale", type=float, default=0.0,
+                            help="replay recorded LLM latency times this (0 measures our own overhead only)")
+    arg_parser.add_argument("--tolerance", type=float, default=0.3, help="allowed regression before failing")
+    arg_parser.add_argument("--save-baseline", action="store_true")
+    arg_parser.add_argument("--record", type=int, metavar="N", help="record N real provider answers and exit")
+    arg_parser.add_argument("--child", choices=sorted(TARGETS), help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_target(args.child, args)))
+        return 0
+    if args.record:
+        record(args.record)
+        return 0
+
+    baselines = load_baselines()
+    comparable = baselines.get("settings") == settings(args)
+    if baselines and not comparable:
+        print(f"Baselines were recorded with {baselines.get('settings')}; not comparing\n")
+
+    results, failures = {}, []
+    print(f"{'target':<8} {'requests':>8} {'errors':>6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'peak RSS MB':>12}  vs baseline")
+    for target in args.targets:
+        result = results[target] = best_of([run_child(target, args) for _ in range(max(1, args.repeat))])
+        if "error" in result:
+            failures.append(f"{target}: {result['error']}")
+            print(f"{target:<8} error: {result['error']}")
+            continue
+        baseline = baselines.get("targets", {}).get(target) if comparable else None
+        found = regressions(result, baseline, args.tolerance) if baseline else []
+        failures.extend(f"{target}: {regression}" for regression in found)
+        if result["errors"]:
+            failures.append(f"{target}: {result['errors']} failed requests")
+        verdict = ("REGRESSED" if found else f"{(result['rps'] - baseline['rps']) / baseline['rps']:+.0%} req/s") \
+            if baseline else "-"
+        print(f"{target:<8} {result['requests']:>8} {result['errors']:>6} {result['rps']:>9.1f} "
+              f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['peak_rss_mb'] or 0:>12.1f}  {verdict}")
+
+    if args.save_baseline:
+        saved = baselines.get("targets", {}) if comparable else {}
+        saved.update({target: result for target, result in results.items() if "error" not in result})
+        with open(BASELINES, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings(args), "python": sys.version.split()[0], "targets": saved}, f, indent=2)
+            f.write("\n")
+        print(f"\nSaved baselines to {BASELINES}")
+    elif failures:
+        print("\nRegressions:\n  " + "\n  ".join(failures))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""The Vercel ASGI app against the BaseHTTPRequestHandler handlers it replaced.
+
+The previous handlers are kept in benchmarks/vercel_legacy for this
+comparison. Both run with the recorded-response LLM stub and the analysis
+cache off.
+
+By default each request is served in-process (an in-memory connection for
+the old handlers, a direct ASGI call for the app), which isolates routing,
+header and JSON overhead. With --server both run behind real servers on
+localhost - http.server for the old handlers, which closes the connection
+after every response, and uvicorn for the app - and one client sends every
+request, so the app's responses can reuse a kept-alive connection.
+
+    python benchmarks/vercel_asgi.py --requests 2000
+    python benchmarks/vercel_asgi.py --server --requests 500
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+from stub_llm import RecordedChatModel
+from suite import VERCEL_APP, asgi_status, handler_status, http_request, load_module, make_resumes, use_model
+
+LEGACY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vercel_legacy")
+
+# route: (method, path, legacy handler file)
+ROUTES = {
+    "OPTIONS": ("OPTIONS", "/api/analyze", "analyze.py"),
+    "health": ("GET", "/api/health", "health.py"),
+    "sample": ("GET", "/api/analyze/sample", "sample.py"),
+    "analyze": ("POST", "/api/analyze", "analyze.py"),
+}
+
+
+def load_legacy(model):
+    """The old handler class per file, with the stub LLM and request logging off"""
+    classes = {}
+    for filename in {filename for _, _, filename in ROUTES.values()}:
+        module = load_module(f"legacy_{filename[:-3]}", os.path.join(LEGACY, filename))
+        if hasattr(module, "engine"):
+            use_model(module, model)
+
+        class Quiet(module.handler):
+            def log_message(self, format, *args):
+                pass
+
+        classes[filename] = Quiet
+    return classes
+
+
+def bodies(route: str, count: int):
+    if route != "analyze":
+        return [b""] * count
+    return [json.dumps({"resume_text": text}).encode() for text in make_resumes(count)]
+
+
+def rate(call, requests):
+    start = time.perf_counter()
+    for request in requests:
+        assert call(request) < 300
+    return len(requests) / (time.perf_counter() - start)
+
+
+def in_process(args, legacy, app, report):
+    loop = asyncio.new_event_loop()
+    print(f"{'route':<10} {'handlers req/s':>15} {'ASGI req/s':>11} {'speedup':>8}", file=report)
+    for route, (method, path, filename) in ROUTES.items():
+        payloads = bodies(route, args.requests)
+        old = rate(lambda body: handler_status(legacy[filename], http_request(method, path, body)), payloads)
+        new = rate(lambda body: loop.run_until_complete(asgi_status(app, method, path, body)), payloads)
+        print(f"{route:<10} {old:>15.0f} {new:>11.0f} {new / old:>7.1f}x", file=report)
+    loop.close()
+
+
+def over_http(args, legacy, app, report):
+    import httpx
+    import uvicorn
+
+    # Client ports seen by each server: one per TCP connection
+    clients = {"handlers": set(), "asgi": set()}
+    servers = {}
+    for filename, handler_class in legacy.items():
+        class Counted(handler_class):
+            def handle(self):
+                clients["handlers"].add(self.client_address[1])
+                super().handle()
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Counted)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers[filename] = server
+
+    async def counted_app(scope, receive, send):
+        if scope["type"] == "http":
+            clients["asgi"].add(scope["client"][1])
+        await app(scope, receive, send)
+
+    config = uvicorn.Config(counted_app, host="127.0.0.1", port=0, log_level="error", lifespan="off")
+    asgi_server = uvicorn.Server(config)
+    threading.Thread(target=asgi_server.run, daemon=True).start()
+    while not asgi_server.started:
+        time.sleep(0.01)
+    asgi_port = asgi_server.servers[0].sockets[0].getsockname()[1]
+
+    print(f"{'route':<10} {'handlers req/s':>15} {'ASGI req/s':>11} {'speedup':>8}  connections (handlers / ASGI)",
+          file=report)
+    with httpx.Client() as client:
+        for route, (method, path, filename) in ROUTES.items():
+            payloads = bodies(route, args.requests)
+            results = []
+            for server, port in (("handlers", servers[filename].server_address[1]), ("asgi", asgi_port)):
+                url = f"http://127.0.0.1:{port}{path}"
+                clients[server].clear()
+
+                def call(body):
+                    response = client.request(method, url, content=body, headers={"Content-Type": "application/json"})
+                    return response.status_code
+
+                results.append((rate(call, payloads), len(clients[server])))
+            (old, old_connections), (new, new_connections) = results
+            print(f"{route:<10} {old:>15.0f} {new:>11.0f} {new / old:>7.1f}x  {old_connections} / {new_connections}",
+                  file=report)
+    asgi_server.should_exit = True
+    for server in servers.values():
+        server.shutdown()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--requests", type=int, default=2000)
+    arg_parser.add_argument("--server", action="store_true", help="serve over localhost HTTP instead of in-process")
+    args = arg_parser.parse_args()
+
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+    os.environ["ANALYSIS_CACHE_BACKEND"] = "none"
+    model = RecordedChatModel()
+    report = sys.stdout
+    # Both analyze handlers write a JSON log line per request
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy = load_legacy(model)
+        app = use_model(load_module("vercel_index", VERCEL_APP), model).app
+        (over_http if args.server else in_process)(args, legacy, app, report)
+
+
+if __name__ == "__main__":
+    main()
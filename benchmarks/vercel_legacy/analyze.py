@@ -1,32 +1,27 @@
 from http.server import BaseHTTPRequestHandler
 import json
 import os
-from typing import Optional
-from pydantic import BaseModel
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
+import sys
+import time
 
-# Pydantic models
-class SEORecommendation(BaseModel):
-    category: str
-    recommendation: str
-    priority: str
-    implementation: str
+# The shared resume_analyzer package sits at the repository root locally and is
+# copied into the project root by deploy-vercel.ps1
+for _root in ('..', os.path.join('..', '..')):
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), _root))
+from resume_analyzer.engine import AnalysisEngine
+from resume_analyzer.metrics import log_event
+from resume_analyzer.timing import PhaseTimer
 
-class ScoreBreakdown(BaseModel):
-    keyword_score: int
-    ats_compatibility: int
-    content_quality: int
-    format_score: int
+MODEL_NAME = "gemini-1.5-flash"
+TEMPERATURE = 0.7
+# A prompt registered in resume_analyzer/prompts.py; part of the analysis cache key
+PROMPT_VERSION = "seo-brief-v1"
+# Comma-separated provider:model pairs; with several, each request goes to the fastest healthy one
+LLM_PROVIDERS = os.getenv("LLM_PROVIDERS", f"google:{MODEL_NAME}")
 
-class ResumeAnalysis(BaseModel):
-    target_industry: str
-    missing_keywords: list[str]
-    seo_recommendations: list[SEORecommendation]
-    overall_score: int
-    score_breakdown: ScoreBreakdown
-    summary: str
+# BaseHTTPRequestHandler is instantiated per request, so the engine (client,
+# prompts and cached analyses) lives at module scope and survives warm invocations
+engine = AnalysisEngine(LLM_PROVIDERS, TEMPERATURE, PROMPT_VERSION)
 
 class handler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
@@ -49,14 +44,28 @@ class handler(BaseHTTPRequestHandler):
             self.end_headers()
 
     def do_POST(self):
+        """Handle a POST and write one JSON log line with its status, duration, phases and tokens"""
+        start = time.perf_counter()
+        self.timer = PhaseTimer()
+        self.log_fields = {}
         try:
-            content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
+            self.route_post()
+        finally:
+            log_event('request', method='POST', path=self.path, status=getattr(self, 'status_code', 500),
+                      duration_ms=round((time.perf_counter() - start) * 1000, 3), phases=self.timer.as_dict(),
+                      **self.log_fields)
+
+    def route_post(self):
+        try:
+            with self.timer.phase('input_parse'):
+                content_length = int(self.headers.get('Content-Length', 0))
+                post_data = self.rfile.read(content_length)
             
             if self.path == '/api/analyze/sample':
                 response_data = self.handle_sample_analysis()
             elif self.path == '/api/analyze':
-                body = json.loads(post_data.decode('utf-8'))
+                with self.timer.phase('input_parse'):
+                    body = json.loads(post_data.decode('utf-8'))
                 resume_text = body.get('resume_text', '')
                 
                 if not resume_text:
@@ -71,57 +80,28 @@ class handler(BaseHTTPRequestHandler):
             self.send_json_response(response_data)
             
         except Exception as e:
+            self.log_fields['error'] = str(e)
             self.send_error_response(f'Internal server error: {str(e)}', 500)
 
     def handle_resume_analysis(self, resume_text: str):
-        """Analyze the provided resume text using Google Gemini"""
+        """Analyze the provided resume text with the shared engine"""
+        timer = self.timer
         try:
-            # Initialize the Gemini LLM
-            gemini_api_key = os.environ.get('GOOGLE_API_KEY')
-            if not gemini_api_key:
-                raise Exception('Google API key not configured')
-            
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-1.5-flash",
-                temperature=0.7,
-                google_api_key=gemini_api_key
-            )
-            
-            # Set up the parser
-            parser = PydanticOutputParser(pydantic_object=ResumeAnalysis)
-            
-            # Create the analysis prompt
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", """
-You are an expert resume SEO analyst. Analyze the provided resume and provide specific search engine optimization recommendations.
-
-Focus on:
-1. ATS (Applicant Tracking System) optimization
-2. Industry-specific keywords
-3. Skills and technologies that should be highlighted
-4. Format and structure improvements
-5. Content enhancement suggestions
-
-{format_instructions}
-"""),
-                ("human", "Analyze this resume:\n\n{resume_text}")
-            ])
-            
-            # Format the prompt with instructions
-            formatted_prompt = prompt.format_messages(
-                format_instructions=parser.get_format_instructions(),
-                resume_text=resume_text
-            )
-            
-            # Run the analysis
-            response = llm.invoke(formatted_prompt)
-            analysis_result = parser.parse(response.content)
+            # Only the first analysis on a function instance pays for building the client
+            analysis_result, info = engine.analyze(resume_text, timer)
+            self.log_fields.update(source=info['source'], tokens=timer.counts,
+                                   tokens_saved=info['compaction']['tokens_saved'])
+            if info['source'] == 'llm':
+                from resume_analyzer.repair import repair_stats
+                self.log_fields['output_parsing'] = repair_stats()
             
             return {
                 'analysis': analysis_result.dict(),
                 'resume_length': len(resume_text),
                 'word_count': len(resume_text.split()),
-                'timestamp': 'vercel'
+                'timestamp': 'cache' if info['cached'] else 'vercel',
+                'compaction': info['compaction'],
+                'timings_ms': timer.as_dict()
             }
             
         except Exception as e:
@@ -168,17 +148,19 @@ Focus on:
         }
 
     def send_json_response(self, data, status_code=200):
+        with self.timer.phase('serialize'):
+            response = json.dumps(data).encode()
+        self.status_code = status_code
         self.send_response(status_code)
         self.send_header('Content-type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
-        
-        response = json.dumps(data)
-        self.wfile.write(response.encode())
+        self.wfile.write(response)
 
     def send_error_response(self, message, status_code=400):
+        self.status_code = status_code
         self.send_response(status_code)
         self.send_header('Content-type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
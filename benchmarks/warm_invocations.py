@@ -0,0 +1,53 @@
+"""Per-phase timings for consecutive Lambda invocations with a stubbed LLM.
+
+The first invocation builds the Gemini client, parser and prompt; every later
+one should report a near-zero ``setup`` phase because the analyzer is reused.
+
+    python benchmarks/warm_invocations.py --invocations 5
+"""
+import argparse
+import importlib.util
+import json
+import os
+
+from stub_llm import StubChatModel
+
+LAMBDA_FUNCTION = os.path.join(os.path.dirname(__file__), '..', 'serverless-deploy', 'lambda_function.py')
+
+
+def load_handler():
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+    # Every invocation must reach the LLM for the timings to mean anything
+    os.environ["ANALYSIS_CACHE_BACKEND"] = "none"
+    spec = importlib.util.spec_from_file_location("lambda_function", LAMBDA_FUNCTION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--invocations", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    module = load_handler()
+    original_factory = module.engine.build_analyzer
+
+    def build_with_stub():
+        # Build the real client so the setup cost is measured, then stub the network call
+        resume_analyzer = original_factory()
+        resume_analyzer.llm = StubChatModel()
+        return resume_analyzer
+
+    module.engine.build_analyzer = build_with_stub
+    event = {"httpMethod": "POST", "path": "/api/analyze", "body": json.dumps({"resume_text": "Jane Doe\nPython developer"})}
+
+    for i in range(args.invocations):
+        response = module.lambda_handler(event, None)
+        timings = json.loads(response["body"])["timings_ms"]
+        phases = "  ".join(f"{name}={ms:.2f}" for name, ms in timings.items())
+        print(f"invocation {i + 1} ({'cold' if i == 0 else 'warm'}): {phases}")
+
+
+if __name__ == "__main__":
+    main()
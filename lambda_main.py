@@ -1,173 +1,338 @@
 import json
 import os
+import time
 from typing import Optional
-from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain.schema import StrOutputParser
+from resume_analyzer.analyzer import Analyzer, LazyAnalyzer
+from resume_analyzer.cache import cache_from_env, cache_key
+from resume_analyzer.compaction import compact_resume, estimate_tokens
+from resume_analyzer.jobs import (DONE, FAILED, FINISH_MARGIN, fail_abandoned, job_view, jobs_from_env, new_job,
+                                  run_claimed, validate_callback_url)
+from resume_analyzer.metrics import log_event
+from resume_analyzer.prompts import SEO_SECTIONS
+from resume_analyzer.providers import configured_providers, llm_from_env
+from resume_analyzer.ratelimit import Overloaded, limiter_from_env
+from resume_analyzer.sample import encode_static, etag_matches
+from resume_analyzer.timing import PhaseTimer
+
+# LangChain and the provider SDKs are imported inside build_analyzer only, so CORS
+# preflight, /health and the sample route stay fast on cold start
+
+MODEL_NAME = "gpt-3.5-turbo"
+TEMPERATURE = 0.3
+# Bump whenever the prompt changes so cached analyses are not reused
+PROMPT_VERSION = "report-v1"
+# Comma-separated provider:model pairs; with several, each request goes to the fastest healthy one
+LLM_PROVIDERS = os.getenv("LLM_PROVIDERS", f"openai:{MODEL_NAME}")
+
+# Module scope so cached analyses survive across warm invocations
+analysis_cache = cache_from_env()
+# Paces LLM calls in this container and backs off on the provider's 429s
+rate_limiter = limiter_from_env()
+
+# Job mode: records in the JOB_TABLE DynamoDB table, analyses run by JobWorkerFunction
+job_store = jobs_from_env()
+JOB_WORKER_FUNCTION = os.getenv('JOB_WORKER_FUNCTION')
+
+# The sample report, encoded once per container and served with an ETag
+SAMPLE = encode_static({
+    'analysis': '''
+    **SEO Keywords Analysis** (Score: 6/10)
+    • Missing keywords: "data analysis", "machine learning", "Python programming"
+    • Current keyword density is moderate
+    • Recommend adding more technical skills
+
+    **ATS Optimization** (Score: 7/10)
+    • Good use of standard section headers
+    • Consider adding a "Technical Skills" section
+    • Use bullet points consistently
+
+    **Content Recommendations**
+    • Add quantified achievements (e.g., "increased efficiency by 25%")
+    • Include more action verbs
+    • Expand on project outcomes
+
+    **Technical Improvements**
+    • Use PDF format for better ATS compatibility
+    • Ensure consistent formatting
+    • Keep resume to 1-2 pages
+
+    **Industry-Specific Suggestions**
+    • Add certifications if available
+    • Include relevant software proficiencies
+    • Mention collaborative project experience
+    ''',
+    'resume_length': 850,
+    'word_count': 127,
+    'timestamp': 'sample'
+})
+SAMPLE_BODY = SAMPLE.body.decode()
 
 def lambda_handler(event, context):
     """
-    AWS Lambda handler for resume analysis
+    AWS Lambda handler for resume analysis. Writes one JSON log line per
+    request with its status, duration, phase timings and token counts
     """
+    start = time.perf_counter()
+    path = event.get('path', '').replace('/prod', '')  # Remove stage prefix
+    method = event.get('httpMethod', 'GET')
+    timer = PhaseTimer()
+    fields = {}
+    response = route_request(event, method, path, timer, fields)
+    log_event('request', method=method, path=path, status=response['statusCode'],
+              duration_ms=round((time.perf_counter() - start) * 1000, 3), phases=timer.as_dict(),
+              request_id=getattr(context, 'aws_request_id', None), **fields)
+    return response
+
+def route_request(event, method: str, path: str, timer: PhaseTimer, fields: dict):
+    """Dispatch one API Gateway event; details for the request log go in ``fields``"""
     try:
         # Handle CORS preflight requests
-        if event.get('httpMethod') == 'OPTIONS':
+        if method == 'OPTIONS':
             return {
                 'statusCode': 200,
                 'headers': {
                     'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type',
-                    'Access-Control-Allow-Methods': 'POST, OPTIONS'
+                    'Access-Control-Allow-Headers': 'Content-Type, Prefer',
+                    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS'
                 },
                 'body': ''
             }
         
-        # Parse the request body
-        if event.get('body'):
-            body = json.loads(event['body'])
-        else:
-            body = event
+        if path == '/api/extract':
+            # A multipart upload, not JSON
+            return handle_extraction(event, timer, fields)
         
-        # Handle different endpoints
-        path = event.get('path', '').replace('/prod', '')  # Remove stage prefix
+        # Parse the request body
+        with timer.phase('input_parse'):
+            if event.get('body'):
+                body = json.loads(event['body'])
+            else:
+                body = event
         
         if path == '/health':
             return create_response({'status': 'healthy', 'service': 'Resume SEO Analyzer'})
         
         elif path == '/api/analyze/sample':
-            return handle_sample_analysis()
+            return handle_sample_analysis(event)
+        
+        elif path.startswith('/api/jobs/') and method == 'GET':
+            return handle_job_status(path[len('/api/jobs/'):])
         
         elif path == '/api/analyze':
             resume_text = body.get('resume_text', '')
             if not resume_text:
                 return create_error_response('Resume text is required', 400)
             
-            return handle_resume_analysis(resume_text)
+            callback_url = body.get('callback_url')
+            if callback_url or 'respond-async' in (request_header(event, 'Prefer') or ''):
+                return handle_job_submission(resume_text, callback_url, fields)
+            
+            return handle_resume_analysis(resume_text, timer, fields)
         
         else:
             return create_error_response('Endpoint not found', 404)
             
     except Exception as e:
-        print(f"Error: {str(e)}")
+        fields['error'] = str(e)
         return create_error_response(f'Internal server error: {str(e)}', 500)
 
-def handle_resume_analysis(resume_text: str):
+def build_analyzer() -> Analyzer:
+    """Create the LLM client(s) and prompt once per container"""
+    from langchain.prompts import PromptTemplate
+    from langchain.schema import StrOutputParser
+    
+    llm = llm_from_env(LLM_PROVIDERS, TEMPERATURE)
+    
+    # Create the analysis prompt
+    prompt = PromptTemplate(
+        input_variables=["resume_text"],
+        template="""
+        You are an expert resume optimizer and SEO specialist. Analyze the following resume and provide detailed recommendations for search engine optimization and ATS (Applicant Tracking System) compatibility.
+
+        Resume Text:
+        {resume_text}
+
+        Please provide a comprehensive analysis with the following sections:
+
+        1. **SEO Keywords Analysis**:
+           - List missing industry-relevant keywords
+           - Suggest specific keywords to add based on the role/industry
+           - Rate current keyword density (1-10)
+
+        2. **ATS Optimization**:
+           - Identify potential ATS scanning issues
+           - Suggest formatting improvements
+           - Recommend section restructuring if needed
+
+        3. **Content Recommendations**:
+           - Missing critical sections
+           - Weak areas that need strengthening
+           - Specific achievements to highlight better
+
+        4. **Technical Improvements**:
+           - File format recommendations
+           - Formatting suggestions
+           - Length and structure optimization
+
+        5. **Industry-Specific Suggestions**:
+           - Role-specific keywords to include
+           - Industry trends to incorporate
+           - Professional buzzwords that add value
+
+        Please format your response as structured JSON with clear sections and actionable recommendations.
+        """
+    )
+    
+    return Analyzer(llm, prompt, StrOutputParser())
+
+analyzer = LazyAnalyzer(build_analyzer)
+
+def analyze_resume(resume_text: str, timer: PhaseTimer, wait: bool = False):
+    """The report for a resume from the cache or the LLM; returns (report, compaction, source).
+
+    Raises Overloaded when the LLM has no capacity soon, unless ``wait``
+    """
+    with timer.phase('compaction'):
+        # The report covers the same sections as the SEO prompts; hobbies and references go as headers only
+        compacted, compaction = compact_resume(resume_text, sections=SEO_SECTIONS)
+    with timer.phase('cache_lookup'):
+        key = cache_key(compacted, LLM_PROVIDERS, PROMPT_VERSION, TEMPERATURE)
+        cached = analysis_cache.get(key) if analysis_cache else None
+    if cached:
+        return cached, compaction, 'cache'
+    
+    if not configured_providers(LLM_PROVIDERS):
+        raise RuntimeError('No LLM provider API key configured')
+    
+    # Only the first request in a container pays for building the client
+    with timer.phase('setup'):
+        resume_analyzer = analyzer.get()
+    
+    # Run the analysis
+    analysis_result = rate_limiter.call(lambda: resume_analyzer.analyze(compacted, timer),
+                                        estimate_tokens(compacted), timer, wait)
+    
+    response_data = {
+        'analysis': analysis_result,
+        'resume_length': len(resume_text),
+        'word_count': len(resume_text.split()),
+        'timestamp': context.aws_request_id if 'context' in globals() else 'local'
+    }
+    if analysis_cache:
+        analysis_cache.set(key, response_data)
+    return response_data, compaction, 'llm'
+
+def handle_resume_analysis(resume_text: str, timer: PhaseTimer, fields: dict):
     """Analyze the provided resume text"""
     try:
-        # Initialize the OpenAI LLM
-        openai_api_key = os.environ.get('OPENAI_API_KEY')
-        if not openai_api_key:
-            return create_error_response('OpenAI API key not configured', 500)
-        
-        llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
-            temperature=0.3,
-            openai_api_key=openai_api_key
-        )
-        
-        # Create the analysis prompt
-        prompt = PromptTemplate(
-            input_variables=["resume_text"],
-            template="""
-            You are an expert resume optimizer and SEO specialist. Analyze the following resume and provide detailed recommendations for search engine optimization and ATS (Applicant Tracking System) compatibility.
-
-            Resume Text:
-            {resume_text}
-
-            Please provide a comprehensive analysis with the following sections:
-
-            1. **SEO Keywords Analysis**:
-               - List missing industry-relevant keywords
-               - Suggest specific keywords to add based on the role/industry
-               - Rate current keyword density (1-10)
-
-            2. **ATS Optimization**:
-               - Identify potential ATS scanning issues
-               - Suggest formatting improvements
-               - Recommend section restructuring if needed
-
-            3. **Content Recommendations**:
-               - Missing critical sections
-               - Weak areas that need strengthening
-               - Specific achievements to highlight better
-
-            4. **Technical Improvements**:
-               - File format recommendations
-               - Formatting suggestions
-               - Length and structure optimization
-
-            5. **Industry-Specific Suggestions**:
-               - Role-specific keywords to include
-               - Industry trends to incorporate
-               - Professional buzzwords that add value
-
-            Please format your response as structured JSON with clear sections and actionable recommendations.
-            """
-        )
-        
-        # Create the chain
-        chain = prompt | llm | StrOutputParser()
-        
-        # Run the analysis
-        analysis_result = chain.invoke({"resume_text": resume_text})
-        
-        return create_response({
-            'analysis': analysis_result,
-            'resume_length': len(resume_text),
-            'word_count': len(resume_text.split()),
-            'timestamp': context.aws_request_id if 'context' in globals() else 'local'
-        })
+        response_data, compaction, source = analyze_resume(resume_text, timer)
+        fields.update(source=source, tokens_saved=compaction['tokens_saved'])
+        if source == 'llm':
+            fields['tokens'] = timer.counts
+        with timer.phase('serialize'):
+            return create_response({**response_data, 'compaction': compaction, 'timings_ms': timer.as_dict()})
         
+    except Overloaded as e:
+        fields['error'] = str(e)
+        return create_response({'detail': str(e)}, 503, e.headers)
     except Exception as e:
+        fields['error'] = f'Analysis failed: {str(e)}'
         return create_error_response(f'Analysis failed: {str(e)}', 500)
 
-def handle_sample_analysis():
-    """Return a sample analysis for testing"""
-    sample_analysis = {
-        'analysis': '''
-        **SEO Keywords Analysis** (Score: 6/10)
-        • Missing keywords: "data analysis", "machine learning", "Python programming"
-        • Current keyword density is moderate
-        • Recommend adding more technical skills
-
-        **ATS Optimization** (Score: 7/10)
-        • Good use of standard section headers
-        • Consider adding a "Technical Skills" section
-        • Use bullet points consistently
-
-        **Content Recommendations**
-        • Add quantified achievements (e.g., "increased efficiency by 25%")
-        • Include more action verbs
-        • Expand on project outcomes
-
-        **Technical Improvements**
-        • Use PDF format for better ATS compatibility
-        • Ensure consistent formatting
-        • Keep resume to 1-2 pages
-
-        **Industry-Specific Suggestions**
-        • Add certifications if available
-        • Include relevant software proficiencies
-        • Mention collaborative project experience
-        ''',
-        'resume_length': 850,
-        'word_count': 127,
-        'timestamp': 'sample'
-    }
-    
-    return create_response(sample_analysis)
+def analyze_job(resume_text: str) -> dict:
+    # Jobs wait for LLM capacity rather than being turned away
+    return analyze_resume(resume_text, PhaseTimer(), wait=True)[0]
+
+def handle_job_submission(resume_text: str, callback_url, fields: dict):
+    """Store the job and hand it to the worker function; answers 202 without waiting for the LLM"""
+    if callback_url:
+        try:
+            validate_callback_url(callback_url)
+        except ValueError as e:
+            return create_error_response(str(e), 400)
+    job = new_job(resume_text, callback_url)
+    job_store.create(job)
+    if JOB_WORKER_FUNCTION:
+        import boto3
+        # An asynchronous invocation returns at once; Lambda queues and retries the event
+        boto3.client('lambda').invoke(FunctionName=JOB_WORKER_FUNCTION, InvocationType='Event',
+                                      Payload=json.dumps({'job_id': job['id']}))
+    else:
+        # Local runs have no worker function; analyze in the background of this process
+        import threading
+        threading.Thread(target=run_claimed, args=(job_store, job['id'], analyze_job), daemon=True).start()
+    fields['job_id'] = job['id']
+    status_url = f"/api/jobs/{job['id']}"
+    return create_response({'job_id': job['id'], 'status': job['status'], 'status_url': status_url}, 202,
+                           {'Location': status_url, 'Preference-Applied': 'respond-async'})
+
+def handle_job_status(job_id: str):
+    job = job_store.get(job_id)
+    if job is not None:
+        # Nothing requeues a job whose worker died here, so fail it once its lease is gone
+        job = fail_abandoned(job_store, job)
+    if job is None:
+        return create_error_response('Job not found', 404)
+    headers = None if job['status'] in (DONE, FAILED) else {'Retry-After': '1'}
+    return create_response(job_view(job), 200, headers)
+
+def job_handler(event, context):
+    """JobWorkerFunction entry point: run the job named in an asynchronous invocation"""
+    start = time.perf_counter()
+    # The analysis must end, and the job with it, before Lambda stops this invocation
+    time_limit = context.get_remaining_time_in_millis() / 1000 - FINISH_MARGIN if context else None
+    job = run_claimed(job_store, event['job_id'], analyze_job, time_limit)
+    if job is None:
+        # Expired, finished, or a retried event for a job another invocation still holds
+        return
+    log_event('job', job_id=job['id'], status=job['status'], duration_ms=round((time.perf_counter() - start) * 1000, 3),
+              queue_ms=round((job['started_at'] - job['created_at']) * 1000, 3), error=job.get('error'),
+              callback=job.get('callback_status'), request_id=getattr(context, 'aws_request_id', None))
+
+def request_header(event, name: str):
+    """A request header by case-insensitive name; API Gateway passes them as the client sent them"""
+    name = name.lower()
+    return next((value for key, value in (event.get('headers') or {}).items() if key.lower() == name), None)
+
+def handle_extraction(event, timer: PhaseTimer, fields: dict):
+    """Extract the text of an uploaded .pdf, .docx or .txt resume (multipart field "file")"""
+    from resume_analyzer.extraction import ExtractionError, extract_multipart
+    body = event.get('body') or ''
+    # API Gateway base64-encodes the template's BinaryMediaTypes
+    if event.get('isBase64Encoded'):
+        import base64
+        body = base64.b64decode(body)
+    else:
+        body = body.encode('utf-8')
+    try:
+        with timer.phase('extraction'):
+            extracted = extract_multipart(body, request_header(event, 'Content-Type'))
+    except ExtractionError as e:
+        fields['error'] = str(e)
+        return create_error_response(str(e), 400)
+    if not extracted['text']:
+        return create_error_response('No text could be extracted from the file', 400)
+    fields.update(format=extracted['format'], pages=extracted['pages'], truncated=extracted['truncated'])
+    return create_response(extracted)
+
+def handle_sample_analysis(event):
+    """Return the sample analysis, or 304 if the client has it"""
+    if etag_matches(request_header(event, 'If-None-Match'), SAMPLE.etag):
+        return create_response('', 304, SAMPLE.headers)
+    return create_response(SAMPLE_BODY, 200, SAMPLE.headers)
 
-def create_response(data, status_code=200):
-    """Create a standardized API response"""
+def create_response(data, status_code=200, extra_headers=None):
+    """Create a standardized API response; strings are sent as already-encoded JSON"""
     return {
         'statusCode': status_code,
         'headers': {
             'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type',
+            'Access-Control-Allow-Headers': 'Content-Type, Prefer',
             'Access-Control-Allow-Methods': 'POST, GET, OPTIONS',
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            **(extra_headers or {})
         },
-        'body': json.dumps(data)
+        'body': data if isinstance(data, str) else json.dumps(data)
     }
 
 def create_error_response(message, status_code=400):
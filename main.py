@@ -1,107 +1,60 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
 from dotenv import load_dotenv
-from pydantic import BaseModel
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
-from langchain.agents import create_tool_calling_agent, AgentExecutor
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
+from resume_analyzer.batch import iter_directory_items, iter_jsonl_items, run_batch
+from resume_analyzer.engine import AnalysisEngine
+from resume_analyzer.extraction import ExtractionError, extract_text
+from resume_analyzer.schema import ResumeAnalysis
 
 load_dotenv()
 
-class SEORecommendation(BaseModel):
-  category: str  # e.g., "Keywords", "Skills", "Industry Terms"
-  recommendation: str
-  priority: str  # "High", "Medium", "Low"
-  implementation: str  # How to implement this
+MODEL_NAME = "gemini-2.5-flash"
+TEMPERATURE = 0.7
+# A prompt registered in resume_analyzer/prompts.py; part of the analysis cache key
+PROMPT_VERSION = "seo-v1"
+# Comma-separated provider:model pairs; with several, each request goes to the fastest healthy one
+LLM_PROVIDERS = os.getenv("LLM_PROVIDERS", f"google:{MODEL_NAME}")
 
-class ScoreBreakdown(BaseModel):
-    keyword_score: int  # /10
-    ats_compatibility: int  # /10
-    industry_terms: int  # /10
-    skills_optimization: int  # /10
-    format_structure: int  # /10
-    explanation: str
-
-class ResumeAnalysis(BaseModel):
-  current_role: str
-  target_industry: str
-  missing_keywords: list[str]
-  seo_recommendations: list[SEORecommendation]
-  overall_score: int  # 1-10
-  score_breakdown: ScoreBreakdown
-  summary: str
-
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.7)
-parser = PydanticOutputParser(pydantic_object=ResumeAnalysis)
-
-prompt = ChatPromptTemplate.from_messages(
-  [
-    (
-      "system", 
-      """
-      You are an expert resume SEO analyst. Analyze the provided resume and provide specific search engine optimization recommendations.
-
-      Focus on:
-      1. ATS (Applicant Tracking System) optimization
-      2. Industry-specific keywords
-      3. Skills and technologies that should be highlighted
-      4. Format and structure improvements for better scanning
-      5. Missing keywords that recruiters commonly search for
-
-      SCORING SYSTEM (1-10):
-      - 1-3: Poor - Major SEO issues, missing critical keywords, poor ATS compatibility
-      - 4-5: Below Average - Some keywords present but lacks optimization, formatting issues
-      - 6-7: Good - Decent keyword usage, mostly ATS-friendly, room for improvement
-      - 8-9: Excellent - Well-optimized, strong keyword presence, ATS-friendly format
-      - 10: Perfect - Exceptional SEO optimization, comprehensive keywords, ideal ATS format
-
-      Consider these scoring factors:
-      • Keyword density and relevance (25%)
-      • ATS compatibility (25%)
-      • Industry-specific terminology (20%)
-      • Skills section optimization (15%)
-      • Format and structure (15%)
-
-      Provide actionable, specific recommendations with priority levels.
-
-      {format_instructions}
-      """,
-    ),
-    ("user", "Please analyze this resume for SEO optimization:\n\n{resume_text}"),
-  ]
-).partial(format_instructions=parser.get_format_instructions())
+# Schema, prompt, cache, analysis mode and LLM client all live in the shared engine
+engine = AnalysisEngine(LLM_PROVIDERS, TEMPERATURE, PROMPT_VERSION)
 
 def analyze_resume(resume_text: str):
     """Analyze a resume and provide SEO recommendations"""
-    chain = prompt | llm | parser
-    
     try:
-        analysis = chain.invoke({"resume_text": resume_text})
+        analysis, info = engine.analyze(resume_text)
+        compaction = info["compaction"]
+        print(f"📉 Sent ~{compaction['tokens']} tokens of resume text ({compaction['tokens_saved']} saved by compaction)")
         return analysis
     except Exception as e:
         print(f"Error analyzing resume: {e}")
         return None
 
+async def analyze_resume_async(resume_text: str) -> ResumeAnalysis:
+    """Async variant of analyze_resume for batch runs; raises instead of returning None"""
+    # Batch runs wait out the provider's rate limit instead of failing items
+    analysis, _ = await engine.aanalyze(resume_text, wait=True)
+    return analysis
+
 def read_resume_file(file_path: str) -> str:
     """Read resume from various file formats"""
     try:
         if file_path.endswith('.txt'):
             with open(file_path, 'r', encoding='utf-8') as file:
                 return file.read()
-        elif file_path.endswith('.pdf'):
-            # You can add PDF reading with PyPDF2 or similar
-            print("PDF reading not implemented yet. Please convert to .txt file.")
-            return None
-        elif file_path.endswith('.docx'):
-            # You can add DOCX reading with python-docx
-            print("DOCX reading not implemented yet. Please convert to .txt file.")
-            return None
+        elif file_path.endswith(('.pdf', '.docx')):
+            extracted = extract_text(file_path)
+            if extracted["truncated"]:
+                print(f"Note: only the first {extracted['pages']} page(s) / {extracted['characters']} characters of {file_path} will be analyzed.")
+            return extracted["text"]
         else:
-            print("Unsupported file format. Please use .txt files.")
+            print("Unsupported file format. Please use .txt, .pdf or .docx files.")
             return None
+    except ExtractionError as e:
+        print(f"Could not read {file_path}: {e}")
+        return None
     except FileNotFoundError:
         print(f"File not found: {file_path}")
         return None
@@ -134,7 +87,7 @@ def main():
     print("🔍 Resume SEO Analyzer")
     print("=" * 40)
     
-    choice = input("\nChoose an option:\n1. Analyze sample resume\n2. Upload your own resume (.txt file)\n3. Paste resume text\n\nEnter choice (1-3): ")
+    choice = input("\nChoose an option:\n1. Analyze sample resume\n2. Upload your own resume (.txt, .pdf or .docx file)\n3. Paste resume text\n\nEnter choice (1-3): ")
     
     resume_text = None
     
@@ -144,7 +97,7 @@ def main():
         print("\nUsing sample resume...")
         
     elif choice == "2":
-        file_path = input("Enter the path to your resume file (.txt): ")
+        file_path = input("Enter the path to your resume file (.txt, .pdf or .docx): ")
         resume_text = read_resume_file(file_path)
         
     elif choice == "3":
@@ -199,6 +152,44 @@ def main():
     else:
         print("❌ No resume text provided")
 
+# Non-interactive batch analysis
+async def run_batch_cli(source: str, concurrency: int, output) -> int:
+    """Analyze a directory of resume files or a JSONL file, writing JSONL results as they finish"""
+    if os.path.isdir(source):
+        items = list(iter_directory_items(source, read_resume_file))
+    else:
+        with open(source, 'r', encoding='utf-8') as file:
+            items = list(iter_jsonl_items(file))
+    
+    failures = 0
+    async for record in run_batch(items, analyze_resume_async, concurrency):
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+        if record["type"] == "result" and record["status"] == "error":
+            failures += 1
+            print(f"❌ {record['id']}: {record['error']}", file=sys.stderr)
+        elif record["type"] == "summary":
+            print(f"✅ {record['items']} resumes ({record['unique']} unique), "
+                  f"{record['failures']} failed in {record['elapsed_ms'] / 1000:.1f}s", file=sys.stderr)
+    return 1 if failures else 0
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(description="Resume SEO Analyzer")
+    arg_parser.add_argument("--batch", metavar="DIR|JSONL",
+                            help="analyze every resume in a directory or JSONL file without prompting")
+    arg_parser.add_argument("--concurrency", type=int, default=8, help="analyses in flight at once in batch mode")
+    arg_parser.add_argument("--output", help="write batch results here instead of stdout")
+    return arg_parser.parse_args()
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.batch:
+        output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+        try:
+            sys.exit(asyncio.run(run_batch_cli(args.batch, args.concurrency, output)))
+        finally:
+            if args.output:
+                output.close()
+    else:
+        main()
 
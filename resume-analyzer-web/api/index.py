@@ -0,0 +1,204 @@
+"""Every /api route on Vercel, as one ASGI app.
+
+vercel.json rewrites /api/* here, so health checks, the sample and analyses
+share one function and keep its instances (and the analysis engine) warm.
+Responses that never change - preflight, health, 404 and the prebuilt
+sample analysis (with its ETag) - are encoded to bytes with their headers
+once, at import. Every response carries Content-Length, so the server can
+keep the connection open.
+
+LangChain is only imported on the first analysis, as in the Lambda handler.
+orjson is used for JSON when installed, the standard library otherwise.
+"""
+import json
+import os
+import sys
+import time
+from typing import Optional
+
+# The shared resume_analyzer package sits at the repository root locally and is
+# copied into the project root by deploy-vercel.ps1
+for _root in ('..', os.path.join('..', '..')):
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), _root))
+from resume_analyzer.engine import AnalysisEngine
+from resume_analyzer.metrics import log_event
+from resume_analyzer.ratelimit import Overloaded
+from resume_analyzer.sample import encoded_sample, etag_matches
+from resume_analyzer.timing import PhaseTimer
+
+try:
+    import orjson
+
+    dumps = orjson.dumps
+    loads = orjson.loads
+except ImportError:
+    def dumps(data) -> bytes:
+        return json.dumps(data, separators=(",", ":")).encode()
+
+    loads = json.loads
+
+MODEL_NAME = "gemini-1.5-flash"
+TEMPERATURE = 0.7
+# A prompt registered in resume_analyzer/prompts.py; part of the analysis cache key
+PROMPT_VERSION = "seo-brief-v1"
+# Comma-separated provider:model pairs; with several, each request goes to the fastest healthy one
+LLM_PROVIDERS = os.getenv("LLM_PROVIDERS", f"google:{MODEL_NAME}")
+
+# Module scope so the client and cached analyses survive across warm invocations
+engine = AnalysisEngine(LLM_PROVIDERS, TEMPERATURE, PROMPT_VERSION)
+
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+    (b"access-control-allow-headers", b"Content-Type"),
+]
+
+def json_response(data, status: int = 200):
+    """(status, headers, body) ready to send"""
+    body = dumps(data)
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    return status, headers + CORS_HEADERS, body
+
+
+PREFLIGHT = (200, [(b"content-length", b"0")] + CORS_HEADERS, b"")
+HEALTH = json_response({'status': 'healthy', 'service': 'Resume SEO Analyzer', 'platform': 'Vercel', 'timestamp': 'live'})
+_sample = encoded_sample(envelope=True)
+_sample_headers = [(name.lower().encode(), value.encode()) for name, value in _sample.headers.items()]
+SAMPLE = (200, [(b"content-type", b"application/json"), (b"content-length", str(len(_sample.body)).encode())]
+          + _sample_headers + CORS_HEADERS, _sample.body)
+SAMPLE_NOT_MODIFIED = (304, _sample_headers + CORS_HEADERS, b"")
+NOT_FOUND = json_response({'detail': 'Endpoint not found'}, 404)
+RESUME_REQUIRED = json_response({'detail': 'Resume text is required'}, 400)
+
+STATIC_ROUTES = {
+    ("GET", "/api/health"): HEALTH,
+    ("GET", "/health"): HEALTH,
+    ("GET", "/api/analyze/sample"): SAMPLE,
+    ("POST", "/api/analyze/sample"): SAMPLE,
+}
+
+
+async def send_response(send, response) -> None:
+    status, headers, body = response
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def header(scope, name: bytes):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def read_body(receive, limit: Optional[int] = None) -> Optional[bytes]:
+    """The request body, or None once it grows past ``limit`` bytes"""
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if limit is not None and size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def analyze(receive, timer: PhaseTimer, fields: dict):
+    """Analyze the resume in the request body with the shared engine"""
+    with timer.phase('input_parse'):
+        body = await read_body(receive)
+        try:
+            resume_text = loads(body or b"{}").get('resume_text', '')
+        except (ValueError, AttributeError):
+            return json_response({'detail': 'Request body must be a JSON object'}, 400)
+    if not resume_text:
+        return RESUME_REQUIRED
+    try:
+        # Only the first analysis on a function instance pays for building the client
+        analysis_result, info = await engine.aanalyze(resume_text, timer)
+    except Overloaded as e:
+        fields['error'] = str(e)
+        status, headers, body = json_response({'detail': str(e)}, 503)
+        return status, headers + [(b"retry-after", e.headers["Retry-After"].encode())], body
+    except Exception as e:
+        fields['error'] = str(e)
+        return json_response({'detail': f'Internal server error: Analysis failed: {str(e)}'}, 500)
+
+    fields.update(source=info['source'], tokens=timer.counts, tokens_saved=info['compaction']['tokens_saved'])
+    if info['source'] == 'llm':
+        from resume_analyzer.repair import repair_stats
+        fields['output_parsing'] = repair_stats()
+    with timer.phase('serialize'):
+        return json_response({
+            'analysis': analysis_result.dict(),
+            'resume_length': len(resume_text),
+            'word_count': len(resume_text.split()),
+            'timestamp': 'cache' if info['cached'] else 'vercel',
+            'compaction': info['compaction'],
+            'timings_ms': timer.as_dict()
+        })
+
+
+async def extract(scope, receive, timer: PhaseTimer, fields: dict):
+    """Extract the text of an uploaded .pdf, .docx or .txt resume (multipart field "file")"""
+    import asyncio
+    from resume_analyzer.extraction import MAX_FILE_BYTES, ExtractionError, extract_multipart
+
+    too_large = json_response({'detail': f'File is larger than the {MAX_FILE_BYTES // (1024 * 1024)} MB limit'}, 413)
+    with timer.phase('input_parse'):
+        body = await read_body(receive, MAX_FILE_BYTES + 64 * 1024)
+    if body is None:
+        return too_large
+    try:
+        with timer.phase('extraction'):
+            # Parsing is CPU-bound; keep it off the event loop
+            extracted = await asyncio.get_running_loop().run_in_executor(
+                None, extract_multipart, body, header(scope, b"content-type"))
+    except ExtractionError as e:
+        fields['error'] = str(e)
+        return json_response({'detail': str(e)}, 400)
+    if not extracted['text']:
+        return json_response({'detail': 'No text could be extracted from the file'}, 400)
+    fields.update(format=extracted['format'], pages=extracted['pages'], truncated=extracted['truncated'])
+    return json_response(extracted)
+
+
+async def lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    method, path = scope["method"], scope["path"].rstrip("/")
+    static = PREFLIGHT if method == "OPTIONS" else STATIC_ROUTES.get((method, path))
+    if static is SAMPLE and etag_matches(header(scope, b"if-none-match"), _sample.etag):
+        static = SAMPLE_NOT_MODIFIED
+    if static is not None:
+        # Cheap routes are not logged; they would drown out the analyses
+        await send_response(send, static)
+        return
+
+    start = time.perf_counter()
+    timer = PhaseTimer()
+    fields = {}
+    if path == "/api/analyze" and method == "POST":
+        response = await analyze(receive, timer, fields)
+    elif path == "/api/extract" and method == "POST":
+        response = await extract(scope, receive, timer, fields)
+    else:
+        response = NOT_FOUND
+    await send_response(send, response)
+    log_event('request', method=method, path=path, status=response[0],
+              duration_ms=round((time.perf_counter() - start) * 1000, 3), phases=timer.as_dict(), **fields)
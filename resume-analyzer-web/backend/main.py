@@ -1,16 +1,47 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, File, Header, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
 from typing import List, Optional
+import asyncio
+import hmac
+import json
 import os
+import sys
+import time
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
+
+# The shared resume_analyzer package lives at the repository root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from resume_analyzer.batch import run_batch
+from resume_analyzer.compaction import estimate_tokens
+from resume_analyzer.engine import AnalysisEngine
+from resume_analyzer.extraction import MAX_FILE_BYTES, ExtractionError, extract_text
+from resume_analyzer.jobs import DONE, FAILED, JobWorkerPool, SQLiteJobStore, job_view, validate_callback_url
+from resume_analyzer.matching import rank_resumes
+from resume_analyzer.metrics import MetricsMiddleware, render as render_metrics
+from resume_analyzer.providers import configured_providers
+from resume_analyzer.ratelimit import Overloaded
+from resume_analyzer.repair import repair_stats
+from resume_analyzer.sample import encoded_sample, etag_matches
+from resume_analyzer.search import MAX_RESULTS, SQLiteResumeStore, store_from_env
+from resume_analyzer.schema import ResumeAnalysis
+from resume_analyzer.scoring import apply_local_scores, local_scores, section_recommendations
+from resume_analyzer.streaming import IncrementalJSONParser, chunk_text, sse_event
+from resume_analyzer.timing import PhaseTimer
 
 load_dotenv()
 
-app = FastAPI(title="Resume SEO Analyzer API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pick up jobs queued before a restart; running jobs finish before shutdown
+    job_pool.start()
+    yield
+    await run_in_threadpool(job_pool.stop)
+
+app = FastAPI(title="Resume SEO Analyzer API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware to allow React frontend to call the API
 app.add_middleware(
@@ -20,81 +51,264 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so request latency includes CORS handling and streamed bodies
+app.add_middleware(MetricsMiddleware)
 
-# Pydantic models (same as your existing code)
-class SEORecommendation(BaseModel):
-    category: str
-    recommendation: str
-    priority: str
-    implementation: str
-
-class ScoreBreakdown(BaseModel):
-    keyword_score: int
-    ats_compatibility: int
-    industry_terms: int
-    skills_optimization: int
-    format_structure: int
-    explanation: str
-
-class ResumeAnalysis(BaseModel):
-    current_role: str
-    target_industry: str
-    missing_keywords: List[str]
-    seo_recommendations: List[SEORecommendation]
-    overall_score: int
-    score_breakdown: ScoreBreakdown
-    summary: str
-
+# Request models; the analysis schema is shared via resume_analyzer.schema
 class ResumeRequest(BaseModel):
     resume_text: str
     user_email: Optional[str] = None
+    # Job mode: the finished job is POSTed here
+    callback_url: Optional[str] = None
+    # Re-analyze only the sections changed since the stored analysis previous_id, which
+    # needs the previous_token returned with it (X-Resume-Id and X-Resume-Token headers)
+    incremental: bool = False
+    previous_id: Optional[int] = None
+    previous_token: Optional[str] = None
 
-# Initialize LLM and parser
-llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.7)
-parser = PydanticOutputParser(pydantic_object=ResumeAnalysis)
-
-prompt = ChatPromptTemplate.from_messages([
-    ("system", """
-    You are an expert resume SEO analyst. Analyze the provided resume and provide specific search engine optimization recommendations.
-
-    Focus on:
-    1. ATS (Applicant Tracking System) optimization
-    2. Industry-specific keywords
-    3. Skills and technologies that should be highlighted
-    4. Format and structure improvements for better scanning
-    5. Missing keywords that recruiters commonly search for
-
-    SCORING SYSTEM (1-10):
-    - 1-3: Poor - Major SEO issues, missing critical keywords, poor ATS compatibility
-    - 4-5: Below Average - Some keywords present but lacks optimization, formatting issues
-    - 6-7: Good - Decent keyword usage, mostly ATS-friendly, room for improvement
-    - 8-9: Excellent - Well-optimized, strong keyword presence, ATS-friendly format
-    - 10: Perfect - Exceptional SEO optimization, comprehensive keywords, ideal ATS format
-
-    Consider these scoring factors:
-    • Keyword density and relevance (25%)
-    • ATS compatibility (25%)
-    • Industry-specific terminology (20%)
-    • Skills section optimization (15%)
-    • Format and structure (15%)
-
-    Provide actionable, specific recommendations with priority levels.
-
-    {format_instructions}
-    """),
-    ("user", "Please analyze this resume for SEO optimization:\n\n{resume_text}"),
-]).partial(format_instructions=parser.get_format_instructions())
-
-def analyze_resume_service(resume_text: str) -> ResumeAnalysis:
-    """Analyze a resume and provide SEO recommendations"""
-    chain = prompt | llm | parser
-    
+class ExtractedResume(BaseModel):
+    text: str
+    format: str
+    pages: int
+    characters: int
+    truncated: bool
+
+class BatchResumeItem(BaseModel):
+    id: str
+    resume_text: str
+
+class BatchRequest(BaseModel):
+    resumes: List[BatchResumeItem]
+    concurrency: Optional[int] = None
+
+class MatchRequest(BaseModel):
+    job_description: str
+    resumes: List[BatchResumeItem]
+    top_k: int = 10
+    # Full LLM analyses for the best few matches only
+    analyze_top: int = 0
+
+# Initialize the analysis engine
+MODEL_NAME = "gemini-1.5-flash"
+TEMPERATURE = 0.7
+# A prompt registered in resume_analyzer/prompts.py; part of the analysis cache key
+PROMPT_VERSION = "seo-v1"
+# Comma-separated provider:model pairs; with several, each request goes to the fastest healthy one
+LLM_PROVIDERS = os.getenv("LLM_PROVIDERS", f"google:{MODEL_NAME}")
+
+engine = AnalysisEngine(LLM_PROVIDERS, TEMPERATURE, PROMPT_VERSION)
+# A long-running server builds the client, parser and prompts up front
+engine.preload()
+
+# Upper bound on LLM calls in flight at once across all requests on this worker
+MAX_CONCURRENT_ANALYSES = int(os.getenv("MAX_CONCURRENT_ANALYSES", "8"))
+llm_semaphore = asyncio.Semaphore(MAX_CONCURRENT_ANALYSES)
+
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "500"))
+
+# Job matching ranks without the LLM, so it takes far more resumes than a batch
+MAX_MATCH_RESUMES = int(os.getenv("MAX_MATCH_RESUMES", "5000"))
+MAX_MATCH_ANALYSES = int(os.getenv("MAX_MATCH_ANALYSES", "5"))
+
+# Job mode: analyses queued in a local SQLite file and run by worker threads.
+# JOB_WORKERS bounds the LLM calls jobs make at once, on top of MAX_CONCURRENT_ANALYSES
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+job_store = SQLiteJobStore(os.getenv("JOB_STORE_PATH", ".jobs.sqlite3"))
+job_pool = JobWorkerPool(job_store, lambda resume_text: analyze_job(resume_text), JOB_WORKERS)
+
+# With RESUME_STORE_PATH set, every analysis returned is kept for RESUME_STORE_TTL_DAYS. Only
+# requests bearing RESUME_STORE_TOKEN can search, read or delete it
+resume_store = store_from_env()
+RESUME_STORE_TOKEN = os.getenv("RESUME_STORE_TOKEN", "")
+
+# Prebuilt analysis of the sample resume (resume_analyzer/data/sample_analysis.json), encoded once
+SAMPLE = encoded_sample()
+
+def request_timer(http_request: Request) -> PhaseTimer:
+    """A PhaseTimer that starts with the time spent routing and parsing the request body"""
+    timer = PhaseTimer()
+    start = http_request.scope.get("state", {}).get("request_start")
+    if start is not None:
+        timer.record("input_parse", time.perf_counter() - start)
+    return timer
+
+def compaction_headers(compaction: dict) -> dict:
+    return {
+        "X-Tokens-Original": str(compaction["original_tokens"]),
+        "X-Tokens-Sent": str(compaction["tokens"]),
+        "X-Tokens-Saved": str(compaction["tokens_saved"]),
+    }
+
+def incremental_headers(incremental: dict) -> dict:
+    if incremental["mode"] != "incremental":
+        return {"X-Incremental": "full"}
+    headers = {
+        "X-Incremental": "incremental",
+        "X-Incremental-Sections": ",".join(incremental["sections_changed"]),
+        "X-Incremental-Tokens-Saved": str(incremental["tokens_saved"]),
+    }
+    if incremental["latency_saved_ms"] is not None:
+        headers["X-Incremental-Latency-Saved-Ms"] = str(incremental["latency_saved_ms"])
+    return headers
+
+def resume_headers(record: Optional[tuple]) -> dict:
+    """The stored record's id and owner token, to send back as the base of an incremental re-analysis"""
+    if record is None:
+        return {}
+    return {"X-Resume-Id": str(record[0]), "X-Resume-Token": record[1]}
+
+async def previous_analysis(request: ResumeRequest) -> Optional[dict]:
+    """The stored record the request names as its base, if its token matches"""
+    if resume_store is None or request.previous_id is None or not request.previous_token:
+        return None
     try:
-        analysis = chain.invoke({"resume_text": resume_text})
-        return analysis
+        return await run_in_threadpool(resume_store.owned, request.previous_id, request.previous_token)
+    except Exception as e:
+        print(f"Error loading previous analysis: {str(e)}")
+        return None
+
+def analyze_resume_service(resume_text: str, timer: Optional[PhaseTimer] = None) -> tuple:
+    """Analyze a resume; returns the analysis and its compaction/cache details"""
+    try:
+        return engine.analyze(resume_text, timer)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=e.headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing resume: {str(e)}")
 
+async def analyze_resume_service_async(resume_text: str, timer: Optional[PhaseTimer] = None,
+                                       wait: bool = False, previous: Optional[dict] = None) -> tuple:
+    """
+    Analyze a resume without blocking the event loop while the LLM responds.
+    503 with Retry-After when the LLM has no capacity soon, unless ``wait``.
+    With a ``previous`` store record, only the sections changed since it are re-analyzed
+    """
+    try:
+        if previous:
+            return await engine.aanalyze_incremental(resume_text, previous["resume_text"], previous["analysis"],
+                                                     timer, limiter=llm_semaphore, wait=wait)
+        return await engine.aanalyze(resume_text, timer, limiter=llm_semaphore, wait=wait)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=e.headers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing resume: {str(e)}")
+
+def store_analysis(resume_text: str, analysis: dict, user_email: Optional[str] = None) -> Optional[tuple]:
+    """Add an analysis to the resume store; returns its (id, owner token), or None when it was not stored.
+    A failure there never fails the analysis"""
+    if resume_store is None:
+        return None
+    try:
+        return resume_store.add(resume_text, analysis, user_email)
+    except Exception as e:
+        print(f"Error storing analysis: {str(e)}")
+        return None
+
+async def remember(resume_text: str, analysis: ResumeAnalysis, user_email: Optional[str] = None) -> Optional[tuple]:
+    if resume_store is not None:
+        return await run_in_threadpool(store_analysis, resume_text, analysis.dict(), user_email)
+    return None
+
+def analyze_job(resume_text: str) -> dict:
+    # Job workers are threads already, so the store is written directly
+    analysis = engine.analyze(resume_text, wait=True)[0].dict()
+    store_analysis(resume_text, analysis)
+    return analysis
+
+async def analyze_batch_item(resume_text: str) -> ResumeAnalysis:
+    # The batch's own concurrency bounds it, so it waits for capacity instead of being turned away
+    analysis, _ = await analyze_resume_service_async(resume_text, wait=True)
+    await remember(resume_text, analysis)
+    return analysis
+
+async def extract_upload(file: UploadFile) -> dict:
+    """Extract an uploaded resume within the page and character budgets"""
+    if file.size is not None and file.size > MAX_FILE_BYTES:
+        raise HTTPException(status_code=413, detail=f"File is larger than the {MAX_FILE_BYTES // (1024 * 1024)} MB limit")
+    try:
+        # Parsing is CPU-bound; keep it off the event loop
+        extracted = await run_in_threadpool(extract_text, file.file, file.filename)
+    except ExtractionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not extracted["text"]:
+        raise HTTPException(status_code=400, detail="No text could be extracted from the file")
+    return extracted
+
+# Hybrid mode replaces these fields of the model's answer with local scores
+LOCAL_FIELDS = ("overall_score", "score_breakdown", "seo_recommendations", "missing_keywords")
+
+def hybrid_events(event: str, data: dict, scores: dict) -> List[str]:
+    """The SSE events for one parsed event with the local scores applied, as engine.finish() applies them"""
+    field = data["field"]
+    if field not in LOCAL_FIELDS:
+        return [sse_event(event, data)]
+    if field == "overall_score":
+        # Follows from the adjusted breakdown
+        return []
+    if field == "score_breakdown":
+        adjusted = apply_local_scores({"score_breakdown": data["value"]}, scores)
+        return [sse_event("field", {"field": "score_breakdown", "value": adjusted["score_breakdown"]}),
+                sse_event("field", {"field": "overall_score", "value": adjusted["overall_score"]})]
+    if field == "missing_keywords":
+        # Keywords come from the local index, not the model
+        if event == "item":
+            return []
+        keywords = scores["missing_keywords"][:10]
+        return ([sse_event("item", {"field": field, "index": i, "value": keyword})
+                 for i, keyword in enumerate(keywords)]
+                + [sse_event("field", {"field": field, "value": keywords})])
+    # The model's recommendations stream as they are; one for each missing standard section follows them
+    if event == "item":
+        return [sse_event(event, data)]
+    recommendations = section_recommendations(data["value"], scores)
+    added = recommendations[len(data["value"]):]
+    return ([sse_event("item", {"field": field, "index": len(data["value"]) + i, "value": rec})
+             for i, rec in enumerate(added)]
+            + [sse_event("field", {"field": field, "value": recommendations})])
+
+async def stream_analysis_events(resume_text: str, timer: PhaseTimer, user_email: Optional[str] = None):
+    """Yield Server-Sent Events for each analysis field as the model produces it"""
+    compacted, ready, info = await engine.aprepare(resume_text, timer)
+    compaction = info["compaction"]
+    if ready:
+        yield sse_event("start", {"cached": engine.mode != "fast", "compaction": compaction})
+        for field, value in ready.dict().items():
+            yield sse_event("field", {"field": field, "value": value})
+        yield sse_event("complete", ready.dict())
+        await remember(resume_text, ready, user_email)
+        return
+
+    hybrid = engine.mode == "hybrid"
+    scores = None
+
+    json_parser = IncrementalJSONParser()
+    try:
+        async with engine.rate_limiter.aslot(estimate_tokens(compacted), timer), llm_semaphore:
+            started = False
+            async for chunk in engine.analyzer().astream(compacted, timer):
+                if not started:
+                    # Flush something on the first token so time-to-first-byte tracks the model
+                    yield sse_event("start", {"cached": False, "compaction": compaction})
+                    started = True
+                for event, data in json_parser.feed(chunk_text(chunk)):
+                    if not hybrid:
+                        yield sse_event(event, data)
+                        continue
+                    if scores is None and (data["field"] == "target_industry" or data["field"] in LOCAL_FIELDS):
+                        # Score for the industry the model names (it comes first), as the final analysis is
+                        industry = data["value"] if data["field"] == "target_industry" else None
+                        scores = await run_in_threadpool(local_scores, resume_text, industry)
+                    for framed in (hybrid_events(event, data, scores) if scores else [sse_event(event, data)]):
+                        yield framed
+        # Parsing and the cache store block; keep them off the event loop
+        analysis = await run_in_threadpool(engine.parse_stream, resume_text, compacted, json_parser.text, timer)
+        yield sse_event("complete", analysis.dict())
+        await remember(resume_text, analysis, user_email)
+    except Overloaded as e:
+        yield sse_event("error", {"detail": str(e), "retry_after": e.retry_after})
+    except Exception as e:
+        yield sse_event("error", {"detail": f"Error analyzing resume: {str(e)}"})
+
 # API Routes
 @app.get("/")
 async def root():
@@ -102,51 +316,268 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "google_api_configured": bool(os.getenv("GOOGLE_API_KEY"))}
+    return {
+        "status": "healthy",
+        "google_api_configured": bool(os.getenv("GOOGLE_API_KEY")),
+        "llm_providers": [f"{provider}:{model}" for provider, model in configured_providers(LLM_PROVIDERS)],
+        "output_parsing": repair_stats(),
+        # LLM calls avoided by sharing an identical analysis already in flight
+        "coalesced_calls_saved": engine.inflight.saved,
+        # Resumes indexed for near-duplicate reuse and LLM calls it saved
+        "near_duplicates": engine.near_duplicates.stats() if engine.near_duplicates else None,
+        "jobs": job_store.counts(),
+        # Current allowed rate toward the provider and calls waiting for it
+        "rate_limiter": engine.rate_limiter.stats(),
+    }
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics: per-phase and per-route latency, tokens, cache hits, output parsing"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/providers")
+async def provider_stats():
+    """Rolling latency, error rate and hedge counts per LLM provider"""
+    llm = engine.analyzer().llm
+    return llm.stats() if hasattr(llm, "stats") else {LLM_PROVIDERS: None}
 
 @app.post("/api/analyze", response_model=ResumeAnalysis)
-async def analyze_resume_endpoint(request: ResumeRequest):
+async def analyze_resume_endpoint(request: ResumeRequest, timer: PhaseTimer = Depends(request_timer),
+                                  prefer: Optional[str] = Header(None)):
     """
-    Analyze a resume and return SEO recommendations
+    Analyze a resume and return SEO recommendations. The X-Tokens-* headers
+    report how many prompt tokens compaction saved.
+
+    With the resume store on, the X-Resume-Id and X-Resume-Token headers
+    name the stored analysis. Send them back as `previous_id` and
+    `previous_token` with `incremental` and only the sections changed since
+    then go to the LLM; the X-Incremental-* headers report the sections,
+    tokens and latency saved
+
+    With `Prefer: respond-async` or a `callback_url`, the analysis runs as a
+    job instead: the response is 202 with the job id, and the result is at
+    GET /api/jobs/{id} and POSTed to the callback URL
     """
     if not request.resume_text.strip():
         raise HTTPException(status_code=400, detail="Resume text cannot be empty")
     
+    if request.callback_url or "respond-async" in (prefer or ""):
+        return await submit_job(request)
+    
     try:
-        result = analyze_resume_service(request.resume_text)
-        return result
+        previous = await previous_analysis(request) if request.incremental else None
+        result, info = await analyze_resume_service_async(request.resume_text, timer, previous=previous)
+        record = await remember(request.resume_text, result, request.user_email)
+        headers = {**compaction_headers(info["compaction"]), **resume_headers(record)}
+        if "incremental" in info:
+            headers.update(incremental_headers(info["incremental"]))
+        with timer.phase("serialize"):
+            return JSONResponse(content=result.dict(), headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/analyze/sample")
-async def analyze_sample_resume():
+async def submit_job(request: ResumeRequest) -> JSONResponse:
+    if request.callback_url:
+        try:
+            # Resolves the callback host
+            await run_in_threadpool(validate_callback_url, request.callback_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    job = await run_in_threadpool(job_pool.submit, request.resume_text, request.callback_url)
+    status_url = f"/api/jobs/{job['id']}"
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job["id"], "status": job["status"], "status_url": status_url},
+        headers={"Location": status_url, "Preference-Applied": "respond-async"},
+    )
+
+@app.get("/api/jobs/{job_id}")
+async def job_status_endpoint(job_id: str):
     """
-    Analyze the sample resume for testing
+    A job's status (queued, running, done or failed) with its analysis once
+    done. Retry-After suggests when to poll again while it is unfinished
     """
-    sample_resume = """
-John Smith
-Software Developer
-Email: john.smith@email.com
-Phone: (555) 123-4567
+    job = await run_in_threadpool(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    headers = {} if job["status"] in (DONE, FAILED) else {"Retry-After": "1"}
+    return JSONResponse(content=job_view(job), headers=headers)
 
-Experience:
-- Worked at Tech Company for 2 years
-- Built websites using JavaScript
-- Fixed bugs and wrote code
+@app.post("/api/analyze/stream")
+async def analyze_resume_stream_endpoint(request: ResumeRequest, timer: PhaseTimer = Depends(request_timer)):
+    """
+    Stream the analysis as Server-Sent Events: a `field` event per completed
+    top-level field, an `item` event per completed list element (each SEO
+    recommendation and missing keyword), then `complete` with the full result
+    """
+    if not request.resume_text.strip():
+        raise HTTPException(status_code=400, detail="Resume text cannot be empty")
+    
+    return StreamingResponse(
+        stream_analysis_events(request.resume_text, timer, request.user_email),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-Education:
-- Computer Science Degree from University
+@app.post("/api/analyze/batch")
+async def analyze_batch_endpoint(request: BatchRequest):
+    """
+    Analyze many resumes at once. Results stream back as JSON Lines in
+    completion order, one `result` record per resume with its latency and
+    status, then a `summary` record. Identical resumes are analyzed once.
+    """
+    if not request.resumes:
+        raise HTTPException(status_code=400, detail="At least one resume is required")
+    if len(request.resumes) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {MAX_BATCH_ITEMS} resumes")
+    
+    items = [(item.id, item.resume_text) for item in request.resumes]
+    # Worker count only bounds how many items are queued at once; the LLM
+    # semaphore still caps calls in flight across all requests
+    concurrency = min(request.concurrency or MAX_CONCURRENT_ANALYSES, MAX_CONCURRENT_ANALYSES)
+    
+    async def lines():
+        async for record in run_batch(items, analyze_batch_item, concurrency):
+            yield json.dumps(record) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
-Skills:
-- Programming
-- Problem solving
-"""
+@app.post("/api/match")
+async def match_resumes_endpoint(request: MatchRequest):
+    """
+    Rank resumes against a job description with BM25, without the LLM.
+    Returns the best `top_k` with the job terms each matched and missed;
+    the first `analyze_top` of them also get a full analysis.
+    """
+    if not request.job_description.strip():
+        raise HTTPException(status_code=400, detail="A job description is required")
+    if not request.resumes:
+        raise HTTPException(status_code=400, detail="At least one resume is required")
+    if len(request.resumes) > MAX_MATCH_RESUMES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_MATCH_RESUMES} resumes can be matched at once")
+    if not 1 <= request.top_k <= MAX_MATCH_RESUMES:
+        raise HTTPException(status_code=400, detail=f"top_k must be between 1 and {MAX_MATCH_RESUMES}")
+    if not 0 <= request.analyze_top <= MAX_MATCH_ANALYSES:
+        raise HTTPException(status_code=400, detail=f"analyze_top must be between 0 and {MAX_MATCH_ANALYSES}")
     
+    items = [(item.id, item.resume_text) for item in request.resumes]
     try:
-        result = analyze_resume_service(sample_resume)
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        ranking = await run_in_threadpool(rank_resumes, request.job_description, items, request.top_k)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        # numpy/scipy not installed
+        raise HTTPException(status_code=501, detail=str(e))
+    
+    texts = {item.id: item.resume_text for item in request.resumes}
+    shortlist = ranking["results"][:request.analyze_top]
+    
+    async def analyze(result: dict):
+        try:
+            analysis, _ = await analyze_resume_service_async(texts[result["id"]], wait=True)
+            result["analysis"] = analysis.dict()
+            await remember(texts[result["id"]], analysis)
+        except HTTPException as e:
+            result["error"] = e.detail
+    
+    await asyncio.gather(*(analyze(result) for result in shortlist))
+    return ranking
+
+def store_access(authorization: Optional[str] = Header(None)) -> SQLiteResumeStore:
+    """The resume store, for requests with `Authorization: Bearer <RESUME_STORE_TOKEN>`"""
+    if resume_store is None:
+        raise HTTPException(status_code=501, detail="The resume store is turned off (RESUME_STORE_PATH)")
+    if not RESUME_STORE_TOKEN:
+        raise HTTPException(status_code=403, detail="Set RESUME_STORE_TOKEN to open the resume store")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), RESUME_STORE_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Missing or invalid resume store token",
+                            headers={"WWW-Authenticate": "Bearer"})
+    return resume_store
+
+@app.get("/api/resumes/search")
+async def search_resumes_endpoint(q: Optional[str] = None, min_score: Optional[int] = None,
+                                  max_score: Optional[int] = None, industry: Optional[str] = None,
+                                  user_email: Optional[str] = None, sort: str = "relevance",
+                                  limit: int = 20, offset: int = 0,
+                                  store: SQLiteResumeStore = Depends(store_access)):
+    """
+    Search analyzed resumes. `q` is a boolean query over the resume text and
+    its keywords (`python AND aws`, `"machine learning" NOT java`,
+    `missing:docker` for the missing keywords); the other parameters filter.
+    Sorted by relevance, score or recent. Results leave out the resume text
+    and email
+    """
+    if not 1 <= limit <= MAX_RESULTS or offset < 0:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_RESULTS}, offset at least 0")
+    try:
+        results = await run_in_threadpool(store.search, q, min_score, max_score, industry, user_email,
+                                          sort, limit, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"results": results}
+
+@app.get("/api/resumes/{record_id}")
+async def stored_resume_endpoint(record_id: int, store: SQLiteResumeStore = Depends(store_access)):
+    """A stored resume's full analysis, without its text or email"""
+    record = await run_in_threadpool(store.get, record_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    return record
+
+@app.delete("/api/resumes/{record_id}", status_code=204)
+async def delete_resume_endpoint(record_id: int, store: SQLiteResumeStore = Depends(store_access)):
+    """Remove a stored resume and its analysis"""
+    if not await run_in_threadpool(store.delete, record_id):
+        raise HTTPException(status_code=404, detail="Resume not found")
+    return Response(status_code=204)
+
+@app.delete("/api/resumes")
+async def delete_user_resumes_endpoint(user_email: str, store: SQLiteResumeStore = Depends(store_access)):
+    """Remove `user_email`'s submissions; resumes someone else also submitted are kept for them"""
+    return {"deleted": await run_in_threadpool(store.delete_user, user_email)}
+
+@app.post("/api/extract", response_model=ExtractedResume)
+async def extract_resume_endpoint(file: UploadFile = File(...)):
+    """
+    Extract the text of an uploaded .pdf, .docx or .txt resume (multipart
+    form field `file`) so it can be previewed before analysis
+    """
+    return await extract_upload(file)
+
+@app.post("/api/analyze/upload", response_model=ResumeAnalysis)
+async def analyze_upload_endpoint(file: UploadFile = File(...), timer: PhaseTimer = Depends(request_timer)):
+    """
+    Extract and analyze an uploaded resume. Only the first pages and
+    characters within the extraction budget are sent to the model; the
+    X-Extraction-* headers say how much was read and whether it was cut short
+    """
+    with timer.phase("extraction"):
+        extracted = await extract_upload(file)
+    result, info = await analyze_resume_service_async(extracted["text"], timer)
+    await remember(extracted["text"], result)
+    with timer.phase("serialize"):
+        return JSONResponse(
+            content=result.dict(),
+            headers={
+                "X-Extraction-Pages": str(extracted["pages"]),
+                "X-Extraction-Characters": str(extracted["characters"]),
+                "X-Extraction-Truncated": str(extracted["truncated"]).lower(),
+                **compaction_headers(info["compaction"]),
+            },
+        )
+
+@app.api_route("/api/analyze/sample", methods=["GET", "POST"], response_model=ResumeAnalysis)
+async def analyze_sample_resume(http_request: Request):
+    """
+    The analysis of the sample resume, prebuilt at build time: no LLM call.
+    Clients can revalidate with If-None-Match
+    """
+    if etag_matches(http_request.headers.get("if-none-match"), SAMPLE.etag):
+        return Response(status_code=304, headers=SAMPLE.headers)
+    return Response(SAMPLE.body, media_type="application/json", headers=SAMPLE.headers)
 
 if __name__ == "__main__":
     import uvicorn
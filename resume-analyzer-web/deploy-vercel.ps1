@@ -64,6 +64,15 @@ try {
     npm install -g vercel
 }
 
+# Bundle the shared resume_analyzer package (with a freshly compiled keyword index and the checked sample analysis) with the serverless functions
+Push-Location ..
+python -m resume_analyzer.keywords build
+# The sample route serves a prebuilt analysis; refuse to ship one that no longer matches the schema
+python -m resume_analyzer.sample check
+if ($LASTEXITCODE -ne 0) { Pop-Location; exit 1 }
+Pop-Location
+Copy-Item -Recurse -Force "..\resume_analyzer" "resume_analyzer"
+
 Write-Host "`n🚀 Starting Vercel deployment..." -ForegroundColor Cyan
 Write-Host "You'll be prompted to:" -ForegroundColor Yellow
 Write-Host "1. Login to Vercel (if not already logged in)"
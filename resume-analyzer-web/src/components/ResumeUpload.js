@@ -1,11 +1,13 @@
 import React, { useState } from 'react';
 import './ResumeUpload.css';
+import { extractResumeText } from '../services/api';
 
 const ResumeUpload = ({ onAnalyze, isAnalyzing }) => {
   const [resumeText, setResumeText] = useState('');
   const [activeTab, setActiveTab] = useState('paste');
+  const [isExtracting, setIsExtracting] = useState(false);
 
-  const handleFileUpload = (event) => {
+  const handleFileUpload = async (event) => {
     const file = event.target.files[0];
     if (file && file.type === 'text/plain') {
       const reader = new FileReader();
@@ -13,8 +15,22 @@ const ResumeUpload = ({ onAnalyze, isAnalyzing }) => {
         setResumeText(e.target.result);
       };
       reader.readAsText(file);
+    } else if (file && /\.(pdf|docx)$/i.test(file.name)) {
+      // PDF and DOCX text is extracted server-side
+      setIsExtracting(true);
+      try {
+        const extracted = await extractResumeText(file);
+        setResumeText(extracted.text);
+        if (extracted.truncated) {
+          alert(`Only the first ${extracted.pages} page(s) of this file will be analyzed`);
+        }
+      } catch (error) {
+        alert(error.message);
+      } finally {
+        setIsExtracting(false);
+      }
     } else {
-      alert('Please upload a .txt file');
+      alert('Please upload a .txt, .pdf or .docx file');
     }
   };
 
@@ -76,15 +92,16 @@ const ResumeUpload = ({ onAnalyze, isAnalyzing }) => {
       {activeTab === 'upload' && (
         <div>
           <label className="form-label">
-            Upload a .txt file:
+            Upload a .txt, .pdf or .docx file:
           </label>
           <input
             type="file"
-            accept=".txt"
+            accept=".txt,.pdf,.docx"
             onChange={handleFileUpload}
             className="file-input"
-            disabled={isAnalyzing}
+            disabled={isAnalyzing || isExtracting}
           />
+          {isExtracting && <p className="preview-label">Reading file...</p>}
           {resumeText && (
             <div className="file-preview">
               <p className="preview-label">Preview:</p>
@@ -27,9 +27,59 @@ export const analyzeResume = async (resumeText, userEmail = null) => {
   }
 };
 
+// Stream the analysis over Server-Sent Events. onEvent(event, data) is called
+// for every `field`/`item` event; resolves with the final analysis.
+export const analyzeResumeStream = async (resumeText, onEvent, userEmail = null) => {
+  const response = await fetch(`${API_BASE_URL}/api/analyze/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify({ resume_text: resumeText, user_email: userEmail }),
+  });
+  if (!response.ok) {
+    const error = await response.json().catch(() => ({}));
+    throw new Error(error.detail || 'Failed to analyze resume');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const event = frame.match(/^event: (.*)$/m)?.[1];
+      const data = JSON.parse(frame.match(/^data: (.*)$/m)?.[1] || 'null');
+      if (event === 'complete') return data;
+      if (event === 'error') throw new Error(data.detail);
+      onEvent(event, data);
+    }
+  }
+  throw new Error('Analysis stream ended unexpectedly');
+};
+
+// Upload a .pdf/.docx/.txt resume and get back its extracted text for preview
+export const extractResumeText = async (file) => {
+  const formData = new FormData();
+  formData.append('file', file);
+  try {
+    const response = await api.post('/api/extract', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Error extracting resume text:', error);
+    throw new Error(error.response?.data?.detail || 'Failed to read resume file');
+  }
+};
+
 export const analyzeSampleResume = async () => {
   try {
-    const response = await api.post('/api/analyze/sample');
+    const response = await api.get('/api/analyze/sample');
     return response.data;
   } catch (error) {
     console.error('Error analyzing sample resume:', error);
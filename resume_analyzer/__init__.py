@@ -0,0 +1,6 @@
+"""Shared building blocks for the Resume SEO Analyzer entry points.
+
+The CLI (main.py), the FastAPI backend, the Vercel functions and the Lambda
+handlers all import from here. Keep this module free of heavy imports so the
+cheap routes of the serverless handlers stay cheap.
+"""
@@ -0,0 +1,88 @@
+"""Process-wide analyzer objects.
+
+The LLM client (and its HTTP connection pool), the prompt templates and the
+parser's format instructions only need to be built once per process - or
+once per container for Lambda and Vercel, which keep the process alive
+between requests.
+"""
+import threading
+from typing import Callable, Optional
+
+from .compaction import estimate_tokens
+from .metrics import TOKENS
+from .timing import PhaseTimer
+
+
+def count_tokens(timer: PhaseTimer, prompt_value, response) -> None:
+    """Prompt and completion tokens as reported by the provider, else estimated"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        counts = {"prompt": usage.get("input_tokens", 0), "completion": usage.get("output_tokens", 0)}
+    else:
+        counts = {"prompt": estimate_tokens(prompt_value.to_string()), "completion": estimate_tokens(response.content)}
+    for kind, tokens in counts.items():
+        timer.add(f"{kind}_tokens", tokens)
+        TOKENS.observe(tokens, kind=kind)
+
+
+class Analyzer:
+    """A prompt, model and output parser wired together once and reused"""
+
+    def __init__(self, llm, prompt, parser, stream_prompt=None, llm_phase: str = "llm"):
+        self.llm = llm
+        self.prompt = prompt
+        self.parser = parser
+        self.stream_prompt = stream_prompt or prompt
+        # Phase the model's network time is recorded under, so prompts of different sizes stay apart
+        self.llm_phase = llm_phase
+
+    def analyze(self, resume_text: str, timer: Optional[PhaseTimer] = None, **variables):
+        """Run the prompt on ``resume_text`` (and any other variables it takes) and parse the answer"""
+        timer = timer or PhaseTimer()
+        with timer.phase("prompt_format"):
+            prompt_value = self.prompt.invoke({"resume_text": resume_text, **variables})
+        with timer.phase(self.llm_phase):
+            response = self.llm.invoke(prompt_value)
+        count_tokens(timer, prompt_value, response)
+        with timer.phase("output_parse"):
+            return self.parser.parse(response.content)
+
+    async def aanalyze(self, resume_text: str, timer: Optional[PhaseTimer] = None, **variables):
+        timer = timer or PhaseTimer()
+        with timer.phase("prompt_format"):
+            prompt_value = self.prompt.invoke({"resume_text": resume_text, **variables})
+        with timer.phase(self.llm_phase):
+            response = await self.llm.ainvoke(prompt_value)
+        count_tokens(timer, prompt_value, response)
+        with timer.phase("output_parse"):
+            return self.parser.parse(response.content)
+
+    async def astream(self, resume_text: str, timer: Optional[PhaseTimer] = None):
+        """Raw model chunks for the streaming prompt; parse the joined text with ``parser``"""
+        timer = timer or PhaseTimer()
+        with timer.phase("prompt_format"):
+            prompt_value = self.stream_prompt.invoke({"resume_text": resume_text})
+        response = None
+        with timer.phase("llm"):
+            async for chunk in self.llm.astream(prompt_value):
+                # Adding chunks merges their content and any usage metadata
+                response = chunk if response is None else response + chunk
+                yield chunk
+        if response is not None:
+            count_tokens(timer, prompt_value, response)
+
+
+class LazyAnalyzer:
+    """Builds an Analyzer on first use so cheap routes never pay for it"""
+
+    def __init__(self, factory: Callable[[], Analyzer]):
+        self._factory = factory
+        self._analyzer = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Analyzer:
+        if self._analyzer is None:
+            with self._lock:
+                if self._analyzer is None:
+                    self._analyzer = self._factory()
+        return self._analyzer
@@ -0,0 +1,110 @@
+"""Bounded, deduplicating fan-out for analyzing many resumes at once.
+
+run_batch takes (id, resume_text) pairs and an async analyze function, runs
+at most ``concurrency`` analyses at a time, and yields one JSON-ready record
+per input as soon as it finishes, followed by a summary record. Inputs whose
+normalized text is identical are analyzed once and the result is reported for
+every id that submitted it.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from .cache import normalize_text
+
+BatchItem = Tuple[str, str]
+
+
+def _content_hash(resume_text: str) -> str:
+    return hashlib.sha256(normalize_text(resume_text).encode("utf-8")).hexdigest()
+
+
+def _jsonable(result):
+    return result.dict() if hasattr(result, "dict") else result
+
+
+async def run_batch(items: Iterable[BatchItem], analyze: Callable[[str], Awaitable], concurrency: int = 8) -> AsyncIterator[dict]:
+    """Analyze every item with at most ``concurrency`` calls in flight, yielding records as they finish"""
+    groups: Dict[str, List[str]] = {}
+    texts: Dict[str, str] = {}
+    empty: List[str] = []
+    total = 0
+    for item_id, resume_text in items:
+        total += 1
+        if not resume_text or not resume_text.strip():
+            empty.append(item_id)
+            continue
+        key = _content_hash(resume_text)
+        groups.setdefault(key, []).append(item_id)
+        texts.setdefault(key, resume_text)
+
+    pending: asyncio.Queue = asyncio.Queue()
+    for key in groups:
+        pending.put_nowait(key)
+    finished: asyncio.Queue = asyncio.Queue()
+
+    async def worker():
+        while True:
+            try:
+                key = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                record = {"status": "ok", "analysis": _jsonable(await analyze(texts[key]))}
+            except Exception as e:
+                record = {"status": "error", "error": getattr(e, "detail", None) or str(e)}
+            record["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            await finished.put((key, record))
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(groups))))]
+    batch_start = time.perf_counter()
+    failures = len(empty)
+    try:
+        for item_id in empty:
+            yield {"type": "result", "id": item_id, "status": "error", "error": "Resume text cannot be empty", "latency_ms": 0.0}
+        for _ in range(len(groups)):
+            key, record = await finished.get()
+            ids = groups[key]
+            for position, item_id in enumerate(ids):
+                if record["status"] == "error":
+                    failures += 1
+                line = {"type": "result", "id": item_id, **record}
+                if position:
+                    line["duplicate_of"] = ids[0]
+                yield line
+    finally:
+        for task in workers:
+            task.cancel()
+
+    yield {
+        "type": "summary",
+        "items": total,
+        "unique": len(groups),
+        "duplicates": total - len(empty) - len(groups),
+        "failures": failures,
+        "elapsed_ms": round((time.perf_counter() - batch_start) * 1000, 1),
+    }
+
+
+def iter_jsonl_items(lines: Iterable[str]) -> Iterator[BatchItem]:
+    """Read {"id": ..., "resume_text": ...} records; ids default to the line number"""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        yield str(record.get("id", number)), record["resume_text"]
+
+
+def iter_directory_items(directory: str, read_file: Callable[[str], str]) -> Iterator[BatchItem]:
+    """Yield every readable resume file in a directory, keyed by file name"""
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            continue
+        resume_text = read_file(path)
+        if resume_text:
+            yield name, resume_text
@@ -0,0 +1,214 @@
+"""Content-addressed cache for resume analyses.
+
+Results are keyed on a hash of the whitespace-normalized resume text plus
+everything else that changes the model output (model name, prompt version and
+temperature), so resubmitting the same resume skips the LLM round trip.
+
+Backends only deal in JSON strings; pick one with ANALYSIS_CACHE_BACKEND:
+
+- ``memory``   in-process LRU dict (default, survives warm Lambda invocations)
+- ``sqlite``   a local SQLite file shared by processes on one machine
+- ``dynamodb`` a DynamoDB table shared by every Lambda container
+- ``none``     caching disabled
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def normalize_text(text: str) -> str:
+    """Collapse every run of whitespace so formatting-only edits hit the cache"""
+    return " ".join(text.split())
+
+
+def cache_key(resume_text: str, model: str, prompt_version: str, temperature: float) -> str:
+    """Hash the normalized resume together with the settings that shape the output"""
+    material = "\x00".join([normalize_text(resume_text), model, prompt_version, repr(float(temperature))])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheBackend:
+    """Thread-safe in-process LRU store"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """SQLite file store with TTL expiry and least-recently-used eviction"""
+
+    def __init__(self, path: str = ".analysis_cache.sqlite3", max_entries: int = 10000):
+        import sqlite3
+
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS analysis_cache_accessed ON analysis_cache (accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return value
+
+    def set(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, time.time()),
+            )
+            self._conn.execute(
+                "DELETE FROM analysis_cache WHERE key IN ("
+                " SELECT key FROM analysis_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis_cache")
+
+
+class DynamoDBCacheBackend:
+    """DynamoDB table shared by all Lambda containers.
+
+    Expiry relies on the table's native TTL attribute (``expires_at``), and
+    capacity is bounded by that TTL rather than LRU eviction.
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self._table = None
+
+    @property
+    def table(self):
+        # boto3 is bundled in the Lambda runtime but slow to import, so defer it
+        # until the first analysis instead of paying for it on every cold start
+        if self._table is None:
+            import boto3
+
+            self._table = boto3.resource("dynamodb").Table(self.table_name)
+        return self._table
+
+    def get(self, key: str) -> Optional[str]:
+        item = self.table.get_item(Key={"key": key}).get("Item")
+        if item is None:
+            return None
+        expires_at = item.get("expires_at")
+        # DynamoDB deletes expired items lazily, so double-check the deadline
+        if expires_at is not None and float(expires_at) <= time.time():
+            return None
+        return item["value"]
+
+    def set(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        item = {"key": key, "value": value}
+        if expires_at is not None:
+            item["expires_at"] = int(expires_at)
+        self.table.put_item(Item=item)
+
+    def clear(self) -> None:
+        """Delete every item; the table holds only this cache, so a paginated key scan finds them all"""
+        scan = {"ProjectionExpression": "#k", "ExpressionAttributeNames": {"#k": "key"}}
+        with self.table.batch_writer() as batch:
+            while True:
+                page = self.table.scan(**scan)
+                for item in page.get("Items", []):
+                    batch.delete_item(Key={"key": item["key"]})
+                if "LastEvaluatedKey" not in page:
+                    break
+                scan["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+
+class AnalysisCache:
+    """Stores analyses as plain dicts so every entry point can rebuild its own model"""
+
+    def __init__(self, backend, ttl: Optional[float] = 24 * 60 * 60):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            # A broken cache must never fail an analysis
+            print(f"Cache read failed: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, data: dict) -> None:
+        expires_at = time.time() + self.ttl if self.ttl else None
+        try:
+            self.backend.set(key, json.dumps(data), expires_at)
+        except Exception as e:
+            print(f"Cache write failed: {e}")
+
+
+def cache_from_env() -> Optional[AnalysisCache]:
+    """Build the cache configured by the ANALYSIS_CACHE_* environment variables"""
+    kind = os.getenv("ANALYSIS_CACHE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("ANALYSIS_CACHE_TTL", 24 * 60 * 60)) or None
+    max_entries = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "1024"))
+
+    if kind == "none":
+        return None
+    if kind == "memory":
+        backend = MemoryCacheBackend(max_entries=max_entries)
+    elif kind == "sqlite":
+        backend = SQLiteCacheBackend(os.getenv("ANALYSIS_CACHE_PATH", ".analysis_cache.sqlite3"), max_entries=max_entries)
+    elif kind == "dynamodb":
+        backend = DynamoDBCacheBackend(os.environ["ANALYSIS_CACHE_TABLE"])
+    else:
+        raise ValueError(f"Unknown ANALYSIS_CACHE_BACKEND: {kind}")
+    return AnalysisCache(backend, ttl=ttl)
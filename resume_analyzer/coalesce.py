@@ -0,0 +1,77 @@
+"""Single-flight coalescing of identical in-flight analyses.
+
+A double-submitted form or a batch with duplicate resumes would otherwise
+start one LLM call per copy before the first one reaches the cache. With
+SingleFlight the first caller for a key runs the call and every caller that
+arrives while it is in flight waits for that result instead. Once the call
+finishes the key is released, so later requests go to the cache as before.
+
+The async call runs in its own task: a caller that disconnects does not
+cancel the answer the others are waiting for. asyncio is imported on the
+first async call only; it pulls in ssl and sockets, which would add tens of
+milliseconds to every serverless cold start.
+"""
+import threading
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its result"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[Tuple[int, str], Any] = {}
+        self._lock = threading.Lock()
+        self.saved = 0
+
+    def _count_saved(self) -> None:
+        with self._lock:
+            self.saved += 1
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return ``(fn(), shared)``; ``shared`` is True when another thread's call was reused"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            self._count_saved()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async do(): ``fn`` is a coroutine function, awaited once per key and event loop"""
+        import asyncio
+
+        task_key = (id(asyncio.get_running_loop()), key)
+        task = self._tasks.get(task_key)
+        shared = task is not None
+        if shared:
+            self._count_saved()
+        else:
+            task = self._tasks[task_key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(task_key, None))
+        return await asyncio.shield(task), shared
+
+    def in_flight(self) -> int:
+        return len(self._calls) + len(self._tasks)
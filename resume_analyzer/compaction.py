@@ -0,0 +1,205 @@
+"""Shrink a resume to what the model needs before it is put in the prompt.
+
+Every resume goes through the cheap, lossless-for-analysis steps:
+
+- whitespace is normalized and runs of blank lines collapsed
+- lines repeated verbatim (page headers, footers, copy-paste doubles) are
+  kept once
+- boilerplate such as "Page 2 of 3" and "References available upon request"
+  is dropped
+- contact lines (email, phone, URLs) become a single "Contact: ..." line that
+  tells the model which details exist without spending tokens on them
+- given the sections a prompt reads (prompts.PROMPT_SECTIONS), every other
+  recognised section is reduced to its header, using the cached parse from
+  sections.py
+
+If the result is still over RESUME_TOKEN_BUDGET (default 2000, 0 disables the
+budget), low-value sections (references, hobbies, personal details) are
+reduced to their headers, then the longest remaining sections lose their
+oldest lines, and as a last resort the text is cut at the budget.
+
+Token counts are estimated at four characters per token, which is close
+enough for English text on the models used here and needs no tokenizer.
+"""
+import math
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .sections import LOW_VALUE_SECTIONS, section_kind, segment, select_sections
+
+TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "2000"))
+CHARS_PER_TOKEN = 4
+
+# Sections never shortened: they are short and carry most of the keywords
+PROTECTED_SECTIONS = ("summary", "skills")
+MIN_SECTION_LINES = 3
+
+_BOILERPLATE_RE = re.compile(
+    r"^(?:page \d+(?: of \d+)?|\d+ of \d+|curriculum vitae|resume|cv"
+    r"|(?:references|referees)(?: are)? available (?:up)?on request\.?"
+    r"|i hereby declare\b.*)$"
+)
+_CONTACT_PATTERNS = {
+    "email": re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"),
+    "phone": re.compile(r"\+?\(?\d[\d\s().-]{7,}\d"),
+    "linkedin": re.compile(r"(?:https?://)?(?:www\.)?linkedin\.com/\S*", re.IGNORECASE),
+    "github": re.compile(r"(?:https?://)?(?:www\.)?github\.com/\S*", re.IGNORECASE),
+    "website": re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE),
+}
+_CONTACT_LABEL_RE = re.compile(r"\b(?:e-?mail|phone|tel|mobile|cell|linkedin|github|website|portfolio|web)\s*:?",
+                               re.IGNORECASE)
+_SEPARATORS_RE = re.compile(r"[|•·,;/]+")
+_SPACES_RE = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _contact_kinds(line: str) -> Optional[List[str]]:
+    """The contact details on a line, or None if the line is more than contact info"""
+    lowered = line.lower()
+    # Substring checks rule out almost every line before any regex runs
+    candidates = {
+        "email": "@" in line,
+        "phone": sum(ch.isdigit() for ch in line) >= 9,
+        "linkedin": "linkedin" in lowered,
+        "github": "github" in lowered,
+        "website": "http" in lowered or "www." in lowered,
+    }
+    kinds, rest = [], line
+    for kind, pattern in _CONTACT_PATTERNS.items():
+        if not candidates[kind]:
+            continue
+        found = [match for match in pattern.findall(rest)
+                 if kind != "phone" or sum(ch.isdigit() for ch in match) >= 9]  # not "2019 - 2021"
+        for match in found:
+            rest = rest.replace(match, " ")
+        if found:
+            kinds.append(kind)
+    if not kinds:
+        return None
+    rest = _SEPARATORS_RE.sub(" ", _CONTACT_LABEL_RE.sub(" ", rest))
+    # A city or a name may share the line; a sentence may not
+    return kinds if len(rest.split()) <= 4 else None
+
+
+def normalize_lines(resume_text: str) -> List[str]:
+    """Whitespace, duplicate, boilerplate and contact clean-up, one line per entry"""
+    lines: List[str] = []
+    seen = set()
+    contact_at, contact_kinds = None, []
+    first_line = None
+    for raw in resume_text.splitlines():
+        line = _SPACES_RE.sub(" ", raw).strip()
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        folded = line.casefold()
+        if _BOILERPLATE_RE.match(folded):
+            continue
+        kinds = _contact_kinds(line)
+        if kinds:
+            if contact_at is None:
+                contact_at = len(lines)
+                lines.append(None)
+            contact_kinds.extend(kind for kind in kinds if kind not in contact_kinds)
+            continue
+        # Short labels such as "Responsibilities:" legitimately repeat; the name
+        # repeated as a page header does not
+        if folded in seen and (folded == first_line or len(line.split()) > 3):
+            continue
+        seen.add(folded)
+        first_line = first_line or folded
+        lines.append(line)
+    if contact_at is not None:
+        lines[contact_at] = "Contact: " + ", ".join(contact_kinds)
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def _split_blocks(lines: List[str]) -> List[Tuple[Optional[str], List[str]]]:
+    """(section, lines) runs; the header line is the first line of its block"""
+    blocks: List[Tuple[Optional[str], List[str]]] = [(None, [])]
+    for line in lines:
+        section = section_kind(line) if line else None
+        if section:
+            blocks.append((section, [line]))
+        else:
+            blocks[-1][1].append(line)
+    return blocks
+
+
+def _tokens(lines: List[str]) -> int:
+    # Each line costs its text plus the newline joining it to the next
+    return sum(estimate_tokens(line + "\n") for line in lines)
+
+
+def compress_sections(lines: List[str], token_budget: int) -> Tuple[List[str], List[str]]:
+    """Shorten low-value, then the longest, sections until the text fits the budget"""
+    blocks = _split_blocks(lines)
+    sizes = [_tokens(block) for _, block in blocks]
+    total = sum(sizes)
+    compressed: List[str] = []
+
+    for i, (section, block) in enumerate(blocks):
+        if total <= token_budget:
+            break
+        if section in LOW_VALUE_SECTIONS and len(block) > 1:
+            blocks[i] = (section, [block[0] + " (omitted)"])
+            total += _tokens(blocks[i][1]) - sizes[i]
+            sizes[i] = _tokens(blocks[i][1])
+            compressed.append(section)
+
+    # Later lines of a section are usually the oldest roles and least relevant details
+    while total > token_budget:
+        candidates = [i for i, (section, block) in enumerate(blocks)
+                      if section not in PROTECTED_SECTIONS and len(block) > MIN_SECTION_LINES]
+        if not candidates:
+            break
+        i = max(candidates, key=sizes.__getitem__)
+        section, block = blocks[i]
+        removed = block.pop()
+        sizes[i] -= estimate_tokens(removed + "\n")
+        total -= estimate_tokens(removed + "\n")
+        if (section or "header") not in compressed:
+            compressed.append(section or "header")
+
+    return [line for _, block in blocks for line in block], compressed
+
+
+def compact_resume(resume_text: str, token_budget: int = TOKEN_BUDGET,
+                   sections: Optional[Iterable[str]] = None) -> Tuple[str, Dict]:
+    """Return the text to send to the model and what compaction saved.
+
+    ``sections`` lists the section kinds the prompt reads; None sends them all
+    """
+    original_tokens = estimate_tokens(resume_text)
+    found = segment(resume_text).kinds
+    omitted: List[str] = []
+    if sections is not None:
+        resume_text, omitted = select_sections(resume_text, sections)
+    lines = normalize_lines(resume_text)
+    compressed: List[str] = []
+    if token_budget and _tokens(lines) > token_budget:
+        lines, compressed = compress_sections(lines, token_budget)
+    text = "\n".join(lines)
+
+    truncated = bool(token_budget) and estimate_tokens(text) > token_budget
+    if truncated:
+        cut = text[:token_budget * CHARS_PER_TOKEN]
+        text = cut[:cut.rfind("\n")] if "\n" in cut else cut
+
+    tokens = estimate_tokens(text)
+    return text, {
+        "original_tokens": original_tokens,
+        "tokens": tokens,
+        "tokens_saved": original_tokens - tokens,
+        "sections": found,
+        "omitted_sections": omitted,
+        "compressed_sections": compressed,
+        "truncated": truncated,
+    }
@@ -0,0 +1,427 @@
+"""The analysis engine the entry points are thin adapters over.
+
+AnalysisEngine owns what each handler used to set up for itself - the
+provider list, temperature, prompt version (and the resume sections it
+reads), analysis cache and analysis mode - and runs every analysis the same
+way:
+
+    compaction -> fast mode, cache or near-duplicate lookup -> LLM
+    -> repair and validation -> cache store -> hybrid local scores
+
+A resume that misses the cache but is nearly identical to one analyzed
+before (a typo fixed, bullets reordered) reuses that analysis; see
+neardup.py. analyze_incremental() re-analyzes an edited resume from its
+previous text and analysis, sending the model only the changed sections; see
+incremental.py.
+
+Concurrent analyses of the same compacted resume (same cache key, so same
+prompt version and provider list) share one LLM call; see coalesce.py. Every
+LLM call goes through the engine's RateLimiter (ratelimit.py), which may
+delay it, retry it, or refuse it with Overloaded.
+
+The async paths run compaction, the cache and near-duplicate lookups and the
+cache store in a worker thread (asyncio.to_thread): the sqlite and dynamodb
+cache backends block on I/O, and the event loop must not.
+
+The LLM client, parser and prompts are built once, on the first analysis or
+by preload(). Building imports LangChain, so a serverless handler whose
+cheap routes never analyze anything never pays for it. Adapters keep only
+their transport: request parsing, status codes, response envelopes and SSE
+framing.
+"""
+import json
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from .analyzer import Analyzer, LazyAnalyzer
+from .cache import cache_from_env, cache_key
+from .coalesce import SingleFlight
+from .compaction import compact_resume, estimate_tokens
+from .incremental import (MAX_CHANGED_SHARE, MIN_SAVING, TOP, changed_lines, diff_sections, merge, report,
+                          update_variables)
+from .metrics import ANALYSES, CACHE_LOOKUPS, COALESCED, PHASE_SECONDS
+from .neardup import fingerprint, index_from_env
+from .prompts import (DEFAULT_PROMPT_VERSION, PROMPT_SECTIONS, PROMPTS, UPDATE_FORMAT_INSTRUCTIONS,
+                      UPDATE_PROMPT_VERSION, build_prompt)
+from .providers import configured_providers, llm_from_env
+from .ratelimit import limiter_from_env
+from .scoring import analysis_mode, apply_local_scores, fast_analysis, local_scores
+from .timing import PhaseTimer
+
+TEMPERATURE = 0.7
+
+
+class AnalysisEngine:
+    """One entry point's analysis configuration and its lazily built analyzer"""
+
+    def __init__(self, providers: str, temperature: float = TEMPERATURE,
+                 prompt_version: str = DEFAULT_PROMPT_VERSION):
+        self.providers = providers
+        self.temperature = temperature
+        self.prompt_version = os.getenv("ANALYSIS_PROMPT", prompt_version)
+        if self.prompt_version not in PROMPTS or self.prompt_version == UPDATE_PROMPT_VERSION:
+            raise ValueError(f"Unknown prompt version: {self.prompt_version!r}")
+        # Sections the prompt reads; compaction reduces the rest to their headers
+        self.sections = PROMPT_SECTIONS.get(self.prompt_version)
+        self.cache = cache_from_env()
+        # Cache keys of recent analyses by resume fingerprint, for near-duplicate reuse
+        self.near_duplicates = index_from_env() if self.cache else None
+        # full: LLM scores everything; hybrid: local keyword/ATS/format subscores and missing keywords; fast: no LLM
+        self.mode = analysis_mode()
+        # Set by use_llm(); otherwise the clients come from the provider list
+        self.llm = None
+        # Identical analyses in flight at the same time make one LLM call
+        self.inflight = SingleFlight()
+        # Requests and tokens per minute toward the provider, adapted to its 429s
+        self.rate_limiter = limiter_from_env()
+        # Looked up on every build so build_analyzer can be wrapped per instance
+        self._analyzer = LazyAnalyzer(lambda: self.build_analyzer())
+        self._update_analyzer = LazyAnalyzer(lambda: self.build_update_analyzer())
+        # Tokens of the full prompt around the resume, worked out on the first incremental analysis
+        self._full_prompt_tokens = None
+
+    def build_analyzer(self) -> Analyzer:
+        """Create the LLM client(s), parser and prompts"""
+        from .repair import RepairingOutputParser
+        from .schema import STREAM_FIELD_ORDER, ResumeAnalysis
+
+        llm = self.llm or llm_from_env(self.providers, self.temperature, json_mode=True)
+        # Repairs near-miss JSON locally instead of failing the analysis
+        parser = RepairingOutputParser(pydantic_object=ResumeAnalysis)
+        instructions = parser.get_format_instructions()
+        return Analyzer(llm, build_prompt(self.prompt_version, instructions), parser,
+                        stream_prompt=build_prompt(self.prompt_version, instructions, STREAM_FIELD_ORDER))
+
+    def build_update_analyzer(self) -> Analyzer:
+        """The incremental update prompt and parser, on the analyzer's LLM client(s)"""
+        from .repair import RepairingOutputParser
+        from .schema import SectionUpdate
+
+        parser = RepairingOutputParser(pydantic_object=SectionUpdate)
+        return Analyzer(self.analyzer().llm, build_prompt(UPDATE_PROMPT_VERSION, UPDATE_FORMAT_INSTRUCTIONS),
+                        parser, llm_phase="llm_update")
+
+    def analyzer(self) -> Analyzer:
+        return self._analyzer.get()
+
+    def preload(self) -> None:
+        """Build the analyzer now rather than on the first analysis"""
+        self._analyzer.get()
+
+    def use_llm(self, llm) -> None:
+        """Send every later analysis to ``llm`` (benchmarks pass a stub)"""
+        self.llm = llm
+        self._analyzer = LazyAnalyzer(lambda: self.build_analyzer())
+        self._update_analyzer = LazyAnalyzer(lambda: self.build_update_analyzer())
+
+    def has_llm(self) -> bool:
+        return self.llm is not None or bool(configured_providers(self.providers))
+
+    def cache_key(self, compacted: str) -> str:
+        return cache_key(compacted, self.providers, self.prompt_version, self.temperature)
+
+    def cached(self, compacted: str):
+        """A previous analysis of the same (compacted) resume, if one is cached"""
+        if not self.cache:
+            return None
+        from .schema import ResumeAnalysis
+        cached = self.cache.get(self.cache_key(compacted))
+        return ResumeAnalysis(**cached) if cached else None
+
+    def store(self, compacted: str, analysis) -> None:
+        if self.cache:
+            key = self.cache_key(compacted)
+            self.cache.set(key, analysis.dict())
+            if self.near_duplicates:
+                self.near_duplicates.add(key, fingerprint(compacted))
+
+    def near_duplicate(self, compacted: str):
+        """A cached analysis of a resume nearly identical to this one and its similarity, or None"""
+        if not (self.cache and self.near_duplicates):
+            return None
+        match = self.near_duplicates.query(fingerprint(compacted))
+        if not match:
+            return None
+        key, similarity = match
+        cached = self.cache.get(key)
+        if not cached:
+            # Expired or evicted from the cache since it was indexed
+            self.near_duplicates.discard(key)
+            return None
+        from .schema import ResumeAnalysis
+        self.near_duplicates.record_hit()
+        return ResumeAnalysis(**cached), similarity
+
+    def finish(self, resume_text: str, analysis):
+        """In hybrid mode, swap the LLM's mechanical subscores for deterministic local ones,
+        scored for the analysis's own target_industry"""
+        if self.mode != "hybrid":
+            return analysis
+        scores = local_scores(resume_text, analysis.target_industry)
+        return type(analysis)(**apply_local_scores(analysis.dict(), scores))
+
+    def compact(self, resume_text: str):
+        """The text this engine's prompt is given, and what compaction saved"""
+        return compact_resume(resume_text, sections=self.sections)
+
+    def lookup(self, resume_text: str, compacted: str, timer: Optional[PhaseTimer] = None,
+               info: Optional[Dict] = None):
+        """The analysis if it needs no LLM call (fast mode, a cache hit or a near duplicate), else None.
+
+        A near-duplicate answer sets "source" and "similarity" in ``info``
+        """
+        timer = timer or PhaseTimer()
+        if self.mode == "fast":
+            from .schema import ResumeAnalysis
+            ANALYSES.inc(source="fast", status="ok")
+            return ResumeAnalysis(**fast_analysis(resume_text))
+        with timer.phase("cache_lookup"):
+            cached = self.cached(compacted)
+        if self.cache:
+            CACHE_LOOKUPS.inc(result="hit" if cached else "miss")
+        if cached:
+            ANALYSES.inc(source="cache", status="ok")
+            return self.finish(resume_text, cached)
+        with timer.phase("near_duplicate_lookup"):
+            near = self.near_duplicate(compacted)
+        if not near:
+            return None
+        ANALYSES.inc(source="near_duplicate", status="ok")
+        if info is not None:
+            info.update(source="near_duplicate", similarity=round(near[1], 3))
+        # Hybrid mode rescores the new text, so fixed keywords and sections still count
+        return self.finish(resume_text, near[0])
+
+    def parse_stream(self, resume_text: str, compacted: str, text: str, timer: Optional[PhaseTimer] = None):
+        """Validate, cache and finish the joined text of a streamed answer"""
+        timer = timer or PhaseTimer()
+        try:
+            with timer.phase("output_parse"):
+                analysis = self.analyzer().parser.parse(text)
+        except Exception:
+            ANALYSES.inc(source="llm", status="error")
+            raise
+        ANALYSES.inc(source="llm", status="ok")
+        self.store(compacted, analysis)
+        return self.finish(resume_text, analysis)
+
+    def _start(self, resume_text: str, timer: PhaseTimer):
+        """Compact the resume and answer from fast mode, the cache or a near duplicate when possible"""
+        # The model only sees the compacted text; local scoring uses the original
+        with timer.phase("compaction"):
+            compacted, compaction = self.compact(resume_text)
+        info = {"compaction": compaction}
+        ready = self.lookup(resume_text, compacted, timer, info)
+        source = info.get("source") or (("fast" if self.mode == "fast" else "cache") if ready else "llm")
+        info.update(cached=source in ("cache", "near_duplicate"), source=source)
+        return compacted, ready, info
+
+    async def aprepare(self, resume_text: str, timer: Optional[PhaseTimer] = None):
+        """Compact and look up the resume off the event loop; returns (compacted, analysis or None, info)"""
+        import asyncio
+
+        return await asyncio.to_thread(self._start, resume_text, timer or PhaseTimer())
+
+    def _llm_analyzer(self, timer: PhaseTimer, lazy: Optional[LazyAnalyzer] = None) -> Analyzer:
+        if not self.has_llm():
+            raise RuntimeError("No LLM provider API key configured")
+        # Only the first analysis in a process pays for building the client
+        with timer.phase("setup"):
+            return (lazy or self._analyzer).get()
+
+    def _call_llm(self, compacted: str, timer: PhaseTimer, wait: bool = False):
+        try:
+            analyzer = self._llm_analyzer(timer)
+            analysis = self.rate_limiter.call(lambda: analyzer.analyze(compacted, timer),
+                                              estimate_tokens(compacted), timer, wait)
+        except Exception:
+            ANALYSES.inc(source="llm", status="error")
+            raise
+        ANALYSES.inc(source="llm", status="ok")
+        self.store(compacted, analysis)
+        return analysis
+
+    async def _acall_llm(self, compacted: str, timer: PhaseTimer, limiter=None, wait: bool = False):
+        import asyncio
+
+        async def call():
+            if limiter is None:
+                return await analyzer.aanalyze(compacted, timer)
+            # Not held during rate-limit waits and retry backoff
+            async with limiter:
+                return await analyzer.aanalyze(compacted, timer)
+
+        try:
+            analyzer = self._llm_analyzer(timer)
+            analysis = await self.rate_limiter.acall(call, estimate_tokens(compacted), timer, wait)
+        except Exception:
+            ANALYSES.inc(source="llm", status="error")
+            raise
+        ANALYSES.inc(source="llm", status="ok")
+        await asyncio.to_thread(self.store, compacted, analysis)
+        return analysis
+
+    def _shared(self, info: Dict, timer: PhaseTimer, start: float) -> None:
+        # Only the caller that made the LLM call has its phases; the rest waited
+        timer.record("coalesced_wait", time.perf_counter() - start)
+        COALESCED.inc()
+        ANALYSES.inc(source="coalesced", status="ok")
+        info["source"] = "coalesced"
+
+    def analyze(self, resume_text: str, timer: Optional[PhaseTimer] = None,
+                wait: bool = False) -> Tuple[object, Dict]:
+        """Analyze a resume; returns the analysis and {"compaction", "cached", "source"}
+        (plus "similarity" when a near duplicate's analysis was reused).
+
+        Raises Overloaded when the LLM has no capacity soon, unless ``wait``
+        (for batch and job callers) says to wait for it however long it takes
+        """
+        timer = timer or PhaseTimer()
+        compacted, ready, info = self._start(resume_text, timer)
+        if ready:
+            return ready, info
+        start = time.perf_counter()
+        analysis, shared = self.inflight.do(self.cache_key(compacted), lambda: self._call_llm(compacted, timer, wait))
+        if shared:
+            self._shared(info, timer, start)
+        return self.finish(resume_text, analysis), info
+
+    async def aanalyze(self, resume_text: str, timer: Optional[PhaseTimer] = None,
+                       limiter=None, wait: bool = False) -> Tuple[object, Dict]:
+        """Async analyze(); ``limiter`` (e.g. a semaphore) is held only around the LLM call"""
+        timer = timer or PhaseTimer()
+        compacted, ready, info = await self.aprepare(resume_text, timer)
+        if ready:
+            return ready, info
+        start = time.perf_counter()
+        analysis, shared = await self.inflight.ado(self.cache_key(compacted),
+                                                   lambda: self._acall_llm(compacted, timer, limiter, wait))
+        if shared:
+            self._shared(info, timer, start)
+        return self.finish(resume_text, analysis), info
+
+    def _full_tokens(self, compacted: str, previous: dict) -> int:
+        """Estimated tokens of a full analysis of ``compacted``: its prompt and an answer the size of ``previous``"""
+        if self._full_prompt_tokens is None:
+            from .repair import RepairingOutputParser
+            from .schema import ResumeAnalysis
+
+            system, user = PROMPTS[self.prompt_version]
+            instructions = RepairingOutputParser(pydantic_object=ResumeAnalysis).get_format_instructions()
+            self._full_prompt_tokens = estimate_tokens(system.replace("{format_instructions}", instructions) + user)
+        return self._full_prompt_tokens + estimate_tokens(compacted) + estimate_tokens(json.dumps(previous))
+
+    def _incremental_start(self, resume_text: str, previous_text: str, previous: dict, timer: PhaseTimer):
+        """Compact both texts and diff them; returns the compacted text, the diff, the update request
+        (None when nothing changed) and why to run a full analysis instead"""
+        with timer.phase("compaction"):
+            compacted, compaction = self.compact(resume_text)
+            previous_compacted, _ = self.compact(previous_text)
+        with timer.phase("section_diff"):
+            diff = diff_sections(previous_compacted, compacted)
+        request = self._update_request(compacted, previous_compacted, previous, diff)
+        reason = None
+        if self.mode == "fast":
+            reason = "fast mode"
+        elif diff.share > MAX_CHANGED_SHARE:
+            reason = f"{diff.share:.0%} of the resume changed"
+        elif request is not None:
+            saving = 1 - request[2] / self._full_tokens(compacted, previous)
+            if saving < MIN_SAVING:
+                reason = f"an update would save {saving:.0%} of the tokens"
+        return compacted, {"compaction": compaction}, diff, request, reason
+
+    def _update_request(self, compacted: str, previous_compacted: str, previous: dict, diff):
+        """The edited lines, the prompt's other variables and the tokens of the prompt and its answer"""
+        if not (diff.changed or diff.removed):
+            return None
+        text = changed_lines(previous_compacted, compacted, [kind for kind in diff.changed if kind != TOP])
+        variables = update_variables(previous, diff.removed)
+        system, user = PROMPTS[UPDATE_PROMPT_VERSION]
+        # The answer restates about as much as the previous analysis the prompt shows
+        tokens = (estimate_tokens(system.replace("{format_instructions}", UPDATE_FORMAT_INSTRUCTIONS) + user)
+                  + estimate_tokens(text) + 2 * estimate_tokens(variables["previous_analysis"]))
+        return text, variables, tokens
+
+    def _incremental_finish(self, resume_text: str, compacted: str, previous: dict, update, diff, info: Dict,
+                            timer: PhaseTimer, tokens_before: float, start: float) -> Tuple[object, Dict]:
+        from .schema import ResumeAnalysis
+
+        latency = time.perf_counter() - start
+        if update is None:
+            analysis, tokens_sent = ResumeAnalysis(**previous), 0
+        else:
+            analysis = ResumeAnalysis(**merge(previous, update.dict()))
+            tokens_sent = int(timer.counts.get("prompt_tokens", 0) + timer.counts.get("completion_tokens", 0)
+                              - tokens_before)
+        # What the full prompt would have sent and the full analysis it would have written back
+        info.update(cached=update is None, source="incremental",
+                    incremental=report(diff, self._full_tokens(compacted, previous), tokens_sent, latency,
+                                       PHASE_SECONDS.mean(phase="llm")))
+        return self.finish(resume_text, analysis), info
+
+    def analyze_incremental(self, resume_text: str, previous_text: str, previous_analysis: dict,
+                            timer: Optional[PhaseTimer] = None, wait: bool = False) -> Tuple[object, Dict]:
+        """Re-analyze an edited resume given its previous text and analysis, querying the model
+        only for the changed sections; info["incremental"] reports what that saved.
+
+        Falls back to analyze() in fast mode, when most of the resume changed or when the update would save
+        too few tokens
+        """
+        timer = timer or PhaseTimer()
+        compacted, info, diff, request, reason = self._incremental_start(resume_text, previous_text,
+                                                                         previous_analysis, timer)
+        if reason:
+            analysis, info = self.analyze(resume_text, timer, wait)
+            info["incremental"] = {"mode": "full", "reason": reason, "sections_changed": diff.changed}
+            return analysis, info
+        tokens_before = timer.counts.get("prompt_tokens", 0) + timer.counts.get("completion_tokens", 0)
+        start = time.perf_counter()
+        update = None
+        if request is not None:
+            text, variables, tokens = request
+            try:
+                analyzer = self._llm_analyzer(timer, self._update_analyzer)
+                update = self.rate_limiter.call(lambda: analyzer.analyze(text, timer, **variables), tokens, timer, wait)
+            except Exception:
+                ANALYSES.inc(source="incremental", status="error")
+                raise
+        ANALYSES.inc(source="incremental", status="ok")
+        return self._incremental_finish(resume_text, compacted, previous_analysis, update, diff, info, timer,
+                                        tokens_before, start)
+
+    async def aanalyze_incremental(self, resume_text: str, previous_text: str, previous_analysis: dict,
+                                   timer: Optional[PhaseTimer] = None, limiter=None,
+                                   wait: bool = False) -> Tuple[object, Dict]:
+        """Async analyze_incremental(); ``limiter`` is held only around the LLM call"""
+        import asyncio
+
+        timer = timer or PhaseTimer()
+        compacted, info, diff, request, reason = await asyncio.to_thread(self._incremental_start, resume_text,
+                                                                         previous_text, previous_analysis, timer)
+        if reason:
+            analysis, info = await self.aanalyze(resume_text, timer, limiter, wait)
+            info["incremental"] = {"mode": "full", "reason": reason, "sections_changed": diff.changed}
+            return analysis, info
+        tokens_before = timer.counts.get("prompt_tokens", 0) + timer.counts.get("completion_tokens", 0)
+        start = time.perf_counter()
+        update = None
+        if request is not None:
+            text, variables, tokens = request
+
+            async def call():
+                if limiter is None:
+                    return await analyzer.aanalyze(text, timer, **variables)
+                async with limiter:
+                    return await analyzer.aanalyze(text, timer, **variables)
+
+            try:
+                analyzer = self._llm_analyzer(timer, self._update_analyzer)
+                update = await self.rate_limiter.acall(call, tokens, timer, wait)
+            except Exception:
+                ANALYSES.inc(source="incremental", status="error")
+                raise
+        ANALYSES.inc(source="incremental", status="ok")
+        return self._incremental_finish(resume_text, compacted, previous_analysis, update, diff, info, timer,
+                                        tokens_before, start)
@@ -0,0 +1,213 @@
+"""Bounded text extraction from PDF and DOCX resumes.
+
+Documents are read one page (PDF) or one paragraph (DOCX) at a time and
+extraction stops as soon as the page or character budget is spent, so a
+200-page upload costs no more than the first few pages and nothing past the
+budget ever reaches the LLM. Memory is capped as well: files over
+MAX_FILE_BYTES are refused up front, and the DOCX XML is parsed
+incrementally through a reader that refuses to decompress more than
+MAX_XML_BYTES, which defuses zip bombs whose headers lie about their size.
+
+PDF support needs the optional ``pypdf`` package; DOCX only uses the
+standard library. extract_multipart() reads the upload out of a raw
+multipart/form-data body, for the Vercel and Lambda handlers, which have no
+form parser of their own. Limits come from the environment:
+
+    EXTRACT_MAX_FILE_BYTES   default 10 MB
+    EXTRACT_MAX_PAGES        default 10
+    EXTRACT_MAX_CHARS        default 30000
+"""
+import io
+import os
+import zipfile
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+from xml.etree import ElementTree
+
+MAX_FILE_BYTES = int(os.getenv("EXTRACT_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "10"))
+MAX_CHARS = int(os.getenv("EXTRACT_MAX_CHARS", "30000"))
+MAX_XML_BYTES = 8 * MAX_FILE_BYTES
+
+SUPPORTED_FORMATS = ("pdf", "docx", "txt")
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+Source = Union[str, BinaryIO]
+Page = Tuple[int, str]
+
+
+class ExtractionError(ValueError):
+    """The document is unsupported, malformed or over the size limits"""
+
+
+def detect_format(filename: Optional[str], head: bytes = b"") -> str:
+    """Format from the file extension, falling back to the magic bytes"""
+    extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if extension in SUPPORTED_FORMATS:
+        return extension
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return "docx"
+    raise ExtractionError("Unsupported file format. Please upload a .pdf, .docx or .txt file.")
+
+
+def _size(stream: BinaryIO) -> int:
+    position = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(position)
+    return size
+
+
+class _LimitedReader:
+    """File-like wrapper that fails once more than ``limit`` bytes have been read"""
+
+    def __init__(self, stream: BinaryIO, limit: int):
+        self._stream = stream
+        self._remaining = limit
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self._remaining -= len(data)
+        if self._remaining < 0:
+            raise ExtractionError("Document content is too large to process")
+        return data
+
+
+def iter_pdf_pages(stream: BinaryIO) -> Iterator[Page]:
+    """Yield (page number, text) for each page; pages are only parsed when reached"""
+    try:
+        from pypdf import PdfReader
+        from pypdf.errors import PyPdfError
+    except ImportError:
+        raise ExtractionError("PDF support requires the pypdf package (pip install pypdf)")
+
+    try:
+        reader = PdfReader(stream)
+        if reader.is_encrypted:
+            raise ExtractionError("Encrypted PDFs are not supported")
+        for number, page in enumerate(reader.pages, 1):
+            yield number, page.extract_text() or ""
+    except ExtractionError:
+        raise
+    except (PyPdfError, ValueError, KeyError) as e:
+        raise ExtractionError(f"Could not read PDF: {e}")
+
+
+def iter_docx_paragraphs(stream: BinaryIO) -> Iterator[Page]:
+    """Yield (page number, text) for each paragraph of word/document.xml.
+
+    Page numbers follow the explicit and last-rendered page breaks Word writes
+    into the document, so they are an estimate for files Word never laid out.
+    """
+    try:
+        archive = zipfile.ZipFile(stream)
+        info = archive.getinfo("word/document.xml")
+    except (zipfile.BadZipFile, KeyError):
+        raise ExtractionError("Not a valid .docx file")
+    if info.file_size > MAX_XML_BYTES:
+        raise ExtractionError("Document content is too large to process")
+
+    page = 1
+    with archive.open(info) as xml:
+        try:
+            for _, element in ElementTree.iterparse(_LimitedReader(xml, MAX_XML_BYTES), events=("end",)):
+                if element.tag != _W + "p":
+                    continue
+                parts = []
+                rendered_breaks = explicit_breaks = 0
+                for node in element.iter():
+                    if node.tag == _W + "t":
+                        parts.append(node.text or "")
+                    elif node.tag == _W + "tab":
+                        parts.append("\t")
+                    elif node.tag == _W + "br" and node.get(_W + "type") == "page":
+                        explicit_breaks += 1
+                    elif node.tag in (_W + "br", _W + "cr"):
+                        parts.append("\n")
+                    elif node.tag == _W + "lastRenderedPageBreak":
+                        rendered_breaks += 1
+                # Word often records the same break both ways
+                page += max(rendered_breaks, explicit_breaks)
+                # Cleared paragraphs keep nested ones (text boxes) from being read twice
+                element.clear()
+                yield page, "".join(parts)
+        except (ElementTree.ParseError, zipfile.BadZipFile) as e:
+            raise ExtractionError(f"Could not read DOCX: {e}")
+
+
+def _iter_text_lines(stream: BinaryIO) -> Iterator[Page]:
+    for line in stream:
+        yield 1, line.decode("utf-8", errors="replace").rstrip("\r\n")
+
+
+def extract_text(source: Source, filename: Optional[str] = None,
+                 max_pages: int = MAX_PAGES, max_chars: int = MAX_CHARS) -> dict:
+    """Extract up to ``max_pages`` pages and ``max_chars`` characters of text.
+
+    ``source`` is a path or a seekable binary file object. Returns the text
+    along with the format, pages read, character count and whether either
+    budget cut the document short.
+    """
+    if isinstance(source, str):
+        filename = filename or source
+        with open(source, "rb") as stream:
+            return extract_text(stream, filename, max_pages, max_chars)
+
+    if _size(source) > MAX_FILE_BYTES:
+        raise ExtractionError(f"File is larger than the {MAX_FILE_BYTES // (1024 * 1024)} MB limit")
+    position = source.tell()
+    file_format = detect_format(filename, source.read(8))
+    source.seek(position)
+
+    if file_format == "pdf":
+        pieces, separator = iter_pdf_pages(source), "\n\n"
+    elif file_format == "docx":
+        pieces, separator = iter_docx_paragraphs(source), "\n"
+    else:
+        pieces, separator = _iter_text_lines(source), "\n"
+
+    parts = []
+    characters = pages = 0
+    truncated = False
+    for page, text in pieces:
+        if page > max_pages:
+            truncated = True
+            break
+        pages = page
+        if characters + len(text) > max_chars:
+            parts.append(text[:max(0, max_chars - characters)])
+            truncated = True
+            break
+        parts.append(text)
+        characters += len(text) + len(separator)
+    pieces.close()
+
+    text = separator.join(parts).strip()
+    return {
+        "text": text,
+        "format": file_format,
+        "pages": pages,
+        "characters": len(text),
+        "truncated": truncated,
+    }
+
+
+def extract_multipart(body: bytes, content_type: Optional[str], field: str = "file") -> dict:
+    """extract_text() of the file uploaded as ``field`` in a multipart/form-data request body"""
+    if not content_type or not content_type.lower().startswith("multipart/form-data"):
+        raise ExtractionError("Expected a multipart/form-data upload with a 'file' field")
+    # The other form fields and the part headers are small; anything far over the file limit is refused unparsed
+    if len(body) > MAX_FILE_BYTES + 64 * 1024:
+        raise ExtractionError(f"File is larger than the {MAX_FILE_BYTES // (1024 * 1024)} MB limit")
+    from email.parser import BytesParser
+    from email.policy import HTTP
+
+    message = BytesParser(policy=HTTP).parsebytes(b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body)
+    if not message.is_multipart():
+        raise ExtractionError("Malformed multipart/form-data body")
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == field:
+            return extract_text(io.BytesIO(part.get_payload(decode=True) or b""), part.get_filename())
+    raise ExtractionError(f"No '{field}' file in the upload")
@@ -0,0 +1,155 @@
+"""Re-analyze an edited resume by sending the model only the sections that changed.
+
+The usual session is analyze -> edit a few lines -> analyze again. Instead of
+re-running the full prompt, diff_sections() compares the compacted new text
+with the compacted previous one section by section (sections.py kinds, the
+top of the resume as TOP). The update prompt (prompts.UPDATE_PROMPT_VERSION)
+gets the top of the resume and, from each changed section, changed_lines():
+its header, its new lines, the entry line (role, degree) each new bullet
+sits under, and the lines it lost. Of the previous analysis it gets only the fields an update
+can change, and its output schema is a short hand-written outline
+(prompts.UPDATE_FORMAT_INSTRUCTIONS) instead of the full JSON schema. Its
+answer (schema.SectionUpdate) rescores the breakdown, names the previous
+recommendations the edits resolved and adds new ones for the edited
+sections. merge() folds that into the previous analysis and recomputes
+overall_score locally from the breakdown.
+
+AnalysisEngine.analyze_incremental() runs a full analysis instead when most
+of the resume changed (new lines make up more than INCREMENTAL_MAX_CHANGED
+of its tokens, default 0.6), since the update prompt then sees little of
+what it scores, or when the update would save less than
+INCREMENTAL_MIN_SAVING of the tokens of a full analysis (default 0.2).
+Most of the latency saved comes from the shorter answer rather than the
+prompt (benchmarks/incremental.py).
+"""
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+from .compaction import estimate_tokens
+from .scoring import weighted_overall
+from .sections import is_bullet, segment
+
+MAX_CHANGED_SHARE = float(os.getenv("INCREMENTAL_MAX_CHANGED", "0.6"))
+MIN_SAVING = float(os.getenv("INCREMENTAL_MIN_SAVING", "0.2"))
+# Key of the text before the first header (name, title, contact details)
+TOP = "top"
+
+
+class SectionDiff(NamedTuple):
+    changed: List[str]  # kinds added or edited, in the new resume's order
+    removed: List[str]  # kinds the previous resume had and the new one does not
+    changed_tokens: int  # of the lines that are new, not of the whole changed sections
+    total_tokens: int
+
+    @property
+    def share(self) -> float:
+        return self.changed_tokens / self.total_tokens if self.total_tokens else 1.0
+
+
+def _normal(line: str) -> str:
+    # Case and spacing edits do not change what the model would say
+    return " ".join(line.lower().split())
+
+
+def _section_lines(text: str) -> Dict[str, List[str]]:
+    lines: Dict[str, List[str]] = {}
+    for section in segment(text).sections:
+        lines.setdefault(section.kind or TOP, []).extend(_normal(line) for line in section.lines)
+    return lines
+
+
+def diff_sections(previous_text: str, resume_text: str) -> SectionDiff:
+    """The sections of ``resume_text`` that differ from ``previous_text``"""
+    before, after = _section_lines(previous_text), _section_lines(resume_text)
+    changed = [kind for kind, lines in after.items() if before.get(kind) != lines]
+    removed = [kind for kind in before if kind not in after]
+    new_lines: List[str] = []
+    for kind in changed:
+        previous_lines = set(before.get(kind, ()))
+        new_lines.extend(line for line in after[kind] if line not in previous_lines)
+    total = sum(estimate_tokens("\n".join(lines)) for lines in after.values())
+    return SectionDiff(changed, removed, estimate_tokens("\n".join(new_lines)), total)
+
+
+def changed_lines(previous_text: str, resume_text: str, kinds: List[str]) -> str:
+    """The top of ``resume_text`` in full and, of its sections in ``kinds``, the header, the new lines and the
+    entry line above each new bullet; "..." stands for unchanged lines left out and "[removed]" marks lost lines"""
+    before, after = segment(previous_text), segment(resume_text)
+    parts: List[str] = []
+    shown_removed = set()
+    for section in after.sections:
+        if section.kind is None:
+            parts.append("\n".join(section.lines))
+            continue
+        if section.kind not in kinds:
+            continue
+        previous = {_normal(line) for line in before.lines(section.kind)}
+        shown = [_normal(line) not in previous for line in section.lines]
+        entry = None
+        for i, line in enumerate(section.lines):
+            if not is_bullet(line):
+                entry = i
+            elif shown[i] and entry is not None:
+                shown[entry] = True
+        lines = [section.title]
+        for line, show in zip(section.lines, shown):
+            if show:
+                lines.append(line)
+            elif lines[-1] != "...":
+                lines.append("...")
+        if section.kind not in shown_removed:
+            current = {_normal(line) for line in after.lines(section.kind)}
+            lines.extend("[removed] " + line for line in before.lines(section.kind) if _normal(line) not in current)
+            shown_removed.add(section.kind)
+        parts.append("\n".join(lines))
+    return "\n\n".join(part for part in parts if part) + "\n"
+
+
+def update_variables(previous: dict, removed: List[str]) -> Dict[str, str]:
+    """The update prompt's variables besides the resume text: the fields of the previous analysis an update
+    can change, recommendations numbered"""
+    compact = {
+        "recommendations": [{"id": i, "category": rec["category"], "recommendation": rec["recommendation"]}
+                            for i, rec in enumerate(previous["seo_recommendations"])],
+        "score_breakdown": previous["score_breakdown"],
+        "missing_keywords": previous["missing_keywords"],
+        "summary": previous["summary"],
+    }
+    text = json.dumps(compact)
+    if removed:
+        text += "\n\nSections removed since: " + ", ".join(removed)
+    return {"previous_analysis": text}
+
+
+def merge(previous: dict, update: dict) -> dict:
+    """The previous analysis with an update applied; overall_score is recomputed from the new breakdown"""
+    resolved = set(update["resolved_recommendations"])
+    kept = [rec for i, rec in enumerate(previous["seo_recommendations"]) if i not in resolved]
+    return {
+        **previous,
+        "seo_recommendations": kept + update["new_recommendations"],
+        "score_breakdown": update["score_breakdown"],
+        "overall_score": weighted_overall(update["score_breakdown"]),
+        "missing_keywords": update["missing_keywords"],
+        "summary": update["summary"],
+    }
+
+
+def report(diff: SectionDiff, tokens_full: int, tokens_sent: int, latency: float,
+           full_latency: Optional[float]) -> dict:
+    """What the incremental run saved against a full one; full latency is the mean of earlier full LLM calls"""
+    full_ms = round(full_latency * 1000, 1) if full_latency is not None else None
+    latency_ms = round(latency * 1000, 1)
+    return {
+        "mode": "incremental",
+        "sections_changed": diff.changed,
+        "sections_removed": diff.removed,
+        "changed_share": round(diff.share, 3),
+        "tokens_full": tokens_full,
+        "tokens_sent": tokens_sent,
+        "tokens_saved": tokens_full - tokens_sent,
+        "latency_ms": latency_ms,
+        "full_latency_ms": full_ms,
+        "latency_saved_ms": round(full_ms - latency_ms, 1) if full_ms is not None else None,
+    }
@@ -0,0 +1,547 @@
+"""Analysis jobs: submit now, fetch the result later or have it posted back.
+
+A synchronous analysis holds the HTTP connection open for the whole LLM
+call, and behind API Gateway a slow answer runs into the Lambda timeout.
+In job mode the request only stores the resume and returns a job id; a
+worker runs the analysis, stores the result for GET /api/jobs/{id} and, if
+the submitter gave a callback URL, POSTs the finished job to it.
+
+Job records live in a store picked with JOB_STORE_BACKEND:
+
+- ``sqlite``   a local SQLite file (default; dev, tests, a single server).
+               JobWorkerPool threads claim queued jobs from it.
+- ``dynamodb`` a DynamoDB table; on Lambda each job is handed to a worker
+               function by an asynchronous invocation, so Lambda's own event
+               queue absorbs bursts.
+
+Records expire after JOB_TTL seconds. The resume text is dropped from the
+record once the job finishes.
+
+A worker holds a lease on the job it runs and renews it every
+HEARTBEAT_INTERVAL seconds, however long the LLM call takes. Only a job whose
+lease has gone JOB_TIMEOUT seconds without renewal counts as abandoned and is
+queued again (worker pools) or claimed by Lambda's retry of the invocation.
+Each claim bumps the job's attempt number, and a result is stored, and its
+callback sent, only if the job still belongs to that attempt, so a job taken
+over from a worker presumed dead is never finished twice. On Lambda a job
+must also end before the invocation does: the analysis gets the time left
+minus FINISH_MARGIN, and a status read fails any job whose lease ran out.
+
+Callback URLs are checked twice: on submission, and again when the result
+is sent. The send connects to the address it just checked and does not
+follow redirects, so a DNS answer that changes in between cannot point it
+into the private network. With JOB_CALLBACK_HOSTS set only those hosts are
+accepted, at whatever address they resolve to. Otherwise any host is
+accepted whose every address is public: no loopback, private, link-local or
+reserved ones. The delivery status the submitter sees says only "delivered"
+or "failed" and the HTTP status, never what the connection ran into.
+"""
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Statuses a job moves through; done and failed are final
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+JOB_TTL = float(os.getenv("JOB_TTL", 24 * 60 * 60))
+# A running job whose lease has not been renewed for this long has lost its worker
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", 60))
+HEARTBEAT_INTERVAL = JOB_TIMEOUT / 4
+CALLBACK_TIMEOUT = float(os.getenv("JOB_CALLBACK_TIMEOUT", 10))
+CALLBACK_ATTEMPTS = 3
+# What a Lambda worker keeps back from the analysis to store the result and deliver the callback
+FINISH_MARGIN = CALLBACK_ATTEMPTS * CALLBACK_TIMEOUT + 10
+# How often a worker pool requeues jobs whose worker died, in this or another process
+RECOVER_INTERVAL = float(os.getenv("JOB_RECOVER_INTERVAL", 60))
+
+Analyze = Callable[[str], dict]
+
+
+def new_job(resume_text: str, callback_url: Optional[str] = None) -> dict:
+    now = time.time()
+    return {
+        "id": os.urandom(16).hex(),
+        "status": QUEUED,
+        "resume_text": resume_text,
+        "callback_url": callback_url,
+        "attempt": 0,
+        "created_at": round(now, 3),
+        "expires_at": round(now + JOB_TTL, 3),
+    }
+
+
+def job_view(job: dict) -> dict:
+    """What the status endpoint returns: everything but the resume and callback URL"""
+    view = {key: job.get(key) for key in ("id", "status", "created_at", "started_at", "finished_at")}
+    if job["status"] == DONE:
+        view["analysis"] = json.loads(job["result"])
+    elif job["status"] == FAILED:
+        view["error"] = job.get("error")
+    if job.get("callback_url"):
+        view["callback"] = job.get("callback_status") or "pending"
+    return view
+
+
+def _callback_target(url: str) -> Tuple[object, int, str]:
+    """The URL's parts, port and the address to connect to; ValueError if it may not be called back"""
+    import ipaddress
+    import socket
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("callback_url must be an http or https URL")
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError:
+        raise ValueError("callback_url has an invalid port")
+    allowed = [host.strip().lower() for host in os.getenv("JOB_CALLBACK_HOSTS", "").split(",") if host.strip()]
+    if allowed and parts.hostname not in allowed:
+        raise ValueError(f"callback_url host {parts.hostname!r} is not allowed")
+    try:
+        addresses = [info[4][0] for info in socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)]
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"callback_url host {parts.hostname!r} does not resolve")
+    # An allowlisted host is trusted wherever it points; any other must not reach into the private network
+    if not allowed and not all(ipaddress.ip_address(address.split("%")[0]).is_global for address in addresses):
+        raise ValueError("callback_url must resolve to public addresses only")
+    return parts, port, addresses[0]
+
+
+def validate_callback_url(url: str) -> str:
+    """Only http(s) URLs of public hosts, or only hosts in JOB_CALLBACK_HOSTS when that is set.
+
+    Resolves the host, so async callers should run it in a thread
+    """
+    _callback_target(url)
+    return url
+
+
+def _send_callback(url: str, body: bytes, job_id: str) -> int:
+    """POST ``body`` to the address the URL's host was just checked at; returns the HTTP status"""
+    import http.client
+    import socket
+
+    parts, port, address = _callback_target(url)
+    https = parts.scheme == "https"
+    base = http.client.HTTPSConnection if https else http.client.HTTPConnection
+
+    class PinnedConnection(base):
+        def connect(self):
+            # The checked address, not a second DNS answer; TLS still verifies the URL's hostname
+            self.sock = socket.create_connection((address, port), self.timeout)
+            if https:
+                self.sock = self._context.wrap_socket(self.sock, server_hostname=parts.hostname)
+
+    connection = PinnedConnection(parts.hostname, port, timeout=CALLBACK_TIMEOUT)
+    try:
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        connection.request("POST", path, body=body, headers={"Content-Type": "application/json", "X-Job-Id": job_id})
+        return connection.getresponse().status
+    finally:
+        connection.close()
+
+
+def post_callback(url: str, job: dict) -> str:
+    """POST the finished job to its callback URL, retrying with backoff; returns the delivery status"""
+    body = json.dumps(job_view(job)).encode("utf-8")
+    status, error = None, None
+    for attempt in range(CALLBACK_ATTEMPTS):
+        if attempt:
+            time.sleep(2 ** (attempt - 1))
+        try:
+            status = _send_callback(url, body, job["id"])
+        except Exception as e:
+            status, error = None, e
+            continue
+        # Redirects are not followed: a 3xx could point anywhere
+        if 200 <= status < 300:
+            return f"delivered ({status})"
+        error = f"HTTP {status}"
+    # The details are for the operator's logs; the submitter only learns the HTTP status, if there was one
+    print(f"Callback for job {job['id']} failed: {error}")
+    return f"failed (HTTP {status})" if status else "failed"
+
+
+def _analyze_within(analyze: Analyze, resume_text: str, time_limit: Optional[float]) -> dict:
+    if time_limit is None:
+        return analyze(resume_text)
+    from concurrent.futures import ThreadPoolExecutor
+    from concurrent.futures import TimeoutError as FutureTimeout
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        return executor.submit(analyze, resume_text).result(timeout=max(time_limit, 0))
+    except FutureTimeout:
+        # The call cannot be interrupted; its answer, if one comes, is ignored
+        raise TimeoutError(f"no answer within {time_limit:.0f} s")
+    finally:
+        executor.shutdown(wait=False)
+
+
+def _keep_lease(store, job: dict, stop: threading.Event) -> None:
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        try:
+            if not store.heartbeat(job["id"], job["attempt"]):
+                # Another worker has taken the job over; finish() will refuse this one's result
+                return
+        except Exception as e:
+            print(f"Job {job['id']} heartbeat failed: {e}")
+
+
+def run_job(store, job: dict, analyze: Analyze, time_limit: Optional[float] = None) -> dict:
+    """Analyze a claimed job's resume, store the outcome and deliver the callback.
+
+    The lease is renewed while the analysis runs, which gives up after
+    ``time_limit`` seconds when one is set. A job another worker has taken over
+    meanwhile is returned still running, with nothing stored or sent.
+    """
+    from .metrics import JOB_QUEUE_SECONDS, JOBS
+
+    stop = threading.Event()
+    threading.Thread(target=_keep_lease, args=(store, job, stop), name=f"job-lease-{job['id'][:8]}",
+                     daemon=True).start()
+    try:
+        outcome = {"status": DONE, "result": json.dumps(_analyze_within(analyze, job["resume_text"], time_limit))}
+    except Exception as e:
+        outcome = {"status": FAILED, "error": f"Analysis failed: {str(e)}"}
+    finally:
+        stop.set()
+    outcome.update(finished_at=round(time.time(), 3), resume_text=None)
+    if not store.finish(job["id"], job["attempt"], **outcome):
+        print(f"Job {job['id']} attempt {job['attempt']} was taken over by another worker; result dropped")
+        return job
+    job.update(outcome)
+    JOBS.inc(status=job["status"])
+    JOB_QUEUE_SECONDS.observe(job["started_at"] - job["created_at"])
+
+    if job.get("callback_url"):
+        job["callback_status"] = post_callback(job["callback_url"], job)
+        store.update(job["id"], callback_status=job["callback_status"])
+    return job
+
+
+def run_claimed(store, job_id: str, analyze: Analyze, time_limit: Optional[float] = None) -> Optional[dict]:
+    """Claim one job by id and run it; None if it finished, expired or is still running elsewhere"""
+    job = store.claim(job_id)
+    return run_job(store, job, analyze, time_limit) if job is not None else None
+
+
+def fail_abandoned(store, job: dict) -> dict:
+    """Fail a running job whose lease ran out, where nothing requeues it (Lambda).
+
+    Called on status reads so clients stop polling; Lambda's own retries of
+    the worker invocation come before this in the usual case.
+    """
+    renewed = job.get("heartbeat_at") or job.get("started_at") or 0
+    if job["status"] != RUNNING or renewed > time.time() - JOB_TIMEOUT:
+        return job
+    outcome = {"status": FAILED, "error": "Analysis worker stopped before finishing",
+               "finished_at": round(time.time(), 3), "resume_text": None}
+    if store.finish(job["id"], job.get("attempt", 0), **outcome):
+        job.update(outcome)
+        return job
+    return store.get(job["id"]) or job
+
+
+class SQLiteJobStore:
+    """Jobs in a SQLite file; claim() hands each queued job to exactly one worker, across processes"""
+
+    COLUMNS = ("id", "status", "resume_text", "callback_url", "result", "error", "callback_status",
+               "created_at", "started_at", "finished_at", "expires_at", "attempt", "heartbeat_at")
+
+    def __init__(self, path: str = ".jobs.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def conn(self):
+        # Opened on first use so importing a handler never creates the file
+        if self._conn is None:
+            import sqlite3
+
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL keeps NORMAL crash-safe; a power loss can only drop the newest commits
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT NOT NULL, resume_text TEXT, callback_url TEXT,"
+                " result TEXT, error TEXT, callback_status TEXT,"
+                " created_at REAL NOT NULL, started_at REAL, finished_at REAL, expires_at REAL NOT NULL,"
+                " attempt INTEGER NOT NULL DEFAULT 0, heartbeat_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, created_at)")
+            if "attempt" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+                # Stores created before job leases
+                conn.execute("ALTER TABLE jobs ADD COLUMN attempt INTEGER NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+            self._conn = conn
+        return self._conn
+
+    def _row(self, row) -> Optional[dict]:
+        return dict(zip(self.COLUMNS, row)) if row else None
+
+    def create(self, job: dict) -> None:
+        with self._lock:
+            self.conn.execute(
+                f"INSERT INTO jobs ({', '.join(job)}) VALUES ({', '.join('?' * len(job))})", tuple(job.values()))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ? AND expires_at > ?",
+                (job_id, time.time())).fetchone()
+        return self._row(row)
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            self.conn.execute(
+                f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in fields)} WHERE id = ?",
+                (*fields.values(), job_id))
+
+    def claim(self, job_id: Optional[str] = None) -> Optional[dict]:
+        """Mark the oldest queued job running under a new attempt and return it, or None if the queue is empty.
+
+        With ``job_id``, claim that job if it is queued or its lease has run out.
+        """
+        now = round(time.time(), 3)
+        with self._lock:
+            conn = self.conn
+            # IMMEDIATE takes the write lock up front, so two processes never claim the same row
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if job_id is None:
+                    row = conn.execute(
+                        f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                        (QUEUED,)).fetchone()
+                else:
+                    row = conn.execute(
+                        f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ? AND expires_at > ? AND"
+                        " (status = ? OR (status = ? AND COALESCE(heartbeat_at, started_at) < ?))",
+                        (job_id, now, QUEUED, RUNNING, now - JOB_TIMEOUT)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE jobs SET status = ?, started_at = ?, heartbeat_at = ?, attempt = attempt + 1"
+                                 " WHERE id = ?", (RUNNING, now, now, row[0]))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        job = self._row(row)
+        if job is not None:
+            job.update(status=RUNNING, started_at=now, heartbeat_at=now, attempt=job["attempt"] + 1)
+        return job
+
+    def heartbeat(self, job_id: str, attempt: int) -> bool:
+        """Renew the lease; False once the job is no longer this attempt's to run"""
+        with self._lock:
+            return self.conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ? AND attempt = ?",
+                (round(time.time(), 3), job_id, RUNNING, attempt)).rowcount == 1
+
+    def finish(self, job_id: str, attempt: int, **fields) -> bool:
+        """update() only if the job is still running under ``attempt``"""
+        with self._lock:
+            return self.conn.execute(
+                f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in fields)}"
+                " WHERE id = ? AND status = ? AND attempt = ?",
+                (*fields.values(), job_id, RUNNING, attempt)).rowcount == 1
+
+    def recover(self, timeout: Optional[float] = None) -> int:
+        """Queue again jobs whose lease ran out because their worker died; delete expired jobs"""
+        timeout = JOB_TIMEOUT if timeout is None else timeout
+        with self._lock:
+            self.conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (time.time(),))
+            return self.conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, heartbeat_at = NULL"
+                " WHERE status = ? AND COALESCE(heartbeat_at, started_at) < ?",
+                (QUEUED, RUNNING, time.time() - timeout)).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+class DynamoDBJobStore:
+    """Jobs in a DynamoDB table (TTL attribute ``expires_at``); work is pushed to workers, never claimed"""
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self._table = None
+
+    @property
+    def table(self):
+        # boto3 is slow to import; only job requests pay for it
+        if self._table is None:
+            import boto3
+
+            self._table = boto3.resource("dynamodb").Table(self.table_name)
+        return self._table
+
+    @staticmethod
+    def _encode(value):
+        # DynamoDB numbers must be Decimals, and TTL must be whole seconds
+        from decimal import Decimal
+
+        return Decimal(str(value)) if isinstance(value, float) else value
+
+    def create(self, job: dict) -> None:
+        item = {key: self._encode(value) for key, value in job.items() if value is not None}
+        item["expires_at"] = int(job["expires_at"])
+        self.table.put_item(Item=item)
+
+    @staticmethod
+    def _decode(item: dict) -> dict:
+        return {key: float(value) if key.endswith("_at") else int(value) if key == "attempt" else value
+                for key, value in item.items()}
+
+    def get(self, job_id: str) -> Optional[dict]:
+        item = self.table.get_item(Key={"id": job_id}).get("Item")
+        # Expired items are deleted lazily, so double-check the deadline
+        if item is None or float(item["expires_at"]) <= time.time():
+            return None
+        return self._decode(item)
+
+    def update(self, job_id: str, **fields) -> None:
+        self._update(job_id, fields)
+
+    def _update(self, job_id: str, fields: dict, condition: Optional[str] = None, values: Optional[dict] = None,
+                add: str = "", returns: str = "NONE") -> Optional[dict]:
+        """SET ``fields`` (plus an ADD clause), under ``condition``; None if the condition failed"""
+        names = {f"#{name}": name for name in fields}
+        expression_values = {f":{name}": self._encode(value) for name, value in fields.items()}
+        request = {
+            "Key": {"id": job_id},
+            "UpdateExpression": "SET " + ", ".join(f"#{name} = :{name}" for name in fields) + add,
+            "ExpressionAttributeNames": names,
+            "ExpressionAttributeValues": expression_values,
+            "ReturnValues": returns,
+        }
+        if condition:
+            names.update({"#status": "status", "#attempt": "attempt"})
+            expression_values.update({key: self._encode(value) for key, value in (values or {}).items()})
+            request["ConditionExpression"] = condition
+        try:
+            response = self.table.update_item(**request)
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return None
+        return response.get("Attributes", {})
+
+    def claim(self, job_id: str) -> Optional[dict]:
+        """Start a new attempt at the job if it is queued or its lease has run out"""
+        now = round(time.time(), 3)
+        item = self._update(
+            job_id, {"status": RUNNING, "started_at": now, "heartbeat_at": now},
+            "expires_at > :now_s AND (#status = :queued OR (#status = :running AND heartbeat_at < :stale))",
+            {":now_s": int(now), ":queued": QUEUED, ":running": RUNNING, ":stale": now - JOB_TIMEOUT, ":one": 1},
+            add=" ADD #attempt :one", returns="ALL_NEW")
+        return self._decode(item) if item is not None else None
+
+    def heartbeat(self, job_id: str, attempt: int) -> bool:
+        return self._update(job_id, {"heartbeat_at": round(time.time(), 3)}, "#status = :running AND #attempt = :a",
+                            {":running": RUNNING, ":a": attempt}) is not None
+
+    def finish(self, job_id: str, attempt: int, **fields) -> bool:
+        return self._update(job_id, fields, "#status = :running AND #attempt = :a",
+                            {":running": RUNNING, ":a": attempt}) is not None
+
+
+def jobs_from_env():
+    """Build the job store configured by the JOB_STORE_* environment variables"""
+    kind = os.getenv("JOB_STORE_BACKEND", "sqlite").lower()
+    if kind == "sqlite":
+        return SQLiteJobStore(os.getenv("JOB_STORE_PATH", ".jobs.sqlite3"))
+    if kind == "dynamodb":
+        return DynamoDBJobStore(os.environ["JOB_TABLE"])
+    raise ValueError(f"Unknown JOB_STORE_BACKEND: {kind}")
+
+
+class JobWorkerPool:
+    """Worker threads that claim queued jobs from a SQLiteJobStore and run them.
+
+    submit() wakes a worker at once; idle workers also poll the store, so
+    jobs submitted by another process sharing the file are picked up too.
+    Every ``recover_interval`` seconds one worker requeues jobs whose lease
+    has gone JOB_TIMEOUT without renewal because their worker died, in any
+    process.
+    """
+
+    def __init__(self, store: SQLiteJobStore, analyze: Analyze, workers: int = 4, poll_interval: float = 1.0,
+                 recover_interval: float = RECOVER_INTERVAL):
+        self.store = store
+        self.analyze = analyze
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.recover_interval = recover_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        # Separate from _lock, which stop() holds while joining the workers
+        self._recovery_lock = threading.Lock()
+        self._next_recovery = 0.0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            self._recover()
+            self._stop.clear()
+            self._threads = [threading.Thread(target=self._work, name=f"job-worker-{n}", daemon=True)
+                             for n in range(self.workers)]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Let running jobs finish; jobs still queued stay in the store for the next start()"""
+        with self._lock:
+            self._stop.set()
+            self._wake.set()
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+
+    def submit(self, resume_text: str, callback_url: Optional[str] = None) -> dict:
+        job = new_job(resume_text, callback_url)
+        self.store.create(job)
+        self.start()
+        self._wake.set()
+        return job
+
+    def _recover(self) -> None:
+        """Requeue orphaned jobs (and drop expired ones) unless that was done within recover_interval"""
+        with self._recovery_lock:
+            now = time.monotonic()
+            if now < self._next_recovery:
+                return
+            self._next_recovery = now + self.recover_interval
+        try:
+            recovered = self.store.recover()
+        except Exception as e:
+            print(f"Job recovery failed: {e}")
+            return
+        if recovered:
+            print(f"Requeued {recovered} interrupted job(s)")
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            self._recover()
+            try:
+                job = self.store.claim()
+            except Exception as e:
+                print(f"Job queue read failed: {e}")
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            try:
+                run_job(self.store, job, self.analyze)
+            except Exception as e:
+                # A broken store must not kill the worker; recover() requeues the job later
+                print(f"Job {job['id']} could not be stored: {e}")
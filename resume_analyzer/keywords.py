@@ -0,0 +1,285 @@
+"""Precompiled industry keyword index.
+
+data/keywords.json is the versioned vocabulary: for each industry, canonical
+keywords and their synonyms, which may be multi-word ("amazon web services").
+It is compiled into a token-level Aho-Corasick automaton stored in a flat
+binary file (data/keywords.idx) that is memory-mapped on load, so every
+process shares the same pages and pays almost nothing to open it.
+
+KeywordIndex.scan walks the resume's tokens once, following goto/fail links,
+and counts every canonical keyword it sees. present/missing keywords for any
+industry fall out of that single pass.
+
+Bump "version" in keywords.json whenever it changes; load_index rebuilds any
+index whose version does not match, or rebuild explicitly:
+
+    python -m resume_analyzer.keywords build
+"""
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+from bisect import bisect_left
+from collections import Counter, deque
+from typing import Dict, List, Optional, Set, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+VOCABULARY_PATH = os.path.join(DATA_DIR, "keywords.json")
+INDEX_PATH = os.path.join(DATA_DIR, "keywords.idx")
+
+MAGIC = b"RKWI"
+FORMAT_VERSION = 1
+# magic, format version, vocabulary version, metadata length, states, transitions, outputs
+_HEADER = struct.Struct("<4sIIIIII")
+# Longest keyword phrase in keywords.json, in tokens
+MAX_PHRASE_WORDS = 3
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[./&+#-][a-z0-9]+)*[+#]*")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def compile_vocabulary(vocabulary: dict) -> bytes:
+    """Compile the JSON vocabulary into the binary automaton format"""
+    industries = sorted(vocabulary["industries"])
+    keywords: List[str] = []
+    keyword_ids: Dict[str, int] = {}
+    industry_keywords: List[List[int]] = []
+    phrases: List[Tuple[List[str], int]] = []
+
+    for industry in industries:
+        industry_keywords.append([])
+        for name, synonyms in vocabulary["industries"][industry].items():
+            if name not in keyword_ids:
+                keyword_ids[name] = len(keywords)
+                keywords.append(name)
+            keyword_id = keyword_ids[name]
+            industry_keywords[-1].append(keyword_id)
+            for phrase in [name, *synonyms]:
+                tokens = tokenize(phrase)
+                if tokens:
+                    phrases.append((tokens, keyword_id))
+
+    tokens = sorted({token for phrase, _ in phrases for token in phrase})
+    token_ids = {token: i for i, token in enumerate(tokens)}
+
+    # Trie over token ids
+    goto: List[Dict[int, int]] = [{}]
+    outputs: List[set] = [set()]
+    for phrase, keyword_id in phrases:
+        state = 0
+        for token in phrase:
+            token_id = token_ids[token]
+            if token_id not in goto[state]:
+                goto[state][token_id] = len(goto)
+                goto.append({})
+                outputs.append(set())
+            state = goto[state][token_id]
+        outputs[state].add(keyword_id)
+
+    # Fail links by BFS; outputs are merged along them so scanning never walks suffix chains
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for token_id, child in goto[state].items():
+            queue.append(child)
+            if state:
+                fallback = fail[state]
+                while fallback and token_id not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = goto[fallback].get(token_id, 0)
+            outputs[child] |= outputs[fail[child]]
+
+    transitions = sorted(
+        (state * len(tokens) + token_id, child) for state, edges in enumerate(goto) for token_id, child in edges.items()
+    )
+    out_start = [0]
+    flat_outputs: List[int] = []
+    for state_outputs in outputs:
+        flat_outputs.extend(sorted(state_outputs))
+        out_start.append(len(flat_outputs))
+
+    metadata = json.dumps({
+        "tokens": tokens,
+        "keywords": keywords,
+        "industry_keywords": industry_keywords,
+        "industries": industries,
+    }).encode("utf-8")
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, vocabulary["version"], len(metadata),
+                          len(goto), len(transitions), len(flat_outputs))
+    body = bytearray(header + metadata)
+    body += b"\0" * (_align(len(body)) - len(body))
+    body += struct.pack(f"<{len(transitions)}Q", *(key for key, _ in transitions))
+    body += struct.pack(f"<{len(transitions)}I", *(child for _, child in transitions))
+    body += struct.pack(f"<{len(fail)}I", *fail)
+    body += struct.pack(f"<{len(out_start)}I", *out_start)
+    body += struct.pack(f"<{len(flat_outputs)}I", *flat_outputs)
+    return bytes(body)
+
+
+class KeywordIndex:
+    """Read-only view over a compiled index held in a buffer (usually an mmap)"""
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        view = memoryview(buffer)
+        magic, format_version, self.version, metadata_len, n_states, n_transitions, n_outputs = _HEADER.unpack_from(view)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError("Not a compiled keyword index, or built by an incompatible version")
+        offset = _HEADER.size
+        metadata = json.loads(bytes(view[offset:offset + metadata_len]))
+        offset = _align(offset + metadata_len)
+
+        def array(code: str, count: int, size: int):
+            nonlocal offset
+            section = view[offset:offset + count * size].cast(code)
+            offset += count * size
+            return section
+
+        self._transition_keys = array("Q", n_transitions, 8)
+        self._transition_next = array("I", n_transitions, 4)
+        self._fail = array("I", n_states, 4)
+        self._out_start = array("I", n_states + 1, 4)
+        self._outputs = array("I", n_outputs, 4)
+
+        self._token_ids = {token: i for i, token in enumerate(metadata["tokens"])}
+        self._n_tokens = len(metadata["tokens"])
+        self.keywords: List[str] = metadata["keywords"]
+        self.industries: List[str] = metadata["industries"]
+        self._industry_keywords: Dict[str, List[int]] = dict(zip(self.industries, metadata["industry_keywords"]))
+
+    def _next_state(self, state: int, token_id: int) -> int:
+        key = state * self._n_tokens + token_id
+        keys = self._transition_keys
+        while True:
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                return self._transition_next[i]
+            if state == 0:
+                return 0
+            state = self._fail[state]
+            key = state * self._n_tokens + token_id
+
+    def scan(self, text: str) -> Counter:
+        """Count occurrences of every canonical keyword in one pass over the tokens"""
+        return self.scan_tokens(_TOKEN_RE.findall(text.lower()))
+
+    def scan_tokens(self, tokens: List[str]) -> Counter:
+        """scan() for text that is already tokenized"""
+        counts: Counter = Counter()
+        token_ids = self._token_ids
+        out_start, outputs = self._out_start, self._outputs
+        state = 0
+        for token in tokens:
+            token_id = token_ids.get(token)
+            if token_id is None:
+                # A token outside the vocabulary cannot continue any phrase
+                state = 0
+                continue
+            state = self._next_state(state, token_id)
+            for i in range(out_start[state], out_start[state + 1]):
+                counts[outputs[i]] += 1
+        return counts
+
+    def phrase_positions(self, tokens: List[str]) -> Set[int]:
+        """Positions of the tokens that belong to a multi-word keyword ("amazon web services")"""
+        covered: Set[int] = set()
+        for size in range(2, MAX_PHRASE_WORDS + 1):
+            for start in range(len(tokens) - size + 1):
+                window = tokens[start:start + size]
+                found = self.scan_tokens(window)
+                # The window is a phrase when it finds a keyword neither of its shorter halves does
+                if found and set(found) - set(self.scan_tokens(window[1:])) - set(self.scan_tokens(window[:-1])):
+                    covered.update(range(start, start + size))
+        return covered
+
+    def industry_keywords(self, industry: str) -> List[str]:
+        return [self.keywords[keyword_id] for keyword_id in self._industry_keywords[industry]]
+
+    def match(self, text: str, industry: str, counts: Optional[Counter] = None) -> Tuple[List[str], List[str]]:
+        """(present, missing) canonical keywords for an industry, in vocabulary order"""
+        counts = self.scan(text) if counts is None else counts
+        present, missing = [], []
+        for keyword_id in self._industry_keywords[industry]:
+            (present if counts[keyword_id] else missing).append(self.keywords[keyword_id])
+        return present, missing
+
+    def industry_hits(self, counts: Counter) -> Dict[str, Tuple[int, int]]:
+        """(distinct keywords, total occurrences) per industry for a scan result"""
+        return {
+            industry: (
+                sum(1 for keyword_id in keyword_ids if counts[keyword_id]),
+                sum(counts[keyword_id] for keyword_id in keyword_ids),
+            )
+            for industry, keyword_ids in self._industry_keywords.items()
+        }
+
+
+def build_index(vocabulary_path: str = VOCABULARY_PATH, index_path: str = INDEX_PATH) -> str:
+    """Compile the vocabulary to disk; falls back to the temp dir on read-only filesystems"""
+    with open(vocabulary_path, "r", encoding="utf-8") as file:
+        compiled = compile_vocabulary(json.load(file))
+    for path in (index_path, os.path.join(tempfile.gettempdir(), os.path.basename(index_path))):
+        try:
+            with open(path + ".tmp", "wb") as file:
+                file.write(compiled)
+            os.replace(path + ".tmp", path)
+            return path
+        except OSError:
+            continue
+    raise OSError(f"Could not write the keyword index to {index_path} or the temp dir")
+
+
+def _vocabulary_version(vocabulary_path: str) -> int:
+    with open(vocabulary_path, "r", encoding="utf-8") as file:
+        return json.load(file)["version"]
+
+
+def _open_index(path: str) -> Optional[KeywordIndex]:
+    try:
+        with open(path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return KeywordIndex(buffer)
+    except (OSError, ValueError):
+        return None
+
+
+_index: Optional[KeywordIndex] = None
+_index_lock = threading.Lock()
+
+
+def load_index() -> KeywordIndex:
+    """The process-wide index, compiled on first use if missing or out of date"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                path = os.getenv("KEYWORD_INDEX_PATH", INDEX_PATH)
+                wanted = _vocabulary_version(VOCABULARY_PATH)
+                candidates = [path, os.path.join(tempfile.gettempdir(), os.path.basename(path))]
+                for candidate in candidates:
+                    index = _open_index(candidate)
+                    if index is not None and index.version == wanted:
+                        _index = index
+                        break
+                else:
+                    _index = _open_index(build_index(VOCABULARY_PATH, path))
+    return _index
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["build"]:
+        sys.exit("usage: python -m resume_analyzer.keywords build")
+    print(f"Wrote {build_index()}")
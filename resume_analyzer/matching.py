@@ -0,0 +1,156 @@
+"""Rank many resumes against one job description without the LLM.
+
+rank_resumes(job_description, resumes, top_k) scores every resume with BM25
+against the terms of the job description and returns the top_k with the
+terms each one matched and the most important ones it is missing. Only the
+shortlist it returns is worth an LLM analysis.
+
+Terms are the job description's words (keywords.tokenize, so "c++" and
+"node.js" survive) minus STOPWORDS, English function words and job-ad
+boilerplate such as "requirements", "senior" or "experience", plus the canonical keywords the keyword
+index finds, so "Amazon Web Services" in a resume matches "AWS" in the job
+description. The words of a multi-word keyword are not terms of their own:
+"machine learning" is one term, not also "machine" and "learning".
+
+Each resume is reduced to its counts of those terms and its length in plain
+Python (term_counts, about 150-250 us per resume), which is most of the
+ranking time. Only what comes after that is vectorized: BM25, coverage and
+top-k are a handful of NumPy/SciPy operations over a sparse resumes x terms
+matrix. IDF comes from the resumes being ranked.
+
+NumPy and SciPy are optional dependencies (pip install numpy scipy) and are
+only imported when ranking runs.
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from .keywords import load_index, tokenize
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_MISSING_TERMS = 15
+
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could do does for from
+had has have having he her his how i if in into is it its may more most must no not of on or our out over
+own per she should so some such than that the their them then there these they this those through to too
+under up us very was we were what when where which while who whom why will with within would you your
+ll re ve
+ability able across candidate candidates company etc including join looking new plus preferred role
+strong team using well work working years year
+apply applicant applicants benefits bonus build building day degree desired duties environment excellent
+experience experienced familiar familiarity good great hands help ideal ideally junior knowledge like
+mid minimum nice opportunity passionate position proven qualification qualifications related relevant
+required requirement requirements responsibilities responsible seeking senior skill skills solid
+understanding want
+""".split())
+
+
+def _require_numpy():
+    try:
+        import numpy
+        from scipy import sparse
+    except ImportError:
+        raise RuntimeError("Job matching requires numpy and scipy (pip install numpy scipy)")
+    return numpy, sparse
+
+
+def job_terms(job_description: str) -> Dict[str, int]:
+    """The job description's terms and how often each appears"""
+    index = load_index()
+    tokens = tokenize(job_description)
+    covered = index.phrase_positions(tokens)
+    terms: Dict[str, int] = {}
+    for position, token in enumerate(tokens):
+        if position not in covered and len(token) > 1 and token not in STOPWORDS and not token.isdigit():
+            terms[token] = terms.get(token, 0) + 1
+    for keyword_id, count in index.scan_tokens(tokens).items():
+        name = index.keywords[keyword_id].lower()
+        terms[name] = max(terms.get(name, 0), count)
+    return terms
+
+
+def term_counts(text: str, columns: Dict[str, int]) -> Tuple[Dict[int, int], int]:
+    """Counts of the ``columns`` terms in ``text`` by column, and the text's length in tokens"""
+    index = load_index()
+    tokens = tokenize(text)
+    bag = Counter(tokens)
+    counts = {column: bag[term] for term, column in columns.items() if term in bag}
+    for keyword_id, count in index.scan_tokens(tokens).items():
+        column = columns.get(index.keywords[keyword_id].lower())
+        if column is not None:
+            counts[column] = max(counts.get(column, 0), count)
+    return counts, len(tokens)
+
+
+def bm25_scores(tf, lengths, query):
+    """BM25 score and query-weighted coverage of every row of a sparse resumes x terms count matrix.
+
+    ``query`` holds each term's count in the job description. Returns
+    (scores, coverage, weights), the last being each term's IDF times its query weight.
+    """
+    np, _ = _require_numpy()
+    n = tf.shape[0]
+    lengths = np.maximum(np.asarray(lengths, dtype=np.float64), 1.0)
+    df = np.bincount(tf.indices, minlength=tf.shape[1])
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+    # Repeated terms in the job description count for more, with the same saturation as in resumes
+    query = np.asarray(query, dtype=np.float64)
+    weights = idf * query * (BM25_K1 + 1) / (query + BM25_K1)
+
+    # BM25 term frequency saturation and length normalization, on the non-zeros only
+    rows = np.repeat(np.arange(n), np.diff(tf.indptr))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / lengths.mean())
+    saturated = tf.copy()
+    saturated.data = tf.data * (BM25_K1 + 1) / (tf.data + norm[rows])
+    scores = saturated @ weights
+    coverage = (tf > 0).astype(np.float64) @ weights / weights.sum()
+    return scores, coverage, weights
+
+
+def rank_resumes(job_description: str, resumes: Iterable[Tuple[str, str]], top_k: int = 10) -> dict:
+    """BM25-rank (id, resume_text) pairs against a job description.
+
+    Returns {"terms": the job description's terms, most important first,
+    "total": resumes ranked, "results": the best ``top_k``, best first}
+    """
+    np, sparse = _require_numpy()
+    wanted = job_terms(job_description)
+    if not wanted:
+        raise ValueError("The job description has no searchable terms")
+    terms = list(wanted)
+    columns = {term: i for i, term in enumerate(terms)}
+
+    ids: List[str] = []
+    indptr, indices, data, lengths = [0], [], [], []
+    for resume_id, text in resumes:
+        counts, length = term_counts(text, columns)
+        ids.append(resume_id)
+        indices.extend(counts)
+        data.extend(counts.values())
+        indptr.append(len(indices))
+        lengths.append(length)
+    if not ids:
+        return {"terms": terms, "total": 0, "results": []}
+
+    n = len(ids)
+    tf = sparse.csr_matrix((np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32),
+                            np.asarray(indptr, dtype=np.int64)), shape=(n, len(terms)))
+    scores, coverage, weights = bm25_scores(tf, lengths, [wanted[term] for term in terms])
+
+    k = min(top_k, n)
+    top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+    top = top[np.lexsort((top, -scores[top]))]
+    importance = np.argsort(-weights, kind="stable")
+    results = []
+    for rank, row in enumerate(top, 1):
+        present = set(tf.indices[tf.indptr[row]:tf.indptr[row + 1]].tolist())
+        results.append({
+            "id": ids[row],
+            "rank": rank,
+            "score": round(float(scores[row]), 4),
+            "coverage": round(float(coverage[row]), 4),
+            "matched_terms": [terms[i] for i in importance if i in present],
+            "missing_terms": [terms[i] for i in importance if i not in present][:MAX_MISSING_TERMS],
+        })
+    return {"terms": [terms[i] for i in importance], "total": n, "results": results}
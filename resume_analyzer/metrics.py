@@ -0,0 +1,206 @@
+"""Process-wide request metrics in Prometheus text format, and JSON log lines.
+
+The analysis engine records every analysis here: the duration of each phase
+(input parsing, compaction, cache lookup, client setup, prompt formatting,
+LLM network time, output parsing, serialization), prompt and completion
+tokens, cache hits and misses, and how the model output parsed. The FastAPI
+backend also records whole-request latency per route and serves render() at
+/metrics. Each worker process keeps its own numbers, as with any Prometheus
+client library in multi-process servers.
+
+Lambda and Vercel instances are too short-lived to scrape, so their handlers
+write one JSON object per request with log_event() instead; CloudWatch Logs
+Insights and Vercel's log drains can query those fields directly.
+
+Standard library only, so importing it costs the serverless handlers nothing.
+"""
+import json
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Sequence, Tuple
+
+# Seconds; wide enough for a cache hit (sub-millisecond) and a slow LLM call
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _format_labels(self.labels, key), value) for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (last is +Inf), sum]
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(tuple(str(labels[name]) for name in self.labels))
+        return sum(series[0]) if series else 0
+
+    def mean(self, **labels: str) -> Optional[float]:
+        """Average observed value, or None before the first observation"""
+        with self._lock:
+            series = self._series.get(tuple(str(labels[name]) for name in self.labels))
+            count = sum(series[0]) if series else 0
+            return series[1] / count if count else None
+
+    def samples(self):
+        rows = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    rows.append((self.name + "_bucket", _format_labels(self.labels, key, f'le="{_format_value(bound)}"'),
+                                 cumulative))
+                rows.append((self.name + "_sum", _format_labels(self.labels, key), total))
+                rows.append((self.name + "_count", _format_labels(self.labels, key), cumulative))
+        return rows
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format, version 0.0.4"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+PHASE_SECONDS = REGISTRY.register(Histogram(
+    "resume_analysis_phase_seconds", "Time spent in each phase of an analysis request", ["phase"]))
+ANALYSES = REGISTRY.register(Counter(
+    "resume_analyses_total", "Analyses by where the result came from (llm, cache, near_duplicate, incremental, fast) and outcome", ["source", "status"]))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "resume_analysis_cache_lookups_total", "Analysis cache lookups", ["result"]))
+TOKENS = REGISTRY.register(Histogram(
+    "resume_analysis_tokens", "Tokens per LLM call (reported by the provider, else estimated)", ["kind"],
+    buckets=TOKEN_BUCKETS))
+COALESCED = REGISTRY.register(Counter(
+    "resume_analysis_coalesced_total", "LLM calls saved by sharing an identical analysis already in flight"))
+OUTPUT_PARSES = REGISTRY.register(Counter(
+    "resume_analysis_output_parses_total", "Model answers that parsed clean, needed repair or failed", ["outcome"]))
+RATE_LIMIT_EVENTS = REGISTRY.register(Counter(
+    "resume_analysis_rate_limit_events_total",
+    "LLM calls throttled or rejected by the client-side limiter, provider 429s and retries", ["event"]))
+JOBS = REGISTRY.register(Counter(
+    "resume_analysis_jobs_total", "Queued analysis jobs by final status (done, failed)", ["status"]))
+JOB_QUEUE_SECONDS = REGISTRY.register(Histogram(
+    "resume_analysis_job_queue_seconds", "Time jobs waited in the queue before a worker started them"))
+HTTP_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Whole-request latency per route", ["method", "route", "status"]))
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording whole-request latency per route template.
+
+    The start time is left in ``scope["state"]["request_start"]`` so a
+    handler can tell how long routing and body parsing took before it ran.
+    Unmatched paths share one label to keep the series count bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        scope.setdefault("state", {})["request_start"] = start
+        status = 500
+
+        async def send_and_record(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            # Streaming responses are timed until their last chunk is sent
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_SECONDS.observe(time.perf_counter() - start, method=scope["method"], route=route, status=status)
+
+
+def log_event(event: str, stream=None, **fields) -> None:
+    """Write one structured log line: {"ts": ..., "event": ..., **fields}"""
+    record = {"ts": round(time.time(), 3), "event": event, **fields}
+    print(json.dumps(record, default=str, separators=(",", ":")), file=stream or sys.stdout, flush=True)
@@ -0,0 +1,172 @@
+"""Reuse the analysis of a nearly identical resume.
+
+The analysis cache is keyed on the exact (whitespace-normalized) compacted
+text, so a resubmission with one typo fixed or two bullets swapped misses it
+and pays for a new LLM call. NearDuplicateIndex remembers a fingerprint of
+every resume analyzed in this process (up to NEAR_DUPLICATE_MAX_ENTRIES),
+under the cache key its analysis was stored with. On a cache miss the engine
+asks the index for a previous resume whose similarity is at least
+NEAR_DUPLICATE_THRESHOLD (default 0.9; 0 turns the index off) and returns
+that analysis from the cache instead; in hybrid mode the local scores are
+recomputed for the new text as usual.
+
+Similarity is the Jaccard similarity of the two resumes' shingles: three
+consecutive words that never span a line break, so reordered bullets, lines
+or sections keep every shingle. Each shingle is hashed once with crc32
+(stable across processes) and the sorted hashes are kept for the exact
+comparison. Finding candidates uses MinHash with banding: one-permutation
+hashing puts every hash in one of SIGNATURE_BINS bins, each bin keeps its
+smallest value and empty bins borrow from the next non-empty one. The bins
+are grouped into BANDS bands, and only resumes that share a whole band with
+the query are compared. With 8 bins per band, a resume at similarity 0.9 is a
+candidate with probability 0.9999, and one at 0.5 almost never is.
+
+Resumes with fewer than MIN_SHINGLES shingles are never matched: there is too
+little text to tell an edit from a different resume.
+"""
+import os
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+SIGNATURE_BINS = 128
+BANDS = 16
+MIN_SHINGLES = 20
+SHINGLE_WORDS = 3
+
+_ROWS = SIGNATURE_BINS // BANDS
+_BIN_BITS = SIGNATURE_BINS.bit_length() - 1
+_EMPTY = 0xFFFFFFFF
+# Knuth's multiplicative constant spreads crc32's low bits before they pick the bin
+_MIX = 2654435761
+
+
+class Fingerprint(NamedTuple):
+    bins: array    # one-permutation MinHash signature, for finding candidates
+    hashes: array  # sorted shingle hashes, for the exact similarity
+
+
+def shingle_hashes(text: str) -> Set[int]:
+    """crc32 of each line's three-word shingles; a shorter line is one shingle"""
+    found: Set[int] = set()
+    for line in text.lower().encode("utf-8", "surrogatepass").splitlines():
+        words = line.split()
+        if len(words) <= SHINGLE_WORDS:
+            if words:
+                found.add(zlib.crc32(b" ".join(words)))
+            continue
+        for first, second, third in zip(words, words[1:], words[2:]):
+            found.add(zlib.crc32(b"%s %s %s" % (first, second, third)))
+    return found
+
+
+def fingerprint(text: str) -> Optional[Fingerprint]:
+    """The fingerprint of ``text``, or None when it is too short to match"""
+    hashes = shingle_hashes(text)
+    if len(hashes) < MIN_SHINGLES:
+        return None
+    bins = [_EMPTY] * SIGNATURE_BINS
+    mask = SIGNATURE_BINS - 1
+    for hashed in hashes:
+        mixed = (hashed * _MIX) & 0xFFFFFFFF
+        slot, value = mixed & mask, mixed >> _BIN_BITS
+        if value < bins[slot]:
+            bins[slot] = value
+    # Densify: an empty bin takes the next filled bin's value, offset by the distance
+    for slot in range(SIGNATURE_BINS):
+        if bins[slot] == _EMPTY:
+            for distance in range(1, SIGNATURE_BINS):
+                value = bins[(slot + distance) & mask]
+                if value < _EMPTY >> _BIN_BITS:
+                    bins[slot] = value | (distance << (32 - _BIN_BITS))
+                    break
+    return Fingerprint(array("I", bins), array("I", sorted(hashes)))
+
+
+def jaccard(hashes: Set[int], other: array) -> float:
+    shared = sum(1 for hashed in other if hashed in hashes)
+    return shared / (len(hashes) + len(other) - shared)
+
+
+class NearDuplicateIndex:
+    """LSH index from resume fingerprints to the cache keys of recent analyses"""
+
+    def __init__(self, threshold: float = 0.9, max_entries: int = 1024):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Fingerprint]" = OrderedDict()
+        self._bands: List[Dict[bytes, Set[str]]] = [{} for _ in range(BANDS)]
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    @staticmethod
+    def _band_keys(bins: array) -> List[bytes]:
+        raw = bins.tobytes()
+        width = _ROWS * bins.itemsize
+        return [raw[i * width:(i + 1) * width] for i in range(BANDS)]
+
+    def add(self, key: str, found: Optional[Fingerprint]) -> None:
+        if found is None:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = found
+            for band, band_key in zip(self._bands, self._band_keys(found.bins)):
+                band.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        key, found = self._entries.popitem(last=False)
+        for band, band_key in zip(self._bands, self._band_keys(found.bins)):
+            keys = band[band_key]
+            keys.discard(key)
+            if not keys:
+                del band[band_key]
+
+    def discard(self, key: str) -> None:
+        """Forget a key whose analysis is no longer in the cache"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key, last=False)
+                self._evict()
+
+    def query(self, found: Optional[Fingerprint]) -> Optional[Tuple[str, float]]:
+        """The most similar indexed key at or above the threshold, with its similarity"""
+        if found is None:
+            return None
+        hashes = set(found.hashes)
+        with self._lock:
+            candidates: Set[str] = set()
+            for band, band_key in zip(self._bands, self._band_keys(found.bins)):
+                keys = band.get(band_key)
+                if keys:
+                    candidates.update(keys)
+            best = None
+            for key in candidates:
+                score = jaccard(hashes, self._entries[key].hashes)
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (key, score)
+        return best
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "threshold": self.threshold, "hits": self.hits}
+
+
+def index_from_env() -> Optional[NearDuplicateIndex]:
+    """The index configured by NEAR_DUPLICATE_THRESHOLD and NEAR_DUPLICATE_MAX_ENTRIES, or None if off"""
+    threshold = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9"))
+    if not threshold:
+        return None
+    if not 0 < threshold <= 1:
+        raise ValueError(f"NEAR_DUPLICATE_THRESHOLD must be between 0 and 1, got {threshold}")
+    return NearDuplicateIndex(threshold, int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "1024")))
@@ -0,0 +1,91 @@
+"""Versioned analysis prompts.
+
+Each version maps to the system and user messages of one prompt. The version
+is part of the analysis cache key, so a changed prompt must be registered
+under a new version rather than edited in place. Entry points pick a version
+with their PROMPT_VERSION (overridable with the ANALYSIS_PROMPT variable);
+LangChain is only imported when a prompt is actually built.
+"""
+from typing import Dict, List, Optional, Tuple
+
+_FOCUS = """You are an expert resume SEO analyst. Analyze the provided resume and provide specific search engine optimization recommendations.
+
+Focus on:
+1. ATS (Applicant Tracking System) optimization
+2. Industry-specific keywords
+3. Skills and technologies that should be highlighted
+"""
+
+PROMPTS: Dict[str, Tuple[str, str]] = {
+    # The full rubric used by the CLI and the backend
+    "seo-v1": (_FOCUS + """4. Format and structure improvements for better scanning
+5. Missing keywords that recruiters commonly search for
+
+SCORING SYSTEM (1-10):
+- 1-3: Poor - Major SEO issues, missing critical keywords, poor ATS compatibility
+- 4-5: Below Average - Some keywords present but lacks optimization, formatting issues
+- 6-7: Good - Decent keyword usage, mostly ATS-friendly, room for improvement
+- 8-9: Excellent - Well-optimized, strong keyword presence, ATS-friendly format
+- 10: Perfect - Exceptional SEO optimization, comprehensive keywords, ideal ATS format
+
+Consider these scoring factors:
+• Keyword density and relevance (25%)
+• ATS compatibility (25%)
+• Industry-specific terminology (20%)
+• Skills section optimization (15%)
+• Format and structure (15%)
+
+Provide actionable, specific recommendations with priority levels.
+
+{format_instructions}
+""", "Please analyze this resume for SEO optimization:\n\n{resume_text}"),
+    # Shorter prompt without the rubric, used by the serverless handlers
+    "seo-brief-v1": (_FOCUS + """4. Format and structure improvements
+5. Content enhancement suggestions
+
+{format_instructions}
+""", "Analyze this resume:\n\n{resume_text}"),
+}
+
+# Incremental re-analysis (incremental.py): the previous analysis and only the edited lines
+UPDATE_PROMPT_VERSION = "seo-update-v2"
+PROMPTS[UPDATE_PROMPT_VERSION] = ("""You are an expert resume SEO analyst. You analyzed a resume earlier; the candidate has since edited some of its sections.
+
+You are given your previous analysis, the top of the resume and, for each edited section, its header, its new or reworded lines, the entry (role, degree) each new bullet belongs to, and the lines it lost marked "[removed]". "..." stands for unchanged lines; sections not shown are unchanged. Update the analysis:
+- score_breakdown: rescore each category on the same 1-10 scale; keep a score unless the edits change it
+- resolved_recommendations: the ids of previous recommendations the edits have addressed
+- new_recommendations: new recommendations for the edited sections only, with priority levels
+- missing_keywords: the complete updated list
+- summary: the previous summary, revised for the edits
+
+{format_instructions}
+""", "Previous analysis:\n{previous_analysis}\n\nEdited lines of the resume:\n\n{resume_text}")
+# The update answer's outline; the full JSON schema of SectionUpdate costs more than the edited lines do
+UPDATE_FORMAT_INSTRUCTIONS = """Answer with one JSON object and nothing else:
+{"score_breakdown": {"keyword_score": int, "ats_compatibility": int, "industry_terms": int, "skills_optimization": int, "format_structure": int, "explanation": str}, "resolved_recommendations": [int], "new_recommendations": [{"category": str, "recommendation": str, "priority": "High" | "Medium" | "Low", "implementation": str}], "missing_keywords": [str], "summary": str}"""
+
+DEFAULT_PROMPT_VERSION = "seo-v1"
+
+# The resume sections each prompt reads (sections.py kinds). Compaction sends
+# the other recognised sections as their header alone; the top of the resume
+# and unrecognised sections are always sent. A version not listed gets everything.
+SEO_SECTIONS = ("summary", "experience", "education", "skills", "projects", "certifications")
+PROMPT_SECTIONS: Dict[str, Tuple[str, ...]] = {
+    "seo-v1": SEO_SECTIONS,
+    "seo-brief-v1": SEO_SECTIONS,
+}
+
+
+def build_prompt(version: str, format_instructions: str, field_order: Optional[List[str]] = None):
+    """The ChatPromptTemplate for ``version`` with the schema instructions filled in"""
+    from langchain_core.prompts import ChatPromptTemplate
+
+    if version not in PROMPTS:
+        raise ValueError(f"Unknown prompt version: {version!r} (known: {', '.join(PROMPTS)})")
+    system, user = PROMPTS[version]
+    if field_order:
+        format_instructions += "\n\nWrite the JSON keys in exactly this order: " + ", ".join(field_order) + "."
+    return ChatPromptTemplate.from_messages([
+        ("system", system),
+        ("user", user),
+    ]).partial(format_instructions=format_instructions)
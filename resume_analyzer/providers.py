@@ -0,0 +1,91 @@
+"""Which LLM providers an entry point may use, and how to build their clients.
+
+Providers are configured as a comma-separated list of ``provider:model``
+pairs in LLM_PROVIDERS, e.g.::
+
+    LLM_PROVIDERS=google:gemini-2.5-flash,openai:gpt-4o-mini,anthropic:claude-3-5-haiku-latest
+
+Only providers whose API key is set are used. With one usable provider its
+chat model is returned as is; with several they are wrapped in a
+ProviderRouter (router.py) that sends each request to the fastest healthy
+one. LLM_HEDGE=1 additionally enables hedged requests.
+
+With ``json_mode=True`` the clients are asked for JSON output natively
+(Gemini's application/json response type, OpenAI's JSON object mode), which
+removes most of the malformed answers repair.py otherwise has to fix.
+Anthropic has no such switch and relies on the repair step alone.
+LLM_JSON_MODE=0 turns it off.
+
+The clients' own retries are off by default (LLM_CLIENT_RETRIES=0): rate
+limits and transient errors are retried by ratelimit.py, which also slows
+down on 429s, and that only works if it sees them.
+
+This module only imports a provider's LangChain package when a client for it
+is actually built.
+"""
+import os
+from typing import List, Tuple
+
+PROVIDER_API_KEYS = {
+    "google": "GOOGLE_API_KEY",
+    "openai": "OPENAI_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+}
+
+Provider = Tuple[str, str]
+
+
+def parse_providers(spec: str) -> List[Provider]:
+    """``"google:gemini-2.5-flash,openai:gpt-4o-mini"`` -> [(provider, model), ...]"""
+    providers = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        provider, _, model = entry.partition(":")
+        if provider not in PROVIDER_API_KEYS or not model:
+            raise ValueError(f"Unknown LLM provider entry: {entry!r} (expected provider:model)")
+        providers.append((provider, model))
+    return providers
+
+
+def configured_providers(spec: str) -> List[Provider]:
+    """The providers in ``spec`` whose API key is present in the environment"""
+    return [(provider, model) for provider, model in parse_providers(spec)
+            if os.environ.get(PROVIDER_API_KEYS[provider])]
+
+
+def build_chat_model(provider: str, model: str, temperature: float, json_mode: bool = False):
+    # Each client reads its own API key variable from PROVIDER_API_KEYS
+    retries = int(os.getenv("LLM_CLIENT_RETRIES", "0"))
+    if provider == "google":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        # Gemini counts the first attempt as one of its max_retries
+        if json_mode:
+            return ChatGoogleGenerativeAI(model=model, temperature=temperature, max_retries=retries + 1,
+                                          response_mime_type="application/json")
+        return ChatGoogleGenerativeAI(model=model, temperature=temperature, max_retries=retries + 1)
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+        if json_mode:
+            return ChatOpenAI(model=model, temperature=temperature, max_retries=retries,
+                              model_kwargs={"response_format": {"type": "json_object"}})
+        return ChatOpenAI(model=model, temperature=temperature, max_retries=retries)
+    from langchain_anthropic import ChatAnthropic
+    return ChatAnthropic(model=model, temperature=temperature, max_retries=retries)
+
+
+def llm_from_env(spec: str, temperature: float, json_mode: bool = False):
+    """One chat model for ``spec``, routed across providers when more than one is usable"""
+    json_mode = json_mode and os.getenv("LLM_JSON_MODE", "1").lower() in ("1", "true", "yes")
+    providers = configured_providers(spec) or parse_providers(spec)[:1]
+    if len(providers) == 1:
+        return build_chat_model(*providers[0], temperature, json_mode)
+
+    from .router import ProviderRouter
+    return ProviderRouter(
+        providers={f"{provider}:{model}": build_chat_model(provider, model, temperature, json_mode)
+                   for provider, model in providers},
+        hedge=os.getenv("LLM_HEDGE", "0").lower() in ("1", "true", "yes"),
+        hedge_after=float(os.getenv("LLM_HEDGE_AFTER", "8")),
+    )
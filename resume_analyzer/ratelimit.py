@@ -0,0 +1,353 @@
+"""Client-side rate limiting and backpressure toward the LLM provider.
+
+Every LLM call an entry point makes goes through one RateLimiter per process:
+
+- Two token buckets, sized in requests per minute (LLM_RPM) and tokens per
+  minute (LLM_TPM). A call reserves one request and its estimated tokens and
+  sleeps until both buckets cover them. The estimate is the resume's
+  estimated tokens plus the prompt and completion overhead learned from the
+  usage providers report; each reservation is corrected once the real usage
+  is known.
+- AIMD: a 429 from the provider halves the allowed rate, and every second
+  of successful calls wins back a tenth of the limit. A Retry-After on the 429 pauses every call
+  until then. With no limit configured, the first 429 sets the request
+  limit to the rate that triggered it.
+- Retries: rate limits and transient server errors are retried up to
+  LLM_MAX_RETRIES times, with exponential backoff and full jitter, and never
+  sooner than Retry-After. When the retries run out on a rate limit, the call
+  raises Overloaded.
+- Admission: at most LLM_MAX_QUEUE calls can be waiting for or making an LLM
+  call at once. A call that would wait longer than LLM_MAX_WAIT seconds for
+  capacity, or back off longer than that before a retry, is turned away with
+  Overloaded. Handlers answer it with 503 and its Retry-After instead of
+  queueing a request that would time out. On Lambda LLM_MAX_WAIT defaults to
+  LAMBDA_MAX_WAIT, well under the functions' 30 s timeout.
+
+Batch and job callers pass ``wait=True``: they are already bounded by their
+worker count, so they skip admission and wait for capacity as long as it
+takes.
+
+The client libraries' own retries are turned off (LLM_CLIENT_RETRIES, see
+providers.py), so every 429 reaches this module.
+"""
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional, Tuple
+
+from .metrics import RATE_LIMIT_EVENTS
+from .timing import PhaseTimer
+
+# A 429, or Anthropic's 529 "overloaded": slow down
+RATE_LIMIT_STATUSES = (429, 529)
+# Worth another attempt after a backoff
+RETRYABLE_STATUSES = RATE_LIMIT_STATUSES + (500, 502, 503, 504)
+
+# The allowed rate never drops below this share of the limit
+MIN_SCALE = 0.05
+INCREASE_STEP = 0.1
+# The rate changes at most once per interval: 429s from calls already in flight
+# when it was cut count as one signal, and increases wait for their effect
+ADJUST_INTERVAL = 1.0
+# Prompt template and completion tokens on top of the resume, until usage is reported
+INITIAL_TOKEN_OVERHEAD = 1500.0
+# Buckets hold this many seconds of refill. Providers enforce per-minute limits
+# over much shorter windows too, so a whole minute's burst would trip them
+BURST_SECONDS = 1.0
+# Default LLM_MAX_WAIT on Lambda, leaving the rest of the 30 s timeout for the call itself
+LAMBDA_MAX_WAIT = 10.0
+
+_RETRY_IN_RE = re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE)
+
+
+class Overloaded(Exception):
+    """The provider's rate limit, or this process's queue, has no room; retry after ``retry_after`` seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> dict:
+        return {"Retry-After": str(max(1, int(-(-self.retry_after // 1))))}
+
+
+def classify_error(error: BaseException) -> Tuple[Optional[int], Optional[float]]:
+    """The HTTP status behind a provider error and its Retry-After in seconds, where known"""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if not isinstance(status, int):
+        status = getattr(response, "status_code", None)
+    message = str(error)
+    if status is None and ("429" in message or "RESOURCE_EXHAUSTED" in message or "rate limit" in message.lower()):
+        status = 429
+
+    retry_after = None
+    headers = getattr(response, "headers", None)
+    if headers is not None and headers.get("retry-after"):
+        try:
+            retry_after = float(headers.get("retry-after"))
+        except ValueError:
+            pass
+    if retry_after is None:
+        # Gemini puts it in the message: "... Please retry in 12.5s."
+        match = _RETRY_IN_RE.search(message)
+        retry_after = float(match.group(1)) if match else None
+    return status, retry_after
+
+
+class TokenBucket:
+    """``per_minute`` units refilled continuously, up to BURST_SECONDS' worth; None means unlimited.
+
+    A reservation may overdraw the bucket, and the caller sleeps off the debt,
+    so concurrent callers are served in the order they reserved.
+    """
+
+    def __init__(self, per_minute: Optional[float] = None):
+        self.per_minute = per_minute
+        self.level = per_minute * BURST_SECONDS / 60 if per_minute else 0.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float, scale: float) -> None:
+        if self.per_minute is not None:
+            rate = self.per_minute * scale / 60
+            self.level = min(max(1.0, rate * BURST_SECONDS), self.level + (now - self.updated) * rate)
+        self.updated = now
+
+    def delay(self, amount: float, scale: float) -> float:
+        """Seconds until ``amount`` is covered, at the current scale"""
+        if self.per_minute is None or self.level >= amount:
+            return 0.0
+        return (amount - self.level) / (self.per_minute * scale / 60)
+
+    def take(self, amount: float) -> None:
+        if self.per_minute is not None:
+            self.level -= amount
+
+
+class RateLimiter:
+    """Token buckets with AIMD, jittered retries and a bounded admission queue; see the module docstring"""
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None, max_queue: int = 64,
+                 max_wait: float = 30.0, max_retries: int = 3, backoff: float = 0.5, max_backoff: float = 20.0):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.scale = 1.0
+        self.paused_until = 0.0
+        self.pending = 0
+        self.token_overhead = INITIAL_TOKEN_OVERHEAD
+        # Calls started in the last minute, to learn a request limit from the first 429
+        self._started: deque = deque(maxlen=10000)
+        self._last_decrease = 0.0
+        self._last_increase = 0.0
+        self._lock = threading.Lock()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rpm": self.requests.per_minute and round(self.requests.per_minute * self.scale, 1),
+                "tpm": self.tokens.per_minute and round(self.tokens.per_minute * self.scale),
+                "scale": round(self.scale, 3),
+                "pending": self.pending,
+                "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 1),
+            }
+
+    def _backlog(self, now: float) -> float:
+        """Roughly how long until capacity frees up; the Retry-After for a rejected call"""
+        waits = [self.paused_until - now, 1.0]
+        for bucket in (self.requests, self.tokens):
+            if bucket.per_minute is not None and bucket.level < 0:
+                waits.append(-bucket.level / (bucket.per_minute * self.scale / 60))
+        return max(waits)
+
+    def _admit(self, wait: bool) -> None:
+        with self._lock:
+            if not wait and self.pending >= self.max_queue:
+                RATE_LIMIT_EVENTS.inc(event="rejected")
+                raise Overloaded("Too many analyses in progress", self._backlog(time.monotonic()))
+            self.pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    def _reserve(self, tokens: int, wait: bool) -> Tuple[float, float]:
+        """Take one request and the estimated tokens; returns (seconds to sleep first, tokens reserved)"""
+        with self._lock:
+            now = time.monotonic()
+            cost = tokens + self.token_overhead
+            self.requests.refill(now, self.scale)
+            self.tokens.refill(now, self.scale)
+            delay = max(0.0, self.paused_until - now, self.requests.delay(1, self.scale),
+                        self.tokens.delay(cost, self.scale))
+            if not wait and delay > self.max_wait:
+                RATE_LIMIT_EVENTS.inc(event="rejected")
+                raise Overloaded("LLM rate limit reached", delay)
+            self.requests.take(1)
+            self.tokens.take(cost)
+            self._started.append(now + delay)
+            if delay:
+                RATE_LIMIT_EVENTS.inc(event="throttled")
+            return delay, cost
+
+    def _succeeded(self, reserved: float, tokens: int, used: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self.scale < 1.0 and now - max(self._last_increase, self._last_decrease) >= ADJUST_INTERVAL:
+                self._last_increase = now
+                self.scale = min(1.0, self.scale + INCREASE_STEP)
+            if used:
+                # Charge what the call really cost, and learn the overhead for the next estimate
+                self.tokens.take(used - reserved)
+                self.token_overhead += 0.2 * (used - tokens - self.token_overhead)
+
+    def _rate_limited(self, retry_after: Optional[float]) -> None:
+        with self._lock:
+            now = time.monotonic()
+            RATE_LIMIT_EVENTS.inc(event="provider_429")
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            if now - self._last_decrease < ADJUST_INTERVAL:
+                return
+            self._last_decrease = now
+            if self.requests.per_minute is None:
+                # No limit configured: start from the per-minute rate that just hit one
+                recent = [at for at in self._started if now - 60 < at <= now]
+                span = max(1.0, now - recent[0]) if recent else 60.0
+                self.requests = TokenBucket(max(1.0, len(recent) * 60 / span))
+                self.requests.level = 0.0
+            self.scale = max(MIN_SCALE, self.scale / 2)
+
+    def _retry_delay(self, error: BaseException, attempt: int, wait: bool) -> Optional[float]:
+        """Seconds to back off before retrying ``error``, or None to give up"""
+        status, retry_after = classify_error(error)
+        if status in RATE_LIMIT_STATUSES:
+            self._rate_limited(retry_after)
+        if status not in RETRYABLE_STATUSES:
+            return None
+        if attempt >= self.max_retries:
+            if status in RATE_LIMIT_STATUSES:
+                raise Overloaded("LLM provider rate limit reached", retry_after or self.max_backoff) from error
+            return None
+        # Full jitter keeps callers that failed together from retrying together
+        delay = max(retry_after or 0.0, random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+        if not wait and delay > self.max_wait:
+            if status in RATE_LIMIT_STATUSES:
+                RATE_LIMIT_EVENTS.inc(event="rejected")
+                raise Overloaded("LLM provider rate limit reached", delay) from error
+            return None
+        RATE_LIMIT_EVENTS.inc(event="retried")
+        return delay
+
+    @staticmethod
+    def _used(timer: PhaseTimer) -> float:
+        return timer.counts.get("prompt_tokens", 0) + timer.counts.get("completion_tokens", 0)
+
+    def call(self, fn: Callable[[], object], tokens: int, timer: Optional[PhaseTimer] = None, wait: bool = False):
+        """Run ``fn`` (one LLM call, ~``tokens`` of input) within the limits, retrying what is worth retrying"""
+        timer = timer or PhaseTimer()
+        self._admit(wait)
+        try:
+            attempt = 0
+            while True:
+                delay, reserved = self._reserve(tokens, wait)
+                if delay:
+                    with timer.phase("rate_limit_wait"):
+                        time.sleep(delay)
+                used = self._used(timer)
+                try:
+                    result = fn()
+                except Exception as e:
+                    backoff = self._retry_delay(e, attempt, wait)
+                    if backoff is None:
+                        raise
+                    with timer.phase("retry_backoff"):
+                        time.sleep(backoff)
+                    attempt += 1
+                    continue
+                self._succeeded(reserved, tokens, self._used(timer) - used)
+                return result
+        finally:
+            self._release()
+
+    async def acall(self, fn: Callable[[], Awaitable], tokens: int, timer: Optional[PhaseTimer] = None,
+                    wait: bool = False):
+        """Async call(); ``fn`` is a coroutine function"""
+        import asyncio
+
+        timer = timer or PhaseTimer()
+        self._admit(wait)
+        try:
+            attempt = 0
+            while True:
+                delay, reserved = self._reserve(tokens, wait)
+                if delay:
+                    with timer.phase("rate_limit_wait"):
+                        await asyncio.sleep(delay)
+                used = self._used(timer)
+                try:
+                    result = await fn()
+                except Exception as e:
+                    backoff = self._retry_delay(e, attempt, wait)
+                    if backoff is None:
+                        raise
+                    with timer.phase("retry_backoff"):
+                        await asyncio.sleep(backoff)
+                    attempt += 1
+                    continue
+                self._succeeded(reserved, tokens, self._used(timer) - used)
+                return result
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def aslot(self, tokens: int, timer: Optional[PhaseTimer] = None):
+        """Admission and rate limiting for one call that cannot be retried, such as a stream"""
+        import asyncio
+
+        timer = timer or PhaseTimer()
+        self._admit(False)
+        try:
+            delay, reserved = self._reserve(tokens, False)
+            if delay:
+                with timer.phase("rate_limit_wait"):
+                    await asyncio.sleep(delay)
+            used = self._used(timer)
+            try:
+                yield
+            except Exception as e:
+                status, retry_after = classify_error(e)
+                if status in RATE_LIMIT_STATUSES:
+                    self._rate_limited(retry_after)
+                raise
+            self._succeeded(reserved, tokens, self._used(timer) - used)
+        finally:
+            self._release()
+
+
+def _limit(name: str) -> Optional[float]:
+    value = float(os.getenv(name, "0"))
+    return value or None
+
+
+def limiter_from_env() -> RateLimiter:
+    """Build the limiter configured by the LLM_* environment variables"""
+    max_wait = LAMBDA_MAX_WAIT if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else 30.0
+    return RateLimiter(
+        rpm=_limit("LLM_RPM"),
+        tpm=_limit("LLM_TPM"),
+        max_queue=int(os.getenv("LLM_MAX_QUEUE", "64")),
+        max_wait=float(os.getenv("LLM_MAX_WAIT", max_wait)),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+        backoff=float(os.getenv("LLM_BACKOFF", "0.5")),
+        max_backoff=float(os.getenv("LLM_MAX_BACKOFF", "20")),
+    )
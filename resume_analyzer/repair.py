@@ -0,0 +1,303 @@
+"""Recover a ResumeAnalysis from model output that is almost, but not quite, JSON.
+
+PydanticOutputParser rejects the whole response over a trailing comma or an
+answer cut off by the token limit, and re-prompting costs a second LLM call.
+RepairingOutputParser validates well-formed JSON directly with pydantic (which
+also skips LangChain's markdown and partial-JSON fallbacks, tens of
+milliseconds on bad input) and, only when that fails, repairs the text
+locally and validates what it can:
+
+- code fences and prose around the outermost object are dropped
+- trailing commas, Python literals (True/None) and raw newlines inside
+  strings are fixed
+- truncated output is cut back to the last complete value and the open
+  strings, arrays and objects are closed; a number at the very end is dropped
+  too, since "2" may be the start of "25", and anything cut is recorded as a
+  dropped_partial_value fix
+- fields are coerced to the schema: "7" or "7/10" for an int, a comma
+  separated string for a list, missing lists and strings left empty, and list
+  items that cannot be validated dropped
+
+Whether a response parsed cleanly, needed repair or could not be recovered is
+counted process-wide; repair_stats() reports the counts and the repair rate.
+Generation-side JSON mode (see providers.build_chat_model) makes the repair
+path rare where the provider supports it.
+"""
+import json
+import re
+import threading
+import typing
+from collections import Counter
+from typing import Any, List, Tuple
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.outputs import Generation
+from pydantic import BaseModel, ValidationError
+
+from .metrics import OUTPUT_PARSES
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?")
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+_LITERALS = {"True": "true", "False": "false", "None": "null", "NaN": "null", "null": "null",
+             "true": "true", "false": "false"}
+
+_lock = threading.Lock()
+_outcomes: Counter = Counter()
+_fixes: Counter = Counter()
+
+
+def _record(outcome: str, fixes: List[str] = ()) -> None:
+    OUTPUT_PARSES.inc(outcome=outcome)
+    with _lock:
+        _outcomes[outcome] += 1
+        _fixes.update(fixes)
+
+
+def repair_stats() -> dict:
+    """How many responses parsed clean, were repaired or failed, and which fixes were needed"""
+    with _lock:
+        total = sum(_outcomes.values())
+        return {
+            "parsed": total,
+            "clean": _outcomes["clean"],
+            "repaired": _outcomes["repaired"],
+            "failed": _outcomes["failed"],
+            "repair_rate": round(_outcomes["repaired"] / total, 4) if total else 0.0,
+            "fixes": dict(_fixes),
+        }
+
+
+def reset_repair_stats() -> None:
+    with _lock:
+        _outcomes.clear()
+        _fixes.clear()
+
+
+def _outer_object(text: str, fixes: List[str]) -> str:
+    if "```" in text:
+        text = _FENCE_RE.sub("", text)
+        fixes.append("code_fence")
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("no JSON object in model output")
+    # Prose after the object is dropped once the object closes, in repair_json
+    if text[:start].strip():
+        fixes.append("surrounding_text")
+    return text[start:].rstrip()
+
+
+def repair_json(text: str) -> Tuple[Any, List[str]]:
+    """Parse ``text`` as JSON, fixing the mistakes language models commonly make"""
+    fixes: List[str] = []
+    body = _outer_object(text, fixes)
+    try:
+        return json.loads(body), fixes
+    except json.JSONDecodeError:
+        pass
+
+    out: List[str] = []
+    stack: List[str] = []
+    # Where the output can be cut if the text turns out to be truncated: after
+    # an opening bracket, before a comma, or after a complete value
+    safe_at, safe_stack = 0, []
+    expect_key = False
+    in_string = escaped = False
+    string_is_key = False
+    i, n = 0, len(body)
+    while i < n:
+        ch = body[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                out.append(ch)
+                if not string_is_key:
+                    safe_at, safe_stack = len(out), stack[:]
+                i += 1
+                continue
+            elif ch in "\r\n\t":
+                ch = {"\r": "\\r", "\n": "\\n", "\t": "\\t"}[ch]
+                fixes.append("control_character")
+            out.append(ch)
+            i += 1
+            continue
+
+        if ch == '"':
+            in_string = True
+            string_is_key = bool(stack) and stack[-1] == "{" and expect_key
+            out.append(ch)
+        elif ch in "{[":
+            stack.append(ch)
+            expect_key = ch == "{"
+            out.append(ch)
+            safe_at, safe_stack = len(out), stack[:]
+        elif ch in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+                fixes.append("trailing_comma")
+            if stack:
+                closer = "}" if stack.pop() == "{" else "]"
+                if ch != closer:
+                    ch = closer
+                    fixes.append("mismatched_bracket")
+            expect_key = False
+            out.append(ch)
+            safe_at, safe_stack = len(out), stack[:]
+            if not stack:
+                if body[i + 1:].strip() and "surrounding_text" not in fixes:
+                    fixes.append("surrounding_text")
+                break
+        elif ch == ",":
+            safe_at, safe_stack = len(out), stack[:]
+            expect_key = bool(stack) and stack[-1] == "{"
+            out.append(ch)
+        elif ch == ":":
+            expect_key = False
+            out.append(ch)
+        elif ch.isalpha() and not (out and out[-1][-1:].isdigit()):  # not the e in 1e3
+            j = i
+            while j < n and (body[j].isalnum() or body[j] == "_"):
+                j += 1
+            word = body[i:j]
+            literal = _LITERALS.get(word)
+            if literal is None:
+                if j == n and any(name.startswith(word) for name in _LITERALS):
+                    # "tru" at the end of truncated output; the cut below drops it
+                    out.append(word)
+                    break
+                raise ValueError(f"unexpected token {word!r} in model output")
+            if literal != word:
+                fixes.append("python_literal")
+            out.append(literal)
+            # Unlike a number, a literal cannot be the start of a longer value
+            safe_at, safe_stack = len(out), stack[:]
+            i = j
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    if in_string or stack:
+        fixes.append("truncated")
+        if "".join(out[safe_at:]).strip(", \t\r\n"):
+            fixes.append("dropped_partial_value")
+        out, stack = out[:safe_at], safe_stack
+        while out and (out[-1].isspace() or out[-1] == ","):
+            out.pop()
+        out.extend("}" if bracket == "{" else "]" for bracket in reversed(stack))
+    return json.loads("".join(out)), fixes
+
+
+def _coerce(value: Any, annotation: Any, fixes: List[str]) -> Any:
+    origin = typing.get_origin(annotation)
+    if origin in (list, List):
+        (item_type,) = typing.get_args(annotation) or (Any,)
+        if isinstance(value, str):
+            value = [part.strip() for part in value.split(",") if part.strip()]
+            fixes.append("string_to_list")
+        elif isinstance(value, dict):
+            value = [value]
+            fixes.append("object_to_list")
+        elif not isinstance(value, list):
+            raise ValueError(f"expected a list, got {type(value).__name__}")
+        items = []
+        for item in value:
+            if item is None:
+                fixes.append("dropped_item")
+                continue
+            try:
+                items.append(_coerce(item, item_type, fixes))
+            except (ValueError, TypeError, ValidationError):
+                fixes.append("dropped_item")
+        return items
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        if not isinstance(value, dict):
+            raise ValueError(f"expected an object for {annotation.__name__}")
+        return coerce_to_model(value, annotation, fixes)
+    if annotation is int:
+        if isinstance(value, bool):
+            raise ValueError("expected an integer, got a boolean")
+        if isinstance(value, int):
+            return value
+        if isinstance(value, float):
+            fixes.append("float_to_int")
+            return round(value)
+        if isinstance(value, str):
+            # "7", "7.5", "7/10" and "Score: 7" all mean 7-ish
+            match = _NUMBER_RE.search(value)
+            if match:
+                fixes.append("string_to_int")
+                return round(float(match.group()))
+        raise ValueError(f"expected an integer, got {value!r}")
+    if annotation is str:
+        if isinstance(value, str):
+            return value
+        if value is None:
+            fixes.append("null_to_string")
+            return ""
+        if isinstance(value, list):
+            fixes.append("list_to_string")
+            return " ".join(str(part) for part in value)
+        if isinstance(value, (int, float)):
+            fixes.append("number_to_string")
+            return str(value)
+        raise ValueError(f"expected a string, got {type(value).__name__}")
+    return value
+
+
+def coerce_to_model(data: dict, model: typing.Type[BaseModel], fixes: List[str]) -> BaseModel:
+    """Validate ``data`` against ``model`` field by field, coercing what it can"""
+    values = {}
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        if name not in data or data[name] is None:
+            if not field.is_required():
+                continue
+            # A truncated answer usually loses its last fields; empty text and
+            # lists are honest stand-ins, a made-up score is not
+            if typing.get_origin(annotation) in (list, List):
+                values[name] = []
+            elif annotation is str:
+                values[name] = ""
+            else:
+                raise ValueError(f"required field {name!r} is missing")
+            fixes.append("missing_field")
+            continue
+        values[name] = _coerce(data[name], annotation, fixes)
+    return model(**values)
+
+
+def repair_output(text: str, model: typing.Type[BaseModel]) -> Tuple[BaseModel, List[str]]:
+    """Repair and validate ``text`` into ``model``, returning the fixes applied"""
+    data, fixes = repair_json(text)
+    if not isinstance(data, dict):
+        raise ValueError("model output is not a JSON object")
+    return coerce_to_model(data, model, fixes), fixes
+
+
+class RepairingOutputParser(PydanticOutputParser):
+    """PydanticOutputParser that repairs malformed output instead of failing the request"""
+
+    def parse_result(self, result: List[Generation], *, partial: bool = False):
+        if partial:
+            return super().parse_result(result, partial=True)
+        text = result[0].text
+        try:
+            parsed = self.pydantic_object.model_validate_json(text)
+        except ValidationError as strict_error:
+            # Raised for invalid JSON as well as for schema mismatches
+            try:
+                parsed, fixes = repair_output(text, self.pydantic_object)
+            except (ValueError, TypeError, ValidationError) as e:
+                _record("failed")
+                raise OutputParserException(f"Could not repair model output: {e}", llm_output=text) from strict_error
+            _record("repaired", sorted(set(fixes)))
+            return parsed
+        _record("clean")
+        return parsed
@@ -0,0 +1,255 @@
+"""Latency-aware routing across several chat model providers.
+
+ProviderRouter is itself a LangChain chat model, so it drops into the
+existing ``prompt | llm | parser`` chains. For every call it ranks the
+providers by rolling median latency, skipping any that are unhealthy (error
+rate over ``max_error_rate`` in the window, or cooling down after repeated
+consecutive failures), and falls through to the next provider when a call
+fails.
+
+With ``hedge=True`` a second request is sent to the runner-up once the first
+has been outstanding longer than the primary's rolling p95 (``hedge_after``
+until there are enough samples), and whichever answer arrives first wins.
+That trims the latency tail at the cost of a few duplicate calls; how many
+is visible in stats().
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+MIN_SAMPLES = 5
+FAILURES_BEFORE_COOLDOWN = 3
+COOLDOWN_SECONDS = 30.0
+
+
+class LatencyWindow:
+    """Rolling latency and outcome samples for one provider"""
+
+    def __init__(self, size: int):
+        self.latencies: deque = deque(maxlen=size)
+        self.outcomes: deque = deque(maxlen=size)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.calls = 0
+        self.hedges = 0
+        self.wins = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= FAILURES_BEFORE_COOLDOWN:
+                self.cooldown_until = time.monotonic() + COOLDOWN_SECONDS
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def healthy(self, max_error_rate: float) -> bool:
+        if time.monotonic() < self.cooldown_until:
+            return False
+        return len(self.outcomes) < MIN_SAMPLES or self.error_rate <= max_error_rate
+
+    def snapshot(self, max_error_rate: float) -> dict:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "samples": len(self.outcomes),
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "wins": self.wins,
+            "healthy": self.healthy(max_error_rate),
+        }
+
+
+class ProviderRouter(BaseChatModel):
+    """Chat model that sends each request to the fastest healthy provider"""
+
+    providers: Dict[str, Any]
+    hedge: bool = False
+    hedge_after: float = 8.0
+    window: int = 100
+    max_error_rate: float = 0.25
+
+    _stats: Dict[str, LatencyWindow] = PrivateAttr(default_factory=dict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _executor: Any = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self._stats = {name: LatencyWindow(self.window) for name in self.providers}
+
+    @property
+    def _llm_type(self) -> str:
+        return "provider-router"
+
+    def ranked(self) -> List[str]:
+        """Healthy providers fastest first, then unhealthy ones as a last resort"""
+        with self._lock:
+            def speed(name):
+                stats = self._stats[name]
+                p50 = stats.percentile(0.5)
+                # Providers without enough samples go first so every one gets measured
+                return (p50 if p50 is not None else 0.0, len(stats.outcomes))
+
+            healthy = [name for name in self.providers if self._stats[name].healthy(self.max_error_rate)]
+            unhealthy = [name for name in self.providers if name not in healthy]
+            return sorted(healthy, key=speed) + sorted(unhealthy, key=speed)
+
+    def hedge_delay(self, name: str) -> float:
+        with self._lock:
+            p95 = self._stats[name].percentile(0.95)
+        return p95 if p95 is not None else self.hedge_after
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: stats.snapshot(self.max_error_rate) for name, stats in self._stats.items()}
+
+    def _record(self, name: str, start: float, ok: bool) -> None:
+        with self._lock:
+            self._stats[name].record(time.perf_counter() - start, ok)
+
+    def _count(self, name: str, field: str) -> None:
+        with self._lock:
+            stats = self._stats[name]
+            setattr(stats, field, getattr(stats, field) + 1)
+
+    @staticmethod
+    def _result(name: str, message) -> ChatResult:
+        message.response_metadata = {**message.response_metadata, "provider": name}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _call(self, name: str, messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any) -> ChatResult:
+        self._count(name, "calls")
+        start = time.perf_counter()
+        try:
+            message = self.providers[name].invoke(messages, stop=stop, **kwargs)
+        except Exception:
+            self._record(name, start, False)
+            raise
+        self._record(name, start, True)
+        return self._result(name, message)
+
+    async def _acall(self, name: str, messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any) -> ChatResult:
+        self._count(name, "calls")
+        start = time.perf_counter()
+        try:
+            message = await self.providers[name].ainvoke(messages, stop=stop, **kwargs)
+        except asyncio.CancelledError:
+            # A hedge that lost the race says nothing about the provider's health
+            raise
+        except Exception:
+            self._record(name, start, False)
+            raise
+        self._record(name, start, True)
+        return self._result(name, message)
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2 * len(self.providers), thread_name_prefix="llm-hedge")
+            return self._executor
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        remaining = self.ranked()
+        error: Optional[BaseException] = None
+        while remaining:
+            name = remaining.pop(0)
+            if not (self.hedge and remaining):
+                try:
+                    result = self._call(name, messages, stop, **kwargs)
+                    self._count(name, "wins")
+                    return result
+                except Exception as e:
+                    error = e
+                    continue
+
+            executor = self._hedge_executor()
+            futures = {executor.submit(self._call, name, messages, stop, **kwargs): name}
+            done, _ = wait(futures, timeout=self.hedge_delay(name))
+            if not done:
+                backup = remaining.pop(0)
+                self._count(backup, "hedges")
+                futures[executor.submit(self._call, backup, messages, stop, **kwargs)] = backup
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        # Threads cannot be cancelled; a losing call finishes in the background
+                        self._count(futures[future], "wins")
+                        return future.result()
+                    error = future.exception()
+        raise error or RuntimeError("No LLM providers configured")
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        remaining = self.ranked()
+        error: Optional[BaseException] = None
+        while remaining:
+            name = remaining.pop(0)
+            tasks = {asyncio.ensure_future(self._acall(name, messages, stop, **kwargs)): name}
+            delay = self.hedge_delay(name) if self.hedge and remaining else None
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                backup = remaining.pop(0)
+                self._count(backup, "hedges")
+                tasks[asyncio.ensure_future(self._acall(backup, messages, stop, **kwargs))] = backup
+            pending = set(tasks)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            self._count(tasks[task], "wins")
+                            return task.result()
+                        error = task.exception()
+            finally:
+                for task in pending:
+                    task.cancel()
+        raise error or RuntimeError("No LLM providers configured")
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any):
+        """Stream from the fastest healthy provider, failing over until the first chunk arrives"""
+        error: Optional[BaseException] = None
+        for name in self.ranked():
+            self._count(name, "calls")
+            start = time.perf_counter()
+            started = False
+            try:
+                async for chunk in self.providers[name].astream(messages, stop=stop, **kwargs):
+                    if not started:
+                        started = True
+                        self._count(name, "wins")
+                    yield ChatGenerationChunk(message=chunk)
+            except Exception as e:
+                self._record(name, start, False)
+                if started:
+                    raise
+                error = e
+                continue
+            self._record(name, start, True)
+            return
+        raise error or RuntimeError("No LLM providers configured")
+
@@ -0,0 +1,130 @@
+"""The sample analysis the landing page shows, as a build-time artifact.
+
+data/sample_analysis.json is the analysis of SAMPLE_RESUME made with the real
+prompt and model, validated against ResumeAnalysis whenever it is built or
+checked. Handlers serve it as bytes encoded once per process with an ETag
+and Cache-Control, so the most requested route makes no LLM call and, after
+the first request, does no work beyond comparing If-None-Match.
+
+Rebuild it after changing the prompt or schema (build bumps "version"):
+
+    python -m resume_analyzer.sample build   # re-runs the analysis; needs an API key
+    python -m resume_analyzer.sample check   # validates the committed artifact
+"""
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, NamedTuple, Optional
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SAMPLE_PATH = os.path.join(DATA_DIR, "sample_analysis.json")
+
+# The artifact only changes on deploy; clients revalidate with the ETag after an hour
+CACHE_CONTROL = "public, max-age=3600, stale-while-revalidate=86400"
+
+SAMPLE_RESUME = """
+John Smith
+Software Developer
+Email: john.smith@email.com
+Phone: (555) 123-4567
+
+Experience:
+- Worked at Tech Company for 2 years
+- Built websites using JavaScript
+- Fixed bugs and wrote code
+
+Education:
+- Computer Science Degree from University
+
+Skills:
+- Programming
+- Problem solving
+"""
+
+
+class EncodedResponse(NamedTuple):
+    """A JSON body encoded once, with the validators clients can cache it by"""
+
+    body: bytes
+    etag: str
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"ETag": self.etag, "Cache-Control": CACHE_CONTROL}
+
+
+def encode_static(data) -> EncodedResponse:
+    body = json.dumps(data, separators=(",", ":")).encode()
+    return EncodedResponse(body, '"' + hashlib.sha256(body).hexdigest()[:20] + '"')
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lets the server answer 304"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def load_sample(path: str = SAMPLE_PATH) -> dict:
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def sample_payload(envelope: bool = False) -> dict:
+    """The sample analysis; with ``envelope``, wrapped like the serverless analyze responses"""
+    analysis = load_sample()["analysis"]
+    if not envelope:
+        return analysis
+    return {
+        "analysis": analysis,
+        "resume_length": len(SAMPLE_RESUME),
+        "word_count": len(SAMPLE_RESUME.split()),
+        "timestamp": "sample",
+    }
+
+
+_encoded: Dict[bool, EncodedResponse] = {}
+
+
+def encoded_sample(envelope: bool = False) -> EncodedResponse:
+    """The sample response, read and encoded once per process"""
+    if envelope not in _encoded:
+        _encoded[envelope] = encode_static(sample_payload(envelope))
+    return _encoded[envelope]
+
+
+def check(path: str = SAMPLE_PATH):
+    """Validate the artifact against ResumeAnalysis; raises if it does not match"""
+    from .schema import ResumeAnalysis
+
+    return ResumeAnalysis(**load_sample(path)["analysis"])
+
+
+def build(path: str = SAMPLE_PATH) -> str:
+    """Analyze SAMPLE_RESUME with the configured provider and write the artifact"""
+    from .engine import AnalysisEngine
+    from .prompts import DEFAULT_PROMPT_VERSION
+
+    engine = AnalysisEngine(os.getenv("LLM_PROVIDERS", "google:gemini-2.5-flash"), prompt_version=DEFAULT_PROMPT_VERSION)
+    engine.cache = None
+    analysis, _ = engine.analyze(SAMPLE_RESUME)
+    previous = load_sample(path)["version"] if os.path.exists(path) else 0
+    with open(path + ".tmp", "w", encoding="utf-8", newline="\n") as file:
+        json.dump({"version": previous + 1, "prompt_version": engine.prompt_version,
+                   "analysis": analysis.dict()}, file, indent=2)
+        file.write("\n")
+    check(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return path
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["build"]:
+        print(f"Wrote {build()}")
+    elif sys.argv[1:] == ["check"]:
+        check()
+        print(f"{SAMPLE_PATH} matches ResumeAnalysis")
+    else:
+        sys.exit("usage: python -m resume_analyzer.sample build|check")
@@ -0,0 +1,50 @@
+"""The analysis every entry point returns.
+
+One schema for the CLI, the FastAPI backend, the Vercel function and the
+Lambda handler, so a cached or batched analysis means the same thing
+everywhere and the web frontend can render any of them.
+"""
+from typing import List
+
+from pydantic import BaseModel
+
+
+class SEORecommendation(BaseModel):
+    category: str  # e.g., "Keywords", "Skills", "Industry Terms"
+    recommendation: str
+    priority: str  # "High", "Medium", "Low"
+    implementation: str  # How to implement this
+
+
+class ScoreBreakdown(BaseModel):
+    keyword_score: int  # /10
+    ats_compatibility: int  # /10
+    industry_terms: int  # /10
+    skills_optimization: int  # /10
+    format_structure: int  # /10
+    explanation: str
+
+
+class ResumeAnalysis(BaseModel):
+    current_role: str
+    target_industry: str
+    missing_keywords: List[str]
+    seo_recommendations: List[SEORecommendation]
+    overall_score: int  # 1-10
+    score_breakdown: ScoreBreakdown
+    summary: str
+
+
+class SectionUpdate(BaseModel):
+    """The update prompt's answer: what a few edited sections change in a previous analysis"""
+    score_breakdown: ScoreBreakdown
+    resolved_recommendations: List[int]  # ids of previous recommendations the edits addressed
+    new_recommendations: List[SEORecommendation]  # only for the edited sections
+    missing_keywords: List[str]
+    summary: str
+
+
+# Streaming asks for the cheapest, most useful fields first so a client can
+# show the score while the recommendations are still being written
+STREAM_FIELD_ORDER = ["current_role", "target_industry", "overall_score", "score_breakdown",
+                      "seo_recommendations", "missing_keywords", "summary"]
@@ -0,0 +1,259 @@
+"""Deterministic, local scoring of the mechanical parts of a resume.
+
+keyword_score, ats_compatibility and format_structure only depend on what is
+literally in the text: which industry keywords appear (matched against the
+precompiled index in keywords.py, synonyms included), which standard sections
+exist and how they are bulleted (the cached parse from sections.py), and
+whether contact details are present. Computing them here is reproducible
+and takes well under 10 ms, so the LLM only has to write the narrative parts,
+or can be skipped entirely.
+
+ANALYSIS_MODE selects how the entry points use this module:
+
+- ``full``   the LLM produces every field (previous behaviour)
+- ``hybrid`` the LLM runs, then the three mechanical subscores, the overall
+             score and missing_keywords are replaced with the local ones,
+             and a missing Experience/Education/Skills section is flagged
+             even when the model did not mention it
+- ``fast``   no LLM call; the whole ResumeAnalysis is built locally
+"""
+import os
+import re
+from typing import Dict, List, Optional
+
+from .keywords import load_index
+from .sections import DATE_STYLES, REQUIRED_SECTIONS, SECTION_ALIASES, segment
+
+ROLE_WORDS = ("developer", "engineer", "manager", "analyst", "designer", "specialist", "consultant",
+              "nurse", "accountant", "director", "coordinator", "scientist", "administrator", "architect",
+              "representative", "associate", "intern", "lead", "officer", "technician")
+
+# Weights from the scoring rubric in the analysis prompt
+SCORE_WEIGHTS = {
+    "keyword_score": 0.25,
+    "ats_compatibility": 0.25,
+    "industry_terms": 0.20,
+    "skills_optimization": 0.15,
+    "format_structure": 0.15,
+}
+
+
+# Presence checks only, so these match the cheapest unambiguous fragment
+_EMAIL_RE = re.compile(r"[\w.+-]@[\w-]+\.\w")
+_PHONE_RE = re.compile(r"\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}")
+_TABLE_RE = re.compile(r"\|.*\||\t.*\t")
+_GLYPH_RE = re.compile(r"[★☆✓✔✖➤➔\U0001F300-\U0001FAFF]")
+
+
+def _clamp(value: float) -> int:
+    return max(1, min(10, round(value)))
+
+
+def detect_industry(industry_hits: Dict[str, tuple]) -> str:
+    """Pick the industry whose vocabulary the resume uses most (distinct keywords)"""
+    best = max(industry_hits, key=lambda industry: industry_hits[industry][0])
+    return best if industry_hits[best][0] else "Technology"
+
+
+def local_scores(resume_text: str, industry: Optional[str] = None) -> dict:
+    """Score the mechanical aspects of a resume and report what was found"""
+    lowered = resume_text.lower()
+    lines = resume_text.splitlines()
+    words = len(resume_text.split()) or 1
+    index = load_index()
+    counts = index.scan(resume_text)
+    industry_hits = index.industry_hits(counts)
+    # The model's target_industry when the vocabulary knows it, so the scores match the analysis they go into
+    industry = {name.lower(): name for name in industry_hits}.get((industry or "").strip().lower())
+    if industry is None:
+        industry = detect_industry(industry_hits)
+    terms = index.industry_keywords(industry)
+
+    matched, missing = index.match(resume_text, industry, counts)
+    density = industry_hits[industry][1] / words * 100
+
+    structure = segment(resume_text)
+    # Low-value sections (references, hobbies) count neither for nor against the score
+    sections = [kind for kind in structure.kinds if kind in SECTION_ALIASES]
+    skills_terms, _ = index.match(" ".join(structure.lines("skills")), industry)
+
+    bullet_styles = structure.bullet_styles()
+    bullets = sum(bullet_styles.values())
+    bullet_consistency = max(bullet_styles.values()) / bullets if bullets else 0.0
+
+    contact = {
+        "email": "@" in resume_text and bool(_EMAIL_RE.search(resume_text)),
+        "phone": bool(_PHONE_RE.search(resume_text)),
+        "linkedin": "linkedin.com/" in lowered,
+    }
+    date_styles = [name for name, regex in DATE_STYLES.items() if regex.search(lowered)]
+    has_tables = bool(_TABLE_RE.search(resume_text))
+    has_glyphs = bool(_GLYPH_RE.search(resume_text))
+    long_lines = sum(1 for line in lines if len(line) > 200)
+
+    keyword_score = _clamp(1 + 6 * min(1.0, len(matched) / 12) + 3 * min(1.0, density / 4))
+
+    missing_sections = structure.missing(REQUIRED_SECTIONS)
+    ats = 10.0 - 2 * len(missing_sections)
+    ats -= 0 if contact["email"] else 2
+    ats -= 0 if contact["phone"] else 1
+    ats -= 1 if has_tables else 0
+    ats -= 1 if has_glyphs else 0
+    ats -= 1 if words < 150 or words > 1200 else 0
+
+    fmt = 10.0
+    fmt -= 3 if not bullets else (2 if bullet_consistency < 0.8 else 0)
+    fmt -= 2 if len(sections) < 3 else 0
+    fmt -= 1 if len(date_styles) > 1 else 0
+    fmt -= 1 if lines and long_lines / len(lines) > 0.2 else 0
+
+    return {
+        "industry": industry,
+        "keyword_score": keyword_score,
+        "ats_compatibility": _clamp(ats),
+        "format_structure": _clamp(fmt),
+        "industry_terms": _clamp(1 + 9 * min(1.0, len(matched) / (len(terms) * 0.6))),
+        "skills_optimization": _clamp(0 if "skills" not in sections else 3 + 7 * min(1.0, len(skills_terms) / 8)),
+        "matched_keywords": matched,
+        "missing_keywords": missing,
+        "keyword_density": round(density, 2),
+        "sections": sorted(sections),
+        "missing_sections": missing_sections,
+        "bullet_styles": bullet_styles,
+        "bullet_consistency": round(bullet_consistency, 2),
+        "contact": contact,
+        "date_styles": date_styles,
+        "has_tables": has_tables,
+        "has_glyphs": has_glyphs,
+        "word_count": words,
+    }
+
+
+def weighted_overall(breakdown: dict) -> int:
+    return _clamp(sum(breakdown[name] * weight for name, weight in SCORE_WEIGHTS.items()))
+
+
+def _section_recommendation(section: str) -> dict:
+    return {
+        "category": "ATS Optimization",
+        "recommendation": f"Add a clearly labelled {section.title()} section",
+        "priority": "High",
+        "implementation": f"Use the standard header \"{section.title()}\" so applicant tracking systems can find it",
+    }
+
+
+def section_recommendations(recommendations: List[dict], scores: dict) -> List[dict]:
+    """The model's recommendations, followed by one for each missing standard section it did not flag.
+
+    Following rather than leading them keeps the indexes of recommendations
+    already streamed to the client valid.
+    """
+    mentioned = " ".join(rec.get("recommendation", "") + " " + rec.get("implementation", "")
+                         for rec in recommendations).lower()
+    missing = [_section_recommendation(section) for section in scores["missing_sections"]
+               if f"{section} section" not in mentioned]
+    return recommendations + missing
+
+
+def apply_local_scores(analysis: dict, scores: dict) -> dict:
+    """Replace the LLM's mechanical subscores and missing keywords with the local ones (hybrid mode)"""
+    breakdown = dict(analysis["score_breakdown"])
+    for name in ("keyword_score", "ats_compatibility", "format_structure"):
+        breakdown[name] = scores[name]
+    adjusted = {
+        **analysis,
+        "missing_keywords": scores["missing_keywords"][:10],
+        "score_breakdown": breakdown,
+        "overall_score": weighted_overall(breakdown),
+    }
+    if "seo_recommendations" in analysis:
+        adjusted["seo_recommendations"] = section_recommendations(analysis["seo_recommendations"], scores)
+    return adjusted
+
+
+def _guess_role(lines: List[str]) -> str:
+    for line in lines[:6]:
+        stripped = line.strip()
+        if stripped and len(stripped) <= 60 and any(word in stripped.lower() for word in ROLE_WORDS):
+            return stripped
+    return "Not specified"
+
+
+def _recommendations(scores: dict) -> List[dict]:
+    recs = [_section_recommendation(section) for section in scores["missing_sections"]]
+    if scores["missing_keywords"]:
+        recs.append({
+            "category": "Keywords",
+            "recommendation": f"Mention in-demand {scores['industry']} terms you have experience with",
+            "priority": "High" if scores["keyword_score"] <= 5 else "Medium",
+            "implementation": "Consider adding: " + ", ".join(scores["missing_keywords"][:6]),
+        })
+    if not scores["contact"]["email"] or not scores["contact"]["phone"]:
+        recs.append({
+            "category": "Contact Information",
+            "recommendation": "Include both an email address and a phone number",
+            "priority": "High",
+            "implementation": "Put them in plain text at the top of the resume, not in a header or image",
+        })
+    if not scores["contact"]["linkedin"]:
+        recs.append({
+            "category": "Contact Information",
+            "recommendation": "Add your LinkedIn profile URL",
+            "priority": "Low",
+            "implementation": "Add linkedin.com/in/your-name next to your email address",
+        })
+    if not scores["bullet_styles"] or scores["bullet_consistency"] < 0.8:
+        recs.append({
+            "category": "Format",
+            "recommendation": "Use one consistent bullet style for achievements",
+            "priority": "Medium",
+            "implementation": "Start each achievement with the same bullet character and an action verb",
+        })
+    if len(scores["date_styles"]) > 1:
+        recs.append({
+            "category": "Format",
+            "recommendation": "Use a single date format throughout",
+            "priority": "Low",
+            "implementation": "For example \"Jan 2020 - Mar 2022\" for every position",
+        })
+    if scores["has_tables"] or scores["has_glyphs"]:
+        recs.append({
+            "category": "ATS Optimization",
+            "recommendation": "Remove tables, columns and decorative symbols",
+            "priority": "Medium",
+            "implementation": "Keep to plain text lines; many ATS parsers scramble tables and icons",
+        })
+    return recs
+
+
+def fast_analysis(resume_text: str, industry: Optional[str] = None) -> dict:
+    """Build a complete ResumeAnalysis payload (main.py/backend schema) without an LLM"""
+    scores = local_scores(resume_text, industry)
+    breakdown = {name: scores[name] for name in SCORE_WEIGHTS}
+    overall = weighted_overall(breakdown)
+    found = ", ".join(scores["sections"]) or "no standard sections"
+    breakdown["explanation"] = (
+        f"Scored locally: {len(scores['matched_keywords'])} {scores['industry']} terms found "
+        f"({scores['keyword_density']} per 100 words); sections detected: {found}."
+    )
+    return {
+        "current_role": _guess_role(resume_text.splitlines()),
+        "target_industry": scores["industry"],
+        "missing_keywords": scores["missing_keywords"][:10],
+        "seo_recommendations": _recommendations(scores),
+        "overall_score": overall,
+        "score_breakdown": breakdown,
+        "summary": (
+            f"Local quick scan rates this resume {overall}/10 for {scores['industry']} roles. "
+            + ("Add the missing standard sections and more industry keywords to improve visibility."
+               if scores["missing_sections"] else
+               "The structure is ATS-friendly; focus on adding relevant industry keywords.")
+        ),
+    }
+
+
+def analysis_mode() -> str:
+    mode = os.getenv("ANALYSIS_MODE", "full").lower()
+    if mode not in ("full", "hybrid", "fast"):
+        raise ValueError(f"Unknown ANALYSIS_MODE: {mode}")
+    return mode
@@ -0,0 +1,381 @@
+"""Persistent store of analyzed resumes, searchable by terms, keywords and score.
+
+When RESUME_STORE_PATH names a SQLite file (it is unset, and the store off,
+by default), every analysis the backend returns is upserted into it together
+with the resume text and the fields searches filter on. One record is kept
+per distinct resume text; analyzing it again replaces the analysis.
+
+Who submitted a record is kept apart from it, in resume_owners: one row per
+add(), holding a hash of the owner token add() returns and the submitter's
+email when given. owned() hands the text and analysis back for a record id
+and any of its tokens, which is how an incremental re-analysis finds its
+base, so two people who submit the same text each keep a working token.
+delete_user() removes only that email's ownership, and the records nobody
+else owns. Records expire RESUME_STORE_TTL_DAYS (default 30, 0 keeps them)
+after their last analysis, and delete() removes one at once. Search results
+and get() never include the resume text or an email.
+
+The inverted index is an FTS5 table over two columns of each record:
+
+- terms:   the resume's tokens (keywords.tokenize, so "c++" and "node.js"
+           stay whole) followed by the canonical keywords the keyword index
+           finds, so a search for "aws" finds "Amazon Web Services"
+- missing: the analysis's missing_keywords
+
+Triggers keep it in step with the records table, so each new analysis
+updates the index incrementally in the same transaction. target_industry and
+overall_score are ordinary B-tree indexes on the records table.
+
+Queries use a small boolean language: words and "quoted phrases", AND, OR,
+NOT and parentheses (a space means AND), and missing:docker to search the
+missing keywords instead of the resume. A word or phrase that is a synonym
+of a canonical keyword also matches the canonical keyword. Results come
+back by relevance (FTS5's BM25), by overall score or newest first.
+"""
+import hashlib
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from .keywords import load_index, tokenize
+
+SORTS = ("relevance", "score", "recent")
+MAX_RESULTS = 100
+# Expired records are deleted at most this often, on the store's next read or write
+PURGE_INTERVAL = 60.0
+
+# Query syntax: parentheses, quoted phrases, field:"phrase" and bare words
+_QUERY_RE = re.compile(r'[()]|(?:\w+:)?"[^"]*"|[^\s()"]+')
+_OPERATORS = {"AND", "OR", "NOT"}
+_FIELDS = {"missing": "missing"}
+# Keep the punctuation keywords.tokenize leaves inside tokens, so "c++" is one FTS token
+_FTS_TOKENIZER = "unicode61 tokenchars '+#./&-'"
+
+
+def index_terms(resume_text: str) -> str:
+    """The text the terms column indexes: the resume's tokens, then its canonical keywords"""
+    index = load_index()
+    tokens = tokenize(resume_text)
+    keywords = sorted({index.keywords[keyword_id].lower() for keyword_id in index.scan_tokens(tokens)})
+    # "|" separates keywords so a phrase query cannot match across two of them
+    return " ".join(tokens) + " | " + " | ".join(keywords)
+
+
+def _phrase(text: str) -> Optional[str]:
+    """An FTS5 string literal for ``text``, ORed with its canonical keyword when it is a synonym of one"""
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    phrase = " ".join(tokens)
+    index = load_index()
+    found = index.scan_tokens(tokens)
+    if len(found) == 1 and (len(tokens) == 1 or len(index.phrase_positions(tokens)) == len(tokens)):
+        canonical = index.keywords[next(iter(found))].lower()
+        if canonical != phrase:
+            return f'("{phrase}" OR "{canonical}")'
+    return f'"{phrase}"'
+
+
+def fts_query(query: str) -> str:
+    """Translate the search language into an FTS5 MATCH expression.
+
+    Raises ValueError when nothing in ``query`` is searchable.
+    """
+    parts: List[str] = []
+    searchable = False
+    for part in _QUERY_RE.findall(query):
+        if part in ("(", ")") or part in _OPERATORS:
+            parts.append(part)
+            continue
+        column = None
+        field, _, value = part.partition(":")
+        if value and field.lower() in _FIELDS:
+            column, part = _FIELDS[field.lower()], value
+        literal = _phrase(part.strip('"'))
+        if literal is None:
+            continue
+        searchable = True
+        parts.append(f"{column} : {literal}" if column else f"terms : {literal}")
+    if not searchable:
+        raise ValueError("The search query has no searchable terms")
+    return " ".join(parts)
+
+
+def text_hash(resume_text: str) -> str:
+    normalized = " ".join(resume_text.split())
+    return hashlib.blake2b(normalized.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class SQLiteResumeStore:
+    """Analyzed resumes in a SQLite file with an FTS5 inverted index over their terms"""
+
+    SUMMARY = ("id", "current_role", "target_industry", "overall_score", "missing_keywords", "created_at",
+               "updated_at")
+
+    def __init__(self, path: str = ".resumes.sqlite3", ttl_days: float = 0):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self._lock = threading.Lock()
+        self._conn = None
+        self._purged_at = 0.0
+
+    @property
+    def conn(self):
+        # Opened on first use so importing a handler never creates the file
+        if self._conn is None:
+            import sqlite3
+
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.executescript(f"""
+                -- The columns searches read come first, ahead of the long text in overflow pages
+                CREATE TABLE IF NOT EXISTS resumes (
+                    id INTEGER PRIMARY KEY, text_hash TEXT NOT NULL UNIQUE,
+                    current_role TEXT, target_industry TEXT COLLATE NOCASE, overall_score INTEGER,
+                    missing_keywords TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL,
+                    resume_text TEXT NOT NULL, analysis TEXT NOT NULL, terms TEXT NOT NULL, missing TEXT NOT NULL);
+                CREATE INDEX IF NOT EXISTS resumes_score ON resumes (overall_score);
+                CREATE INDEX IF NOT EXISTS resumes_industry ON resumes (target_industry, overall_score);
+                CREATE INDEX IF NOT EXISTS resumes_updated ON resumes (updated_at);
+                -- One row per submission; a bulk-loaded record may have an email and no token
+                CREATE TABLE IF NOT EXISTS resume_owners (
+                    resume_id INTEGER NOT NULL, token_hash TEXT UNIQUE, user_email TEXT, created_at REAL NOT NULL);
+                CREATE INDEX IF NOT EXISTS resume_owners_resume ON resume_owners (resume_id);
+                CREATE INDEX IF NOT EXISTS resume_owners_email ON resume_owners (user_email, resume_id);
+                CREATE TRIGGER IF NOT EXISTS resumes_disowned AFTER DELETE ON resumes BEGIN
+                    DELETE FROM resume_owners WHERE resume_id = old.id;
+                END;
+                CREATE VIRTUAL TABLE IF NOT EXISTS resume_terms USING fts5(
+                    terms, missing, content='resumes', content_rowid='id', tokenize="{_FTS_TOKENIZER}");
+                CREATE TRIGGER IF NOT EXISTS resumes_indexed AFTER INSERT ON resumes BEGIN
+                    INSERT INTO resume_terms (rowid, terms, missing) VALUES (new.id, new.terms, new.missing);
+                END;
+                CREATE TRIGGER IF NOT EXISTS resumes_unindexed AFTER DELETE ON resumes BEGIN
+                    INSERT INTO resume_terms (resume_terms, rowid, terms, missing)
+                    VALUES ('delete', old.id, old.terms, old.missing);
+                END;
+                CREATE TRIGGER IF NOT EXISTS resumes_reindexed AFTER UPDATE OF terms, missing ON resumes
+                WHEN old.terms IS NOT new.terms OR old.missing IS NOT new.missing BEGIN
+                    INSERT INTO resume_terms (resume_terms, rowid, terms, missing)
+                    VALUES ('delete', old.id, old.terms, old.missing);
+                    INSERT INTO resume_terms (rowid, terms, missing) VALUES (new.id, new.terms, new.missing);
+                END;
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(resumes)")}
+            if "user_email" in columns:
+                # Stores created before resume_owners kept one owner on the record; move it over once
+                moved = ["user_email", "token_hash"] if "token_hash" in columns else ["user_email"]
+                owned = " OR ".join(f"{column} IS NOT NULL" for column in moved)
+                conn.execute("BEGIN")
+                conn.execute(f"INSERT INTO resume_owners (resume_id, token_hash, user_email, created_at)"
+                             f" SELECT id, {'token_hash' if len(moved) == 2 else 'NULL'}, user_email, updated_at"
+                             f" FROM resumes WHERE {owned}")
+                conn.execute(f"UPDATE resumes SET {', '.join(f'{column} = NULL' for column in moved)} WHERE {owned}")
+                conn.execute("COMMIT")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _record(resume_text: str, analysis: dict, now: float) -> tuple:
+        missing = analysis.get("missing_keywords") or []
+        return (
+            text_hash(resume_text), analysis.get("current_role"), analysis.get("target_industry"),
+            analysis.get("overall_score"), json.dumps(missing), now, now, resume_text, json.dumps(analysis),
+            index_terms(resume_text), " | ".join(" ".join(tokenize(term)) for term in missing),
+        )
+
+    def add_many(self, records: Iterable[Tuple[str, dict, Optional[str]]]) -> int:
+        """Upsert (resume_text, analysis dict, user_email) records in one transaction; returns how many"""
+        now = round(time.time(), 3)
+        rows, owners = [], []
+        for text, analysis, email in records:
+            rows.append(self._record(text, analysis, now))
+            if email is not None:
+                owners.append((None, email, now, rows[-1][0], email))
+        self._upsert(rows, owners)
+        return len(rows)
+
+    def add(self, resume_text: str, analysis: dict, user_email: Optional[str] = None) -> Tuple[int, str]:
+        """Upsert one record; returns its id and a new owner token for owned(), alongside any earlier ones"""
+        token = secrets.token_urlsafe(24)
+        now = round(time.time(), 3)
+        record = self._record(resume_text, analysis, now)
+        self._upsert([record], [(token_hash(token), user_email, now, record[0], None)])
+        with self._lock:
+            record_id = self.conn.execute("SELECT id FROM resumes WHERE text_hash = ?", (record[0],)).fetchone()[0]
+        return record_id, token
+
+    def _upsert(self, rows: List[tuple], owners: List[tuple]) -> None:
+        """Upsert records, then add (token hash, email, time, text hash, email to skip if already an owner) owners"""
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN")
+            try:
+                self._expire(conn)
+                conn.executemany(
+                    "INSERT INTO resumes (text_hash, current_role, target_industry, overall_score,"
+                    " missing_keywords, created_at, updated_at, resume_text, analysis, terms, missing)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (text_hash) DO UPDATE SET"
+                    " analysis = excluded.analysis, current_role = excluded.current_role,"
+                    " target_industry = excluded.target_industry, overall_score = excluded.overall_score,"
+                    " missing_keywords = excluded.missing_keywords, missing = excluded.missing,"
+                    " updated_at = excluded.updated_at", rows)
+                # Bulk loads record an email once per record rather than once per load
+                conn.executemany(
+                    "INSERT INTO resume_owners (resume_id, token_hash, user_email, created_at)"
+                    " SELECT r.id, ?, ?, ? FROM resumes r WHERE r.text_hash = ? AND NOT EXISTS ("
+                    " SELECT 1 FROM resume_owners o WHERE o.user_email = ?5 AND o.resume_id = r.id)", owners)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def get(self, record_id: int) -> Optional[dict]:
+        """A stored resume's summary and full analysis, without its text"""
+        record = self._full("WHERE id = ?", (record_id,))
+        if record is not None:
+            del record["resume_text"]
+        return record
+
+    def owned(self, record_id: int, token: str) -> Optional[dict]:
+        """A stored resume with its text and full analysis, if add() returned ``token`` for it"""
+        return self._full("WHERE id = (SELECT resume_id FROM resume_owners WHERE token_hash = ?) AND id = ?",
+                          (token_hash(token), record_id))
+
+    def _full(self, where: str, params: tuple) -> Optional[dict]:
+        with self._lock:
+            self._expire(self.conn)
+            row = self.conn.execute(
+                f"SELECT {', '.join(self.SUMMARY)}, resume_text, analysis FROM resumes {where}", params).fetchone()
+        if row is None:
+            return None
+        record = self._summary(row)
+        record.update(resume_text=row[-2], analysis=json.loads(row[-1]))
+        return record
+
+    def delete(self, record_id: int) -> bool:
+        """Remove one record; False when there was none"""
+        with self._lock:
+            return self.conn.execute("DELETE FROM resumes WHERE id = ?", (record_id,)).rowcount > 0
+
+    def delete_user(self, user_email: str) -> int:
+        """Remove ``user_email``'s ownership of its records, and the records no one else owns; returns how many"""
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN")
+            try:
+                ids = [row[0] for row in conn.execute(
+                    "SELECT DISTINCT resume_id FROM resume_owners WHERE user_email = ?", (user_email,))]
+                conn.execute("DELETE FROM resume_owners WHERE user_email = ?", (user_email,))
+                deleted = conn.execute(
+                    f"DELETE FROM resumes WHERE id IN ({', '.join('?' * len(ids))}) AND NOT EXISTS ("
+                    " SELECT 1 FROM resume_owners WHERE resume_id = resumes.id)", ids).rowcount
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return deleted
+
+    def purge_expired(self) -> int:
+        """Remove the records older than the TTL now; returns how many"""
+        with self._lock:
+            self._purged_at = 0.0
+            return self._expire(self.conn)
+
+    def _expire(self, conn) -> int:
+        # Called with the lock held; the updated_at index makes it cheap when nothing expired
+        now = time.time()
+        if not self.ttl or now - self._purged_at < PURGE_INTERVAL:
+            return 0
+        self._purged_at = now
+        return conn.execute("DELETE FROM resumes WHERE updated_at < ?", (now - self.ttl,)).rowcount
+
+    def _summary(self, row) -> dict:
+        record = dict(zip(self.SUMMARY, row))
+        record["missing_keywords"] = json.loads(record["missing_keywords"] or "[]")
+        return record
+
+    def _where(self, query: Optional[str], min_score: Optional[int], max_score: Optional[int],
+               industry: Optional[str], user_email: Optional[str]) -> Tuple[str, str, list]:
+        """The FROM and WHERE clauses (and their parameters) of a search"""
+        searching = bool(query and query.strip())
+        # With a query, "+" keeps SQLite from driving the search from a filter's index and
+        # running the full-text match once per row it finds there
+        prefix = "+" if searching else ""
+        filters, params = [], []
+        if searching:
+            filters.append("resume_terms MATCH ?")
+            params.append(fts_query(query))
+        for clause, value in (("r.overall_score >= ?", min_score), ("r.overall_score <= ?", max_score),
+                              ("r.target_industry = ?", industry),
+                              ("r.id IN (SELECT resume_id FROM resume_owners WHERE user_email = ?)", user_email)):
+            if value is not None:
+                filters.append(prefix + clause)
+                params.append(value)
+        tables = "resume_terms JOIN resumes r ON r.id = resume_terms.rowid" if searching else "resumes r"
+        return tables, " WHERE " + " AND ".join(filters) if filters else "", params
+
+    def _execute(self, sql: str, params: tuple) -> list:
+        import sqlite3
+
+        with self._lock:
+            self._expire(self.conn)
+            try:
+                return self.conn.execute(sql, params).fetchall()
+            except sqlite3.OperationalError as e:
+                # FTS5 rejects malformed boolean expressions ("python AND", unbalanced parentheses)
+                raise ValueError(f"Invalid search query: {e}")
+
+    def search(self, query: Optional[str] = None, min_score: Optional[int] = None, max_score: Optional[int] = None,
+               industry: Optional[str] = None, user_email: Optional[str] = None, sort: str = "relevance",
+               limit: int = 20, offset: int = 0) -> List[dict]:
+        """Stored resumes matching a boolean ``query`` and the filters, best first.
+
+        Raises ValueError for an unsearchable query or an unknown sort.
+        """
+        if sort not in SORTS:
+            raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+        tables, where, params = self._where(query, min_score, max_score, industry, user_email)
+        columns = ", ".join(f"r.{column}" for column in self.SUMMARY)
+        if tables == "resumes r":
+            relevance = "NULL"
+            order = "r.overall_score DESC, r.id DESC" if sort == "score" else "r.id DESC"
+        else:
+            # bm25() reads every match's statistics, so only relevance pays for it
+            relevance = "bm25(resume_terms)" if sort == "relevance" else "NULL"
+            # By rowid FTS5 can stream matches newest first and stop at the limit
+            order = {"relevance": "bm25(resume_terms), resume_terms.rowid DESC",
+                     "score": "r.overall_score DESC, resume_terms.rowid DESC", "recent": "resume_terms.rowid DESC"}[sort]
+        rows = self._execute(f"SELECT {columns}, {relevance} FROM {tables}{where} ORDER BY {order} LIMIT ? OFFSET ?",
+                             (*params, min(limit, MAX_RESULTS), offset))
+        results = []
+        for row in rows:
+            record = self._summary(row[:-1])
+            if row[-1] is not None:
+                # bm25() is lower for better matches; report it the usual way round
+                record["relevance"] = round(-row[-1], 4)
+            results.append(record)
+        return results
+
+    def count(self, query: Optional[str] = None, min_score: Optional[int] = None, max_score: Optional[int] = None,
+              industry: Optional[str] = None, user_email: Optional[str] = None) -> int:
+        """How many stored resumes match; visits every match, unlike a search sorted by recency"""
+        tables, where, params = self._where(query, min_score, max_score, industry, user_email)
+        return self._execute(f"SELECT COUNT(*) FROM {tables}{where}", tuple(params))[0][0]
+
+
+def store_from_env() -> Optional[SQLiteResumeStore]:
+    """The store at RESUME_STORE_PATH, or None when it is unset or empty"""
+    path = os.getenv("RESUME_STORE_PATH", "")
+    return SQLiteResumeStore(path, float(os.getenv("RESUME_STORE_TTL_DAYS", "30"))) if path else None
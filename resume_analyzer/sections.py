@@ -0,0 +1,189 @@
+"""Rule-based segmentation of a resume into typed sections.
+
+segment() splits the text at recognised section headers ("Experience",
+"TECHNICAL SKILLS:", "## Education") and returns a ResumeStructure with one
+Section per block: its kind, its character span in the original text, its
+lines, its bullet points and the dates it mentions. Text before the first
+header (name, title, contact details) is the section with kind None; lines
+under an unrecognised header stay with the section above them.
+
+Compaction, local scoring and the handlers all ask for the structure of the
+same resume, so parses are kept in a small LRU keyed by a hash of the text
+(SECTION_CACHE_SIZE, default 256). A parse is one pass over the lines with
+plain string checks; the date regexes only run on lines that contain a year.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+SECTION_ALIASES = {
+    "summary": ["summary", "professional summary", "profile", "objective", "about me"],
+    "experience": ["experience", "work experience", "professional experience", "employment history",
+                   "work history", "employment"],
+    "education": ["education", "academic background", "education and training"],
+    "skills": ["skills", "technical skills", "core competencies", "key skills", "competencies"],
+    "projects": ["projects", "personal projects", "key projects"],
+    "certifications": ["certifications", "certificates", "licenses", "licenses and certifications"],
+}
+# Recognised so they end the section above them, but rarely worth sending to a model
+LOW_VALUE_SECTIONS = {
+    "references": ["references", "referees"],
+    "interests": ["interests", "hobbies", "hobbies and interests", "personal interests", "activities"],
+    "personal details": ["personal details", "personal information", "personal data"],
+    "declaration": ["declaration"],
+}
+REQUIRED_SECTIONS = ("experience", "education", "skills")
+
+CACHE_SIZE = int(os.getenv("SECTION_CACHE_SIZE", "256"))
+
+_HEADER_LOOKUP = {alias: section for aliases in (SECTION_ALIASES, LOW_VALUE_SECTIONS)
+                  for section, names in aliases.items() for alias in names}
+# Markdown and decoration around a header, and the colon after it: "## Skills ##", "**Education:**"
+_HEADER_MARKS = " \t#=*:"
+_BULLET_MARKS = frozenset("-*•◦▪‣●")
+_NUMBERED_RE = re.compile(r"\d+[.)]\s+")
+_YEAR_RE = re.compile(r"(?:19|20)\d\d")
+# Date styles are matched against the lowercased text
+DATE_STYLES = {
+    "month_year": re.compile(r"\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]{0,6}\.? \d{4}\b"),
+    "numeric": re.compile(r"\b\d{1,2}/\d{4}\b"),
+    "year_range": re.compile(r"\b(?:19|20)\d{2}\s*[-–]\s*(?:(?:19|20)\d{2}|present|current)\b"),
+}
+# Only run on lines that contain a year, which is what keeps a parse cheap
+_DATE_RE = re.compile("|".join(regex.pattern for regex in DATE_STYLES.values()), re.IGNORECASE)
+
+
+class Bullet(NamedTuple):
+    style: str  # the bullet character, or "numbered"
+    text: str   # the line without its marker
+
+
+class Section(NamedTuple):
+    kind: Optional[str]    # key of SECTION_ALIASES or LOW_VALUE_SECTIONS; None before the first header
+    title: Optional[str]   # the header line as written
+    start: int             # span in the original text, header line included
+    end: int
+    lines: Tuple[str, ...]  # stripped, non-empty lines after the header
+    bullets: Tuple[Bullet, ...]
+    dates: Tuple[str, ...]
+
+
+class ResumeStructure(NamedTuple):
+    sections: Tuple[Section, ...]
+
+    @property
+    def kinds(self) -> List[str]:
+        """Recognised section kinds in order of first appearance"""
+        kinds: List[str] = []
+        for section in self.sections:
+            if section.kind and section.kind not in kinds:
+                kinds.append(section.kind)
+        return kinds
+
+    def lines(self, kind: str) -> List[str]:
+        """Every line under headers of ``kind`` (a resume may repeat a header)"""
+        return [line for section in self.sections if section.kind == kind for line in section.lines]
+
+    def missing(self, required: Iterable[str] = REQUIRED_SECTIONS) -> List[str]:
+        kinds = self.kinds
+        return [kind for kind in required if kind not in kinds]
+
+    def bullet_styles(self) -> Dict[str, int]:
+        styles: Dict[str, int] = {}
+        for section in self.sections:
+            for bullet in section.bullets:
+                styles[bullet.style] = styles.get(bullet.style, 0) + 1
+        return styles
+
+
+def section_kind(line: str) -> Optional[str]:
+    """The section a header line opens, or None if it is not a recognised header"""
+    return _HEADER_LOOKUP.get(line.strip(_HEADER_MARKS).lower()) if len(line) <= 45 else None
+
+
+def _bullet(line: str) -> Optional[Bullet]:
+    if line[0] in _BULLET_MARKS:
+        if len(line) > 1 and line[1] in " \t":
+            return Bullet(line[0], line[2:].lstrip())
+    elif line[0].isdigit():
+        numbered = _NUMBERED_RE.match(line)
+        if numbered:
+            return Bullet("numbered", line[numbered.end():])
+    return None
+
+
+def is_bullet(line: str) -> bool:
+    """Whether a stripped, non-empty line is a bulleted or numbered item"""
+    return _bullet(line) is not None
+
+
+def parse(text: str) -> ResumeStructure:
+    """Segment ``text`` without the cache"""
+    sections: List[Section] = []
+    kind, title, start = None, None, 0
+    lines: List[str] = []
+    bullets: List[Bullet] = []
+    dates: List[str] = []
+    position = 0
+    for raw in text.splitlines(keepends=True):
+        line_start, position = position, position + len(raw)
+        line = raw.strip()
+        if not line:
+            continue
+        found = section_kind(line)
+        if found:
+            if kind or lines:
+                sections.append(Section(kind, title, start, line_start, tuple(lines), tuple(bullets), tuple(dates)))
+            kind, title, start, lines, bullets, dates = found, line, line_start, [], [], []
+            continue
+        lines.append(line)
+        bullet = _bullet(line)
+        if bullet:
+            bullets.append(bullet)
+        if _YEAR_RE.search(line):
+            dates.extend(_DATE_RE.findall(line))
+    if kind or lines:
+        sections.append(Section(kind, title, start, len(text), tuple(lines), tuple(bullets), tuple(dates)))
+    return ResumeStructure(tuple(sections))
+
+
+_cache: "OrderedDict[bytes, ResumeStructure]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def segment(text: str) -> ResumeStructure:
+    """The structure of ``text``, parsed once per distinct text"""
+    key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    with _lock:
+        structure = _cache.get(key)
+        if structure is not None:
+            _cache.move_to_end(key)
+            return structure
+    structure = parse(text)
+    with _lock:
+        _cache[key] = structure
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return structure
+
+
+def select_sections(text: str, kinds: Iterable[str]) -> Tuple[str, List[str]]:
+    """Keep only the recognised sections in ``kinds`` (and the top of the resume); the
+    others are reduced to their header. Returns the text and the kinds reduced."""
+    keep = set(kinds)
+    parts: List[str] = []
+    omitted: List[str] = []
+    for section in segment(text).sections:
+        body = text[section.start:section.end]
+        header = section.title + " (omitted)\n\n" if section.kind else None
+        # A two-word hobbies line is cheaper to send than to mark as omitted
+        if section.kind is None or section.kind in keep or len(header) >= len(body):
+            parts.append(body)
+            continue
+        parts.append(header)
+        if section.kind not in omitted:
+            omitted.append(section.kind)
+    return ("".join(parts), omitted) if omitted else (text, [])
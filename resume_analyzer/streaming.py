@@ -0,0 +1,166 @@
+"""Incremental parsing of a streamed JSON analysis and Server-Sent Events framing.
+
+The model writes one JSON object token by token. IncrementalJSONParser watches
+the characters go by and reports each top-level field as soon as its value is
+complete, plus every element of a top-level array (each SEO recommendation,
+each missing keyword) as soon as that element closes. That lets the client
+render the score long before the summary has been generated.
+"""
+import json
+from typing import Any, List, Tuple
+
+Event = Tuple[str, dict]
+
+
+class IncrementalJSONParser:
+    """Feed text chunks in, get ("field" | "item", payload) events out.
+
+    Anything before the first ``{`` (such as a ```json fence) is ignored.
+    The full text seen so far is kept in ``text`` for the final, strict parse.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._buffer = ""   # text from the opening brace of the top-level object
+        self._pos = 0
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._key = None          # top-level key whose value is being read
+        self._key_start = None
+        self._expect_key = True   # at depth 1: next string is a key, not a value
+        self._value_start = None
+        self._array_field = None  # top-level key whose array is being read
+        self._item_start = None
+        self._item_index = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> List[Event]:
+        self._chunks.append(chunk)
+        if self._done:
+            return []
+        if not self._started:
+            brace = chunk.find("{")
+            if brace == -1:
+                return []
+            chunk = chunk[brace:]
+            self._started = True
+        self._buffer += chunk
+        events: List[Event] = []
+        buffer = self._buffer
+
+        while self._pos < len(buffer):
+            i = self._pos
+            ch = buffer[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._close_string(buffer, i, events)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key_start = i
+                else:
+                    self._open_value(i)
+            elif ch in "{[":
+                self._open_value(i)
+                self._depth += 1
+                if self._depth == 2 and ch == "[":
+                    self._array_field = self._key
+                    self._item_index = 0
+            elif ch in "}]":
+                self._end_scalar(buffer, i, events)
+                self._depth -= 1
+                if self._depth == 0:
+                    self._done = True
+                    break
+                if self._depth == 1:
+                    self._emit_field(buffer, i + 1, events)
+                    self._array_field = None
+                elif self._depth == 2 and self._array_field is not None:
+                    self._emit_item(buffer, i + 1, events)
+            elif ch == ",":
+                self._end_scalar(buffer, i, events)
+                if self._depth == 1:
+                    self._expect_key = True
+            elif ch == ":":
+                if self._depth == 1:
+                    self._expect_key = False
+            elif not ch.isspace():
+                self._open_value(i)
+        return events
+
+    def _open_value(self, i: int) -> None:
+        if self._depth == 1 and not self._expect_key and self._value_start is None:
+            self._value_start = i
+        elif self._depth == 2 and self._array_field is not None and self._item_start is None:
+            self._item_start = i
+
+    def _close_string(self, buffer: str, i: int, events: List[Event]) -> None:
+        if self._depth == 1:
+            if self._expect_key:
+                self._key = json.loads(buffer[self._key_start:i + 1])
+            else:
+                self._emit_field(buffer, i + 1, events)
+        elif self._depth == 2 and self._array_field is not None:
+            self._emit_item(buffer, i + 1, events)
+
+    def _end_scalar(self, buffer: str, i: int, events: List[Event]) -> None:
+        """Numbers, booleans and null have no closing token; they end at , ] or }"""
+        if self._depth == 1 and self._value_start is not None:
+            self._emit_field(buffer, i, events)
+        elif self._depth == 2 and self._item_start is not None:
+            self._emit_item(buffer, i, events)
+
+    def _emit_field(self, buffer: str, end: int, events: List[Event]) -> None:
+        if self._value_start is None:
+            return
+        value = self._decode(buffer[self._value_start:end])
+        self._value_start = None
+        if self._key is not None and value is not _INVALID:
+            events.append(("field", {"field": self._key, "value": value}))
+
+    def _emit_item(self, buffer: str, end: int, events: List[Event]) -> None:
+        if self._item_start is None:
+            return
+        value = self._decode(buffer[self._item_start:end])
+        self._item_start = None
+        if value is not _INVALID:
+            events.append(("item", {"field": self._array_field, "index": self._item_index, "value": value}))
+        self._item_index += 1
+
+    @staticmethod
+    def _decode(raw: str) -> Any:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return _INVALID
+
+
+_INVALID = object()
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Frame one Server-Sent Event; the payload is always a single JSON line"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def chunk_text(chunk) -> str:
+    """Text of a streamed message chunk; some providers send a list of content blocks"""
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    return "".join(block if isinstance(block, str) else block.get("text", "") for block in content)
@@ -0,0 +1,38 @@
+"""Lightweight per-request phase timing.
+
+Every finished phase is also recorded in the process-wide phase histogram
+(metrics.py), so the timings a handler logs and the ones /metrics exposes
+come from the same measurement.
+"""
+import time
+from contextlib import contextmanager
+
+from .metrics import PHASE_SECONDS
+
+
+class PhaseTimer:
+    """Records how long each named phase of a request took, in milliseconds"""
+
+    def __init__(self):
+        self.phases = {}
+        self.counts = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add a phase measured elsewhere (e.g. before the handler ran)"""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds * 1000
+        PHASE_SECONDS.observe(seconds, phase=name)
+
+    def add(self, name: str, value: float) -> None:
+        """Accumulate a per-request count such as tokens"""
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def as_dict(self) -> dict:
+        return {name: round(ms, 3) for name, ms in self.phases.items()}
@@ -52,6 +52,15 @@ if ($continue -ne "y" -and $continue -ne "Y") {
 # Navigate to serverless deploy directory
 Set-Location "c:\Users\Damian\AI Agent\serverless-deploy"
 
+# Bundle the shared resume_analyzer package (with a freshly compiled keyword index and the checked sample analysis) with the function code
+Push-Location ..
+python -m resume_analyzer.keywords build
+# The sample route serves a prebuilt analysis; refuse to ship one that no longer matches the schema
+python -m resume_analyzer.sample check
+if ($LASTEXITCODE -ne 0) { Pop-Location; exit 1 }
+Pop-Location
+Copy-Item -Recurse -Force "..\resume_analyzer" "resume_analyzer"
+
 Write-Host "`n🔨 Building SAM application..." -ForegroundColor Cyan
 sam build
 
@@ -1,179 +1,222 @@
 import json
 import os
+import sys
+import time
 from typing import Optional
-from pydantic import BaseModel
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
-
-# Pydantic models (same as your backend)
-class SEORecommendation(BaseModel):
-    category: str
-    recommendation: str
-    priority: str
-    implementation: str
-
-class ScoreBreakdown(BaseModel):
-    keyword_score: int
-    ats_compatibility: int
-    content_quality: int
-    format_score: int
-
-class ResumeAnalysis(BaseModel):
-    target_industry: str
-    missing_keywords: list[str]
-    seo_recommendations: list[SEORecommendation]
-    overall_score: int
-    score_breakdown: ScoreBreakdown
-    summary: str
+
+# LangChain, the Gemini SDK and pydantic are imported by the engine on the
+# first analysis only, so CORS preflight, /health and the sample route stay
+# fast on cold start
+
+# deploy.ps1 copies the shared package next to this file; locally it lives one level up
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from resume_analyzer.engine import AnalysisEngine
+from resume_analyzer.jobs import (DONE, FAILED, FINISH_MARGIN, fail_abandoned, job_view, jobs_from_env, new_job,
+                                  run_claimed, validate_callback_url)
+from resume_analyzer.metrics import log_event
+from resume_analyzer.ratelimit import Overloaded
+from resume_analyzer.sample import encoded_sample, etag_matches
+from resume_analyzer.timing import PhaseTimer
+
+MODEL_NAME = "gemini-1.5-flash"
+TEMPERATURE = 0.7
+# A prompt registered in resume_analyzer/prompts.py; part of the analysis cache key
+PROMPT_VERSION = "seo-brief-v1"
+# Comma-separated provider:model pairs; with several, each request goes to the fastest healthy one
+LLM_PROVIDERS = os.getenv("LLM_PROVIDERS", f"google:{MODEL_NAME}")
+
+# Module scope so the client and cached analyses survive across warm invocations
+engine = AnalysisEngine(LLM_PROVIDERS, TEMPERATURE, PROMPT_VERSION)
+
+# Job mode: records in the JOB_TABLE DynamoDB table, analyses run by JobWorkerFunction
+job_store = jobs_from_env()
+JOB_WORKER_FUNCTION = os.getenv('JOB_WORKER_FUNCTION')
+
+# Prebuilt sample analysis, encoded once per container
+SAMPLE = encoded_sample(envelope=True)
+SAMPLE_BODY = SAMPLE.body.decode()
 
 def lambda_handler(event, context):
     """
-    AWS Lambda handler for resume analysis
+    AWS Lambda handler for resume analysis. Writes one JSON log line per
+    request with its status, duration, phase timings and token counts
     """
+    start = time.perf_counter()
+    path = event.get('path', '').replace('/Prod', '').replace('/prod', '')
+    method = event.get('httpMethod', 'GET')
+    timer = PhaseTimer()
+    fields = {}
+    response = route_request(event, method, path, timer, fields)
+    log_event('request', method=method, path=path, status=response['statusCode'],
+              duration_ms=round((time.perf_counter() - start) * 1000, 3), phases=timer.as_dict(),
+              request_id=getattr(context, 'aws_request_id', None), **fields)
+    return response
+
+def route_request(event, method: str, path: str, timer: PhaseTimer, fields: dict):
+    """Dispatch one API Gateway event; details for the request log go in ``fields``"""
     try:
         # Handle CORS preflight requests
-        if event.get('httpMethod') == 'OPTIONS':
+        if method == 'OPTIONS':
             return create_cors_response('', 200)
         
-        # Parse the request
-        path = event.get('path', '').replace('/Prod', '').replace('/prod', '')
-        method = event.get('httpMethod', 'GET')
-        
-        print(f"Request: {method} {path}")
-        
         # Route requests
         if path == '/health':
             return create_cors_response({'status': 'healthy', 'service': 'Resume SEO Analyzer'})
         
         elif path == '/api/analyze/sample':
-            return handle_sample_analysis()
+            return handle_sample_analysis(event)
+        
+        elif path == '/api/extract' and method == 'POST':
+            return handle_extraction(event, timer, fields)
+        
+        elif path.startswith('/api/jobs/') and method == 'GET':
+            return handle_job_status(path[len('/api/jobs/'):])
         
         elif path == '/api/analyze' and method == 'POST':
-            if event.get('body'):
-                body = json.loads(event['body'])
-            else:
-                body = event
+            with timer.phase('input_parse'):
+                if event.get('body'):
+                    body = json.loads(event['body'])
+                else:
+                    body = event
             
             resume_text = body.get('resume_text', '')
             if not resume_text:
                 return create_cors_response({'detail': 'Resume text is required'}, 400)
             
-            return handle_resume_analysis(resume_text)
+            callback_url = body.get('callback_url')
+            if callback_url or 'respond-async' in (request_header(event, 'Prefer') or ''):
+                return handle_job_submission(resume_text, callback_url, fields)
+            
+            return handle_resume_analysis(resume_text, timer, fields)
         
         else:
             return create_cors_response({'detail': 'Endpoint not found'}, 404)
             
     except Exception as e:
-        print(f"Error: {str(e)}")
+        fields['error'] = str(e)
         return create_cors_response({'detail': f'Internal server error: {str(e)}'}, 500)
 
-def handle_resume_analysis(resume_text: str):
-    """Analyze the provided resume text using Google Gemini"""
+def handle_resume_analysis(resume_text: str, timer: PhaseTimer, fields: dict):
+    """Analyze the provided resume text with the shared engine"""
     try:
-        # Initialize the Gemini LLM
-        gemini_api_key = os.environ.get('GOOGLE_API_KEY')
-        if not gemini_api_key:
-            return create_cors_response({'detail': 'Google API key not configured'}, 500)
-        
-        llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash",
-            temperature=0.7,
-            google_api_key=gemini_api_key
-        )
-        
-        # Set up the parser
-        parser = PydanticOutputParser(pydantic_object=ResumeAnalysis)
+        # Only the first analysis in a container pays for building the client
+        analysis_result, info = engine.analyze(resume_text, timer)
         
-        # Create the analysis prompt
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """
-You are an expert resume SEO analyst. Analyze the provided resume and provide specific search engine optimization recommendations.
-
-Focus on:
-1. ATS (Applicant Tracking System) optimization
-2. Industry-specific keywords
-3. Skills and technologies that should be highlighted
-4. Format and structure improvements
-5. Content enhancement suggestions
-
-{format_instructions}
-"""),
-            ("human", "Analyze this resume:\n\n{resume_text}")
-        ])
-        
-        # Format the prompt with instructions
-        formatted_prompt = prompt.format_messages(
-            format_instructions=parser.get_format_instructions(),
-            resume_text=resume_text
-        )
-        
-        # Run the analysis
-        response = llm.invoke(formatted_prompt)
-        analysis_result = parser.parse(response.content)
-        
-        return create_cors_response({
-            'analysis': analysis_result.dict(),
-            'resume_length': len(resume_text),
-            'word_count': len(resume_text.split()),
-            'timestamp': context.aws_request_id if 'context' in globals() else 'lambda'
-        })
+        fields.update(source=info['source'], tokens=timer.counts,
+                      tokens_saved=info['compaction']['tokens_saved'])
+        if info['source'] == 'llm':
+            from resume_analyzer.repair import repair_stats
+            fields['output_parsing'] = repair_stats()
+        with timer.phase('serialize'):
+            return create_cors_response({
+                'analysis': analysis_result.dict(),
+                'resume_length': len(resume_text),
+                'word_count': len(resume_text.split()),
+                'timestamp': 'cache' if info['cached'] else context.aws_request_id if 'context' in globals() else 'lambda',
+                'compaction': info['compaction'],
+                'timings_ms': timer.as_dict()
+            })
         
+    except Overloaded as e:
+        fields['error'] = str(e)
+        return create_cors_response({'detail': str(e)}, 503, e.headers)
     except Exception as e:
-        print(f"Analysis error: {str(e)}")
+        fields['error'] = f'Analysis failed: {str(e)}'
         return create_cors_response({'detail': f'Analysis failed: {str(e)}'}, 500)
 
-def handle_sample_analysis():
-    """Return a sample analysis for testing"""
-    sample_analysis = {
-        'analysis': {
-            'target_industry': 'Technology',
-            'missing_keywords': ['Python', 'Machine Learning', 'AWS', 'Docker'],
-            'seo_recommendations': [
-                {
-                    'category': 'Keywords',
-                    'recommendation': 'Add "Python programming" and "data analysis" keywords',
-                    'priority': 'High',
-                    'implementation': 'Include these terms in your skills section and project descriptions'
-                },
-                {
-                    'category': 'ATS Optimization',
-                    'recommendation': 'Use standard section headers like "Work Experience" and "Education"',
-                    'priority': 'High',
-                    'implementation': 'Replace creative headers with ATS-friendly standard ones'
-                },
-                {
-                    'category': 'Technical Skills',
-                    'recommendation': 'Create a dedicated technical skills section',
-                    'priority': 'Medium',
-                    'implementation': 'List programming languages, frameworks, and tools separately'
-                }
-            ],
-            'overall_score': 7,
-            'score_breakdown': {
-                'keyword_score': 6,
-                'ats_compatibility': 8,
-                'content_quality': 7,
-                'format_score': 7
-            },
-            'summary': 'Good foundation but needs more industry-specific keywords and technical skills highlighted. Consider adding quantified achievements and ensuring ATS compatibility.'
-        },
-        'resume_length': 850,
-        'word_count': 127,
-        'timestamp': 'sample'
-    }
-    
-    return create_cors_response(sample_analysis)
+def handle_extraction(event, timer: PhaseTimer, fields: dict):
+    """Extract the text of an uploaded .pdf, .docx or .txt resume (multipart field "file")"""
+    from resume_analyzer.extraction import ExtractionError, extract_multipart
+    try:
+        with timer.phase('extraction'):
+            extracted = extract_multipart(request_body(event), request_header(event, 'Content-Type'))
+    except ExtractionError as e:
+        fields['error'] = str(e)
+        return create_cors_response({'detail': str(e)}, 400)
+    if not extracted['text']:
+        return create_cors_response({'detail': 'No text could be extracted from the file'}, 400)
+    fields.update(format=extracted['format'], pages=extracted['pages'], truncated=extracted['truncated'])
+    return create_cors_response(extracted)
+
+def analyze_job(resume_text: str) -> dict:
+    # Jobs wait for LLM capacity rather than being turned away
+    return engine.analyze(resume_text, wait=True)[0].dict()
+
+def handle_job_submission(resume_text: str, callback_url, fields: dict):
+    """Store the job and hand it to the worker function; answers 202 without waiting for the LLM"""
+    if callback_url:
+        try:
+            validate_callback_url(callback_url)
+        except ValueError as e:
+            return create_cors_response({'detail': str(e)}, 400)
+    job = new_job(resume_text, callback_url)
+    job_store.create(job)
+    if JOB_WORKER_FUNCTION:
+        import boto3
+        # An asynchronous invocation returns at once; Lambda queues and retries the event
+        boto3.client('lambda').invoke(FunctionName=JOB_WORKER_FUNCTION, InvocationType='Event',
+                                      Payload=json.dumps({'job_id': job['id']}))
+    else:
+        # Local runs have no worker function; analyze in the background of this process
+        import threading
+        threading.Thread(target=run_claimed, args=(job_store, job['id'], analyze_job), daemon=True).start()
+    fields['job_id'] = job['id']
+    status_url = f"/api/jobs/{job['id']}"
+    return create_cors_response({'job_id': job['id'], 'status': job['status'], 'status_url': status_url}, 202,
+                                {'Location': status_url, 'Preference-Applied': 'respond-async'})
+
+def handle_job_status(job_id: str):
+    job = job_store.get(job_id)
+    if job is not None:
+        # Nothing requeues a job whose worker died here, so fail it once its lease is gone
+        job = fail_abandoned(job_store, job)
+    if job is None:
+        return create_cors_response({'detail': 'Job not found'}, 404)
+    headers = None if job['status'] in (DONE, FAILED) else {'Retry-After': '1'}
+    return create_cors_response(job_view(job), 200, headers)
+
+def job_handler(event, context):
+    """JobWorkerFunction entry point: run the job named in an asynchronous invocation"""
+    start = time.perf_counter()
+    # The analysis must end, and the job with it, before Lambda stops this invocation
+    time_limit = context.get_remaining_time_in_millis() / 1000 - FINISH_MARGIN if context else None
+    job = run_claimed(job_store, event['job_id'], analyze_job, time_limit)
+    if job is None:
+        # Expired, finished, or a retried event for a job another invocation still holds
+        return
+    log_event('job', job_id=job['id'], status=job['status'], duration_ms=round((time.perf_counter() - start) * 1000, 3),
+              queue_ms=round((job['started_at'] - job['created_at']) * 1000, 3), error=job.get('error'),
+              callback=job.get('callback_status'), request_id=getattr(context, 'aws_request_id', None))
+
+def request_header(event, name: str):
+    """A request header by case-insensitive name; API Gateway passes them as the client sent them"""
+    name = name.lower()
+    return next((value for key, value in (event.get('headers') or {}).items() if key.lower() == name), None)
+
+def request_body(event) -> bytes:
+    """The raw request body; API Gateway base64-encodes the template's BinaryMediaTypes"""
+    body = event.get('body') or ''
+    if event.get('isBase64Encoded'):
+        import base64
+        return base64.b64decode(body)
+    return body.encode('utf-8')
+
+def handle_sample_analysis(event):
+    """Return the prebuilt sample analysis, or 304 if the client has it"""
+    if etag_matches(request_header(event, 'If-None-Match'), SAMPLE.etag):
+        return create_cors_response('', 304, SAMPLE.headers)
+    return create_cors_response(SAMPLE_BODY, 200, SAMPLE.headers)
 
-def create_cors_response(data, status_code=200):
+def create_cors_response(data, status_code=200, extra_headers=None):
     """Create a response with CORS headers"""
     return {
         'statusCode': status_code,
         'headers': {
             'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,Prefer',
             'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            **(extra_headers or {})
         },
         'body': json.dumps(data) if isinstance(data, (dict, list)) else data
     }
@@ -0,0 +1,47 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+# The shared package sits at the repository root, as for the benchmarks; their stub models are reused
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from resume_analyzer.search import SQLiteResumeStore
+
+
+@pytest.fixture
+def backend(monkeypatch, tmp_path):
+    """A fresh import of the FastAPI backend with its resume store in ``tmp_path``"""
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-placeholder")
+    monkeypatch.setenv("ANALYSIS_CACHE_BACKEND", "none")
+    path = os.path.join(os.path.dirname(__file__), "..", "resume-analyzer-web", "backend", "main.py")
+    spec = importlib.util.spec_from_file_location("backend_main", path)
+    main = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(main)
+    monkeypatch.setattr(main, "resume_store", SQLiteResumeStore(str(tmp_path / "resumes.sqlite3")))
+    return main
+
+
+LAMBDA_HANDLERS = {
+    "root": os.path.join(os.path.dirname(__file__), "..", "lambda_main.py"),
+    "serverless": os.path.join(os.path.dirname(__file__), "..", "serverless-deploy", "lambda_function.py"),
+}
+
+
+@pytest.fixture(params=sorted(LAMBDA_HANDLERS))
+def lambda_module(request, monkeypatch, tmp_path):
+    """A fresh import of each Lambda handler module, with its job store in ``tmp_path``"""
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-placeholder")
+    monkeypatch.setenv("ANALYSIS_CACHE_BACKEND", "none")
+    monkeypatch.setenv("JOB_STORE_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.delenv("JOB_WORKER_FUNCTION", raising=False)
+    path = LAMBDA_HANDLERS[request.param]
+    monkeypatch.syspath_prepend(os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location(f"lambda_{request.param}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,123 @@
+"""Cache keys and the memory, SQLite and DynamoDB backends."""
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from resume_analyzer.cache import (AnalysisCache, DynamoDBCacheBackend, MemoryCacheBackend, SQLiteCacheBackend,
+                                   cache_key)
+
+
+def test_key_ignores_whitespace_but_not_settings():
+    key = cache_key("Jane  Doe\n\nPython", "google:gemini", "seo-v1", 0.7)
+    assert key == cache_key("Jane Doe Python ", "google:gemini", "seo-v1", 0.7)
+    assert key != cache_key("Jane Doe Python", "openai:gpt", "seo-v1", 0.7)
+    assert key != cache_key("Jane Doe Python", "google:gemini", "seo-brief-v1", 0.7)
+    assert key != cache_key("Jane Doe Python", "google:gemini", "seo-v1", 0.2)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCacheBackend(max_entries=2)
+    return SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), max_entries=2)
+
+
+def test_round_trip_and_expiry(backend):
+    backend.set("live", "1", time.time() + 60)
+    backend.set("dead", "2", time.time() - 1)
+    assert backend.get("live") == "1"
+    assert backend.get("dead") is None
+    assert backend.get("missing") is None
+
+
+def test_least_recently_used_entry_is_evicted(backend):
+    backend.set("a", "1", None)
+    time.sleep(0.01)
+    backend.set("b", "2", None)
+    time.sleep(0.01)
+    # Reading "a" makes "b" the least recently used
+    assert backend.get("a") == "1"
+    time.sleep(0.01)
+    backend.set("c", "3", None)
+    assert backend.get("b") is None
+    assert backend.get("a") == "1" and backend.get("c") == "3"
+
+
+def test_clear(backend):
+    backend.set("a", "1", None)
+    backend.clear()
+    assert backend.get("a") is None
+
+
+class FakeTable:
+    """The slice of a boto3 DynamoDB Table the backend uses, with scans paged ``page_size`` items at a time"""
+
+    def __init__(self, page_size=2):
+        self.items = {}
+        self.page_size = page_size
+        self.scans = 0
+
+    def get_item(self, Key):
+        item = self.items.get(Key["key"])
+        return {"Item": dict(item)} if item else {}
+
+    def put_item(self, Item):
+        self.items[Item["key"]] = dict(Item)
+
+    def scan(self, ProjectionExpression, ExpressionAttributeNames, ExclusiveStartKey=None):
+        self.scans += 1
+        keys = sorted(self.items)
+        if ExclusiveStartKey:
+            keys = [key for key in keys if key > ExclusiveStartKey["key"]]
+        page = {"Items": [{"key": key} for key in keys[:self.page_size]]}
+        if len(keys) > self.page_size:
+            page["LastEvaluatedKey"] = {"key": keys[self.page_size - 1]}
+        return page
+
+    @contextmanager
+    def batch_writer(self):
+        deletes = []
+
+        class Batch:
+            def delete_item(self, Key):
+                deletes.append(Key["key"])
+
+        yield Batch()
+        for key in deletes:
+            self.items.pop(key, None)
+
+
+def test_dynamodb_backend_expires_and_clears_every_page():
+    backend = DynamoDBCacheBackend("cache")
+    backend._table = FakeTable(page_size=2)
+    for i in range(5):
+        backend.set(f"key{i}", str(i), time.time() + 60)
+    backend.set("old", "x", time.time() - 1)
+    assert backend.get("key3") == "3"
+    # DynamoDB's TTL deletes lazily, so an expired item may still be there
+    assert backend.get("old") is None
+    backend.clear()
+    assert backend.table.items == {}
+    assert backend.table.scans == 3
+
+
+def test_a_broken_backend_never_fails_an_analysis():
+    class Broken:
+        def get(self, key):
+            raise ConnectionError("down")
+
+        def set(self, key, value, expires_at):
+            raise ConnectionError("down")
+
+    cache = AnalysisCache(Broken())
+    assert cache.get("key") is None
+    cache.set("key", {"overall_score": 7})
+    assert cache.misses == 1
+
+
+def test_analysis_cache_round_trips_dicts():
+    cache = AnalysisCache(MemoryCacheBackend(), ttl=60)
+    cache.set("key", {"overall_score": 7, "missing_keywords": ["AWS"]})
+    assert cache.get("key") == {"overall_score": 7, "missing_keywords": ["AWS"]}
+    assert cache.hits == 1
@@ -0,0 +1,53 @@
+"""The async analysis paths keep blocking cache work off the event loop."""
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from stub_llm import StubChatModel
+
+from resume_analyzer.engine import AnalysisEngine
+
+RESUME = "Jane Doe\nBackend Engineer\n\nExperience\n- Built Django APIs on PostgreSQL\n\nSkills\nPython, Docker\n"
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-placeholder")
+    monkeypatch.setenv("ANALYSIS_CACHE_BACKEND", "memory")
+    monkeypatch.delenv("ANALYSIS_MODE", raising=False)
+    engine = AnalysisEngine("google:gemini-1.5-flash")
+    engine.use_llm(StubChatModel())
+    return engine
+
+
+def record_threads(monkeypatch, obj, *names):
+    """Wrap methods of ``obj`` to note whether each call ran on the event loop's thread"""
+    on_loop = []
+    for name in names:
+        method = getattr(obj, name)
+
+        def wrapper(*args, _method=method, **kwargs):
+            on_loop.append(threading.current_thread() is threading.main_thread())
+            return _method(*args, **kwargs)
+
+        monkeypatch.setattr(obj, name, wrapper)
+    return on_loop
+
+
+def test_aanalyze_reads_and_writes_the_cache_off_the_loop(monkeypatch, engine):
+    on_loop = record_threads(monkeypatch, engine.cache, "get", "set")
+    on_loop += record_threads(monkeypatch, engine.near_duplicates, "query", "add")
+    first, info = asyncio.run(engine.aanalyze(RESUME))
+    assert info["source"] == "llm"
+    again, info = asyncio.run(engine.aanalyze(RESUME))
+    assert info["source"] == "cache" and again.dict() == first.dict()
+    assert on_loop and not any(on_loop)
+
+
+def test_aprepare_answers_cache_hits(engine):
+    asyncio.run(engine.aanalyze(RESUME))
+    compacted, ready, info = asyncio.run(engine.aprepare(RESUME))
+    assert ready is not None and info["cached"] and compacted
@@ -0,0 +1,76 @@
+"""Hybrid mode scores locally for the model's target_industry, and the stream agrees with the final analysis."""
+import json
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from stub_llm import SAMPLE_RESPONSE, StubChatModel
+
+from resume_analyzer.engine import AnalysisEngine
+from resume_analyzer.scoring import local_scores
+
+# Software terms, so local detection alone would say Technology; no Education section
+RESUME = """Jane Doe
+Software Engineer
+
+Experience
+Software Engineer, Data Co, 2019 - Present
+- Built Python microservices on AWS with Docker and Kubernetes
+- Owned CI/CD pipelines and SQL reporting for budget forecasting
+
+Skills
+Python, AWS, Docker, Kubernetes, SQL
+"""
+# The model reads it as a finance resume
+ANSWER = json.dumps({**json.loads(SAMPLE_RESPONSE), "target_industry": "Finance"})
+
+
+def test_local_scores_use_a_known_industry_whatever_its_case():
+    assert local_scores(RESUME)["industry"] == "Technology"
+    assert local_scores(RESUME, "finance ")["industry"] == "Finance"
+    assert local_scores(RESUME, "Underwater Basket Weaving")["industry"] == "Technology"
+
+
+def test_finish_scores_for_the_analysis_target_industry(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-placeholder")
+    monkeypatch.setenv("ANALYSIS_CACHE_BACKEND", "none")
+    monkeypatch.setenv("ANALYSIS_MODE", "hybrid")
+    engine = AnalysisEngine("google:gemini-1.5-flash")
+    engine.use_llm(StubChatModel(response=ANSWER))
+    analysis, _ = engine.analyze(RESUME)
+    assert analysis.target_industry == "Finance"
+    assert analysis.missing_keywords == local_scores(RESUME, "Finance")["missing_keywords"][:10]
+    assert analysis.missing_keywords != local_scores(RESUME)["missing_keywords"][:10]
+
+
+def events(body):
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        yield event[len("event: "):], json.loads(data[len("data: "):])
+
+
+def test_stream_items_fields_and_complete_agree(backend):
+    from fastapi.testclient import TestClient
+
+    backend.engine.mode = "hybrid"
+    backend.engine.use_llm(StubChatModel(response=ANSWER, chunk_size=5))
+    response = TestClient(backend.app).post("/api/analyze/stream", json={"resume_text": RESUME})
+    fields, items, complete = {}, {}, None
+    for event, data in events(response.text):
+        if event == "field":
+            fields[data["field"]] = data["value"]
+        elif event == "item":
+            items.setdefault(data["field"], []).append((data["index"], data["value"]))
+        elif event == "complete":
+            complete = data
+    assert complete is not None and complete["target_industry"] == "Finance"
+    for field in ("overall_score", "score_breakdown", "seo_recommendations", "missing_keywords"):
+        assert fields[field] == complete[field], field
+    for field in ("seo_recommendations", "missing_keywords"):
+        streamed = [value for _, value in sorted(items[field])]
+        assert [index for index, _ in items[field]] == list(range(len(streamed)))
+        assert streamed == complete[field], field
+    # The locally found missing Education section is one of the streamed recommendations
+    assert any("Education" in rec["recommendation"] for rec in complete["seo_recommendations"])
+    assert complete["missing_keywords"] == local_scores(RESUME, "Finance")["missing_keywords"][:10]
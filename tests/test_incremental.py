@@ -0,0 +1,107 @@
+"""Section diffs, and re-analysis based on a stored analysis named by its id and owner token."""
+import pytest
+
+from resume_analyzer import engine as engine_module
+from resume_analyzer.incremental import changed_lines, diff_sections
+
+RESUME = """Jane Doe
+Backend Engineer
+
+Experience
+Backend Engineer, Data Co, 2019 - Present
+- Built Django APIs on PostgreSQL
+- Ran Docker services on Kubernetes
+
+Skills
+Python, Django, PostgreSQL
+"""
+
+
+def test_diff_counts_only_the_new_lines_of_a_changed_section():
+    edited = RESUME.replace("Python, Django, PostgreSQL", "Python, Django, PostgreSQL, Terraform")
+    diff = diff_sections(RESUME, edited)
+    assert diff.changed == ["skills"] and diff.removed == []
+    assert 0 < diff.changed_tokens < diff.total_tokens / 4
+    assert diff_sections(RESUME, RESUME.replace("Jane", "jane ")).changed == []
+
+
+def test_removed_sections_are_reported():
+    diff = diff_sections(RESUME, RESUME.split("Skills")[0])
+    assert diff.removed == ["skills"]
+
+
+def test_only_the_edited_lines_and_their_entry_are_sent():
+    edited = RESUME.replace("- Ran Docker services on Kubernetes", "- Ran Docker services on Amazon EKS")
+    text = changed_lines(RESUME, edited, diff_sections(RESUME, edited).changed)
+    assert text == ("Jane Doe\nBackend Engineer\n\n"
+                    "Experience\nBackend Engineer, Data Co, 2019 - Present\n...\n"
+                    "- Ran Docker services on Amazon EKS\n[removed] - Ran Docker services on Kubernetes\n")
+    # Unchanged sections are left out entirely
+    assert "Skills" not in text and "Django APIs" not in text
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    pytest.importorskip("langchain_core")
+    from incremental import TokenTimedStub
+
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-placeholder")
+    monkeypatch.setenv("ANALYSIS_CACHE_BACKEND", "none")
+    engine = engine_module.AnalysisEngine("google:gemini-1.5-flash")
+    engine.use_llm(TokenTimedStub(latency=0, prompt_ms=0, completion_ms=0))
+    return engine
+
+
+def test_update_sends_a_fraction_of_a_full_analysis(engine):
+    previous = engine.analyze(RESUME)[0].dict()
+    edited = RESUME.replace("Python, Django, PostgreSQL", "Python, Django, PostgreSQL, Terraform")
+    _, info = engine.analyze_incremental(edited, RESUME, previous)
+    report = info["incremental"]
+    assert report["mode"] == "incremental" and report["sections_changed"] == ["skills"]
+    assert 0 < report["tokens_sent"] < report["tokens_full"] * (1 - engine_module.MIN_SAVING)
+
+
+def test_small_savings_run_a_full_analysis(engine, monkeypatch):
+    previous = engine.analyze(RESUME)[0].dict()
+    monkeypatch.setattr(engine_module, "MIN_SAVING", 0.99)
+    edited = RESUME.replace("Python, Django, PostgreSQL", "Python, Django, PostgreSQL, Terraform")
+    _, info = engine.analyze_incremental(edited, RESUME, previous)
+    assert info["incremental"]["mode"] == "full" and "would save" in info["incremental"]["reason"]
+
+
+def test_unchanged_resume_reports_tokens_without_building_the_analyzer(engine):
+    previous = engine.analyze(RESUME)[0].dict()
+    engine.use_llm(engine.llm)
+    _, info = engine.analyze_incremental(RESUME, RESUME, previous)
+    assert info["cached"] and info["incremental"]["tokens_sent"] == 0
+    assert info["incremental"]["tokens_full"] > 0
+    assert engine._analyzer._analyzer is None
+
+
+@pytest.fixture
+def client(backend):
+    pytest.importorskip("langchain_core")
+    from fastapi.testclient import TestClient
+    from incremental import TokenTimedStub
+
+    backend.engine.use_llm(TokenTimedStub(latency=0, prompt_ms=0, completion_ms=0))
+    return TestClient(backend.app)
+
+
+def test_incremental_needs_the_owner_token(client):
+    first = client.post("/api/analyze", json={"resume_text": RESUME, "user_email": "jane@example.com"})
+    assert first.status_code == 200
+    record_id, token = int(first.headers["X-Resume-Id"]), first.headers["X-Resume-Token"]
+    edited = RESUME.replace("Python, Django, PostgreSQL", "Python, Django, PostgreSQL, Terraform")
+
+    # Knowing the email, or the id without its token, is not enough to use someone's analysis
+    for base in ({"user_email": "jane@example.com"}, {"previous_id": record_id, "previous_token": "guess"}):
+        response = client.post("/api/analyze", json={"resume_text": edited, "incremental": True, **base})
+        assert response.status_code == 200 and "X-Incremental" not in response.headers
+
+    response = client.post("/api/analyze", json={"resume_text": edited, "incremental": True,
+                                                  "previous_id": record_id, "previous_token": token})
+    assert response.status_code == 200
+    assert response.headers["X-Incremental"] == "incremental"
+    assert response.headers["X-Incremental-Sections"] == "skills"
+    assert int(response.headers["X-Resume-Id"]) != record_id
@@ -0,0 +1,238 @@
+"""Callback URL checks, job leases and recovery of orphaned jobs."""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from resume_analyzer import jobs
+
+
+def resolve_to(monkeypatch, *addresses):
+    """Make every host resolve to ``addresses``"""
+    def getaddrinfo(host, port, *args, **kwargs):
+        return [(socket.AF_INET6 if ":" in address else socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port))
+                for address in addresses]
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+
+
+@pytest.fixture(autouse=True)
+def no_allowlist(monkeypatch):
+    monkeypatch.delenv("JOB_CALLBACK_HOSTS", raising=False)
+    # Retries back off for seconds otherwise
+    monkeypatch.setattr(jobs.time, "sleep", lambda seconds: None)
+
+
+def test_public_host_is_accepted(monkeypatch):
+    resolve_to(monkeypatch, "93.184.216.34")
+    assert jobs.validate_callback_url("https://hooks.example.com/done") == "https://hooks.example.com/done"
+
+
+@pytest.mark.parametrize("address", ["127.0.0.1", "10.0.0.5", "172.16.3.4", "192.168.1.1", "169.254.169.254",
+                                     "100.64.0.1", "0.0.0.0", "::1", "fe80::1", "fc00::1", "::ffff:127.0.0.1"])
+def test_private_addresses_are_refused(monkeypatch, address):
+    resolve_to(monkeypatch, address)
+    with pytest.raises(ValueError, match="public addresses"):
+        jobs.validate_callback_url("http://hooks.example.com/done")
+
+
+def test_one_private_address_among_public_ones_is_refused(monkeypatch):
+    resolve_to(monkeypatch, "93.184.216.34", "10.1.2.3")
+    with pytest.raises(ValueError):
+        jobs.validate_callback_url("http://hooks.example.com/done")
+
+
+@pytest.mark.parametrize("url", ["ftp://hooks.example.com/", "file:///etc/passwd", "http:///path", "not a url",
+                                 "http://hooks.example.com:99999/"])
+def test_malformed_urls_are_refused(url):
+    with pytest.raises(ValueError):
+        jobs.validate_callback_url(url)
+
+
+def test_unresolvable_host_is_refused(monkeypatch):
+    def getaddrinfo(*args, **kwargs):
+        raise socket.gaierror("no such host")
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+    with pytest.raises(ValueError, match="does not resolve"):
+        jobs.validate_callback_url("http://nowhere.invalid/")
+
+
+def test_allowlist_refuses_other_hosts_and_trusts_its_own(monkeypatch):
+    monkeypatch.setenv("JOB_CALLBACK_HOSTS", "hooks.internal, hooks.example.com")
+    resolve_to(monkeypatch, "10.0.0.7")
+    assert jobs.validate_callback_url("http://hooks.internal/done")
+    with pytest.raises(ValueError, match="not allowed"):
+        jobs.validate_callback_url("http://attacker.example.net/")
+
+
+def test_rebinding_after_validation_is_caught_at_send_time(monkeypatch):
+    resolve_to(monkeypatch, "93.184.216.34")
+    jobs.validate_callback_url("http://hooks.example.com/done")
+    resolve_to(monkeypatch, "169.254.169.254")
+    connections = []
+    monkeypatch.setattr(socket, "create_connection", lambda *args, **kwargs: connections.append(args))
+    status = jobs.post_callback("http://hooks.example.com/done", {"id": "job", "status": jobs.DONE, "result": "{}"})
+    assert status == "failed"
+    assert connections == []
+
+
+class Receiver(BaseHTTPRequestHandler):
+    status = 200
+    bodies = []
+
+    def do_POST(self):
+        Receiver.bodies.append(self.rfile.read(int(self.headers["Content-Length"])))
+        self.send_response(Receiver.status)
+        self.send_header("Location", "http://169.254.169.254/")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def receiver(monkeypatch):
+    # localhost is private, so it has to be allowlisted
+    monkeypatch.setenv("JOB_CALLBACK_HOSTS", "localhost")
+    server = HTTPServer(("127.0.0.1", 0), Receiver)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    Receiver.bodies = []
+    yield f"http://localhost:{server.server_address[1]}/hook?source=test"
+    server.shutdown()
+
+
+def test_callback_is_delivered(receiver):
+    Receiver.status = 200
+    job = {"id": "job", "status": jobs.DONE, "result": '{"overall_score": 7}'}
+    assert jobs.post_callback(receiver, job) == "delivered (200)"
+    assert b'"overall_score": 7' in Receiver.bodies[0]
+
+
+@pytest.mark.parametrize("code", [500, 302])
+def test_failed_callback_reports_only_the_http_status(receiver, code):
+    # Redirects count as failures instead of being followed
+    Receiver.status = code
+    assert jobs.post_callback(receiver, {"id": "job", "status": jobs.FAILED}) == f"failed (HTTP {code})"
+    assert len(Receiver.bodies) == jobs.CALLBACK_ATTEMPTS
+
+
+def test_unreachable_callback_does_not_echo_the_error(monkeypatch):
+    monkeypatch.setenv("JOB_CALLBACK_HOSTS", "localhost")
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    # Nothing listens on the port any more
+    assert jobs.post_callback(f"http://localhost:{port}/", {"id": "job", "status": jobs.FAILED}) == "failed"
+
+
+def test_worker_pool_requeues_jobs_orphaned_while_it_runs(tmp_path):
+    store = jobs.SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    pool = jobs.JobWorkerPool(store, lambda text: {"length": len(text)}, workers=1, poll_interval=0.01,
+                              recover_interval=0.05)
+    pool.start()
+    try:
+        # Claimed long ago by a worker in another process that has since died
+        job = jobs.new_job("resume")
+        job.update(status=jobs.RUNNING, started_at=time.time() - jobs.JOB_TIMEOUT - 1)
+        store.create(job)
+        deadline = time.time() + 5
+        while store.get(job["id"])["status"] != jobs.DONE and time.time() < deadline:
+            time.sleep(0.01)
+        assert store.get(job["id"])["status"] == jobs.DONE
+    finally:
+        pool.stop()
+
+
+@pytest.fixture
+def short_lease(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_TIMEOUT", 0.2)
+    monkeypatch.setattr(jobs, "HEARTBEAT_INTERVAL", 0.02)
+
+
+def test_slow_job_keeps_its_lease_and_runs_once(tmp_path, short_lease):
+    store = jobs.SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    calls = []
+
+    def slow(text):
+        calls.append(text)
+        # time.sleep is stubbed out for the callback backoff
+        threading.Event().wait(1)
+        return {"length": len(text)}
+
+    pool = jobs.JobWorkerPool(store, slow, workers=2, poll_interval=0.01, recover_interval=0.01)
+    job = pool.submit("resume")
+    try:
+        deadline = time.time() + 5
+        while store.get(job["id"])["status"] != jobs.DONE and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        pool.stop()
+    assert store.get(job["id"])["status"] == jobs.DONE
+    assert calls == ["resume"]
+
+
+def test_result_of_a_taken_over_attempt_is_dropped(tmp_path, monkeypatch, short_lease):
+    store = jobs.SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    sent = []
+    monkeypatch.setattr(jobs, "post_callback", lambda url, job: sent.append(job["id"]) or "delivered (200)")
+    store.create(jobs.new_job("resume", "https://hooks.example.com/"))
+    first = store.claim()
+    assert first["attempt"] == 1
+    # The first worker looks dead: its lease ran out without renewal
+    assert store.claim(first["id"]) is None
+    store.update(first["id"], heartbeat_at=time.time() - 1)
+    second = store.claim(first["id"])
+    assert second["attempt"] == 2
+    assert not store.heartbeat(first["id"], first["attempt"])
+
+    late = jobs.run_job(store, first, lambda text: {"by": "first"})
+    assert late["status"] == jobs.RUNNING and sent == []
+    assert store.get(first["id"])["status"] == jobs.RUNNING
+    jobs.run_job(store, second, lambda text: {"by": "second"})
+    assert store.get(first["id"])["result"] == '{"by": "second"}'
+    assert sent == [first["id"]]
+    # A finished job cannot be claimed again
+    assert store.claim(first["id"]) is None
+
+
+def test_time_limit_fails_the_job_instead_of_leaving_it_running(tmp_path):
+    store = jobs.SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    job = jobs.new_job("resume")
+    store.create(job)
+    done = jobs.run_claimed(store, job["id"], lambda text: threading.Event().wait(1), time_limit=0.05)
+    assert done["status"] == jobs.FAILED and "no answer within" in done["error"]
+    assert store.get(job["id"])["status"] == jobs.FAILED
+
+
+def test_status_read_fails_a_job_whose_lease_ran_out(tmp_path, short_lease):
+    store = jobs.SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    store.create(jobs.new_job("resume"))
+    job = store.claim()
+    assert jobs.fail_abandoned(store, job)["status"] == jobs.RUNNING
+    store.update(job["id"], heartbeat_at=time.time() - 1)
+    job = store.get(job["id"])
+    assert jobs.fail_abandoned(store, job)["status"] == jobs.FAILED
+    assert store.get(job["id"])["error"] == "Analysis worker stopped before finishing"
+
+
+def test_lambda_job_worker_runs_each_job_once(lambda_module, monkeypatch):
+    calls = []
+    monkeypatch.setattr(lambda_module, "analyze_job", lambda text: calls.append(text) or {"length": len(text)})
+
+    class Context:
+        aws_request_id = "request"
+
+        def get_remaining_time_in_millis(self):
+            return 300000
+
+    job = jobs.new_job("resume")
+    lambda_module.job_store.create(job)
+    lambda_module.job_handler({"job_id": job["id"]}, Context())
+    # Lambda retries the event; the finished job is not run again
+    lambda_module.job_handler({"job_id": job["id"]}, Context())
+    assert calls == ["resume"]
+    response = lambda_module.lambda_handler({"httpMethod": "GET", "path": f"/api/jobs/{job['id']}"}, None)
+    assert json.loads(response["body"])["status"] == jobs.DONE
+    assert "Prefer" in response["headers"]["Access-Control-Allow-Headers"]
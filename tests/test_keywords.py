@@ -0,0 +1,99 @@
+"""The keyword automaton finds exactly what a naive scan over token windows finds."""
+import json
+from collections import Counter
+
+import pytest
+
+from resume_analyzer.keywords import (MAX_PHRASE_WORDS, VOCABULARY_PATH, KeywordIndex, compile_vocabulary,
+                                      load_index, tokenize)
+
+TEXTS = [
+    # Overlapping phrases: "amazon web services" and "google cloud platform" contain shorter synonyms
+    "Deployed to Amazon Web Services and Google Cloud Platform; moved off Google Cloud later.",
+    # Word boundaries: none of these may match inside a longer token
+    "JavaScript, TypeScript and Java; C++ not C; node js and Node.js; reactjs; t-sql; k8s8",
+    # One token feeding two industries, and the same keyword twice
+    "Forecasting and sales forecasting, forecasts, Salesforce CRM, customer relationship management.",
+    "Led CI/CD with continuous integration and continuous delivery; unit tests and test-driven development.",
+    "P&L ownership, profit and loss, A/B testing, ab testing, pay-per-click and google ads campaigns.",
+    "",
+]
+
+
+def naive_scan(vocabulary: dict, text: str) -> Counter:
+    """Compare every token window against every phrase; count a keyword once per end position"""
+    phrases = {}
+    for keywords in vocabulary["industries"].values():
+        for name, synonyms in keywords.items():
+            for phrase in [name, *synonyms]:
+                phrases.setdefault(tuple(tokenize(phrase)), set()).add(name)
+    tokens = tokenize(text)
+    counts = Counter()
+    for end in range(1, len(tokens) + 1):
+        found = set()
+        for size in range(1, min(end, MAX_PHRASE_WORDS) + 1):
+            found |= phrases.get(tuple(tokens[end - size:end]), set())
+        counts.update(found)
+    return counts
+
+
+def named(index: KeywordIndex, counts: Counter) -> Counter:
+    return Counter({index.keywords[keyword_id]: count for keyword_id, count in counts.items()})
+
+
+@pytest.fixture(scope="module")
+def vocabulary():
+    with open(VOCABULARY_PATH, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def test_longest_phrase_fits_max_phrase_words(vocabulary):
+    lengths = [len(tokenize(phrase)) for keywords in vocabulary["industries"].values()
+               for name, synonyms in keywords.items() for phrase in [name, *synonyms]]
+    assert max(lengths) <= MAX_PHRASE_WORDS
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_scan_matches_naive_scan(vocabulary, text):
+    index = load_index()
+    assert named(index, index.scan(text)) == naive_scan(vocabulary, text)
+
+
+def test_overlaps_and_boundaries():
+    index = load_index()
+    counts = named(index, index.scan(TEXTS[0]))
+    # Occurrences are counted where they end: "google cloud platform" also ends "google cloud" one token earlier
+    assert counts["AWS"] == 1 and counts["GCP"] == 3
+    # "cloud" is itself a keyword, so each mention of Google Cloud counts it too
+    assert counts["Cloud Computing"] == 2
+    counts = named(index, index.scan(TEXTS[1]))
+    # "js" is a JavaScript synonym, so "node js" counts once for each
+    assert counts["Java"] == 1 and counts["JavaScript"] == 2 and counts["TypeScript"] == 1
+    assert counts["Node.js"] == 2 and counts["React"] == 1 and counts["SQL"] == 1
+    assert counts["Kubernetes"] == 0
+    counts = named(index, index.scan(TEXTS[2]))
+    assert counts["Forecasting"] == 3 and counts["Sales Forecasting"] == 2
+    assert counts["Salesforce"] == 1 and counts["CRM"] == 2
+
+
+def test_small_vocabulary_with_shared_prefixes_and_suffixes():
+    vocabulary = {"version": 1, "industries": {"Test": {
+        "A B C": ["b c d"], "B C": [], "C": ["x y"], "X Y Z": [],
+    }}}
+    index = KeywordIndex(compile_vocabulary(vocabulary))
+    for text in ["a b c d", "x y z x y", "a b x y z", "b c b c d a b c", "a b d c"]:
+        assert named(index, index.scan(text)) == naive_scan(vocabulary, text), text
+
+
+def test_phrase_positions_cover_multi_word_keywords_only():
+    index = load_index()
+    tokens = tokenize("Python on Amazon Web Services with Docker")
+    assert index.phrase_positions(tokens) == {2, 3, 4}
+    assert index.phrase_positions(tokenize("Python, Docker and Git")) == set()
+
+
+def test_match_splits_present_and_missing_in_vocabulary_order():
+    index = load_index()
+    present, missing = index.match("Python and Kubernetes on AWS", "Technology")
+    assert present == ["Python", "AWS", "Kubernetes"]
+    assert missing == [k for k in index.industry_keywords("Technology") if k not in present]
@@ -0,0 +1,21 @@
+"""Job description terms: boilerplate is dropped, skills and synonyms are kept."""
+from resume_analyzer.matching import job_terms
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+
+We're looking for a backend engineer to build data pipelines.
+Requirements: 5+ years of experience with Python and Amazon Web Services.
+Responsibilities include building APIs. Strong knowledge of Docker is a plus."""
+
+
+def test_job_ad_boilerplate_is_not_a_term():
+    terms = job_terms(JOB_DESCRIPTION)
+    for word in ("senior", "build", "building", "requirements", "experience", "responsibilities", "knowledge",
+                 "re", "years"):
+        assert word not in terms
+
+
+def test_skills_and_canonical_keywords_are_terms():
+    terms = job_terms(JOB_DESCRIPTION)
+    assert {"python", "docker", "aws", "backend", "pipelines"} <= set(terms)
+    assert terms["backend"] == 2
@@ -0,0 +1,97 @@
+"""Near-duplicate lookup: edits and reorderings match, different resumes do not, and LSH agrees with brute force."""
+import random
+
+import pytest
+
+from resume_analyzer import neardup
+from resume_analyzer.neardup import NearDuplicateIndex, fingerprint, jaccard, shingle_hashes
+
+WORDS = ("python backend services payments latency team api billing data pipeline cloud migration customers "
+         "reliability tests deploy release metrics dashboards queue workers cache database schema").split()
+
+
+def make_resume(seed: int, lines: int = 30) -> str:
+    rng = random.Random(seed)
+    return "\n".join("- " + " ".join(rng.choice(WORDS) for _ in range(8)) for _ in range(lines)) + "\n"
+
+
+def similarity(a: str, b: str) -> float:
+    return jaccard(shingle_hashes(a), sorted(shingle_hashes(b)))
+
+
+@pytest.fixture
+def index():
+    return NearDuplicateIndex(threshold=0.9)
+
+
+def test_shingles_stay_within_lines():
+    assert len(shingle_hashes("one two three four")) == 2
+    # A short line is one shingle, and case does not matter
+    assert shingle_hashes("Python") == shingle_hashes("python")
+    assert shingle_hashes("a b c\nd e f") != shingle_hashes("a b c d e f")
+
+
+def test_short_text_is_never_matched(index):
+    assert fingerprint("Jane Doe\nPython developer\n") is None
+    index.add("short", None)
+    assert index.query(None) is None and index.stats()["entries"] == 0
+
+
+def test_reordered_lines_and_small_edits_match(index):
+    resume = make_resume(1)
+    index.add("original", fingerprint(resume))
+    lines = resume.splitlines()
+    reordered = "\n".join(lines[10:] + lines[:10]) + "\n"
+    assert index.query(fingerprint(reordered)) == ("original", 1.0)
+    typo = resume.replace(lines[5], lines[5] + " typo", 1)
+    key, score = index.query(fingerprint(typo))
+    assert key == "original" and 0.9 <= score < 1
+
+
+def test_different_resumes_do_not_match(index):
+    index.add("first", fingerprint(make_resume(1)))
+    assert index.query(fingerprint(make_resume(2))) is None
+
+
+def test_banding_finds_what_brute_force_finds():
+    base = make_resume(3, lines=40)
+    lines = base.splitlines()
+    index = NearDuplicateIndex(threshold=0.8)
+    variants = {}
+    for edits in range(12):
+        changed = list(lines)
+        for n in range(edits):
+            changed[n * 3] = make_resume(100 + n, lines=1).strip()
+        variants[f"v{edits}"] = "\n".join(changed) + "\n"
+        index.add(f"v{edits}", fingerprint(variants[f"v{edits}"]))
+    for probe in (base, variants["v4"], make_resume(4, lines=40)):
+        expected = max(((key, similarity(probe, text)) for key, text in variants.items()), key=lambda pair: pair[1])
+        found = index.query(fingerprint(probe))
+        if expected[1] >= 0.8:
+            assert found is not None and found[1] == pytest.approx(expected[1])
+        else:
+            assert found is None
+
+
+def test_eviction_and_discard_forget_keys():
+    index = NearDuplicateIndex(threshold=0.9, max_entries=2)
+    resumes = [make_resume(seed) for seed in range(3)]
+    for n, resume in enumerate(resumes):
+        index.add(f"r{n}", fingerprint(resume))
+    assert index.query(fingerprint(resumes[0])) is None
+    assert index.query(fingerprint(resumes[1]))[0] == "r1"
+    index.discard("r1")
+    assert index.query(fingerprint(resumes[1])) is None
+    assert index.stats()["entries"] == 1
+    # No band still points at a forgotten key
+    assert all(keys <= {"r2"} for band in index._bands for keys in band.values())
+
+
+def test_threshold_from_env(monkeypatch):
+    monkeypatch.setenv("NEAR_DUPLICATE_THRESHOLD", "0")
+    assert neardup.index_from_env() is None
+    monkeypatch.setenv("NEAR_DUPLICATE_THRESHOLD", "0.85")
+    assert neardup.index_from_env().threshold == 0.85
+    monkeypatch.setenv("NEAR_DUPLICATE_THRESHOLD", "1.5")
+    with pytest.raises(ValueError):
+        neardup.index_from_env()
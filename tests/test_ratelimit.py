@@ -0,0 +1,78 @@
+"""Admission: calls that would wait longer than max_wait are turned away with Overloaded."""
+import threading
+
+import pytest
+
+from resume_analyzer import ratelimit
+from resume_analyzer.ratelimit import Overloaded, RateLimiter
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(ratelimit.time, "sleep", slept.append)
+    return slept
+
+
+def test_call_over_max_wait_is_refused_without_calling_the_provider(sleeps):
+    # One request per second: the second call in a row would wait about a second
+    limiter = RateLimiter(rpm=60, max_wait=0.5)
+    assert limiter.call(lambda: "first", 100) == "first"
+    calls = []
+    with pytest.raises(Overloaded) as refused:
+        limiter.call(lambda: calls.append(1), 100)
+    assert calls == []
+    assert sleeps == []
+    assert refused.value.retry_after > 0.5
+
+
+def test_waiting_callers_sleep_instead(sleeps):
+    limiter = RateLimiter(rpm=60, max_wait=0.5)
+    limiter.call(lambda: None, 100)
+    assert limiter.call(lambda: "second", 100, wait=True) == "second"
+    assert sleeps and sleeps[0] > 0.5
+
+
+def test_full_queue_is_refused():
+    limiter = RateLimiter(max_queue=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=limiter.call, args=(slow, 100))
+    worker.start()
+    started.wait(5)
+    try:
+        with pytest.raises(Overloaded, match="Too many analyses"):
+            limiter.call(lambda: None, 100)
+    finally:
+        release.set()
+        worker.join()
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def test_retry_after_over_max_wait_is_refused_instead_of_slept(sleeps):
+    limiter = RateLimiter(max_wait=10, max_retries=3)
+
+    def provider():
+        raise RateLimited("Resource exhausted. Please retry in 25s.")
+
+    with pytest.raises(Overloaded) as refused:
+        limiter.call(provider, 100)
+    assert sleeps == []
+    assert refused.value.retry_after == 25
+
+
+def test_max_wait_defaults_under_the_lambda_timeout(monkeypatch):
+    monkeypatch.delenv("LLM_MAX_WAIT", raising=False)
+    monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+    assert ratelimit.limiter_from_env().max_wait == 30
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "resume-analyzer-api")
+    assert ratelimit.limiter_from_env().max_wait == ratelimit.LAMBDA_MAX_WAIT < 30
+    monkeypatch.setenv("LLM_MAX_WAIT", "5")
+    assert ratelimit.limiter_from_env().max_wait == 5
@@ -0,0 +1,123 @@
+"""Output repair: what each kind of malformed model output is turned into, and what is given up."""
+import json
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.exceptions import OutputParserException
+
+from resume_analyzer.repair import RepairingOutputParser, repair_json, repair_output, repair_stats, reset_repair_stats
+from resume_analyzer.schema import ResumeAnalysis
+from stub_llm import SAMPLE_RESPONSE
+
+SAMPLE = json.loads(SAMPLE_RESPONSE)
+
+
+def test_clean_json_needs_no_fixes():
+    assert repair_json(SAMPLE_RESPONSE) == (SAMPLE, [])
+
+
+def test_code_fence_and_surrounding_prose_are_dropped():
+    data, fixes = repair_json(f"Here is the analysis:\n```json\n{SAMPLE_RESPONSE}\n```\nHope it helps!")
+    assert data == SAMPLE
+    assert {"code_fence", "surrounding_text"} <= set(fixes)
+    # Prose after the object, without a fence
+    assert repair_json('{"a": 1} and that is all') == ({"a": 1}, ["surrounding_text"])
+
+
+def test_trailing_commas():
+    data, fixes = repair_json('{"a": [1, 2, ], "b": {"c": "d",},\n}')
+    assert data == {"a": [1, 2], "b": {"c": "d"}}
+    assert fixes.count("trailing_comma") == 3
+
+
+def test_python_literals():
+    data, fixes = repair_json('{"a": True, "b": False, "c": None, "d": NaN, "e": true}')
+    assert data == {"a": True, "b": False, "c": None, "d": None, "e": True}
+    assert fixes.count("python_literal") == 4
+    # Numbers with exponents are not words
+    assert repair_json('{"a": 1e3,}')[0] == {"a": 1000.0}
+
+
+def test_unknown_words_are_not_guessed():
+    with pytest.raises(ValueError, match="unexpected token"):
+        repair_json('{"a": maybe,}')
+    with pytest.raises(ValueError, match="no JSON object"):
+        repair_json("Sorry, I cannot help with that.")
+
+
+def test_raw_newlines_inside_strings():
+    data, fixes = repair_json('{"summary": "line one\nline two",}')
+    assert data == {"summary": "line one\nline two"}
+    assert "control_character" in fixes
+
+
+def test_mismatched_brackets_follow_what_was_opened():
+    data, fixes = repair_json('{"a": [1, 2}, "b": {"c": 3]}')
+    assert data == {"a": [1, 2], "b": {"c": 3}}
+    assert fixes.count("mismatched_bracket") == 2
+
+
+@pytest.mark.parametrize("text, expected, dropped", [
+    # Cut after a complete value: nothing is lost
+    ('{"a": [1, 2]', {"a": [1, 2]}, False),
+    ('{"a": ["x", "y"', {"a": ["x", "y"]}, False),
+    ('{"a": [1, true', {"a": [1, True]}, False),
+    ('{"a": [1, ', {"a": [1]}, False),
+    ('{"a": [', {"a": []}, False),
+    # A trailing number may be the start of a longer one ("2" of "25"), so it is dropped
+    ('{"a": [1, 2', {"a": [1]}, True),
+    ('{"a": 1, "b": 7', {"a": 1}, True),
+    # Unfinished strings, words and keys are dropped with whatever they belonged to
+    ('{"a": ["x", "y', {"a": ["x"]}, True),
+    ('{"a": [1, tru', {"a": [1]}, True),
+    ('{"a": 1, "b', {"a": 1}, True),
+    ('{"a": {"b": [{"c": "d"}, {"c": "e', {"a": {"b": [{"c": "d"}, {}]}}, True),
+])
+def test_truncated_output_keeps_only_complete_values(text, expected, dropped):
+    data, fixes = repair_json(text)
+    assert data == expected
+    assert "truncated" in fixes
+    assert ("dropped_partial_value" in fixes) == dropped
+
+
+def test_truncated_analysis_fills_lost_lists_and_strings_but_not_scores():
+    # The streaming field order puts the scores first, so a cut loses the lists and the summary
+    ordered = {key: SAMPLE[key] for key in ("current_role", "target_industry", "overall_score", "score_breakdown",
+                                            "missing_keywords")}
+    text = json.dumps(ordered)
+    analysis, fixes = repair_output(text[:text.index('"AWS"') + 3], ResumeAnalysis)
+    assert analysis.overall_score == SAMPLE["overall_score"]
+    assert analysis.missing_keywords == ["Python"] and analysis.seo_recommendations == []
+    assert analysis.summary == "" and "missing_field" in fixes
+    with pytest.raises(ValueError, match="overall_score"):
+        repair_output(SAMPLE_RESPONSE[:SAMPLE_RESPONSE.index('"overall_score"')], ResumeAnalysis)
+
+
+def test_fields_are_coerced_to_the_schema():
+    data = dict(SAMPLE, overall_score="7/10", missing_keywords="Python, AWS ,",
+                seo_recommendations=[SAMPLE["seo_recommendations"][0], "Add metrics", None])
+    data["score_breakdown"] = dict(SAMPLE["score_breakdown"], keyword_score=6.6, explanation=["Few", "terms"])
+    analysis, fixes = repair_output(json.dumps(data), ResumeAnalysis)
+    assert analysis.overall_score == 7
+    assert analysis.missing_keywords == ["Python", "AWS"]
+    assert len(analysis.seo_recommendations) == 1
+    assert analysis.score_breakdown.keyword_score == 7
+    assert analysis.score_breakdown.explanation == "Few terms"
+    assert {"string_to_int", "string_to_list", "dropped_item", "float_to_int", "list_to_string"} <= set(fixes)
+    with pytest.raises(ValueError, match="boolean"):
+        repair_output(json.dumps(dict(SAMPLE, overall_score=True)), ResumeAnalysis)
+
+
+def test_parser_counts_each_outcome():
+    reset_repair_stats()
+    parser = RepairingOutputParser(pydantic_object=ResumeAnalysis)
+    assert parser.parse(SAMPLE_RESPONSE).overall_score == SAMPLE["overall_score"]
+    assert parser.parse(f"```json\n{SAMPLE_RESPONSE[:-1]},}}\n```").summary == SAMPLE["summary"]
+    with pytest.raises(OutputParserException):
+        parser.parse("I could not analyze this resume.")
+    stats = repair_stats()
+    assert (stats["parsed"], stats["clean"], stats["repaired"], stats["failed"]) == (3, 1, 1, 1)
+    assert stats["repair_rate"] == round(1 / 3, 4)
+    assert stats["fixes"] == {"code_fence": 1, "trailing_comma": 1}
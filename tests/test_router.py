@@ -0,0 +1,126 @@
+"""Provider routing: failover, ranking by latency, cooldown of failing providers, and hedging."""
+import asyncio
+from typing import Any, List, Optional
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from resume_analyzer import router
+from resume_analyzer.router import FAILURES_BEFORE_COOLDOWN, MIN_SAMPLES, ProviderRouter
+from stub_llm import StubChatModel
+
+MESSAGES = [HumanMessage(content="Analyze this resume")]
+
+
+class FailingModel(StubChatModel):
+    """Stub provider whose every call fails, before any token when streamed"""
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any):
+        self.calls += 1
+        raise RuntimeError("503 Service Unavailable")
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any):
+        self.calls += 1
+        raise RuntimeError("503 Service Unavailable")
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any):
+        self.calls += 1
+        raise RuntimeError("503 Service Unavailable")
+        yield
+
+
+def test_failed_call_falls_through_to_the_next_provider():
+    providers = {"down": FailingModel(), "up": StubChatModel(response="ok")}
+    model = ProviderRouter(providers=providers)
+    message = model.invoke(MESSAGES)
+    assert message.content == "ok"
+    assert message.response_metadata["provider"] == "up"
+    stats = model.stats()
+    assert stats["down"]["error_rate"] == 1.0 and stats["down"]["wins"] == 0
+    assert stats["up"]["wins"] == 1
+
+
+def test_every_provider_failing_raises_the_last_error():
+    model = ProviderRouter(providers={"a": FailingModel(), "b": FailingModel()})
+    with pytest.raises(RuntimeError, match="503"):
+        model.invoke(MESSAGES)
+    with pytest.raises(RuntimeError, match="No LLM providers"):
+        ProviderRouter(providers={}).invoke(MESSAGES)
+
+
+def test_providers_are_ranked_by_median_latency():
+    model = ProviderRouter(providers={"slow": StubChatModel(), "fast": StubChatModel()})
+    # Providers without enough samples are tried first so all of them get measured
+    assert model.ranked() == ["slow", "fast"]
+    for _ in range(MIN_SAMPLES):
+        model._stats["slow"].record(0.5, True)
+    assert model.ranked() == ["fast", "slow"]
+    for _ in range(MIN_SAMPLES):
+        model._stats["fast"].record(0.1, True)
+    assert model.ranked() == ["fast", "slow"]
+    assert model.hedge_delay("fast") == 0.1
+    assert model.hedge_delay("slow") == 0.5
+
+
+def test_consecutive_failures_put_a_provider_last_until_the_cooldown_ends(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(router.time, "monotonic", lambda: clock[0])
+    model = ProviderRouter(providers={"flaky": StubChatModel(), "steady": StubChatModel()})
+    for _ in range(MIN_SAMPLES):
+        model._stats["flaky"].record(0.01, True)
+        model._stats["steady"].record(0.2, True)
+    assert model.ranked()[0] == "flaky"
+    for _ in range(FAILURES_BEFORE_COOLDOWN):
+        model._stats["flaky"].record(0.0, False)
+    assert model.ranked() == ["steady", "flaky"]
+    assert model.stats()["flaky"]["healthy"] is False
+    clock[0] += router.COOLDOWN_SECONDS + 1
+    # Back from cooldown, but 3 errors in 8 samples is still over the 25% error rate
+    assert model.ranked() == ["steady", "flaky"]
+    for _ in range(4):
+        model._stats["flaky"].record(0.01, True)
+    assert model.ranked() == ["flaky", "steady"]
+
+
+def test_hedge_goes_to_the_runner_up_when_the_primary_is_slow():
+    providers = {"stuck": StubChatModel(response="late", latency=0.3), "backup": StubChatModel(response="quick")}
+    model = ProviderRouter(providers=providers, hedge=True, hedge_after=0.02)
+    assert model.invoke(MESSAGES).content == "quick"
+    stats = model.stats()
+    assert stats["backup"]["hedges"] == 1 and stats["backup"]["wins"] == 1
+    assert stats["stuck"]["wins"] == 0
+
+
+def test_async_hedge_cancels_the_loser_without_counting_it_as_an_error():
+    providers = {"stuck": StubChatModel(response="late", latency=5), "backup": StubChatModel(response="quick")}
+    model = ProviderRouter(providers=providers, hedge=True, hedge_after=0.02)
+    message = asyncio.run(model.ainvoke(MESSAGES))
+    assert message.content == "quick" and message.response_metadata["provider"] == "backup"
+    stats = model.stats()
+    assert stats["stuck"]["samples"] == 0 and stats["stuck"]["calls"] == 1
+    assert stats["backup"]["hedges"] == 1 and stats["backup"]["wins"] == 1
+
+
+def test_no_hedge_when_the_primary_answers_in_time():
+    providers = {"primary": StubChatModel(response="first"), "backup": StubChatModel(response="second")}
+    model = ProviderRouter(providers=providers, hedge=True, hedge_after=1.0)
+    assert asyncio.run(model.ainvoke(MESSAGES)).content == "first"
+    assert providers["backup"].calls == 0
+
+
+def test_stream_fails_over_before_the_first_chunk():
+    providers = {"down": FailingModel(), "up": StubChatModel(response="streamed answer", chunk_size=4)}
+    model = ProviderRouter(providers=providers)
+
+    async def collect():
+        return [chunk.content async for chunk in model.astream(MESSAGES)]
+
+    assert "".join(asyncio.run(collect())) == "streamed answer"
+    stats = model.stats()
+    assert stats["down"]["error_rate"] == 1.0 and stats["up"]["wins"] == 1
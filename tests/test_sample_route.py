@@ -0,0 +1,22 @@
+"""The sample route answers GET (what the frontend sends) and POST (older clients) with the same cached bytes."""
+
+
+def test_lambda_sample_answers_get_and_post(lambda_module):
+    get = lambda_module.lambda_handler({"httpMethod": "GET", "path": "/api/analyze/sample"}, None)
+    post = lambda_module.lambda_handler({"httpMethod": "POST", "path": "/api/analyze/sample"}, None)
+    assert get["statusCode"] == post["statusCode"] == 200
+    assert get["body"] == post["body"] == lambda_module.SAMPLE_BODY
+    assert get["headers"]["ETag"] == lambda_module.SAMPLE.etag
+    revalidate = {"httpMethod": "GET", "path": "/api/analyze/sample",
+                  "headers": {"If-None-Match": lambda_module.SAMPLE.etag}}
+    cached = lambda_module.lambda_handler(revalidate, None)
+    assert cached["statusCode"] == 304 and cached["body"] == ""
+
+
+def test_backend_sample_answers_get_and_post(backend):
+    from fastapi.testclient import TestClient
+    client = TestClient(backend.app)
+    get, post = client.get("/api/analyze/sample"), client.post("/api/analyze/sample")
+    assert get.status_code == post.status_code == 200
+    assert get.content == post.content
+    assert client.get("/api/analyze/sample", headers={"If-None-Match": get.headers["ETag"]}).status_code == 304
@@ -0,0 +1,134 @@
+"""The resume store: off unless configured, no text or email in what it returns, expiry, deletion, owner tokens."""
+import sqlite3
+import time
+
+import pytest
+
+from resume_analyzer import search
+from resume_analyzer.search import SQLiteResumeStore
+
+RESUME = "Jane Doe\nBackend Engineer\n\nSkills\nPython, Amazon Web Services, Docker\n"
+ANALYSIS = {"current_role": "Backend Engineer", "target_industry": "Technology", "overall_score": 7,
+            "missing_keywords": ["Kubernetes"], "summary": "Solid backend resume."}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteResumeStore(str(tmp_path / "resumes.sqlite3"), ttl_days=30)
+
+
+def test_store_is_off_unless_configured(monkeypatch, tmp_path):
+    monkeypatch.delenv("RESUME_STORE_PATH", raising=False)
+    assert search.store_from_env() is None
+    monkeypatch.setenv("RESUME_STORE_PATH", "")
+    assert search.store_from_env() is None
+    monkeypatch.setenv("RESUME_STORE_PATH", str(tmp_path / "resumes.sqlite3"))
+    monkeypatch.setenv("RESUME_STORE_TTL_DAYS", "7")
+    store = search.store_from_env()
+    assert store is not None and store.ttl == 7 * 86400
+
+
+def test_results_leave_out_text_and_email(store):
+    store.add(RESUME, ANALYSIS, "jane@example.com")
+    results = store.search("python AND aws")
+    assert len(results) == 1
+    record = store.get(results[0]["id"])
+    for returned in (results[0], record):
+        assert "user_email" not in returned and "resume_text" not in returned
+        assert "jane@example.com" not in str(returned)
+    assert record["analysis"]["summary"] == ANALYSIS["summary"]
+
+
+def test_expired_records_are_purged(store):
+    store.add(RESUME, ANALYSIS, "jane@example.com")
+    store.add(RESUME + "Kubernetes\n", ANALYSIS)
+    store.conn.execute("UPDATE resumes SET updated_at = ? WHERE id IN ("
+                       " SELECT resume_id FROM resume_owners WHERE user_email IS NOT NULL)", (time.time() - 31 * 86400,))
+    assert store.purge_expired() == 1
+    assert store.count() == 1
+    # The expired record's owners went with it
+    assert store.conn.execute("SELECT COUNT(*) FROM resume_owners").fetchone()[0] == 1
+    assert store.search("python") and store.search("kubernetes")
+
+
+def test_delete(store):
+    store.add_many([(RESUME, ANALYSIS, "jane@example.com"), (RESUME + "Go\n", ANALYSIS, "jane@example.com"),
+                    (RESUME + "Rust\n", ANALYSIS, "john@example.com")])
+    first = store.search(sort="recent")[-1]["id"]
+    assert store.delete(first)
+    assert not store.delete(first)
+    assert store.get(first) is None
+    assert store.delete_user("jane@example.com") == 1
+    assert store.count() == 1
+    # The index follows the deletes
+    assert store.count("go") == 0
+
+
+def test_owner_tokens_open_only_their_record(store):
+    record_id, token = store.add(RESUME, ANALYSIS, "jane@example.com")
+    other_id, other_token = store.add(RESUME + "Go\n", ANALYSIS)
+    assert store.owned(record_id, token)["resume_text"] == RESUME
+    assert store.owned(record_id, "guess") is None
+    assert store.owned(other_id, token) is None and store.owned(record_id, other_token) is None
+    # Bulk loads leave the tokens alone
+    store.add_many([(RESUME, ANALYSIS, None)])
+    assert store.owned(record_id, token) is not None
+
+
+def test_two_owners_of_the_same_text_keep_their_own_tokens(store):
+    record_id, jane = store.add(RESUME, ANALYSIS, "jane@example.com")
+    again, john = store.add(RESUME, dict(ANALYSIS, overall_score=8), "john@example.com")
+    # Still one record, with the newest analysis, but both tokens open it
+    assert again == record_id and john != jane and store.count() == 1
+    assert store.owned(record_id, jane)["analysis"]["overall_score"] == 8
+    assert store.owned(record_id, john) is not None
+    assert [r["id"] for r in store.search(user_email="jane@example.com")] == [record_id]
+    assert [r["id"] for r in store.search(user_email="john@example.com")] == [record_id]
+
+    # Jane's deletion request removes her ownership, not John's record
+    assert store.delete_user("jane@example.com") == 0
+    assert store.owned(record_id, jane) is None
+    assert store.owned(record_id, john) is not None
+    assert store.search(user_email="jane@example.com") == []
+    assert store.delete_user("john@example.com") == 1
+    assert store.count() == 0
+
+
+def test_old_stores_move_their_owner_onto_resume_owners(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    old = sqlite3.connect(path)
+    old.execute("CREATE TABLE resumes (id INTEGER PRIMARY KEY, text_hash TEXT NOT NULL UNIQUE, user_email TEXT,"
+                " current_role TEXT, target_industry TEXT COLLATE NOCASE, overall_score INTEGER,"
+                " missing_keywords TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL,"
+                " resume_text TEXT NOT NULL, analysis TEXT NOT NULL, terms TEXT NOT NULL, missing TEXT NOT NULL,"
+                " token_hash TEXT)")
+    old.execute("INSERT INTO resumes VALUES (1, 'h', 'jane@example.com', 'Engineer', 'Technology', 7, '[]',"
+                " 1, 1, 'text', '{}', 'text', '', ?)", (search.token_hash("old-token"),))
+    old.commit()
+    old.close()
+    store = SQLiteResumeStore(path)
+    assert store.owned(1, "old-token")["resume_text"] == "text"
+    assert [r["id"] for r in store.search(user_email="jane@example.com")] == [1]
+    # Opening it again does not copy the owner twice
+    assert SQLiteResumeStore(path).conn.execute("SELECT COUNT(*) FROM resume_owners").fetchone()[0] == 1
+
+
+def test_store_endpoints_need_the_token(monkeypatch, backend):
+    from fastapi.testclient import TestClient
+    main, client, store = backend, TestClient(backend.app), backend.resume_store
+    store.add(RESUME, ANALYSIS, "jane@example.com")
+    record_id = store.search()[0]["id"]
+    monkeypatch.setattr(main, "RESUME_STORE_TOKEN", "")
+    assert client.get(f"/api/resumes/{record_id}").status_code == 403
+    monkeypatch.setattr(main, "RESUME_STORE_TOKEN", "s3cret")
+    for headers in ({}, {"Authorization": "Bearer wrong"}, {"Authorization": "s3cret"}):
+        assert client.get(f"/api/resumes/{record_id}", headers=headers).status_code == 401
+        assert client.get("/api/resumes/search", params={"q": "python"}, headers=headers).status_code == 401
+        assert client.delete(f"/api/resumes/{record_id}", headers=headers).status_code == 401
+
+    auth = {"Authorization": "Bearer s3cret"}
+    response = client.get(f"/api/resumes/{record_id}", headers=auth)
+    assert response.status_code == 200 and "jane@example.com" not in response.text
+    assert "Jane Doe" not in response.text
+    assert client.delete(f"/api/resumes/{record_id}", headers=auth).status_code == 204
+    assert client.get(f"/api/resumes/{record_id}", headers=auth).status_code == 404
@@ -0,0 +1,90 @@
+"""Resume segmentation: headers, spans, bullets, dates, the parse cache and section selection."""
+from resume_analyzer import sections
+from resume_analyzer.sections import Bullet, parse, section_kind, segment, select_sections
+
+RESUME = """Jane Doe
+Backend Engineer | jane@example.com
+
+## Professional Summary ##
+Backend engineer with eight years of Python.
+
+WORK EXPERIENCE:
+Acme Corp, Senior Engineer, Jan 2019 - Present
+- Led the payments team
+• Cut latency by 40%
+1. Shipped the billing API
+-not a bullet
+Awards
+Engineer of the year 2020
+
+**Education:**
+BSc Computer Science, 2010-2014
+
+Skills
+Python, Go, AWS
+
+Hobbies
+Chess
+"""
+
+
+def test_header_variants_are_recognised():
+    for line in ["Experience", "WORK EXPERIENCE:", "## Education", "**Skills:**", "  Technical Skills  ",
+                 "Hobbies and Interests"]:
+        assert section_kind(line) is not None, line
+    # Long lines and ordinary sentences are not headers
+    assert section_kind("Experience " + "x" * 40) is None
+    assert section_kind("Led the payments team") is None
+
+
+def test_sections_cover_the_text_in_order():
+    structure = parse(RESUME)
+    assert structure.kinds == ["summary", "experience", "education", "skills", "interests"]
+    assert structure.sections[0].kind is None
+    assert structure.sections[0].lines == ("Jane Doe", "Backend Engineer | jane@example.com")
+    # Spans are contiguous and rebuild the original text
+    assert "".join(RESUME[section.start:section.end] for section in structure.sections) == RESUME
+    assert [section.title for section in structure.sections[1:3]] == ["## Professional Summary ##", "WORK EXPERIENCE:"]
+    assert structure.missing() == []
+    assert parse("Jane Doe\nSkills\nPython\n").missing() == ["experience", "education"]
+
+
+def test_unrecognised_header_stays_with_the_section_above():
+    experience = parse(RESUME).sections[2]
+    assert "Awards" in experience.lines and "Engineer of the year 2020" in experience.lines
+
+
+def test_bullets_and_dates():
+    structure = parse(RESUME)
+    experience = structure.sections[2]
+    assert experience.bullets == (Bullet("-", "Led the payments team"), Bullet("•", "Cut latency by 40%"),
+                                  Bullet("numbered", "Shipped the billing API"))
+    assert structure.bullet_styles() == {"-": 1, "•": 1, "numbered": 1}
+    assert experience.dates == ("Jan 2019",)
+    assert structure.sections[3].dates == ("2010-2014",)
+    # "Present" after a year range
+    assert parse("Experience\nAcme 2019 – present\n").sections[0].dates == ("2019 – present",)
+    assert structure.lines("skills") == ["Python, Go, AWS"]
+
+
+def test_segment_parses_each_text_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(sections, "parse", lambda text: calls.append(text) or parse(text))
+    monkeypatch.setattr(sections, "_cache", sections.OrderedDict())
+    monkeypatch.setattr(sections, "CACHE_SIZE", 2)
+    first = segment(RESUME)
+    assert segment(RESUME) is first and len(calls) == 1
+    segment("Skills\nPython\n")
+    segment("Education\nBSc\n")
+    # The oldest text was evicted
+    assert segment(RESUME) == first and len(calls) == 4
+
+
+def test_select_sections_reduces_the_others_to_their_header():
+    text, omitted = select_sections(RESUME, ["experience"])
+    assert omitted == ["summary", "education", "skills"]
+    assert "Led the payments team" in text and "Jane Doe" in text
+    assert "**Education:** (omitted)" in text and "BSc Computer Science" not in text
+    # A section shorter than its omission marker is kept as it is
+    assert "Hobbies\nChess\n" in text
+    assert select_sections(RESUME, ["summary", "experience", "education", "skills"]) == (RESUME, [])
@@ -0,0 +1,80 @@
+"""The incremental JSON parser gives the same events however the answer is chunked."""
+import json
+
+import pytest
+
+from resume_analyzer.streaming import IncrementalJSONParser, chunk_text, sse_event
+
+ANSWER = {
+    "current_role": "Backend \"Platform\" Engineer {Data}",
+    "overall_score": 7,
+    "score_breakdown": {"keyword_score": 6, "ats_compatibility": 8, "explanation": "Good, but [see] notes\\n"},
+    "seo_recommendations": [
+        {"category": "Keywords", "recommendation": "Add \"AWS\", Docker", "priority": "High",
+         "implementation": "List them under Skills: {cloud: [aws]}"},
+        {"category": "Format", "recommendation": "Quantify results", "priority": "Medium",
+         "implementation": "Add metrics"},
+    ],
+    "missing_keywords": ["C++", "Node.js", "CI/CD", "café"],
+    "verified": True,
+    "ratio": -0.25e1,
+    "notes": None,
+    "empty": [],
+    "summary": "Strong résumé; add numbers.",
+}
+PAYLOAD = "```json\n" + json.dumps(ANSWER, indent=2, ensure_ascii=False) + "\n```"
+
+
+def expected_events():
+    events = []
+    for key, value in ANSWER.items():
+        if isinstance(value, list):
+            events += [("item", {"field": key, "index": i, "value": item}) for i, item in enumerate(value)]
+        events.append(("field", {"field": key, "value": value}))
+    return events
+
+
+def parse(text, size):
+    parser = IncrementalJSONParser()
+    events = []
+    for start in range(0, len(text), size):
+        events += parser.feed(text[start:start + size])
+    return parser, events
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, len(PAYLOAD)])
+def test_every_chunk_size_gives_the_same_events(size):
+    parser, events = parse(PAYLOAD, size)
+    assert events == expected_events()
+    assert parser.text == PAYLOAD
+
+
+def test_compact_json_gives_the_same_events():
+    assert parse(json.dumps(ANSWER), 5)[1] == expected_events()
+
+
+def test_fields_arrive_before_the_answer_ends():
+    text = json.dumps(ANSWER)
+    parser = IncrementalJSONParser()
+    events = parser.feed(text[:text.index('"score_breakdown"')])
+    assert ("field", {"field": "overall_score", "value": 7}) in events
+    assert not any(data["field"] == "summary" for _, data in events)
+
+
+def test_text_after_the_object_is_ignored():
+    parser, events = parse('{"overall_score": 7} {"overall_score": 1}', 4)
+    assert events == [("field", {"field": "overall_score", "value": 7})]
+
+
+def test_sse_event_is_one_json_line():
+    framed = sse_event("field", {"field": "summary", "value": "two\nlines"})
+    assert framed == 'event: field\ndata: {"field": "summary", "value": "two\\nlines"}\n\n'
+
+
+def test_chunk_text_joins_content_blocks():
+    class Chunk:
+        def __init__(self, content):
+            self.content = content
+
+    assert chunk_text(Chunk("plain")) == "plain"
+    assert chunk_text(Chunk(["a", {"type": "text", "text": "b"}, {"type": "image"}])) == "ab"